@@ -1,5 +1,6 @@
 """Streamlit web application for RAG Lab."""
 
+import logging
 import streamlit as st
 import sys
 from pathlib import Path
@@ -8,8 +9,22 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from config import Config
-from retrieval.search import VectorSearch
+from ingest.embed import get_openai_client
+from observability import metrics
+from retrieval.search import VectorSearch, narrow_merged
 from retrieval.rag import RAGPipeline
+from retrieval.warmup import get_readiness, warm_up
+
+# Library modules only create loggers; the entry point configures output.
+logging.basicConfig(level=logging.INFO)
+
+APP_QUERIES = metrics.REGISTRY.counter(
+    "rag_app_queries_total", "Queries submitted in the app (cache hits included)", ("mode",)
+)
+
+# Slider bounds. Candidates are fetched once at these bounds and narrowed client-side.
+TOP_K_MAX = 10
+SIMILARITY_THRESHOLD_MIN = 0.0
 
 
 def embedding_strategy_collections(base: str) -> list[str]:
@@ -35,20 +50,94 @@ def collection_title(collection_name: str) -> str:
     return suffix
 
 
+@st.cache_resource(show_spinner="Loading search engine...")
+def get_engines() -> tuple[VectorSearch, RAGPipeline]:
+    """
+    Build the search engine and RAG pipeline once per process.
+
+    Streamlit shares cache_resource values across all sessions (creation is
+    locked), so every browser session reuses one Chroma client, one set of open
+    collections, and one OpenAI client instead of opening its own.
+    """
+    collections = embedding_strategy_collections(Config.CHROMA_COLLECTION_NAME)
+    search_engine = VectorSearch(collection_name=collections)
+    rag_pipeline = RAGPipeline(search=search_engine)
+
+    # Warm up at startup so the first user does not pay for it.
+    if Config.WARMUP_ENABLED:
+        warm_up(search_engine, rag_pipeline)
+    else:
+        get_openai_client()
+
+    return search_engine, rag_pipeline
+
+
+@st.cache_resource
+def start_metrics_exporter() -> int | None:
+    """Serve Prometheus /metrics on Config.METRICS_PORT once per process (0 = off)."""
+    if not Config.METRICS_PORT:
+        return None
+    metrics.set_readiness_check(get_readiness().to_dict)
+    server = metrics.start_metrics_server(Config.METRICS_PORT)
+    return int(server.server_address[1])
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def search_candidates(query: str) -> dict[str, list[dict]]:
+    """Per-strategy candidates for a query, fetched once at TOP_K_MAX and memoized across reruns."""
+    # st.cache_resource erases get_engines()'s return type.
+    search_engine: VectorSearch = get_engines()[0]
+    return search_engine.search(
+        query, top_k=TOP_K_MAX, threshold=SIMILARITY_THRESHOLD_MIN
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def merged_candidates(query: str) -> list[dict]:
+    """Merged candidates for a query, fetched once at the loosest slider settings and memoized."""
+    search_engine: VectorSearch = get_engines()[0]
+    return search_engine.search_merged(
+        query, top_k=TOP_K_MAX, threshold=SIMILARITY_THRESHOLD_MIN
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def rag_answer(query: str, top_k: int, threshold: float) -> dict:
+    """RAG answer memoized per (query, top_k, threshold); retrieval comes from merged_candidates()."""
+    rag_pipeline: RAGPipeline = get_engines()[1]
+    context = narrow_merged(merged_candidates(query), top_k, threshold)
+    result = rag_pipeline.generate_answer_from_results(query, context)
+    if "error" in result["metadata"]:
+        # Raise so transient LLM failures are not memoized.
+        raise RuntimeError(result["answer"])
+    return result
+
+
 # Page configuration
 st.set_page_config(
     page_title="RAG Lab - Mental Health FAQ", page_icon="🧠", layout="wide"
 )
 
-# Initialize session state
-if "search_engine" not in st.session_state:
-    try:
-        collections = embedding_strategy_collections(Config.CHROMA_COLLECTION_NAME)
-        st.session_state.search_engine = VectorSearch(collection_name=collections)
-        st.session_state.rag_pipeline = RAGPipeline(collection_name=collections)
-    except Exception as e:
-        st.error(f"Error initializing search engine: {e}")
-        st.stop()
+# Shared (process-wide) engines
+try:
+    search_engine, rag_pipeline = get_engines()
+except Exception as e:
+    st.error(f"Error initializing search engine: {e}")
+    st.stop()
+
+readiness = get_readiness()
+if Config.WARMUP_ENABLED and not readiness.ready:
+    failed = "; ".join(f"{s.name}: {s.detail}" for s in readiness.steps if not s.ok)
+    st.error(f"Search engine is not ready ({readiness.state}): {failed}")
+    st.stop()
+if readiness.state == "degraded":
+    failed = "; ".join(f"{s.name}: {s.detail}" for s in readiness.steps if not s.ok)
+    st.warning(f"Warm-up incomplete, first queries may be slow or fail: {failed}")
+
+try:
+    start_metrics_exporter()
+except OSError as e:
+    st.warning(f"Metrics endpoint not started (port {Config.METRICS_PORT}): {e}")
 
 # Header
 st.title("🧠 RAG Lab - Mental Health FAQ")
@@ -75,14 +164,14 @@ with st.sidebar:
     top_k = st.slider(
         "Number of results (Top-K)",
         min_value=1,
-        max_value=10,
+        max_value=TOP_K_MAX,
         value=Config.TOP_K,
         help="Number of FAQ entries to retrieve",
     )
 
     similarity_threshold = st.slider(
         "Similarity Threshold",
-        min_value=0.0,
+        min_value=SIMILARITY_THRESHOLD_MIN,
         max_value=1.0,
         value=Config.SIMILARITY_THRESHOLD,
         step=0.05,
@@ -101,12 +190,12 @@ if st.button("Search", type="primary") or query:
         st.warning("Please enter a question.")
     else:
         try:
+            APP_QUERIES.labels("rag" if mode == "RAG (Retrieval + Generation)" else "retrieval").inc()
             if mode == "RAG (Retrieval + Generation)":
                 # RAG mode
+                # Memoized: reruns (slider moves, expanders) reuse cached retrieval/answers.
                 with st.spinner("Generating answer..."):
-                    result = st.session_state.rag_pipeline.generate_answer(
-                        query, top_k=top_k, threshold=similarity_threshold
-                    )
+                    result = rag_answer(query, top_k, similarity_threshold)
 
                 # Display answer
                 st.subheader("🤖 Generated Answer")
@@ -133,10 +222,13 @@ if st.button("Search", type="primary") or query:
 
             else:
                 # Retrieval only mode
+                # Memoized at TOP_K_MAX; Top-K changes only narrow the cached candidates.
+                # (VectorSearch.search() does not apply the threshold, so neither do we here.)
                 with st.spinner("Searching..."):
-                    results = st.session_state.search_engine.search(
-                        query, top_k=top_k, threshold=similarity_threshold
-                    )
+                    candidates = search_candidates(query)
+                    results = {
+                        name: items[:top_k] for name, items in candidates.items()
+                    }
 
                 # Backward-compatible normalization: support older list-style results too.
                 if isinstance(results, list):
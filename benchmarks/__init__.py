@@ -0,0 +1 @@
+"""Offline benchmarking helpers (fake OpenAI server, microbenchmarks)."""
@@ -0,0 +1,338 @@
+"""Local stand-in for the OpenAI embeddings and chat completions endpoints."""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import logging
+import math
+import random
+import struct
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FakeOpenAIConfig:
+    embedding_dim: int = 1536
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    retry_after_ms: int = 100
+    chat_response: str | None = None
+    stream_chunk_delay_ms: float = 0.0
+    seed: int = 0
+
+
+def deterministic_embedding(text: str, dim: int) -> list[float]:
+    """
+    Deterministic, L2-normalized embedding via signed feature hashing.
+
+    Character unigrams and bigrams are hashed into `dim` buckets, so texts that
+    share characters end up with positive cosine similarity.
+    """
+    if dim <= 0:
+        raise ValueError("dim must be > 0")
+
+    normalized = " ".join((text or "").lower().split())
+    vec = [0.0] * dim
+    features = list(normalized) + [
+        normalized[i : i + 2] for i in range(len(normalized) - 1)
+    ]
+    for feat in features:
+        h = zlib.crc32(feat.encode("utf-8"))
+        vec[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+
+    norm = math.sqrt(sum(v * v for v in vec))
+    if norm == 0.0:
+        vec[0] = 1.0
+        return vec
+    return [v / norm for v in vec]
+
+
+def _approx_tokens(text: str) -> int:
+    return len(text.split())
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """HTTP server carrying the fake API configuration and counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: FakeOpenAIConfig):
+        super().__init__(address, _Handler)
+        self.config = config
+        self.stats: dict[str, int] = {}
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.socket.getsockname()[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def draw_delay_and_error(self) -> tuple[float, bool]:
+        cfg = self.config
+        with self._lock:
+            jitter = self._rng.uniform(0.0, cfg.jitter_ms) if cfg.jitter_ms > 0 else 0.0
+            fail = cfg.error_rate > 0 and self._rng.random() < cfg.error_rate
+        return (cfg.latency_ms + jitter) / 1000.0, fail
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeOpenAIServer
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; avoid Nagle/delayed-ACK stalls on keep-alive.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("fake_openai: " + format, *args)
+
+    def _send_json(
+        self, status: int, obj: dict[str, Any], headers: dict[str, str] | None = None
+    ) -> None:
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self) -> str:
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path.startswith("/v1/"):
+            path = path[len("/v1") :]
+        return path
+
+    def do_GET(self) -> None:
+        route = self._route()
+        if route == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif route == "/stats":
+            with self.server._lock:
+                stats = dict(self.server.stats)
+            self._send_json(200, stats)
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self) -> None:
+        route = self._route()
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as e:
+            self._send_json(400, {"error": {"message": f"Invalid JSON: {e}"}})
+            return
+
+        if route not in ("/embeddings", "/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        self.server.count(route)
+        delay_s, fail = self.server.draw_delay_and_error()
+        if delay_s > 0:
+            time.sleep(delay_s)
+        if fail:
+            self.server.count(f"{route}:429")
+            self._send_json(
+                429,
+                {
+                    "error": {
+                        "message": "Rate limit reached (fake server)",
+                        "type": "requests",
+                        "code": "rate_limit_exceeded",
+                    }
+                },
+                headers={"retry-after-ms": str(self.server.config.retry_after_ms)},
+            )
+            return
+
+        if route == "/embeddings":
+            self._handle_embeddings(payload)
+        else:
+            self._handle_chat(payload)
+
+    def _handle_embeddings(self, payload: dict[str, Any]) -> None:
+        raw_input = payload.get("input")
+        texts = [raw_input] if isinstance(raw_input, str) else list(raw_input or [])
+        if not texts or not all(isinstance(t, str) for t in texts):
+            self._send_json(
+                400, {"error": {"message": "input must be a string or list of strings"}}
+            )
+            return
+
+        dim = int(payload.get("dimensions") or self.server.config.embedding_dim)
+        use_base64 = payload.get("encoding_format") == "base64"
+
+        data = []
+        for i, text in enumerate(texts):
+            vec = deterministic_embedding(text, dim)
+            embedding: Any = (
+                base64.b64encode(struct.pack(f"<{dim}f", *vec)).decode("ascii")
+                if use_base64
+                else vec
+            )
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+
+        n_tokens = sum(_approx_tokens(t) for t in texts)
+        self._send_json(
+            200,
+            {
+                "object": "list",
+                "data": data,
+                "model": payload.get("model", "fake-embedding"),
+                "usage": {"prompt_tokens": n_tokens, "total_tokens": n_tokens},
+            },
+        )
+
+    def _chat_text(self, payload: dict[str, Any]) -> str:
+        if self.server.config.chat_response is not None:
+            return self.server.config.chat_response
+        messages = payload.get("messages") or []
+        user_contents = [
+            str(m.get("content") or "")
+            for m in messages
+            if isinstance(m, dict) and m.get("role") == "user"
+        ]
+        last = user_contents[-1] if user_contents else ""
+        return next((line.strip() for line in last.splitlines() if line.strip()), "")
+
+    def _handle_chat(self, payload: dict[str, Any]) -> None:
+        text = self._chat_text(payload)
+        model = payload.get("model", "fake-chat")
+        created = int(time.time())
+        completion_id = f"chatcmpl-fake-{uuid.uuid4().hex[:12]}"
+        prompt_tokens = sum(
+            _approx_tokens(str(m.get("content") or ""))
+            for m in payload.get("messages") or []
+            if isinstance(m, dict)
+        )
+        completion_tokens = _approx_tokens(text)
+
+        if payload.get("stream"):
+            self._stream_chat(text, model, created, completion_id)
+            return
+
+        self._send_json(
+            200,
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": text},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            },
+        )
+
+    def _stream_chat(
+        self, text: str, model: str, created: int, completion_id: str
+    ) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def chunk(delta: dict[str, Any], finish_reason: str | None) -> None:
+            obj = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+            }
+            self.wfile.write(f"data: {json.dumps(obj, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        delay_s = self.server.config.stream_chunk_delay_ms / 1000.0
+        chunk({"role": "assistant", "content": ""}, None)
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if delay_s > 0:
+                time.sleep(delay_s)
+            chunk({"content": word if i == 0 else " " + word}, None)
+        chunk({}, "stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_fake_openai_server(
+    config: FakeOpenAIConfig | None = None, host: str = "127.0.0.1", port: int = 0
+) -> FakeOpenAIServer:
+    """Start the fake server on a daemon thread and return it (port 0 = any free port)."""
+    server = FakeOpenAIServer((host, port), config or FakeOpenAIConfig())
+    thread = threading.Thread(
+        target=server.serve_forever, name="fake-openai", daemon=True
+    )
+    thread.start()
+    return server
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="benchmarks.fake_openai")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8089)
+    p.add_argument("--embedding-dim", dest="embedding_dim", type=int, default=1536)
+    p.add_argument("--latency-ms", dest="latency_ms", type=float, default=0.0, help="Base latency per request")
+    p.add_argument("--jitter-ms", dest="jitter_ms", type=float, default=0.0, help="Uniform extra latency [0, jitter]")
+    p.add_argument("--error-rate", dest="error_rate", type=float, default=0.0, help="Probability of a 429 response")
+    p.add_argument("--retry-after-ms", dest="retry_after_ms", type=int, default=100)
+    p.add_argument("--chat-response", dest="chat_response", default=None, help="Fixed chat reply (default: echo)")
+    p.add_argument("--stream-chunk-delay-ms", dest="stream_chunk_delay_ms", type=float, default=0.0)
+    p.add_argument("--seed", type=int, default=0)
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    config = FakeOpenAIConfig(
+        embedding_dim=int(args.embedding_dim),
+        latency_ms=float(args.latency_ms),
+        jitter_ms=float(args.jitter_ms),
+        error_rate=float(args.error_rate),
+        retry_after_ms=int(args.retry_after_ms),
+        chat_response=args.chat_response,
+        stream_chunk_delay_ms=float(args.stream_chunk_delay_ms),
+        seed=int(args.seed),
+    )
+    server = FakeOpenAIServer((args.host, int(args.port)), config)
+    print(f"base_url={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
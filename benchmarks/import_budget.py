@@ -0,0 +1,192 @@
+"""
+Import-time budgets for the CLI and app entry points.
+
+Each entry point is imported in a fresh interpreter; the import time (excluding
+interpreter startup) is compared with the budget stored in
+baselines/import_budget.json, and heavy dependencies that must stay lazy
+(chromadb, openai, pandas, ...) are checked to be absent from sys.modules.
+
+문서: docs/benchmarks/import_budget.md
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_BUDGET_PATH = Path(__file__).resolve().parent / "baselines" / "import_budget.json"
+
+# Budget written by --update-baseline: room for slower machines and cold caches.
+_BUDGET_FACTOR = 3.0
+_BUDGET_SLACK_MS = 100.0
+
+_ALWAYS_LAZY = ("chromadb", "openai", "pandas", "pyarrow", "zstandard")
+
+
+@dataclass(frozen=True)
+class EntryPoint:
+    name: str
+    # Modules imported together; app/main.py is a Streamlit script, so its own
+    # project imports are measured without running the page.
+    modules: tuple[str, ...]
+    lazy: tuple[str, ...]
+
+
+def _project_module(name: str) -> bool:
+    path = ROOT.joinpath(*name.split("."))
+    return path.is_dir() or path.with_suffix(".py").is_file()
+
+
+def script_project_imports(path: str | Path) -> tuple[str, ...]:
+    """Project modules a script imports at module level, in order (third-party ones skipped)."""
+    names: list[str] = []
+    for node in ast.parse(Path(path).read_text(encoding="utf-8")).body:
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            # `from package import module` imports the submodule too.
+            submodules = [f"{node.module}.{alias.name}" for alias in node.names]
+            names.extend([m for m in submodules if _project_module(m)] or [node.module])
+    return tuple(dict.fromkeys(name for name in names if _project_module(name)))
+
+
+ENTRY_POINTS = {
+    ep.name: ep
+    for ep in (
+        EntryPoint("evaluation.cli", ("evaluation.cli",), _ALWAYS_LAZY + ("numpy",)),
+        EntryPoint("ingest.index", ("ingest.index",), _ALWAYS_LAZY + ("numpy",)),
+        EntryPoint("data.preprocess", ("data.preprocess",), _ALWAYS_LAZY + ("numpy",)),
+        EntryPoint("app.main", script_project_imports(ROOT / "app" / "main.py"), _ALWAYS_LAZY),
+    )
+}
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+for name in sys.argv[1:-1]:
+    __import__(name)
+elapsed_ms = (time.perf_counter() - t0) * 1000.0
+lazy = sys.argv[-1].split(",")
+print(json.dumps({"ms": elapsed_ms, "loaded": [m for m in lazy if m in sys.modules]}))
+"""
+
+
+@dataclass(frozen=True)
+class ImportMeasurement:
+    name: str
+    ms: float
+    loaded_heavy: list[str]
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def measure_import(entry: EntryPoint, runs: int = 3) -> ImportMeasurement:
+    """Best of `runs` fresh-interpreter imports (the minimum is the least noisy)."""
+    best = float("inf")
+    loaded: list[str] = []
+    for _ in range(max(1, runs)):
+        proc = subprocess.run(
+            [sys.executable, "-c", _PROBE, *entry.modules, ",".join(entry.lazy)],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"Importing {entry.name} failed:\n{proc.stderr.strip()}")
+        obj = json.loads(proc.stdout.strip().splitlines()[-1])
+        best = min(best, float(obj["ms"]))
+        loaded = list(obj["loaded"])
+    return ImportMeasurement(name=entry.name, ms=best, loaded_heavy=loaded)
+
+
+def load_budgets(path: str | Path = DEFAULT_BUDGET_PATH) -> dict[str, dict[str, Any]]:
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(str(p))
+    obj = json.loads(p.read_text(encoding="utf-8"))
+    return dict(obj.get("entry_points", {}))
+
+
+def save_budgets(
+    measurements: dict[str, ImportMeasurement], path: str | Path = DEFAULT_BUDGET_PATH
+) -> None:
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    obj = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "entry_points": {
+            name: {
+                "measured_ms": round(m.ms, 1),
+                "budget_ms": round(max(m.ms * _BUDGET_FACTOR, m.ms + _BUDGET_SLACK_MS)),
+            }
+            for name, m in measurements.items()
+        },
+    }
+    p.write_text(json.dumps(obj, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def find_budget_violations(
+    measurements: dict[str, ImportMeasurement], budgets: dict[str, dict[str, Any]]
+) -> list[str]:
+    """Describe every entry point over budget or importing a lazy dependency eagerly."""
+    problems: list[str] = []
+    for name, m in measurements.items():
+        if m.loaded_heavy:
+            problems.append(f"{name}: imports {', '.join(m.loaded_heavy)} eagerly")
+        budget = budgets.get(name)
+        if budget and m.ms > float(budget["budget_ms"]):
+            problems.append(
+                f"{name}: import {m.ms:.1f}ms > budget {float(budget['budget_ms']):.0f}ms "
+                f"(measured {float(budget['measured_ms']):.1f}ms at baseline)"
+            )
+    return problems
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="benchmarks.import_budget")
+    p.add_argument("--only", default=None, help=f"Comma-separated subset of {','.join(ENTRY_POINTS)}")
+    p.add_argument("--runs", type=int, default=3, help="Fresh imports per entry point (best is kept)")
+    p.add_argument("--budget", default=str(DEFAULT_BUDGET_PATH), help="Budget JSON path")
+    p.add_argument("--update-baseline", action="store_true", help="Write measurements as the new budgets")
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    names = [n.strip() for n in args.only.split(",") if n.strip()] if args.only else list(ENTRY_POINTS)
+    unknown = sorted(set(names) - set(ENTRY_POINTS))
+    if unknown:
+        raise SystemExit(f"Unknown entry points {unknown}; expected any of {list(ENTRY_POINTS)}")
+
+    measurements = {name: measure_import(ENTRY_POINTS[name], runs=args.runs) for name in names}
+    for m in measurements.values():
+        print(f"{m.name}: import_ms={m.ms:.1f} eager_heavy={','.join(m.loaded_heavy) or '-'}")
+
+    if args.update_baseline:
+        save_budgets(measurements, args.budget)
+        print(f"baseline={args.budget}")
+        return 0
+
+    try:
+        budgets = load_budgets(args.budget)
+    except FileNotFoundError:
+        print(f"No budget at {args.budget}; run with --update-baseline first.")
+        budgets = {}
+    problems = find_budget_violations(measurements, budgets)
+    for problem in problems:
+        print(f"OVER BUDGET {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,160 @@
+"""
+Microbenchmarks: retrieval.utils batch kernels vs their scalar equivalents.
+
+Each case times a scalar/pure-Python baseline and the kernel on the same
+synthetic input (best of `repeat` runs) and prints the speedup.
+
+문서: docs/benchmarks/kernels.md
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import numpy as np
+
+from retrieval.utils import (
+    cosine_similarity,
+    cosine_similarity_matrix,
+    filter_by_threshold,
+    fuse_scores,
+    normalize_rows,
+    threshold_mask,
+    top_k_indices,
+)
+
+
+@dataclass(frozen=True)
+class KernelResult:
+    name: str
+    size: str
+    baseline_ms: float
+    kernel_ms: float
+
+    @property
+    def speedup(self) -> float:
+        return self.baseline_ms / self.kernel_ms if self.kernel_ms > 0 else float("inf")
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "speedup": self.speedup}
+
+
+def _best_ms(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - t0) * 1000.0)
+    return best
+
+
+def bench_cosine(num_queries: int, num_docs: int, dim: int, repeat: int) -> KernelResult:
+    rng = np.random.default_rng(0)
+    queries = rng.normal(size=(num_queries, dim)).astype(np.float32)
+    docs = normalize_rows(rng.normal(size=(num_docs, dim)))
+    q_lists, d_lists = queries.tolist(), docs.tolist()
+
+    def baseline() -> object:
+        return [[cosine_similarity(q, d) for d in d_lists] for q in q_lists]
+
+    return KernelResult(
+        "cosine",
+        f"{num_queries}x{num_docs}x{dim}",
+        _best_ms(baseline, repeat),
+        _best_ms(lambda: cosine_similarity_matrix(normalize_rows(queries), docs, normalized=True), repeat),
+    )
+
+
+def bench_top_k(num_queries: int, num_docs: int, k: int, repeat: int) -> KernelResult:
+    scores = np.random.default_rng(1).random((num_queries, num_docs), dtype=np.float32)
+    rows = scores.tolist()
+
+    def baseline() -> object:
+        return [sorted(range(len(r)), key=r.__getitem__, reverse=True)[:k] for r in rows]
+
+    return KernelResult(
+        "top_k",
+        f"{num_queries}x{num_docs} k={k}",
+        _best_ms(baseline, repeat),
+        _best_ms(lambda: top_k_indices(scores, k), repeat),
+    )
+
+
+def bench_threshold(num_scores: int, num_thresholds: int, repeat: int) -> KernelResult:
+    rng = random.Random(2)
+    results = [{"score": rng.random()} for _ in range(num_scores)]
+    scores = np.fromiter((r["score"] for r in results), dtype=np.float64, count=num_scores)
+    thresholds = np.linspace(0.0, 0.9, num_thresholds)
+
+    def baseline() -> object:
+        return [len(filter_by_threshold(results, float(t))) for t in thresholds]
+
+    return KernelResult(
+        "threshold",
+        f"{num_scores} scores x {num_thresholds} thresholds",
+        _best_ms(baseline, repeat),
+        _best_ms(lambda: threshold_mask(scores[None, :], thresholds[:, None]).sum(axis=1), repeat),
+    )
+
+
+def bench_fusion(num_sources: int, num_docs: int, repeat: int) -> KernelResult:
+    scores = np.random.default_rng(3).random((num_sources, num_docs))
+    per_source = [dict(enumerate(row)) for row in scores.tolist()]
+
+    def baseline() -> object:
+        best: dict[int, float] = {}
+        for source in per_source:
+            for doc, score in source.items():
+                if score > best.get(doc, float("-inf")):
+                    best[doc] = score
+        return best
+
+    return KernelResult(
+        "fusion_max",
+        f"{num_sources}x{num_docs}",
+        _best_ms(baseline, repeat),
+        _best_ms(lambda: fuse_scores(scores, "max"), repeat),
+    )
+
+
+def run_kernel_benchmarks(scale: float = 1.0, repeat: int = 5) -> list[KernelResult]:
+    """Run every case; scale multiplies the document/score counts."""
+    n = max(10, int(2000 * scale))
+    return [
+        bench_cosine(num_queries=8, num_docs=n, dim=256, repeat=repeat),
+        bench_top_k(num_queries=8, num_docs=n * 10, k=10, repeat=repeat),
+        bench_threshold(num_scores=n * 5, num_thresholds=5, repeat=repeat),
+        bench_fusion(num_sources=3, num_docs=n * 5, repeat=repeat),
+    ]
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="benchmarks.kernels")
+    p.add_argument("--scale", type=float, default=1.0, help="Multiply input sizes")
+    p.add_argument("--repeat", type=int, default=5, help="Runs per case (best is kept)")
+    p.add_argument("--json", action="store_true", help="Print results as JSON")
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    results = run_kernel_benchmarks(scale=args.scale, repeat=args.repeat)
+    if args.json:
+        print(json.dumps([r.to_dict() for r in results], indent=2))
+        return 0
+    for r in results:
+        print(
+            f"{r.name:<11} {r.size:<28} baseline_ms={r.baseline_ms:9.3f} "
+            f"kernel_ms={r.kernel_ms:8.3f} speedup={r.speedup:6.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
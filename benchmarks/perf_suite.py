@@ -0,0 +1,338 @@
+"""
+Performance regression suite for the RAG hot paths.
+
+Runs fully offline against the fake OpenAI server and a temporary Chroma
+directory, stores baselines as JSON, and flags p95/throughput regressions.
+
+문서: docs/benchmarks/perf_suite.md
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import logging
+import random
+import shutil
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
+
+from benchmarks.fake_openai import FakeOpenAIConfig, start_fake_openai_server
+from config import Config
+from evaluation.latency_stats import LatencyHistogram
+
+if TYPE_CHECKING:
+    from ingest.index import FAQColumn, FAQEntry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "perf_baseline.json"
+DEFAULT_TOLERANCE = 0.5
+
+_EMBEDDING_DIM = 64
+
+# Timed re-indexing runs of one strategy collection.
+_INDEXING_ITERATIONS = 3
+
+_SYLLABLES = "마음 불안 우울 수면 상담 치료 스트레스 증상 약물 가족 친구 학교 직장 감정 호흡 운동".split()
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    name: str
+    p95_ms: float
+    throughput_per_s: float
+    unit: str
+    iterations: int
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class _Measured:
+    latencies_ms: list[float]
+    items: int
+    unit: str
+
+
+def _synthetic_faq(n: int, seed: int = 0) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+
+    def sentence(words: int) -> str:
+        return " ".join(rng.choice(_SYLLABLES) for _ in range(words))
+
+    return [
+        {
+            "id": i,
+            "question": f"{sentence(6)} {i}?",
+            "answer": f"{sentence(30)}.",
+            "text": "",
+        }
+        for i in range(n)
+    ]
+
+
+def _timed_iterations(fn: Callable[[int], int], iterations: int) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    items = 0
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        items += fn(i)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    return latencies, items
+
+
+@contextlib.contextmanager
+def _offline_environment() -> Iterator[Path]:
+    """Point Config at a fresh fake OpenAI server and a temporary Chroma directory."""
+    server = start_fake_openai_server(
+        FakeOpenAIConfig(embedding_dim=_EMBEDDING_DIM, chat_response="ok")
+    )
+    tmp = Path(tempfile.mkdtemp(prefix="rag_perf_"))
+    saved = {
+        key: getattr(Config, key)
+        for key in ("OPENAI_API_KEY", "OPENAI_BASE_URL", "CHROMA_PERSIST_DIRECTORY")
+    }
+    Config.OPENAI_API_KEY = "fake"
+    Config.OPENAI_BASE_URL = server.base_url
+    Config.CHROMA_PERSIST_DIRECTORY = str(tmp / "chroma")
+    try:
+        yield tmp
+    finally:
+        for key, value in saved.items():
+            setattr(Config, key, value)
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+class _Suite:
+    """Benchmarks sharing one indexed corpus; sizes scale with `scale`."""
+
+    def __init__(self, scale: float):
+        self.scale = scale
+        self.faq = _synthetic_faq(self._n(2000))
+        self._search: Any = None
+
+    def _n(self, base: int) -> int:
+        return max(1, int(base * self.scale))
+
+    def indexing(self) -> _Measured:
+        from ingest import index
+        from retrieval.search import VectorSearch
+
+        client = index.create_chroma_client()
+        faq = cast("list[FAQEntry]", self.faq)
+
+        def build(columns: list[FAQColumn]) -> str:
+            name = index.collection_name_for(columns)
+            collection = index.recreate_collection(client, name)
+            index.index_faq_data(collection, faq, columns=columns)
+            return name
+
+        # Every timed iteration indexes the same strategy, so p95 compares like
+        # with like; the others are built once, untimed, for the search benchmarks.
+        timed_columns: list[FAQColumn] = ["question", "answer"]
+
+        def run(i: int) -> int:
+            build(timed_columns)
+            return len(faq)
+
+        latencies, items = _timed_iterations(run, _INDEXING_ITERATIONS)
+        names = [build(["question"]), build(["answer"]), index.collection_name_for(timed_columns)]
+        self._search = VectorSearch(collection_name=names, client=client)
+        return _Measured(latencies, items, "entries")
+
+    def search_merged(self) -> _Measured:
+        vs = self._search
+        n = self._n(200)
+        # Distinct queries so the rewrite cache does not short-circuit the path.
+        queries = [f"{self.faq[i % len(self.faq)]['question']} #{i}" for i in range(n)]
+
+        def run(i: int) -> int:
+            vs.search_merged(queries[i], top_k=5, threshold=-1.0)
+            return 1
+
+        latencies, items = _timed_iterations(run, n)
+        return _Measured(latencies, items, "queries")
+
+    def format_context(self) -> _Measured:
+        from retrieval.rag import RAGPipeline
+
+        rag = RAGPipeline(search=self._search)
+        results = self._search.search_merged(self.faq[0]["question"], top_k=10, threshold=-1.0)
+
+        def run(i: int) -> int:
+            rag.format_context(results)
+            return 1
+
+        latencies, items = _timed_iterations(run, self._n(5000))
+        return _Measured(latencies, items, "calls")
+
+    def metrics(self) -> _Measured:
+        from evaluation.retrieval_metrics import compute_retrieval_metrics_multi_k
+
+        rng = random.Random(1)
+        batch = 1024
+        retrieved = [[f"faq_{rng.randrange(500)}" for _ in range(10)] for _ in range(batch)]
+        gold = [[f"faq_{rng.randrange(500)}"] for _ in range(batch)]
+        latencies, items = _timed_iterations(
+            lambda i: len(compute_retrieval_metrics_multi_k(retrieved, gold, [1, 3, 5, 10])),
+            self._n(50),
+        )
+        return _Measured(latencies, items, "samples")
+
+    def preprocessing(self) -> _Measured:
+        import pandas as pd
+
+        from data.preprocess import preprocess_faq_data
+
+        rows = self._n(20000)
+        faq = _synthetic_faq(rows, seed=2)
+        df = pd.DataFrame(
+            {"Questions": [r["question"] for r in faq], "Answers": [r["answer"] for r in faq]}
+        )
+        latencies, items = _timed_iterations(lambda i: len(preprocess_faq_data(df)), 3)
+        return _Measured(latencies, items, "rows")
+
+
+# Run order matters: indexing builds the collections the retrieval benchmarks query.
+BENCHMARKS = ("indexing", "search_merged", "format_context", "metrics", "preprocessing")
+
+
+def run_perf_suite(
+    names: list[str] | None = None, scale: float = 1.0
+) -> dict[str, BenchmarkResult]:
+    """Run the selected benchmarks (default: all) offline and return results by name."""
+    selected = list(BENCHMARKS) if not names else [n for n in BENCHMARKS if n in names]
+    unknown = sorted(set(names or []) - set(BENCHMARKS))
+    if unknown:
+        raise ValueError(f"Unknown benchmarks {unknown}; expected any of {BENCHMARKS}")
+
+    results: dict[str, BenchmarkResult] = {}
+    with _offline_environment():
+        suite = _Suite(scale)
+        needs_index = any(n in ("search_merged", "format_context") for n in selected)
+        for name in BENCHMARKS:
+            if name not in selected and not (name == "indexing" and needs_index):
+                continue
+            measured: _Measured = getattr(suite, name)()
+            if name not in selected:
+                continue
+            hist = LatencyHistogram()
+            for ms in measured.latencies_ms:
+                hist.add(ms)
+            total_s = sum(measured.latencies_ms) / 1000.0
+            results[name] = BenchmarkResult(
+                name=name,
+                p95_ms=hist.quantile(0.95),
+                throughput_per_s=measured.items / total_s if total_s > 0 else 0.0,
+                unit=measured.unit,
+                iterations=len(measured.latencies_ms),
+            )
+            logger.info(
+                "%s: p95=%.3fms throughput=%.1f %s/s",
+                name,
+                results[name].p95_ms,
+                results[name].throughput_per_s,
+                measured.unit,
+            )
+    return results
+
+
+def load_baseline(path: str | Path = DEFAULT_BASELINE_PATH) -> dict[str, dict[str, Any]]:
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(str(p))
+    obj = json.loads(p.read_text(encoding="utf-8"))
+    return dict(obj.get("benchmarks", {}))
+
+
+def save_baseline(
+    results: dict[str, BenchmarkResult],
+    path: str | Path = DEFAULT_BASELINE_PATH,
+    scale: float = 1.0,
+) -> None:
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    obj = {
+        "scale": scale,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "benchmarks": {name: r.to_dict() for name, r in results.items()},
+    }
+    p.write_text(json.dumps(obj, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def find_regressions(
+    results: dict[str, BenchmarkResult],
+    baseline: dict[str, dict[str, Any]],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> list[str]:
+    """
+    Compare results to the baseline and describe every regression beyond tolerance.
+
+    A benchmark regresses when p95 exceeds baseline * (1 + tolerance) or throughput
+    falls below baseline / (1 + tolerance). Benchmarks missing from the baseline are skipped.
+    """
+    problems: list[str] = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        p95_limit = float(base["p95_ms"]) * (1.0 + tolerance)
+        if r.p95_ms > p95_limit:
+            problems.append(
+                f"{name}: p95 {r.p95_ms:.3f}ms > {p95_limit:.3f}ms "
+                f"(baseline {float(base['p95_ms']):.3f}ms, tolerance {tolerance:.0%})"
+            )
+        tput_floor = float(base["throughput_per_s"]) / (1.0 + tolerance)
+        if r.throughput_per_s < tput_floor:
+            problems.append(
+                f"{name}: throughput {r.throughput_per_s:.1f} {r.unit}/s < {tput_floor:.1f} "
+                f"(baseline {float(base['throughput_per_s']):.1f}, tolerance {tolerance:.0%})"
+            )
+    return problems
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="benchmarks.perf_suite")
+    p.add_argument("--only", default=None, help=f"Comma-separated subset of {','.join(BENCHMARKS)}")
+    p.add_argument("--scale", type=float, default=1.0, help="Multiply workload sizes")
+    p.add_argument("--baseline", default=str(DEFAULT_BASELINE_PATH), help="Baseline JSON path")
+    p.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative regression")
+    p.add_argument("--update-baseline", action="store_true", help="Write results as the new baseline")
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    names = [n.strip() for n in args.only.split(",") if n.strip()] if args.only else None
+    results = run_perf_suite(names, scale=float(args.scale))
+    for r in results.values():
+        print(f"{r.name}: p95_ms={r.p95_ms:.3f} throughput={r.throughput_per_s:.1f} {r.unit}/s")
+
+    if args.update_baseline:
+        save_baseline(results, args.baseline, scale=float(args.scale))
+        print(f"baseline={args.baseline}")
+        return 0
+
+    try:
+        baseline = load_baseline(args.baseline)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; run with --update-baseline first.")
+        return 0
+    problems = find_regressions(results, baseline, float(args.tolerance))
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
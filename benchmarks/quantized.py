@@ -0,0 +1,148 @@
+"""
+Recall and latency of the two-stage quantized engine against exact search.
+
+Builds clustered random-vector corpora (no embedding API involved), writes one
+quantized store per code type, and for every over-fetch factor measures
+recall@k against exact float32 search, per-query latency, and the vector bytes
+held in RAM. The `flat` row is exact search over an in-memory float32 matrix.
+
+문서: docs/benchmarks/quantized.md
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from evaluation.latency_stats import LatencyHistogram
+from retrieval.quantized import QUANTIZATIONS, QuantizedStore, write_quantized_store
+
+_PAGE = 5000
+
+
+@dataclass(frozen=True)
+class QuantizedBenchResult:
+    size: int
+    dim: int
+    engine: str
+    overfetch: float
+    recall: float
+    p50_ms: float
+    p95_ms: float
+    ram_mb: float
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def clustered_corpus(size: int, dim: int, queries: int, seed: int = 0) -> tuple[Any, Any]:
+    """Unit vectors around 64 centers, like topical FAQ embeddings; queries from the same mix."""
+    import numpy as np
+
+    from retrieval.utils import normalize_rows
+
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(64, dim))
+
+    def sample(n: int) -> Any:
+        return normalize_rows(centers[rng.integers(0, len(centers), n)] + 0.8 * rng.normal(size=(n, dim)))
+
+    return sample(size), sample(queries)
+
+
+def _recall(got: list[int], expected: list[int]) -> float:
+    return len(set(got) & set(expected)) / len(expected)
+
+
+def bench_quantized(
+    size: int, dim: int, quantizations: list[str], overfetches: list[float], queries: int, top_k: int
+) -> list[QuantizedBenchResult]:
+    from retrieval.utils import cosine_similarity_matrix, top_k_indices
+
+    docs, query_vectors = clustered_corpus(size, dim, queries)
+    scores = cosine_similarity_matrix(query_vectors, docs, normalized=True)
+    exact = [row.tolist() for row in top_k_indices(scores, top_k)]
+
+    flat = LatencyHistogram()
+    for query in query_vectors:
+        t = time.perf_counter()
+        top_k_indices(cosine_similarity_matrix(query, docs, normalized=True), top_k)
+        flat.add((time.perf_counter() - t) * 1000.0)
+    summary = flat.summary()
+    results = [
+        QuantizedBenchResult(size, dim, "flat", 0.0, 1.0, summary["p50_ms"], summary["p95_ms"], docs.nbytes / 2**20)
+    ]
+
+    ids = [str(i) for i in range(size)]
+    tmp = Path(tempfile.mkdtemp(prefix="rag_quantized_"))
+    try:
+        for quantization in quantizations:
+            pages = ((ids[s : s + _PAGE], docs[s : s + _PAGE]) for s in range(0, size, _PAGE))
+            store = QuantizedStore(write_quantized_store(tmp / quantization, pages, size, quantization))
+            for overfetch in overfetches:
+                latency = LatencyHistogram()
+                recall = 0.0
+                for query, expected in zip(query_vectors, exact):
+                    t = time.perf_counter()
+                    hits = store.search(query, top_k, overfetch=overfetch)
+                    latency.add((time.perf_counter() - t) * 1000.0)
+                    recall += _recall([row for row, _ in hits], expected)
+                summary = latency.summary()
+                results.append(
+                    QuantizedBenchResult(
+                        size,
+                        dim,
+                        quantization,
+                        overfetch,
+                        recall / len(exact),
+                        summary["p50_ms"],
+                        summary["p95_ms"],
+                        store.ram_bytes / 2**20,
+                    )
+                )
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return results
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="benchmarks.quantized")
+    p.add_argument("--sizes", default="20000,100000", help="Comma-separated corpus sizes")
+    p.add_argument("--dim", type=int, default=256, help="Vector dimension")
+    p.add_argument("--quantization", default=",".join(QUANTIZATIONS), help="Comma-separated: int8,binary")
+    p.add_argument("--overfetch", default="1,2,4,8,16", help="Comma-separated over-fetch factors")
+    p.add_argument("--queries", type=int, default=200, help="Timed queries per cell")
+    p.add_argument("--top-k", dest="top_k", type=int, default=10)
+    p.add_argument("--json", action="store_true", help="Print results as JSON")
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    quantizations = [q.strip() for q in args.quantization.split(",") if q.strip()]
+    overfetches = [float(v) for v in args.overfetch.split(",") if v.strip()]
+    results = [
+        r
+        for size in (int(v) for v in args.sizes.split(",") if v.strip())
+        for r in bench_quantized(size, args.dim, quantizations, overfetches, args.queries, args.top_k)
+    ]
+    if args.json:
+        print(json.dumps([r.to_dict() for r in results], indent=2))
+        return 0
+    for r in results:
+        print(
+            f"size={r.size:<8} engine={r.engine:<7} overfetch={r.overfetch:<5g} "
+            f"recall@{args.top_k}={r.recall:.3f} p50_ms={r.p50_ms:7.2f} p95_ms={r.p95_ms:7.2f} "
+            f"ram_mb={r.ram_mb:8.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,140 @@
+"""
+Query latency of sharded collections as the corpus grows.
+
+Builds random-vector corpora of each size split into each shard count (no
+embedding API involved), then times ShardedCollection.query() for a fixed set
+of query vectors. Compare the rows of one size to see what scatter-gather
+costs, and the rows of one shard count to see how latency grows with size.
+
+문서: docs/benchmarks/sharding.md
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from evaluation.latency_stats import LatencyHistogram
+from retrieval.sharding import ShardSet, shard_of, shard_persist_directory
+
+_COLLECTION = "bench"
+# Chroma rejects larger add() batches.
+_ADD_BATCH = 5000
+
+
+@dataclass(frozen=True)
+class ShardBenchResult:
+    size: int
+    shards: int
+    mode: str
+    p50_ms: float
+    p95_ms: float
+    build_s: float
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def build_sharded_corpus(base: Path, size: int, num_shards: int, dim: int, seed: int = 0) -> None:
+    """Random unit vectors, routed with shard_of() like ingest/index.py does."""
+    import numpy as np
+
+    from retrieval.search import get_chroma_client
+    from retrieval.utils import normalize_rows
+
+    vectors = normalize_rows(np.random.default_rng(seed).normal(size=(size, dim)))
+    routed: list[list[int]] = [[] for _ in range(num_shards)]
+    for faq_id in range(size):
+        routed[shard_of(faq_id, num_shards)].append(faq_id)
+    for shard, ids in enumerate(routed):
+        client = get_chroma_client(shard_persist_directory(shard, str(base)))
+        collection = client.create_collection(_COLLECTION, metadata={"hnsw:space": "cosine"})
+        for start in range(0, len(ids), _ADD_BATCH):
+            batch = ids[start : start + _ADD_BATCH]
+            collection.add(
+                ids=[f"faq_{i}" for i in batch],
+                embeddings=vectors[batch],
+                metadatas=[{"id": i} for i in batch],
+            )
+
+
+def bench_sharded_query(
+    size: int, num_shards: int, processes: bool, dim: int, queries: int, top_k: int
+) -> ShardBenchResult:
+    import numpy as np
+
+    tmp = Path(tempfile.mkdtemp(prefix="rag_shards_"))
+    try:
+        t0 = time.perf_counter()
+        build_sharded_corpus(tmp, size, num_shards, dim)
+        build_s = time.perf_counter() - t0
+
+        shard_set = ShardSet.local(num_shards, base=str(tmp), processes=processes)
+        try:
+            collection = shard_set.collection(_COLLECTION)
+            query_vectors = np.random.default_rng(1).normal(size=(queries, dim)).tolist()
+            # Untimed first query: worker start-up and index loading.
+            collection.query(query_embeddings=[query_vectors[0]], n_results=top_k)
+            histogram = LatencyHistogram()
+            for vector in query_vectors:
+                t = time.perf_counter()
+                collection.query(query_embeddings=[vector], n_results=top_k)
+                histogram.add((time.perf_counter() - t) * 1000.0)
+        finally:
+            shard_set.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    summary = histogram.summary()
+    return ShardBenchResult(
+        size=size,
+        shards=num_shards,
+        mode="process" if processes else "thread",
+        p50_ms=summary["p50_ms"],
+        p95_ms=summary["p95_ms"],
+        build_s=build_s,
+    )
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="benchmarks.sharding")
+    p.add_argument("--sizes", default="2000,20000", help="Comma-separated corpus sizes")
+    p.add_argument("--shards", default="1,4", help="Comma-separated shard counts")
+    p.add_argument("--mode", choices=["thread", "process"], default="thread")
+    p.add_argument("--dim", type=int, default=256, help="Vector dimension")
+    p.add_argument("--queries", type=int, default=200, help="Timed queries per cell")
+    p.add_argument("--top-k", dest="top_k", type=int, default=5)
+    p.add_argument("--json", action="store_true", help="Print results as JSON")
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    results = [
+        bench_sharded_query(size, shards, args.mode == "process", args.dim, args.queries, args.top_k)
+        for size in _int_list(args.sizes)
+        for shards in _int_list(args.shards)
+    ]
+    if args.json:
+        print(json.dumps([r.to_dict() for r in results], indent=2))
+        return 0
+    for r in results:
+        print(
+            f"size={r.size:<8} shards={r.shards:<3} mode={r.mode:<7} "
+            f"p50_ms={r.p50_ms:7.2f} p95_ms={r.p95_ms:7.2f} build_s={r.build_s:6.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
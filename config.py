@@ -12,17 +12,67 @@ class Config:
 
     # OpenAI API
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    # Optional API base URL (e.g. the local fake server in benchmarks/fake_openai.py)
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
     LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+    # Reduced-dimension vectors (see docs/ingest/reduce.md): 0 = full model dimension
+    EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0"))
+    # api = the embeddings `dimensions` parameter (text-embedding-3-*), pca = a
+    # projection fitted at index time and applied to queries
+    EMBEDDING_REDUCTION = os.getenv("EMBEDDING_REDUCTION", "api")
 
     # Chroma configuration
     CHROMA_PERSIST_DIRECTORY = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
     CHROMA_COLLECTION_NAME = os.getenv("CHROMA_COLLECTION_NAME", "mental_health_faq")
+    # Sharding (see docs/retrieval/sharding.md): split each strategy collection into
+    # N shards by FAQ id hash, stored in <CHROMA_PERSIST_DIRECTORY>/shard-NN
+    CHROMA_NUM_SHARDS = int(os.getenv("CHROMA_NUM_SHARDS", "1"))
+    # Comma-separated host:port Chroma servers, one per shard (empty = local directories)
+    CHROMA_SHARD_HOSTS = os.getenv("CHROMA_SHARD_HOSTS", "")
+    # Query each local shard in its own worker process instead of a thread
+    CHROMA_SHARD_PROCESSES = os.getenv("CHROMA_SHARD_PROCESSES", "false").lower() in ("1", "true", "yes")
+
+    # Retrieval engine: chroma (HNSW) or quantized (two-stage scan + exact rescoring;
+    # see docs/retrieval/quantized.md)
+    SEARCH_ENGINE = os.getenv("SEARCH_ENGINE", "chroma")
+    # Codes of the quantized store: int8 (1 byte/dim) or binary (1 bit/dim)
+    QUANTIZATION = os.getenv("QUANTIZATION", "int8")
+    # Candidates rescored exactly per result: n_results * QUANTIZED_OVERFETCH
+    QUANTIZED_OVERFETCH = float(os.getenv("QUANTIZED_OVERFETCH", "4"))
 
     # Retrieval configuration
     TOP_K = int(os.getenv("TOP_K", "5"))
     SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.3"))
 
+    # Indexing: keep only the last N processed entries (0 = index everything)
+    INDEX_MAX_ENTRIES = int(os.getenv("INDEX_MAX_ENTRIES", "1000"))
+
+    # Preprocessing: estimated Jaccard similarity at which `--dedup` collapses entries
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.7"))
+
+    # Tracing (per-stage latency spans)
+    TRACE_ENABLED = os.getenv("TRACE_ENABLED", "false").lower() in ("1", "true", "yes")
+    TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+
+    # Profiling (per-request stack dumps; see docs/observability/profiling.md)
+    PROFILE_ENABLED = os.getenv("PROFILE_ENABLED", "false").lower() in ("1", "true", "yes")
+    # Profile 1 in N requests (0 = only when enabled or requested per call)
+    PROFILE_SAMPLE_EVERY = int(os.getenv("PROFILE_SAMPLE_EVERY", "0"))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join("runs", "profiles"))
+    # sampling (collapsed/speedscope stacks) or cprofile (.prof)
+    PROFILE_PROFILER = os.getenv("PROFILE_PROFILER", "sampling")
+    PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "speedscope")
+
+    # Warm-up at startup (see docs/retrieval/warmup.md): load indexes, open the
+    # OpenAI client and run synthetic queries before accepting traffic
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+    # Synthetic warm queries (each is one embedding call)
+    WARMUP_QUERIES = int(os.getenv("WARMUP_QUERIES", "3"))
+
+    # Metrics: port for the Prometheus /metrics endpoint of the app (0 = not served)
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
     # Kaggle API (optional)
     KAGGLE_USERNAME = os.getenv("KAGGLE_USERNAME")
     KAGGLE_KEY = os.getenv("KAGGLE_KEY")
@@ -31,6 +81,8 @@ class Config:
     DATA_DIR = "data"
     RAW_DATA_DIR = os.path.join(DATA_DIR, "raw")
     PROCESSED_DATA_DIR = os.path.join(DATA_DIR, "processed")
+    # Format written by download/preprocess: jsonl, jsonl.zst (needs `zstandard`) or json
+    DATA_FORMAT = os.getenv("DATA_FORMAT", "jsonl")
 
     @classmethod
     def validate(cls):
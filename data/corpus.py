@@ -0,0 +1,280 @@
+"""
+Memory-mapped columnar (Arrow IPC) processed corpus with an id index.
+
+`faq_processed.arrow` holds the processed entries in fixed-size record batches;
+`faq_processed.ids.arrow` holds the ids sorted with their row numbers. Both are
+opened memory-mapped, so opening is O(1) and reads are zero-copy slices.
+
+문서: docs/data/corpus.md
+"""
+
+from __future__ import annotations
+
+import bisect
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+from typing import Any
+
+ARROW_SUFFIX = ".arrow"
+DEFAULT_BATCH_SIZE = 65_536
+
+_COLUMNS = ("id", "question", "answer", "text")
+_INDEX_SUFFIX = ".ids.arrow"
+
+
+def _pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.compute  # noqa: F401
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "The Arrow processed corpus requires the `pyarrow` package (pip install pyarrow)."
+        ) from e
+    return pyarrow
+
+
+def arrow_available() -> bool:
+    try:
+        _pyarrow()
+    except ImportError:
+        return False
+    return True
+
+
+def index_path_for(corpus_path: str | Path) -> Path:
+    """faq_processed.arrow -> faq_processed.ids.arrow"""
+    p = Path(corpus_path)
+    stem = p.name[: -len(ARROW_SUFFIX)] if p.name.endswith(ARROW_SUFFIX) else p.name
+    return p.with_name(stem + _INDEX_SUFFIX)
+
+
+class ArrowCorpusWriter:
+    """
+    Incrementally write processed entries to an Arrow IPC file and its id index.
+
+    Entries are buffered batch_size at a time; close() flushes the last batch and
+    builds the sorted id index from the memory-mapped id column (no Python-side
+    copy of all ids).
+    """
+
+    def __init__(self, path: str | Path, batch_size: int = DEFAULT_BATCH_SIZE):
+        if batch_size <= 0:
+            raise ValueError("batch_size must be > 0")
+        self.pa = _pyarrow()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.num_rows = 0
+        self._id_kind: str | None = None
+        self._buffer: dict[str, list[Any]] = {name: [] for name in _COLUMNS}
+        self._writer: Any = None
+        self._sink: Any = None
+
+    def _open_writer(self) -> None:
+        pa = self.pa
+        metadata = {
+            "batch_size": str(self.batch_size),
+            "id_kind": self._id_kind or "str",
+        }
+        self._arrow_schema = pa.schema([(name, pa.string()) for name in _COLUMNS], metadata=metadata)
+        self._sink = pa.OSFile(str(self.path), "wb")
+        self._writer = pa.ipc.new_file(self._sink, self._arrow_schema)
+
+    def write(self, entry: dict[str, Any]) -> None:
+        entry_id = entry["id"]
+        kind = "int" if isinstance(entry_id, int) and not isinstance(entry_id, bool) else "str"
+        if self._id_kind is None:
+            self._id_kind = kind
+        elif kind != self._id_kind:
+            raise ValueError(f"Mixed id types in corpus: {self._id_kind} and {kind}")
+
+        buf = self._buffer
+        buf["id"].append(str(entry_id))
+        buf["question"].append(entry["question"])
+        buf["answer"].append(entry["answer"])
+        buf["text"].append(entry.get("text", ""))
+        if len(buf["id"]) >= self.batch_size:
+            self._flush()
+
+    def write_all(self, entries: Iterable[dict[str, Any]]) -> int:
+        for entry in entries:
+            self.write(entry)
+        return self.num_rows + len(self._buffer["id"])
+
+    def _flush(self) -> None:
+        pa = self.pa
+        n = len(self._buffer["id"])
+        if n == 0:
+            return
+        if self._writer is None:
+            self._open_writer()
+        batch = pa.record_batch(
+            [pa.array(self._buffer[name], type=pa.string()) for name in _COLUMNS],
+            schema=self._arrow_schema,
+        )
+        self._writer.write_batch(batch)
+        self.num_rows += n
+        self._buffer = {name: [] for name in _COLUMNS}
+
+    def close(self) -> int:
+        pa = self.pa
+        self._flush()
+        if self._writer is None:
+            # Empty corpus: still write a readable file.
+            self._open_writer()
+        self._writer.close()
+        self._sink.close()
+        _write_id_index(pa, self.path)
+        return self.num_rows
+
+    def __enter__(self) -> ArrowCorpusWriter:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        if exc[0] is None:
+            self.close()
+        elif self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+
+
+def _write_id_index(pa: Any, corpus_path: Path) -> None:
+    with pa.memory_map(str(corpus_path), "r") as source:
+        ids = pa.ipc.open_file(source).read_all().column("id")
+        order = pa.compute.sort_indices(ids)
+        sorted_ids = pa.compute.take(ids, order).cast(pa.large_string()).combine_chunks()
+        table = pa.table({"id": sorted_ids, "row": order.cast(pa.int64())})
+    with pa.OSFile(str(index_path_for(corpus_path)), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def write_arrow_corpus(
+    entries: Iterable[dict[str, Any]], path: str | Path, batch_size: int = DEFAULT_BATCH_SIZE
+) -> int:
+    """Stream entries into `path` (+ its id index); return the number written."""
+    writer = ArrowCorpusWriter(path, batch_size=batch_size)
+    writer.write_all(entries)
+    return writer.close()
+
+
+class ArrowCorpus:
+    """
+    Read-only, memory-mapped view of an Arrow processed corpus.
+
+    Opening maps the files and reads only the IPC footers. Row access goes
+    straight to the owning record batch (rows are stored in fixed-size batches);
+    lookups by id binary-search the sorted id index.
+    """
+
+    def __init__(self, path: str | Path):
+        pa = _pyarrow()
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(str(self.path))
+        index_path = index_path_for(self.path)
+        if not index_path.exists():
+            raise FileNotFoundError(f"Missing id index {index_path}")
+
+        self._source = pa.memory_map(str(self.path), "r")
+        self._reader = pa.ipc.open_file(self._source)
+        metadata = self._reader.schema.metadata or {}
+        self.batch_size = int(metadata.get(b"batch_size", DEFAULT_BATCH_SIZE))
+        self.id_kind = metadata.get(b"id_kind", b"str").decode()
+        # Decoded batch columns, filled on first touch (decoding a batch's IPC
+        # message costs tens of microseconds; the buffers stay in the memory map).
+        self._batch_columns: list[tuple[Any, ...] | None] = [None] * self._reader.num_record_batches
+
+        self._index_source = pa.memory_map(str(index_path), "r")
+        index_reader = pa.ipc.open_file(self._index_source)
+        self._sorted_ids: Any = None
+        self._sorted_rows: Any = None
+        self._num_rows = 0
+        if index_reader.num_record_batches:
+            index = index_reader.get_batch(0)
+            self._sorted_ids = index.column(0)
+            self._sorted_rows = index.column(1)
+            self._num_rows = index.num_rows
+
+    def __len__(self) -> int:
+        return self._num_rows
+
+    def close(self) -> None:
+        self._source.close()
+        self._index_source.close()
+
+    def __enter__(self) -> ArrowCorpus:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _convert_id(self, value: str) -> int | str:
+        return int(value) if self.id_kind == "int" else value
+
+    def _columns_of_batch(self, b: int) -> tuple[Any, ...]:
+        columns = self._batch_columns[b]
+        if columns is None:
+            columns = tuple(self._reader.get_batch(b).columns)
+            self._batch_columns[b] = columns
+        return columns
+
+    def row(self, i: int) -> dict[str, Any]:
+        """Entry at row position i (0-based)."""
+        if not 0 <= i < self._num_rows:
+            raise IndexError(i)
+        b, offset = divmod(i, self.batch_size)
+        columns = self._columns_of_batch(b)
+        entry = {name: col[offset].as_py() for name, col in zip(_COLUMNS, columns)}
+        entry["id"] = self._convert_id(entry["id"])
+        return entry
+
+    def row_of(self, entry_id: int | str) -> int | None:
+        """Row position of an id, or None (binary search over the sorted index)."""
+        ids = self._sorted_ids
+        if ids is None:
+            return None
+        key = str(entry_id)
+        lo = bisect.bisect_left(_ArrayView(ids), key)
+        if lo < len(ids) and ids[lo].as_py() == key:
+            return int(self._sorted_rows[lo].as_py())
+        return None
+
+    def get(self, entry_id: int | str) -> dict[str, Any] | None:
+        i = self.row_of(entry_id)
+        return None if i is None else self.row(i)
+
+    def get_many(self, entry_ids: Sequence[int | str]) -> list[dict[str, Any] | None]:
+        return [self.get(entry_id) for entry_id in entry_ids]
+
+    def column(self, name: str) -> Any:
+        """Whole column as a ChunkedArray backed by the memory map."""
+        if name not in _COLUMNS:
+            raise KeyError(name)
+        return self._reader.read_all().column(name)
+
+    def iter_entries(self, start: int = 0) -> Iterator[dict[str, Any]]:
+        """Stream entries from row `start`, one record batch at a time."""
+        first_batch, offset = divmod(max(0, start), self.batch_size)
+        for b in range(first_batch, self._reader.num_record_batches):
+            batch = self._reader.get_batch(b)
+            if offset:
+                batch = batch.slice(offset)
+                offset = 0
+            for entry in batch.to_pylist():
+                entry["id"] = self._convert_id(entry["id"])
+                yield entry
+
+
+class _ArrayView(Sequence[str]):
+    """Sequence adapter so bisect can search an Arrow string array in place."""
+
+    def __init__(self, array: Any):
+        self._array = array
+
+    def __len__(self) -> int:
+        return len(self._array)
+
+    def __getitem__(self, i: Any) -> Any:
+        return self._array[i].as_py()
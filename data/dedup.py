@@ -0,0 +1,237 @@
+"""
+Near-duplicate collapsing for processed FAQ entries (MinHash + LSH banding).
+
+Entries are compared on character shingles of their normalized question and
+answer. The first entry of each near-duplicate cluster is kept as canonical;
+later members are dropped and recorded in an alias map (id -> canonical id).
+
+문서: docs/data/dedup.md
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from data.records import iter_records, write_records
+
+logger = logging.getLogger(__name__)
+
+_MASK_32 = np.uint64((1 << 32) - 1)
+# Multiplier for the polynomial shingle and band hashes (wraps mod 2^64).
+_POLY = np.uint64(0x100000001B3)
+
+# Entries hashed per NumPy call; LSH lookups stay sequential so the earliest
+# entry of a cluster is always the canonical one.
+_SIGNATURE_CHUNK = 1024
+
+
+@dataclass(frozen=True)
+class DedupConfig:
+    # Estimated Jaccard similarity at or above which two entries are duplicates.
+    threshold: float = 0.7
+    num_perm: int = 64
+    # num_perm / bands rows per band; 16 x 4 makes pairs above ~0.5 candidates.
+    bands: int = 16
+    shingle_size: int = 3
+    seed: int = 0
+
+
+@dataclass
+class DedupStats:
+    num_input: int = 0
+    num_kept: int = 0
+    num_aliases: int = 0
+    # Canonical entries that absorbed at least one duplicate.
+    num_clusters: int = 0
+
+    @property
+    def shrink_ratio(self) -> float:
+        """Fraction of entries removed from the index."""
+        return self.num_aliases / self.num_input if self.num_input else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "num_input": self.num_input,
+            "num_kept": self.num_kept,
+            "num_aliases": self.num_aliases,
+            "num_clusters": self.num_clusters,
+            "shrink_ratio": self.shrink_ratio,
+        }
+
+
+def normalize_for_dedup(text: str) -> str:
+    """Lowercase and collapse whitespace so spacing/case edits do not count."""
+    return " ".join(text.lower().split())
+
+
+class MinHasher:
+    """
+    MinHash signatures over character shingles, computed for many texts at once.
+
+    Shingles are hashed with a polynomial over code points into 32 bits. Each
+    permutation is multiply-shift hashing, h -> ((a*h + b) mod 2^64) >> 32,
+    which needs no division. It is applied to all shingles of a chunk at once,
+    and np.minimum.reduceat takes the minimum per text. Taking the minimum
+    before the shift gives the same result, so the shift runs on the small
+    result only.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 0):
+        if num_perm <= 0:
+            raise ValueError("num_perm must be > 0")
+        if shingle_size <= 0:
+            raise ValueError("shingle_size must be > 0")
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 1 << 63, size=(num_perm, 1), dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=(num_perm, 1), dtype=np.uint64)
+
+    def _shingle_hashes(self, text: str) -> np.ndarray:
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        k = self.shingle_size
+        if len(codes) <= k:
+            # Short texts are a single shingle (an empty text hashes to 0).
+            k = max(1, len(codes))
+            codes = codes if len(codes) else np.zeros(1, dtype=np.uint64)
+        h = np.zeros(len(codes) - k + 1, dtype=np.uint64)
+        for i in range(k):
+            h = h * _POLY + codes[i : len(codes) - k + 1 + i]
+        return (h ^ (h >> np.uint64(32))) & _MASK_32
+
+    def signatures(self, texts: list[str]) -> np.ndarray:
+        """(len(texts), num_perm) uint32 signatures."""
+        if not texts:
+            return np.zeros((0, self.num_perm), dtype=np.uint32)
+        hashes = [self._shingle_hashes(t) for t in texts]
+        offsets = np.cumsum([0] + [len(h) for h in hashes[:-1]])
+        permuted = np.multiply(self._a, np.concatenate(hashes))
+        permuted += self._b
+        mins = np.minimum.reduceat(permuted, offsets, axis=1)
+        return (mins >> np.uint64(32)).astype(np.uint32).T.copy()
+
+
+class NearDuplicateCollapser:
+    """
+    Stream processed entries and drop near-duplicates of earlier entries.
+
+    Each signature is split into `bands` bands; entries sharing any band are
+    candidates, and a candidate is accepted when the fraction of equal
+    signature slots (the Jaccard estimate) reaches `threshold`. Memory grows
+    with the number of canonical entries (their signatures and band keys), not
+    with the number of duplicates.
+    """
+
+    def __init__(self, config: DedupConfig | None = None):
+        self.config = config = config or DedupConfig()
+        if not 0.0 < config.threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        if config.bands <= 0 or config.num_perm % config.bands:
+            raise ValueError("num_perm must be a positive multiple of bands")
+        self._hasher = MinHasher(config.num_perm, config.shingle_size, config.seed)
+        self._rows = config.num_perm // config.bands
+        self._tables: list[dict[int, int]] = [{} for _ in range(config.bands)]
+        # Canonical signatures, one row each; grown by doubling.
+        self._signatures = np.zeros((1024, config.num_perm), dtype=np.uint32)
+        self._canonical_ids: list[Any] = []
+        self._clustered: set[int] = set()
+        self.aliases: dict[Any, Any] = {}
+        self.stats = DedupStats()
+
+    def _band_keys(self, signatures: np.ndarray) -> list[list[int]]:
+        bands = signatures.reshape(len(signatures), self.config.bands, self._rows).astype(np.uint64)
+        keys = np.zeros(bands.shape[:2], dtype=np.uint64)
+        for r in range(self._rows):
+            keys = keys * _POLY + bands[:, :, r]
+        band_keys: list[list[int]] = keys.tolist()
+        return band_keys
+
+    def _match(self, signature: np.ndarray, band_keys: list[int]) -> tuple[int, float] | None:
+        best: tuple[int, float] | None = None
+        seen: set[int] = set()
+        for table, key in zip(self._tables, band_keys):
+            c = table.get(key)
+            if c is None or c in seen:
+                continue
+            seen.add(c)
+            similarity = float(np.count_nonzero(self._signatures[c] == signature)) / len(signature)
+            if similarity >= self.config.threshold and (best is None or similarity > best[1]):
+                best = (c, similarity)
+        return best
+
+    def _add(self, entry: dict[str, Any], signature: np.ndarray, band_keys: list[int]) -> bool:
+        """Register entry; return True if it is canonical (kept)."""
+        self.stats.num_input += 1
+        match = self._match(signature, band_keys)
+        if match is not None:
+            c, _ = match
+            self.aliases[entry["id"]] = self._canonical_ids[c]
+            self.stats.num_aliases += 1
+            if c not in self._clustered:
+                self._clustered.add(c)
+                self.stats.num_clusters += 1
+            return False
+
+        c = len(self._canonical_ids)
+        self._canonical_ids.append(entry["id"])
+        if c == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.zeros_like(self._signatures)])
+        self._signatures[c] = signature
+        for table, key in zip(self._tables, band_keys):
+            table.setdefault(key, c)
+        self.stats.num_kept += 1
+        return True
+
+    def collapse(self, entries: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+        """Yield canonical entries in input order; duplicates go to `aliases`."""
+        it = iter(entries)
+        while chunk := list(itertools.islice(it, _SIGNATURE_CHUNK)):
+            texts = [
+                normalize_for_dedup(f"{e.get('question', '')}\n{e.get('answer', '')}") for e in chunk
+            ]
+            signatures = self._hasher.signatures(texts)
+            for entry, signature, keys in zip(chunk, signatures, self._band_keys(signatures)):
+                if self._add(entry, signature, keys):
+                    yield entry
+
+    def log_summary(self) -> None:
+        s = self.stats
+        logger.info(
+            "Near-duplicate collapsing: %s -> %s entries (%s aliases in %s clusters); "
+            "each strategy collection shrinks by %.1f%%",
+            s.num_input,
+            s.num_kept,
+            s.num_aliases,
+            s.num_clusters,
+            100.0 * s.shrink_ratio,
+        )
+
+
+def alias_path_for(output_path: str | Path) -> Path:
+    """faq_processed.jsonl(.zst)/.json/.arrow -> faq_processed.aliases.jsonl"""
+    p = Path(output_path)
+    stem = p.name
+    for suffix in (".jsonl.zst", ".jsonl", ".json", ".arrow"):
+        if stem.lower().endswith(suffix):
+            stem = stem[: -len(suffix)]
+            break
+    return p.with_name(f"{stem}.aliases.jsonl")
+
+
+def write_aliases(aliases: dict[Any, Any], path: str | Path) -> int:
+    """Write {"id": duplicate_id, "canonical_id": id} records; return the count."""
+    return write_records(
+        ({"id": dup, "canonical_id": canonical} for dup, canonical in aliases.items()), path
+    )
+
+
+def load_aliases(path: str | Path) -> dict[Any, Any]:
+    """Read an alias file written by write_aliases() into {duplicate_id: canonical_id}."""
+    return {rec["id"]: rec["canonical_id"] for rec in iter_records(path)}
@@ -1,64 +1,72 @@
 """Load and save FAQ-style datasets into data/raw/."""
 
-import json
+import argparse
 from pathlib import Path
 import logging
 
 from datasets import load_dataset
 
 from config import Config
+from data.records import with_record_format, write_records
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def download_dataset():
+def iter_dataset_rows(ds):
+    """Yield each row as a dict annotated with its split name (`_split`)."""
+    # ds is typically a DatasetDict (split -> Dataset). Handle both DatasetDict and Dataset.
+    if hasattr(ds, "items"):
+        split_items = list(ds.items())
+    else:
+        split_items = [("train", ds)]
+
+    for split_name, split_ds in split_items:
+        for row in split_ds:
+            obj = dict(row)
+            obj["_split"] = split_name
+            yield obj
+
+
+def download_dataset(out_path=None):
     """
-    Load the dataset via Hugging Face Datasets and save it to data/raw/ as JSON.
+    Load the dataset via Hugging Face Datasets and save it to data/raw/.
+
+    Rows are streamed to `out_path` (default: data/raw/webfaq_kor.<DATA_FORMAT>),
+    one JSON object per line for .jsonl/.jsonl.zst.
 
     Note:
       If the dataset requires access, login first (e.g. `huggingface-cli login`).
     """
-    raw_data_dir = Path(Config.RAW_DATA_DIR)
-    raw_data_dir.mkdir(parents=True, exist_ok=True)
+    if out_path is None:
+        out_path = with_record_format(Path(Config.RAW_DATA_DIR) / "webfaq_kor", Config.DATA_FORMAT)
+    out_path = Path(out_path)
 
     dataset_id = "PaDaS-Lab/webfaq"
     dataset_config = "kor"
-    out_path = raw_data_dir / "webfaq_kor.json"
 
     logger.info("Loading dataset via Hugging Face Datasets...")
     logger.info("Dataset: %s (%s)", dataset_id, dataset_config)
     ds = load_dataset(dataset_id, dataset_config)
 
-    # Save as a single JSON array so data/preprocess.py can discover and load it.
+    # data/preprocess.py discovers the file in data/raw/ and streams it back.
     logger.info("Saving to: %s", out_path)
-    num_rows = 0
-    with out_path.open("w", encoding="utf-8") as f:
-        f.write("[\n")
-        first = True
-
-        # ds is typically a DatasetDict (split -> Dataset). Handle both DatasetDict and Dataset.
-        if hasattr(ds, "items"):
-            split_items = list(ds.items())  # type: ignore[no-any-return]
-        else:
-            split_items = [("train", ds)]
-
-        for split_name, split_ds in split_items:
-            for row in split_ds:
-                obj = dict(row)
-                obj["_split"] = split_name
-
-                if not first:
-                    f.write(",\n")
-                json.dump(obj, f, ensure_ascii=False)
-                first = False
-                num_rows += 1
-
-        f.write("\n]\n")
+    num_rows = write_records(iter_dataset_rows(ds), out_path)
 
     logger.info("Saved %s rows to %s", num_rows, out_path)
     return out_path
 
 
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="data.download_faq")
+    p.add_argument(
+        "--out",
+        default=None,
+        help="Output .jsonl/.jsonl.zst/.json (default: data/raw/webfaq_kor.<DATA_FORMAT>)",
+    )
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    return download_dataset(args.out)
+
+
 if __name__ == "__main__":
-    download_dataset()
+    main()
@@ -1,152 +1,374 @@
 """Preprocess Mental Health FAQ dataset into Q-A pairs."""
 
-import json
-import pandas as pd
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import logging
 from config import Config
+from data.corpus import ARROW_SUFFIX, ArrowCorpusWriter, write_arrow_corpus
+from data.records import find_record_file, iter_records, with_record_format, write_records
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_CSV_CHUNKSIZE = 100_000
 
-def load_raw_data(raw_data_dir):
-    """Load raw dataset files."""
+# pandas (~0.3 s to import) is imported by the CSV/DataFrame paths only, so
+# `--help` and JSONL input do not pay for it.
+
+
+def find_raw_data_file(raw_data_dir):
+    """Return the first CSV file in the directory, else the first JSONL(.zst)/JSON file."""
     raw_data_path = Path(raw_data_dir)
 
     # Try to find CSV or JSON files
-    csv_files = list(raw_data_path.glob("*.csv"))
-    json_files = list(raw_data_path.glob("*.json"))
-
+    csv_files = sorted(raw_data_path.glob("*.csv"))
     if csv_files:
-        logger.info(f"Found CSV file: {csv_files[0]}")
-        return pd.read_csv(csv_files[0])
-    elif json_files:
-        logger.info(f"Found JSON file: {json_files[0]}")
-        with open(json_files[0], "r", encoding="utf-8") as f:
-            return json.load(f)
-    else:
-        raise FileNotFoundError(
-            f"No CSV or JSON files found in {raw_data_dir}. "
-            "Please ensure the dataset is downloaded."
+        return csv_files[0]
+
+    record_file = find_record_file(raw_data_path)
+    if record_file is not None:
+        return record_file
+
+    raise FileNotFoundError(
+        f"No CSV, JSONL or JSON files found in {raw_data_dir}. "
+        "Please ensure the dataset is downloaded."
+    )
+
+
+def load_raw_data(raw_data_dir):
+    """Load raw dataset files (a DataFrame for CSV, else a list of records)."""
+    path = find_raw_data_file(raw_data_dir)
+    if path.suffix == ".csv":
+        import pandas as pd
+
+        logger.info(f"Found CSV file: {path}")
+        return pd.read_csv(path)
+    logger.info(f"Found JSON file: {path}")
+    return list(iter_records(path))
+
+
+def detect_qa_columns(columns):
+    """Pick the question/answer columns by name; the last match wins, None if absent."""
+    question_col = None
+    answer_col = None
+
+    # Common column names for FAQ datasets
+    for col in columns:
+        col_lower = col.lower()
+        if "question" in col_lower or "q" == col_lower:
+            question_col = col
+        elif "answer" in col_lower or "a" == col_lower or "response" in col_lower:
+            answer_col = col
+
+    return question_col, answer_col
+
+
+def _row_dtype(df):
+    """
+    The dtype iterrows() gives each row: the frame's common dtype.
+
+    A frame with only numeric columns upcasts e.g. int cells to float ("1" -> "1.0").
+    """
+    return df.iloc[:1].to_numpy().dtype
+
+
+def _cells_as_str(series, row_dtype):
+    """str() of every cell, as iterrows() would produce it."""
+    if row_dtype != object and series.dtype != row_dtype:
+        series = series.astype(row_dtype)
+    return series.map(str).astype(object)
+
+
+def _normalize_frame(df, question_col, answer_col, row_dtype=None):
+    """
+    Column-wise normalization of one DataFrame (or CSV chunk).
+
+    Returns (ids, questions, answers, texts) lists. ids is None when the Q/A
+    columns were detected; the caller numbers the kept rows sequentially.
+    """
+    if row_dtype is None:
+        row_dtype = _row_dtype(df)
+
+    if question_col and answer_col:
+        questions = _cells_as_str(df[question_col], row_dtype).str.strip()
+        answers = _cells_as_str(df[answer_col], row_dtype).str.strip()
+        keep = (questions != "") & (answers != "") & (questions != "nan") & (answers != "nan")
+        questions = questions[keep]
+        answers = answers[keep]
+        texts = "Q: " + questions + "\nA: " + answers  # Combined text for embedding
+        return None, questions.tolist(), answers.tolist(), texts.tolist()
+
+    if df.shape[1] < 2:
+        return [], [], [], []
+    first = _cells_as_str(df.iloc[:, 0], row_dtype)
+    second = _cells_as_str(df.iloc[:, 1], row_dtype)
+    texts = "Q: " + first + "\nA: " + second
+    return (
+        df.index.tolist(),
+        first.str.strip().tolist(),
+        second.str.strip().tolist(),
+        texts.tolist(),
+    )
+
+
+def _entries_from_columns(ids, questions, answers, texts, id_offset=0):
+    if ids is None:
+        ids = range(id_offset, id_offset + len(questions))
+    return [
+        {"id": i, "question": q, "answer": a, "text": t}
+        for i, q, a, t in zip(ids, questions, answers, texts)
+    ]
+
+
+def _normalize_chunk(args):
+    return _normalize_frame(*args)
+
+
+def preprocess_csv(csv_path, chunksize=DEFAULT_CSV_CHUNKSIZE, workers=1):
+    """Preprocess a CSV file read in chunks (see iter_preprocess_csv) into a list."""
+    processed_data = list(iter_preprocess_csv(csv_path, chunksize=chunksize, workers=workers))
+    logger.info(f"Processed {len(processed_data)} FAQ entries")
+    return processed_data
+
+
+def iter_preprocess_csv(csv_path, chunksize=DEFAULT_CSV_CHUNKSIZE, workers=1):
+    """
+    Yield processed entries from a CSV file read in chunks of `chunksize` rows.
+
+    Columns are detected once from the first chunk. With workers > 1 chunks are
+    normalized in a process pool and collected in order, so ids match a
+    single-process run. Parsing stays in this process.
+    """
+    import pandas as pd
+
+    reader = pd.read_csv(csv_path, chunksize=max(1, int(chunksize)))
+    first = next(reader, None)
+    if first is None:
+        return
+
+    question_col, answer_col = detect_qa_columns(first.columns)
+    if not (question_col and answer_col):
+        logger.warning(
+            "Could not find question/answer columns. Using first two columns."
         )
 
+    def jobs():
+        for df in itertools.chain([first], reader):
+            # Ship only the columns used; the row dtype still reflects the whole frame.
+            used = df[[question_col, answer_col]] if question_col and answer_col else df.iloc[:, :2]
+            yield used, question_col, answer_col, _row_dtype(df)
+
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = _bounded_map(pool, _normalize_chunk, jobs(), window=2 * workers)
+    else:
+        pool = None
+        results = map(_normalize_chunk, jobs())
+
+    num_entries = 0
+    try:
+        for columns in results:
+            entries = _entries_from_columns(*columns, id_offset=num_entries)
+            num_entries += len(entries)
+            yield from entries
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def _bounded_map(pool, fn, items, window):
+    """pool.map() in order, but with at most `window` items submitted ahead."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
 
 def preprocess_faq_data(raw_data):
     """Convert raw data into standardized Q-A pairs."""
+    import pandas as pd
+
     processed_data = []
 
     if isinstance(raw_data, pd.DataFrame):
         # Handle CSV format
-        # Common column names for FAQ datasets
-        question_col = None
-        answer_col = None
-
-        for col in raw_data.columns:
-            col_lower = col.lower()
-            if "question" in col_lower or "q" == col_lower:
-                question_col = col
-            elif "answer" in col_lower or "a" == col_lower or "response" in col_lower:
-                answer_col = col
-
-        if question_col and answer_col:
-            for _, row in raw_data.iterrows():
-                question = str(row[question_col]).strip()
-                answer = str(row[answer_col]).strip()
-
-                if question and answer and question != "nan" and answer != "nan":
-                    processed_data.append(
-                        {
-                            "id": len(processed_data),
-                            "question": question,
-                            "answer": answer,
-                            "text": f"Q: {question}\nA: {answer}",  # Combined text for embedding
-                        }
-                    )
-        else:
+        question_col, answer_col = detect_qa_columns(raw_data.columns)
+        if not (question_col and answer_col):
             logger.warning(
                 "Could not find question/answer columns. Using first two columns."
             )
-            for idx, row in raw_data.iterrows():
-                if len(row) >= 2:
-                    processed_data.append(
-                        {
-                            "id": idx,
-                            "question": str(row.iloc[0]).strip(),
-                            "answer": str(row.iloc[1]).strip(),
-                            "text": f"Q: {row.iloc[0]}\nA: {row.iloc[1]}",
-                        }
-                    )
+        processed_data = _entries_from_columns(
+            *_normalize_frame(raw_data, question_col, answer_col)
+        )
 
     elif isinstance(raw_data, (list, dict)):
         # Handle JSON format
         if isinstance(raw_data, dict):
             raw_data = [raw_data]
-
-        for idx, item in enumerate(raw_data):
-            if isinstance(item, dict):
-                # Try to extract question and answer with various key names
-                # Prefer HF WebFAQ keys ("question", "answer") and fall back to other common variants.
-                question = (
-                    item.get("question")
-                    or item.get("Questions")
-                    or item.get("Question")
-                    or item.get("q")
-                )
-                answer = (
-                    item.get("answer")
-                    or item.get("Answers")
-                    or item.get("Answer")
-                    or item.get("a")
-                    or item.get("response")
-                )
-                # Prefer stable IDs when available (HF datasets often provide `id`).
-                question_id = item.get("id") or item.get("Question_ID") or str(idx)
-
-                if question and answer:
-                    processed_data.append(
-                        {
-                            "id": question_id,
-                            "question": str(question).strip(),
-                            "answer": str(answer).strip(),
-                            "text": f"Q: {question}\nA: {answer}",
-                        }
-                    )
+        processed_data = list(iter_preprocess_records(raw_data))
 
     logger.info(f"Processed {len(processed_data)} FAQ entries")
     return processed_data
 
 
+def iter_preprocess_records(records):
+    """Yield processed entries from JSON/JSONL records (dicts) one at a time."""
+    for idx, item in enumerate(records):
+        if isinstance(item, dict):
+            # Try to extract question and answer with various key names
+            # Prefer HF WebFAQ keys ("question", "answer") and fall back to other common variants.
+            question = (
+                item.get("question")
+                or item.get("Questions")
+                or item.get("Question")
+                or item.get("q")
+            )
+            answer = (
+                item.get("answer")
+                or item.get("Answers")
+                or item.get("Answer")
+                or item.get("a")
+                or item.get("response")
+            )
+            # Prefer stable IDs when available (HF datasets often provide `id`).
+            question_id = item.get("id") or item.get("Question_ID") or str(idx)
+
+            if question and answer:
+                yield {
+                    "id": question_id,
+                    "question": str(question).strip(),
+                    "answer": str(answer).strip(),
+                    "text": f"Q: {question}\nA: {answer}",
+                }
+
+
 def save_processed_data(processed_data, output_path):
-    """Save processed data to JSON file."""
+    """
+    Save processed data (any iterable of entries) to .jsonl, .jsonl.zst, .json
+    or an Arrow corpus (.arrow, see data/corpus.py).
+
+    Entries are written as they are produced; returns the number written.
+    """
     output_path = Path(output_path)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if output_path.name.endswith(ARROW_SUFFIX):
+        num_entries = write_arrow_corpus(processed_data, output_path)
+    else:
+        num_entries = write_records(processed_data, output_path)
+
+    logger.info(f"Saved {num_entries} processed entries to {output_path}")
+    return num_entries
+
+
+def _tee_to_arrow(entries, writer):
+    for entry in entries:
+        writer.write(entry)
+        yield entry
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(processed_data, f, indent=2, ensure_ascii=False)
 
-    logger.info(f"Saved processed data to {output_path}")
+def _build_parser():
+    p = argparse.ArgumentParser(prog="data.preprocess")
+    p.add_argument(
+        "--input",
+        default=None,
+        help="Raw CSV/JSONL/JSON file or directory (default: Config.RAW_DATA_DIR)",
+    )
+    p.add_argument(
+        "--output",
+        default=None,
+        help="Output .jsonl/.jsonl.zst/.json/.arrow (default: <PROCESSED_DATA_DIR>/faq_processed.<DATA_FORMAT>)",
+    )
+    p.add_argument(
+        "--arrow",
+        action="store_true",
+        help="Also write <PROCESSED_DATA_DIR>/faq_processed.arrow (+ id index) in the same pass",
+    )
+    p.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Collapse near-duplicate entries (MinHash/LSH) and write <output>.aliases.jsonl",
+    )
+    p.add_argument(
+        "--dedup-threshold",
+        dest="dedup_threshold",
+        type=float,
+        default=None,
+        help="Estimated Jaccard similarity for --dedup (default: Config.DEDUP_THRESHOLD)",
+    )
+    p.add_argument(
+        "--chunksize",
+        type=int,
+        default=DEFAULT_CSV_CHUNKSIZE,
+        help="CSV rows read per chunk",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes normalizing CSV chunks (1 = in-process)",
+    )
+    return p
 
 
-def main():
-    """Main preprocessing pipeline."""
-    raw_data_dir = Config.RAW_DATA_DIR
-    processed_data_dir = Path(Config.PROCESSED_DATA_DIR)
-    processed_data_dir.mkdir(parents=True, exist_ok=True)
+def main(argv=None):
+    """Main preprocessing pipeline; returns the number of entries written."""
+    args = _build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
 
-    output_file = processed_data_dir / "faq_processed.json"
+    raw_input = Path(args.input or Config.RAW_DATA_DIR)
+    output_file = (
+        Path(args.output)
+        if args.output
+        else with_record_format(
+            Path(Config.PROCESSED_DATA_DIR) / "faq_processed", Config.DATA_FORMAT
+        )
+    )
+
+    raw_file = raw_input if raw_input.is_file() else find_raw_data_file(raw_input)
+
+    # Records stream from the raw file through preprocessing into the output file.
+    if raw_file.suffix == ".csv":
+        logger.info(f"Found CSV file: {raw_file}")
+        processed_data = iter_preprocess_csv(
+            raw_file, chunksize=args.chunksize, workers=args.workers
+        )
+    else:
+        logger.info(f"Found JSON file: {raw_file}")
+        processed_data = iter_preprocess_records(iter_records(raw_file))
+
+    collapser = None
+    if args.dedup:
+        from data.dedup import DedupConfig, NearDuplicateCollapser, alias_path_for, write_aliases
 
-    logger.info("Loading raw data...")
-    raw_data = load_raw_data(raw_data_dir)
+        threshold = (
+            Config.DEDUP_THRESHOLD if args.dedup_threshold is None else args.dedup_threshold
+        )
+        collapser = NearDuplicateCollapser(DedupConfig(threshold=threshold))
+        processed_data = collapser.collapse(processed_data)
 
-    logger.info("Preprocessing data...")
-    processed_data = preprocess_faq_data(raw_data)
+    arrow_writer = None
+    if args.arrow and not output_file.name.endswith(ARROW_SUFFIX):
+        arrow_file = Path(Config.PROCESSED_DATA_DIR) / f"faq_processed{ARROW_SUFFIX}"
+        arrow_writer = ArrowCorpusWriter(arrow_file)
+        processed_data = _tee_to_arrow(processed_data, arrow_writer)
 
-    logger.info(f"Saving processed data to {output_file}...")
-    save_processed_data(processed_data, output_file)
+    logger.info(f"Preprocessing into {output_file}...")
+    num_entries = save_processed_data(processed_data, output_file)
+    if arrow_writer is not None:
+        arrow_writer.close()
+        logger.info(f"Saved {num_entries} processed entries to {arrow_writer.path}")
+    if collapser is not None:
+        alias_file = alias_path_for(output_file)
+        write_aliases(collapser.aliases, alias_file)
+        logger.info(f"Saved {len(collapser.aliases)} near-duplicate aliases to {alias_file}")
+        collapser.log_summary()
 
     logger.info("Preprocessing complete!")
-    return processed_data
+    return num_entries
 
 
 if __name__ == "__main__":
@@ -0,0 +1,155 @@
+"""
+Streaming record I/O for raw and processed datasets.
+
+JSONL (optionally zstd-compressed, `.jsonl.zst`) is the native format; legacy
+JSON arrays (`.json`) remain readable and writable.
+
+문서: docs/data/records.md
+"""
+
+from __future__ import annotations
+
+import io
+import json
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import IO, Any
+
+RECORD_FORMATS = ("jsonl", "jsonl.zst", "json")
+
+# Discovery order when a directory holds several formats.
+_SUFFIX_PREFERENCE = (".jsonl.zst", ".jsonl", ".json")
+
+
+def record_format(path: str | Path) -> str:
+    """Return "jsonl", "jsonl.zst" or "json" from the file name."""
+    name = Path(path).name.lower()
+    if name.endswith(".jsonl.zst"):
+        return "jsonl.zst"
+    if name.endswith(".jsonl"):
+        return "jsonl"
+    if name.endswith(".json"):
+        return "json"
+    raise ValueError(f"Unsupported record file {path!s}; expected one of {RECORD_FORMATS}")
+
+
+def with_record_format(stem: str | Path, fmt: str) -> Path:
+    """Append the suffix for `fmt` to a path without one (e.g. faq_processed -> faq_processed.jsonl)."""
+    if fmt not in RECORD_FORMATS:
+        raise ValueError(f"Unknown record format {fmt!r}; expected one of {RECORD_FORMATS}")
+    p = Path(stem)
+    return p.with_name(f"{p.name}.{fmt}")
+
+
+def find_record_file(directory: str | Path, stem: str | None = None) -> Path | None:
+    """
+    First record file in `directory` (optionally named `stem.<format>`), preferring
+    compressed JSONL, then JSONL, then JSON. None if there is none.
+    """
+    d = Path(directory)
+    for suffix in _SUFFIX_PREFERENCE:
+        if stem is not None:
+            candidate = d / f"{stem}{suffix}"
+            if candidate.is_file():
+                return candidate
+            continue
+        matches = sorted(d.glob(f"*{suffix}"))
+        if matches:
+            return matches[0]
+    return None
+
+
+def _zstd() -> Any:
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "Reading or writing .jsonl.zst requires the `zstandard` package "
+            "(pip install zstandard)."
+        ) from e
+    return zstandard
+
+
+def open_text(path: str | Path, mode: str = "r") -> IO[str]:
+    """Open a record file as UTF-8 text ("r" or "w"), transparently (de)compressing .zst."""
+    if mode not in ("r", "w"):
+        raise ValueError("mode must be 'r' or 'w'")
+    p = Path(path)
+    if not p.name.lower().endswith(".zst"):
+        return p.open(mode, encoding="utf-8")
+
+    zstandard = _zstd()
+    if mode == "r":
+        raw: IO[bytes] = zstandard.ZstdDecompressor().stream_reader(p.open("rb"), closefd=True)
+    else:
+        raw = zstandard.ZstdCompressor(level=3).stream_writer(p.open("wb"), closefd=True)
+    return io.TextIOWrapper(raw, encoding="utf-8")
+
+
+def iter_records(path: str | Path) -> Iterator[dict[str, Any]]:
+    """
+    Stream dict records from a .jsonl, .jsonl.zst or .json file.
+
+    JSONL is parsed line by line. A JSON array has to be parsed whole before its
+    items are yielded; a top-level JSON object is yielded as a single record.
+    """
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(str(p))
+    fmt = record_format(p)
+    return _iter_json_array(p) if fmt == "json" else _iter_jsonl(p)
+
+
+def _iter_jsonl(p: Path) -> Iterator[dict[str, Any]]:
+    with open_text(p, "r") as f:
+        for idx, line in enumerate(f):
+            raw = line.strip()
+            if not raw:
+                continue
+            try:
+                obj = json.loads(raw)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{p}: invalid JSON at line {idx + 1}: {e}") from e
+            if not isinstance(obj, dict):
+                raise ValueError(f"{p}: line {idx + 1} must be a JSON object")
+            yield obj
+
+
+def _iter_json_array(p: Path) -> Iterator[dict[str, Any]]:
+    with p.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    items = [data] if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError(f"{p}: expected a JSON array or object")
+    for item in items:
+        if isinstance(item, dict):
+            yield item
+
+
+def _json_array_item(record: dict[str, Any]) -> str:
+    # Same layout as json.dump(records, f, indent=2): each item indented one level.
+    return "  " + json.dumps(record, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+
+
+def write_records(records: Iterable[dict[str, Any]], path: str | Path) -> int:
+    """
+    Stream records to `path` in the format given by its suffix; return the count.
+
+    .json output is byte-identical to json.dump(list(records), f, indent=2,
+    ensure_ascii=False) but is written incrementally.
+    """
+    p = Path(path)
+    fmt = record_format(p)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    n = 0
+    with open_text(p, "w") as f:
+        if fmt == "json":
+            for rec in records:
+                f.write(("[\n" if n == 0 else ",\n") + _json_array_item(rec))
+                n += 1
+            f.write("\n]" if n else "[]")
+        else:
+            for rec in records:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                n += 1
+    return n
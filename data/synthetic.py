@@ -0,0 +1,305 @@
+"""
+Generate synthetic Korean-like FAQ corpora and matching retrieval eval sets.
+
+Output follows the processed-data (faq_processed) schema (id, question, answer, text) and the
+retrieval_eval JSONL schema, so indexing/search/eval can be scaled offline.
+
+문서: docs/data/synthetic.md
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import logging
+import math
+import random
+from collections import deque
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from data.records import write_records
+
+logger = logging.getLogger(__name__)
+
+_SYLLABLES = list(
+    "가각간갈감강개거건걱검게격결경계고공과관교구국군권귀규그근글금기길김"
+    "나난날남내너널네노높누눈느능니다단달담당대더덕도독돌동두드든들등디따때"
+    "라락란람랑래량러런려력련로록론료루류르른름리린립마막만말맞매머먼면명모목"
+    "몸못무문물미민바박반받발방배버번벌범법변별병보복본부분불비빈사산살삼상새"
+    "생서석선설성세소속손수숙순술스습승시식신실심아안알압앞애야약양어억언얼"
+    "업여역연열영예오온와완외요용우운울원위유육윤은을음의이인일임입자작잔장"
+    "재저적전절점정제조족존종좌주준중즉증지직진질집차착찬참창채처천철청체초"
+    "총최추축출충취측치친칠침타탁태터토통투특파판편평포표품피하학한할함합항"
+    "해행향허현혈협형호혹화확환활회효후훈휴흐흔희"
+)
+
+# Question/answer endings keep the text shaped like real Korean FAQ entries.
+_QUESTION_ENDINGS = ("인가요?", "나요?", "할까요?", "있나요?", "되나요?", "하나요?", "어떻게 하나요?")
+_ANSWER_ENDINGS = ("입니다.", "습니다.", "하세요.", "됩니다.", "좋습니다.", "있습니다.")
+_QUERY_ENDINGS = ("", "", " 방법", " 문의", " 궁금합니다", "")
+
+
+@dataclass(frozen=True)
+class SyntheticCorpusConfig:
+    num_entries: int = 10_000
+    seed: int = 0
+    # Fraction of entries that are near-duplicates (light edits) of an earlier entry.
+    near_duplicate_rate: float = 0.1
+    num_topics: int = 50
+    vocab_size: int = 5000
+    eval_queries: int = 1000
+    # Word-count distributions (log-normal, clipped).
+    question_words_median: float = 7.0
+    answer_words_median: float = 45.0
+    # Canonical entries remembered as near-duplicate sources (bounds memory).
+    duplicate_window: int = 10_000
+
+
+class _TextModel:
+    """
+    Vocabulary with Zipfian word frequencies plus per-topic word lists.
+
+    Vectors of words come from the NumPy generator; scalar draws use a seeded
+    random.Random, which is much cheaper per call.
+    """
+
+    def __init__(self, seed: int, vocab_size: int, num_topics: int):
+        self.rng = rng = np.random.default_rng(seed)
+        self.py = random.Random(seed)
+        words: dict[str, None] = {}
+        syllables = np.array(_SYLLABLES)
+        while len(words) < vocab_size:
+            n = int(rng.choice([1, 2, 3, 4], p=[0.1, 0.45, 0.3, 0.15]))
+            words["".join(rng.choice(syllables, size=n))] = None
+        self.vocab = np.array(list(words), dtype=object)
+
+        ranks = np.arange(1, vocab_size + 1, dtype=np.float64)
+        p = 1.0 / ranks**1.07
+        self.cdf = np.cumsum(p / p.sum())
+        self._cdf_list = self.cdf.tolist()
+
+        topic_size = max(10, vocab_size // (num_topics * 4))
+        self.topics = [
+            rng.choice(vocab_size, size=topic_size, replace=False) for _ in range(num_topics)
+        ]
+        topic_p = 1.0 / np.arange(1, num_topics + 1, dtype=np.float64)
+        self._topic_cdf = np.cumsum(topic_p / topic_p.sum()).tolist()
+
+    def topic(self) -> int:
+        return min(bisect.bisect_left(self._topic_cdf, self.py.random()), len(self._topic_cdf) - 1)
+
+    def words(self, n: int, topic: int, topic_share: float = 0.35) -> list[str]:
+        ids = np.searchsorted(self.cdf, self.rng.random(n))
+        np.minimum(ids, len(self.vocab) - 1, out=ids)
+        use_topic = self.rng.random(n) < topic_share
+        k = int(np.count_nonzero(use_topic))
+        if k:
+            words = self.topics[topic]
+            ids[use_topic] = words[self.rng.integers(0, len(words), size=k)]
+        sampled: list[str] = self.vocab[ids].tolist()
+        return sampled
+
+    def word(self, topic: int, topic_share: float = 0.35) -> str:
+        if self.py.random() < topic_share:
+            words = self.topics[topic]
+            return str(self.vocab[words[self.py.randrange(len(words))]])
+        i = bisect.bisect_left(self._cdf_list, self.py.random())
+        return str(self.vocab[min(i, len(self.vocab) - 1)])
+
+    def length(self, median: float, sigma: float, lo: int, hi: int) -> int:
+        return max(lo, min(hi, round(self.py.lognormvariate(math.log(median), sigma))))
+
+
+def _question_text(words: list[str], ending: str) -> str:
+    return " ".join(words) + " " + ending
+
+
+def _answer_text(words: list[str], py: random.Random) -> str:
+    sentences: list[str] = []
+    i = 0
+    while i < len(words):
+        n = py.randint(6, 15)
+        chunk = words[i : i + n]
+        sentences.append(" ".join(chunk) + " " + py.choice(_ANSWER_ENDINGS))
+        i += n
+    return " ".join(sentences)
+
+
+def _perturb(words: list[str], model: _TextModel, topic: int, rate: float) -> list[str]:
+    """Word-level edits (substitute / drop / insert) at roughly `rate` per word."""
+    rand = model.py.random
+    out: list[str] = []
+    for w in words:
+        r = rand()
+        if r < rate / 3:
+            continue
+        if r < 2 * rate / 3:
+            out.append(model.word(topic))
+            continue
+        out.append(w)
+        if r > 1.0 - rate / 3:
+            out.append(model.word(topic))
+    return out or list(words[:1])
+
+
+@dataclass
+class _Canonical:
+    id: int
+    topic: int
+    question: list[str]
+    answer: list[str]
+
+
+@dataclass
+class _EvalSeed:
+    qid: str
+    query: str
+    topic: int
+    members: list[int]
+
+
+class SyntheticFAQGenerator:
+    """
+    Streams synthetic FAQ entries and collects eval seeds along the way.
+
+    Iterate `entries()` once; afterwards `eval_samples()` yields the labeled
+    queries whose gold_ids include every near-duplicate of the seeded entry.
+    """
+
+    def __init__(self, config: SyntheticCorpusConfig):
+        if config.num_entries <= 0:
+            raise ValueError("num_entries must be > 0")
+        if not 0.0 <= config.near_duplicate_rate < 1.0:
+            raise ValueError("near_duplicate_rate must be in [0, 1)")
+        self.config = config
+        self.model = _TextModel(config.seed, config.vocab_size, config.num_topics)
+        self.py = self.model.py
+        self._seeds: dict[int, _EvalSeed] = {}
+        self.num_near_duplicates = 0
+
+    def _query_from(self, question: list[str], topic: int) -> str:
+        py = self.py
+        keep = [w for w in question if py.random() < 0.8] or question[:1]
+        keep = _perturb(keep, self.model, topic, rate=0.15)
+        return " ".join(keep) + py.choice(_QUERY_ENDINGS)
+
+    def entries(self) -> Iterator[dict[str, Any]]:
+        cfg = self.config
+        model = self.model
+        py = self.py
+        window: deque[_Canonical] = deque(maxlen=max(1, cfg.duplicate_window))
+        # Spread eval seeds evenly over a conservative estimate of the canonical count.
+        rate = cfg.near_duplicate_rate
+        expected_canonicals = cfg.num_entries * (1.0 - rate) - 3.0 * math.sqrt(
+            cfg.num_entries * rate * (1.0 - rate)
+        )
+        seed_ratio = min(1.0, cfg.eval_queries / max(1.0, expected_canonicals))
+        num_canonicals = 0
+
+        for i in range(cfg.num_entries):
+            if window and py.random() < cfg.near_duplicate_rate:
+                src = window[py.randrange(len(window))]
+                topic = src.topic
+                q_words = _perturb(src.question, model, topic, rate=0.2)
+                a_words = _perturb(src.answer, model, topic, rate=0.05)
+                self.num_near_duplicates += 1
+                seed = self._seeds.get(src.id)
+                if seed is not None:
+                    seed.members.append(i)
+            else:
+                topic = model.topic()
+                q_words = model.words(model.length(cfg.question_words_median, 0.4, 3, 40), topic)
+                a_words = model.words(model.length(cfg.answer_words_median, 0.7, 8, 400), topic)
+                window.append(_Canonical(i, topic, q_words, a_words))
+                num_canonicals += 1
+                if len(self._seeds) < cfg.eval_queries and int(
+                    num_canonicals * seed_ratio
+                ) > int((num_canonicals - 1) * seed_ratio):
+                    self._seeds[i] = _EvalSeed(
+                        qid=f"syn_{len(self._seeds) + 1:06d}",
+                        query=self._query_from(q_words, topic),
+                        topic=topic,
+                        members=[i],
+                    )
+
+            question = _question_text(q_words, py.choice(_QUESTION_ENDINGS))
+            answer = _answer_text(a_words, py)
+            yield {
+                "id": i,
+                "question": question,
+                "answer": answer,
+                "text": f"Q: {question}\nA: {answer}",
+            }
+
+    def eval_samples(self) -> Iterator[dict[str, Any]]:
+        for seed in self._seeds.values():
+            tags = [f"topic_{seed.topic:02d}"]
+            if len(seed.members) > 1:
+                tags.append("near_duplicate")
+            yield {
+                "qid": seed.qid,
+                "query": seed.query,
+                "gold_ids": [f"faq_{m}" for m in seed.members],
+                "tags": tags,
+            }
+
+
+def generate_synthetic_dataset(
+    config: SyntheticCorpusConfig, corpus_path: str | Path, eval_path: str | Path
+) -> dict[str, int]:
+    """Write the corpus (streamed) and then its eval JSONL; return counts."""
+    gen = SyntheticFAQGenerator(config)
+    num_entries = write_records(gen.entries(), corpus_path)
+    num_eval = write_records(gen.eval_samples(), eval_path)
+    logger.info(
+        "Wrote %s entries (%s near-duplicates) to %s and %s eval queries to %s",
+        num_entries,
+        gen.num_near_duplicates,
+        corpus_path,
+        num_eval,
+        eval_path,
+    )
+    return {
+        "num_entries": num_entries,
+        "num_near_duplicates": gen.num_near_duplicates,
+        "num_eval_queries": num_eval,
+    }
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="data.synthetic")
+    p.add_argument("--entries", type=int, default=10_000, help="Number of FAQ entries (e.g. 10000 .. 5000000)")
+    p.add_argument("--out", default="data/processed/faq_synthetic.jsonl", help="Corpus path: .jsonl, .jsonl.zst or .json (faq_processed schema)")
+    p.add_argument("--eval-out", dest="eval_out", default="data/eval/retrieval_eval.synthetic.jsonl", help="Eval JSONL path")
+    p.add_argument("--eval-queries", dest="eval_queries", type=int, default=1000)
+    p.add_argument("--near-duplicate-rate", dest="near_duplicate_rate", type=float, default=0.1)
+    p.add_argument("--topics", type=int, default=50)
+    p.add_argument("--vocab-size", dest="vocab_size", type=int, default=5000)
+    p.add_argument("--seed", type=int, default=0)
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    config = SyntheticCorpusConfig(
+        num_entries=int(args.entries),
+        seed=int(args.seed),
+        near_duplicate_rate=float(args.near_duplicate_rate),
+        num_topics=int(args.topics),
+        vocab_size=int(args.vocab_size),
+        eval_queries=int(args.eval_queries),
+    )
+    stats = generate_synthetic_dataset(config, args.out, args.eval_out)
+    for k, v in stats.items():
+        print(f"{k}={v}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
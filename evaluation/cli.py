@@ -7,22 +7,121 @@ CLI entrypoint for evaluation.
 from __future__ import annotations
 
 import argparse
+import logging
 from pathlib import Path
 
+from evaluation.dimension_report import REDUCTION_METHODS, run_dimension_report
+from evaluation.load_test import ARRIVAL_PROCESSES, LOAD_TEST_MODES, LOAD_TEST_TARGETS, run_load_test
 from evaluation.retrieval_runner import run_retrieval_eval
+from evaluation.sweep import run_retrieval_sweep
+from ingest.reduce import DEFAULT_PCA_FIT_SIZE
+from observability import metrics, profiling
+
+
+def _parse_int_list(value: str | None) -> list[int] | None:
+    if value is None or value.strip() == "":
+        return None
+    return [int(x) for x in value.split(",") if x.strip()]
+
+
+def _parse_float_list(value: str) -> list[float]:
+    return [float(x) for x in value.split(",") if x.strip()]
+
+
+def _parse_str_list(value: str) -> list[str]:
+    return [x.strip() for x in value.split(",") if x.strip()]
+
+
+def _write_metrics_snapshot(metrics_out: str | None, run_dir: Path) -> None:
+    path = metrics.write_metrics(Path(metrics_out) if metrics_out else run_dir / "metrics.prom")
+    print(f"metrics_path={path}")
 
 
 def _build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(prog="evaluation")
     sub = p.add_subparsers(dest="command", required=True)
 
-    r = sub.add_parser("retrieval-eval", help="Run label-based retrieval evaluation")
+    # Every command ends with a snapshot of the in-process metrics registry.
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--metrics-out",
+        dest="metrics_out",
+        default=None,
+        help="Metrics snapshot path: .json = JSON, otherwise Prometheus text (default: <run dir>/metrics.prom)",
+    )
+
+    r = sub.add_parser("retrieval-eval", parents=[common], help="Run label-based retrieval evaluation")
     r.add_argument("--eval", dest="eval_path", required=True, help="Path to eval JSONL")
-    r.add_argument("--top-k", dest="top_k", type=int, default=5, help="Top-k for retrieval")
+    # --ks retrieves at max(ks), so a separate --top-k would be ignored.
+    r_k = r.add_mutually_exclusive_group()
+    r_k.add_argument("--top-k", dest="top_k", type=int, default=5, help="Top-k for retrieval")
+    r_k.add_argument(
+        "--ks",
+        dest="ks",
+        default=None,
+        help="Comma-separated cutoffs, e.g. 1,3,5,10 (retrieves once at the max; not with --top-k)",
+    )
     r.add_argument("--threshold", dest="threshold", type=float, default=0.0, help="Similarity threshold")
     r.add_argument("--out", dest="out_dir", default=None, help="Output directory (default: runs/retrieval_eval_...)")
     r.add_argument("--collection-name", dest="collection_name", default=None, help="Chroma collection name")
     r.add_argument("--top-n-failures", dest="top_n_failures", type=int, default=20, help="Worst samples to list")
+    r.add_argument("--workers", dest="workers", type=int, default=1, help="Concurrent rewrite/retrieval threads")
+    r.add_argument("--batch-size", dest="batch_size", type=int, default=1, help="Queries embedded per API call")
+    r.add_argument("--corpus", dest="corpus_path", default=None, help="Arrow processed corpus (faq_processed.arrow) to show questions in the report")
+    r.add_argument("--aliases", dest="alias_path", default=None, help="Near-duplicate alias file (faq_processed.aliases.jsonl) to resolve gold ids")
+
+    sw = sub.add_parser("sweep", parents=[common], help="Evaluate a grid of retrieval configurations in one pass")
+    sw.add_argument("--eval", dest="eval_path", required=True, help="Path to eval JSONL")
+    sw.add_argument(
+        "--collections",
+        dest="collections",
+        action="append",
+        default=None,
+        help=(
+            "Comma-separated collections merged as one configuration (full names or strategy "
+            "suffixes like question,answer); repeat for more (default: each strategy alone + all)"
+        ),
+    )
+    sw.add_argument("--thresholds", dest="thresholds", default="0.0", help="Comma-separated similarity thresholds")
+    sw.add_argument("--top-k", dest="top_k", default="5", help="Comma-separated top-k values, e.g. 1,3,5,10")
+    sw.add_argument("--rewrite", dest="rewrite", default="llm", help="Comma-separated rewrite modes: llm,heuristic,none")
+    sw.add_argument("--out", dest="out_dir", default=None, help="Output directory (default: runs/retrieval_sweep_...)")
+    sw.add_argument("--workers", dest="workers", type=int, default=1, help="Concurrent rewrite/query threads")
+    sw.add_argument("--batch-size", dest="batch_size", type=int, default=64, help="Queries embedded per API call")
+    sw.add_argument("--aliases", dest="alias_path", default=None, help="Near-duplicate alias file (faq_processed.aliases.jsonl) to resolve gold ids")
+
+    dr = sub.add_parser("dim-report", parents=[common], help="Recall vs memory/latency of reduced-dimension embeddings")
+    dr.add_argument("--eval", dest="eval_path", required=True, help="Path to eval JSONL")
+    dr.add_argument("--collection", dest="collection", default=None, help="Collection indexed at full dimension (full name or strategy suffix; default: question_answer)")
+    dr.add_argument("--dims", dest="dims", default="64,128,256,512", help="Comma-separated reduced dimensions")
+    dr.add_argument("--methods", dest="methods", default=",".join(REDUCTION_METHODS), help="Comma-separated reductions: truncate (= API dimensions), pca")
+    dr.add_argument("--top-k", dest="top_k", default="1,5,10", help="Comma-separated top-k values")
+    dr.add_argument("--rewrite", dest="rewrite", default="none", help="Rewrite mode applied to queries: llm, heuristic, none")
+    dr.add_argument("--fit-size", dest="fit_size", type=int, default=DEFAULT_PCA_FIT_SIZE, help="Corpus vectors the PCA projection is fitted on")
+    dr.add_argument("--hnsw", dest="hnsw", action="store_true", help="Also time a temporary Chroma (HNSW) index per cell")
+    dr.add_argument("--out", dest="out_dir", default=None, help="Output directory (default: runs/dimension_report_...)")
+    dr.add_argument("--batch-size", dest="batch_size", type=int, default=64, help="Queries embedded per API call")
+    dr.add_argument("--aliases", dest="alias_path", default=None, help="Near-duplicate alias file (faq_processed.aliases.jsonl) to resolve gold ids")
+
+    lt = sub.add_parser("load-test", parents=[common], help="Replay eval queries under concurrent load")
+    lt.add_argument("--eval", dest="eval_path", required=True, help="Path to eval JSONL (queries are replayed cyclically)")
+    lt.add_argument("--target", dest="target", choices=LOAD_TEST_TARGETS, default="search", help="search = search_merged, rag = generate_answer")
+    lt.add_argument("--mode", dest="mode", choices=LOAD_TEST_MODES, default="closed", help="closed = N concurrent clients, open = target QPS")
+    lt.add_argument("--concurrency", dest="concurrency", default="1", help="Closed loop: comma-separated client counts, one step each")
+    lt.add_argument("--qps", dest="qps", default="1", help="Open loop: comma-separated offered QPS, one step each")
+    lt.add_argument("--arrival", dest="arrival", choices=ARRIVAL_PROCESSES, default="uniform", help="Open loop arrival process")
+    lt.add_argument("--max-in-flight", dest="max_in_flight", type=int, default=256, help="Open loop: worker threads")
+    lt.add_argument("--duration-s", dest="duration_s", type=float, default=10.0, help="Seconds per step (0 = use --requests only)")
+    lt.add_argument("--requests", dest="num_requests", type=int, default=None, help="Requests per step")
+    lt.add_argument("--warmup-requests", dest="warmup_requests", type=int, default=0, help="Unrecorded requests before the first step")
+    lt.add_argument("--no-warm-up", dest="warm_up", action="store_false", default=None, help="Skip index/client warm-up before the first step (default: Config.WARMUP_ENABLED)")
+    lt.add_argument("--collections", dest="collections", default=None, help="Comma-separated collections (default: all strategy collections)")
+    lt.add_argument("--top-k", dest="top_k", type=int, default=5, help="Top-k for retrieval")
+    lt.add_argument("--threshold", dest="threshold", type=float, default=0.0, help="Similarity threshold")
+    lt.add_argument("--out", dest="out_path", default=None, help="Result JSON path (default: runs/load_test_.../result.json)")
+    lt.add_argument("--seed", dest="seed", type=int, default=0, help="Seed for Poisson arrivals")
+    lt.add_argument("--profile-every", dest="profile_every", type=int, default=0, help="Dump a stack profile of 1 in N requests (0 = off)")
+    lt.add_argument("--profile-dir", dest="profile_dir", default=None, help="Profile output directory (default: Config.PROFILE_DIR)")
 
     return p
 
@@ -30,6 +129,7 @@ def _build_parser() -> argparse.ArgumentParser:
 def main(argv: list[str] | None = None) -> int:
     p = _build_parser()
     args = p.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
 
     if args.command == "retrieval-eval":
         summary = run_retrieval_eval(
@@ -39,11 +139,101 @@ def main(argv: list[str] | None = None) -> int:
             out_dir=None if args.out_dir is None else Path(args.out_dir),
             collection_name=None if args.collection_name in (None, "") else str(args.collection_name),
             top_n_failures=int(args.top_n_failures),
+            workers=int(args.workers),
+            batch_size=int(args.batch_size),
+            ks=_parse_int_list(args.ks),
+            corpus_path=None if args.corpus_path is None else Path(args.corpus_path),
+            alias_path=None if args.alias_path is None else Path(args.alias_path),
         )
         print(f"out_dir={summary.out_dir}")
         print(f"num_samples={summary.num_samples}")
         for k, v in summary.metric_avgs.items():
             print(f"{k}={v:.6f}")
+        for k, v in summary.latency.items():
+            print(f"latency_{k}={v:.3f}")
+        for k, v in summary.throughput.items():
+            print(f"{k}={v:.3f}")
+        _write_metrics_snapshot(args.metrics_out, Path(summary.out_dir))
+        return 0
+
+    if args.command == "sweep":
+        sweep = run_retrieval_sweep(
+            eval_path=Path(args.eval_path),
+            collection_sets=None
+            if args.collections is None
+            else [_parse_str_list(v) for v in args.collections],
+            thresholds=_parse_float_list(args.thresholds),
+            ks=_parse_int_list(args.top_k) or [5],
+            rewrite_modes=_parse_str_list(args.rewrite),
+            out_dir=None if args.out_dir is None else Path(args.out_dir),
+            workers=int(args.workers),
+            batch_size=int(args.batch_size),
+            alias_path=None if args.alias_path is None else Path(args.alias_path),
+        )
+        print(f"out_dir={sweep.out_dir}")
+        print(f"num_samples={sweep.num_samples}")
+        print(f"num_configs={sweep.num_configs}")
+        for k, v in sweep.cost.items():
+            print(f"{k}={v}")
+        _write_metrics_snapshot(args.metrics_out, Path(sweep.out_dir))
+        return 0
+
+    if args.command == "dim-report":
+        report = run_dimension_report(
+            eval_path=Path(args.eval_path),
+            collection_name=args.collection,
+            dimensions=_parse_int_list(args.dims) or [],
+            methods=_parse_str_list(args.methods),
+            ks=_parse_int_list(args.top_k) or [5],
+            rewrite=str(args.rewrite),
+            out_dir=None if args.out_dir is None else Path(args.out_dir),
+            batch_size=int(args.batch_size),
+            fit_size=int(args.fit_size),
+            hnsw=bool(args.hnsw),
+            alias_path=None if args.alias_path is None else Path(args.alias_path),
+        )
+        print(f"out_dir={report.out_dir}")
+        print(f"num_vectors={report.num_vectors} full_dimensions={report.full_dimensions}")
+        for row in report.rows:
+            print(
+                f"method={row['method']} dimensions={row['dimensions']} "
+                f"vectors_mb={row['vectors_mb']:.2f} exact_p50_ms={row['exact_p50_ms']:.3f} "
+                + " ".join(f"{k}={v:.4f}" for k, v in row.items() if k.startswith(("recall@", "full_overlap@")))
+            )
+        _write_metrics_snapshot(args.metrics_out, Path(report.out_dir))
+        return 0
+
+    if args.command == "load-test":
+        if args.profile_every:
+            profiling.configure_profiling(sample_every=int(args.profile_every), out_dir=args.profile_dir)
+        result = run_load_test(
+            eval_path=Path(args.eval_path),
+            target=str(args.target),
+            mode=str(args.mode),
+            concurrency=_parse_int_list(args.concurrency) or [1],
+            qps=_parse_float_list(args.qps) or [1.0],
+            duration_s=float(args.duration_s) if args.duration_s > 0 else None,
+            num_requests=args.num_requests,
+            warmup_requests=int(args.warmup_requests),
+            warm_up=args.warm_up,
+            arrival=str(args.arrival),
+            max_in_flight=int(args.max_in_flight),
+            collections=None if args.collections is None else _parse_str_list(args.collections),
+            top_k=int(args.top_k),
+            threshold=float(args.threshold),
+            out_path=None if args.out_path is None else Path(args.out_path),
+            seed=int(args.seed),
+        )
+        print(f"out_path={result.out_path}")
+        level_key = "concurrency" if result.mode == "closed" else "offered_qps"
+        for step in result.steps:
+            lat = step["latency"]
+            print(
+                f"{level_key}={step[level_key]} achieved_qps={step['achieved_qps']:.3f} "
+                f"error_rate={step['error_rate']:.4f} p50_ms={lat['p50_ms']:.3f} "
+                f"p95_ms={lat['p95_ms']:.3f} p99_ms={lat['p99_ms']:.3f}"
+            )
+        _write_metrics_snapshot(args.metrics_out, Path(result.out_path).parent)
         return 0
 
     raise AssertionError("unreachable")
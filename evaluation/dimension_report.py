@@ -0,0 +1,320 @@
+"""
+Recall versus memory and latency of reduced-dimension embeddings.
+
+Reads the full-dimension vectors of one indexed collection, embeds the eval
+queries once, and for every (method, dimensions) cell reduces both sides the
+way the index pipeline would (Matryoshka truncation = the API `dimensions`
+output, or a PCA projection fitted on the corpus), then ranks exactly with the
+kernels in retrieval.utils. No re-embedding per dimension.
+
+문서: docs/evaluation/dimension_report.md
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from collections.abc import Sequence
+from typing import Any
+
+from evaluation.latency_stats import LatencyHistogram
+from evaluation.retrieval_dataset import iter_retrieval_eval_jsonl, load_gold_aliases
+from evaluation.retrieval_metrics import METRIC_NAMES, compute_retrieval_metrics_multi_k
+from evaluation.sweep import resolve_collection_name
+from evaluation.utils import now_ts
+from ingest.embed import get_embeddings_batch
+from ingest.reduce import DEFAULT_PCA_FIT_SIZE, PCAProjection, truncate_embeddings
+from retrieval.search import REWRITE_MODES, VectorSearch
+
+REDUCTION_METHODS = ("truncate", "pca")
+
+# Chroma get() page size when reading the stored vectors.
+_READ_PAGE = 5000
+
+
+@dataclass(frozen=True)
+class DimensionReportSummary:
+    collection: str
+    num_vectors: int
+    full_dimensions: int
+    num_samples: int
+    rows: list[dict[str, Any]]
+    out_dir: str
+
+
+def _read_collection_vectors(vs: VectorSearch, name: str) -> tuple[list[str], Any]:
+    import numpy as np
+
+    from retrieval.quantized import iter_collection_pages
+
+    if name in vs.projections:
+        raise ValueError(
+            f"{name} stores PCA-reduced vectors; re-index it at full dimension "
+            "(EMBEDDING_DIMENSIONS=0) to compare reductions"
+        )
+    if vs.shards is not None:
+        from ingest.index import create_shard_clients
+
+        # Every shard is read in turn (get() offsets are per shard).
+        sources = [client.get_collection(name=name) for client in create_shard_clients(len(vs.shards))]
+    else:
+        sources = [vs.collections[name]]
+    ids: list[str] = []
+    pages = []
+    for page_ids, page in iter_collection_pages(sources, _READ_PAGE):
+        ids.extend(page_ids)
+        pages.append(page)
+    if not ids:
+        raise ValueError(f"Collection {name} is empty")
+    return ids, np.concatenate(pages)
+
+
+def _exact_search(queries: Any, docs: Any, max_k: int) -> tuple[Any, LatencyHistogram]:
+    """Rank every document for each query, one query at a time (timed) like serving does."""
+    import numpy as np
+
+    from retrieval.utils import cosine_similarity_matrix, top_k_indices
+
+    latency = LatencyHistogram()
+    top = np.empty((len(queries), min(max_k, len(docs))), dtype=np.intp)
+    for i, query in enumerate(queries):
+        t0 = time.perf_counter()
+        top[i] = top_k_indices(cosine_similarity_matrix(query, docs, normalized=True), max_k)
+        latency.add((time.perf_counter() - t0) * 1000.0)
+    return top, latency
+
+
+def _hnsw_latency(ids: list[str], queries: Any, docs: Any, max_k: int) -> LatencyHistogram:
+    """Query latency of a throwaway Chroma (HNSW) collection holding `docs`."""
+    from ingest.index import create_chroma_client
+
+    tmp = Path(tempfile.mkdtemp(prefix="rag_dims_"))
+    try:
+        collection = create_chroma_client(str(tmp)).create_collection(
+            "dims", metadata={"hnsw:space": "cosine"}
+        )
+        for start in range(0, len(ids), _READ_PAGE):
+            collection.add(
+                ids=ids[start : start + _READ_PAGE], embeddings=docs[start : start + _READ_PAGE]
+            )
+        # Untimed first query: loads the index.
+        collection.query(query_embeddings=[queries[0].tolist()], n_results=max_k)
+        latency = LatencyHistogram()
+        for query in queries:
+            t0 = time.perf_counter()
+            collection.query(query_embeddings=[query.tolist()], n_results=max_k)
+            latency.add((time.perf_counter() - t0) * 1000.0)
+        return latency
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _reduce(
+    method: str, dimensions: int, docs: Any, queries: Any, fit_size: int
+) -> tuple[Any, Any, float | None]:
+    if method == "truncate":
+        return truncate_embeddings(docs, dimensions), truncate_embeddings(queries, dimensions), None
+    projection = PCAProjection(dimensions, fit_size=fit_size).fit(docs[:fit_size])
+    return projection.transform(docs), projection.transform(queries), projection.explained_variance_ratio
+
+
+def _score_cell(
+    method: str,
+    dimensions: int,
+    docs: Any,
+    queries: Any,
+    doc_ids: list[str],
+    gold_ids_list: list[list[str]],
+    ks: list[int],
+    reference: Any,
+    explained_variance: float | None,
+    hnsw: bool,
+) -> tuple[dict[str, Any], Any]:
+    import numpy as np
+
+    max_k = ks[-1]
+    top, latency = _exact_search(queries, docs, max_k)
+    retrieved = [[doc_ids[j] for j in row] for row in top]
+    metrics = compute_retrieval_metrics_multi_k(retrieved, gold_ids_list, ks)
+
+    row: dict[str, Any] = {
+        "method": method,
+        "dimensions": dimensions,
+        "explained_variance": "" if explained_variance is None else explained_variance,
+        "bytes_per_vector": dimensions * 4,
+        "vectors_mb": len(docs) * dimensions * 4 / 2**20,
+    }
+    for k in ks:
+        for name in METRIC_NAMES:
+            row[f"{name}@{k}"] = sum(m[f"{name}@{k}"] for m in metrics) / len(metrics)
+    # Share of the full-dimension top max_k that this cell still returns.
+    reference = top if reference is None else reference
+    overlap = [len(set(a) & set(b)) / len(b) for a, b in zip(top.tolist(), reference.tolist())]
+    row[f"full_overlap@{max_k}"] = float(np.mean(overlap))
+    exact = latency.summary()
+    row["exact_p50_ms"] = exact["p50_ms"]
+    row["exact_p95_ms"] = exact["p95_ms"]
+    if hnsw:
+        summary = _hnsw_latency(doc_ids, queries, docs, max_k).summary()
+        row["hnsw_p50_ms"] = summary["p50_ms"]
+        row["hnsw_p95_ms"] = summary["p95_ms"]
+    return row, top
+
+
+def _write_report_csv(rows: list[dict[str, Any]], path: Path) -> None:
+    columns = list(rows[0])
+    with path.open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(columns)
+        for row in rows:
+            w.writerow(
+                [f"{row[c]:.6f}" if isinstance(row[c], float) else str(row[c]) for c in columns]
+            )
+
+
+def _write_report_md(rows: list[dict[str, Any]], summary: dict[str, Any], path: Path) -> None:
+    columns = list(rows[0])
+    with path.open("w", encoding="utf-8") as f:
+        f.write("# Embedding Dimension Report\n\n")
+        f.write(
+            f"- collection: {summary['collection']}\n"
+            f"- vectors: {summary['num_vectors']} x {summary['full_dimensions']}-d\n"
+            f"- queries: {summary['num_samples']}\n\n"
+        )
+        f.write("| " + " | ".join(columns) + " |\n")
+        f.write("|" + "---|" * 2 + "---:|" * (len(columns) - 2) + "\n")
+        for row in rows:
+            cells = []
+            for c in columns:
+                v = row[c]
+                if c.endswith("_ms") or c == "vectors_mb":
+                    cells.append(f"{float(v):.2f}")
+                elif isinstance(v, float):
+                    cells.append(f"{v:.4f}")
+                else:
+                    cells.append(str(v))
+            f.write("| " + " | ".join(cells) + " |\n")
+        f.write(
+            "\nMetrics come from exact (brute-force) ranking, so differences between rows "
+            "are due to the reduction alone. `full_overlap` is the share of the full-dimension "
+            "top results each row keeps. `truncate` matches the API `dimensions` parameter "
+            "only for Matryoshka-trained models (text-embedding-3-*).\n"
+        )
+
+
+def run_dimension_report(
+    *,
+    eval_path: str | Path,
+    collection_name: str | None = None,
+    dimensions: Sequence[int] = (64, 128, 256, 512),
+    methods: Sequence[str] = REDUCTION_METHODS,
+    ks: Sequence[int] = (1, 5, 10),
+    rewrite: str = "none",
+    out_dir: str | Path | None = None,
+    batch_size: int = 64,
+    fit_size: int = DEFAULT_PCA_FIT_SIZE,
+    hnsw: bool = False,
+    alias_path: str | Path | None = None,
+) -> DimensionReportSummary:
+    """
+    Compare retrieval quality, vector memory and query latency across dimensions.
+
+    The first row is the full-dimension baseline. PCA is fitted on the first
+    fit_size corpus vectors. hnsw=True also times a temporary Chroma collection
+    per cell, which is closer to serving latency but slower to run.
+    """
+    import numpy as np
+
+    from retrieval.utils import normalize_rows
+
+    metric_ks = sorted({int(k) for k in ks})
+    if not metric_ks or metric_ks[0] <= 0:
+        raise ValueError("k must be > 0")
+    for method in methods:
+        if method not in REDUCTION_METHODS:
+            raise ValueError(f"Unknown reduction method {method!r}; expected one of {REDUCTION_METHODS}")
+    if rewrite not in REWRITE_MODES:
+        raise ValueError(f"Unknown rewrite mode {rewrite!r}; expected one of {REWRITE_MODES}")
+
+    name = resolve_collection_name(collection_name or "question_answer")
+    vs = VectorSearch(collection_name=name)
+    doc_ids, full_docs = _read_collection_vectors(vs, name)
+    full_dim = int(full_docs.shape[1])
+    cells = sorted({int(d) for d in dimensions if 0 < int(d) < full_dim})
+    if not cells:
+        raise ValueError(f"No dimensions below the stored {full_dim}")
+
+    aliases = None if alias_path is None else load_gold_aliases(alias_path)
+    samples = list(iter_retrieval_eval_jsonl(eval_path, aliases=aliases))
+    if not samples:
+        raise ValueError(f"No samples in {eval_path}")
+    texts = [vs.rewrite_query(s.query, mode=rewrite) for s in samples]
+    # Full-dimension query vectors, reduced per cell like the documents.
+    full_queries = np.asarray(
+        get_embeddings_batch(texts, batch_size=max(1, batch_size), dimensions=0), dtype=np.float32
+    )
+    gold_ids_list = [list(s.gold_ids) for s in samples]
+
+    out = Path(out_dir) if out_dir is not None else Path("runs") / f"dimension_report_{now_ts()}"
+    out.mkdir(parents=True, exist_ok=True)
+
+    baseline, reference = _score_cell(
+        "full",
+        full_dim,
+        normalize_rows(full_docs),
+        normalize_rows(full_queries),
+        doc_ids,
+        gold_ids_list,
+        metric_ks,
+        reference=None,
+        explained_variance=None,
+        hnsw=hnsw,
+    )
+    rows = [baseline]
+    for method in dict.fromkeys(methods):
+        for dim in cells:
+            docs, queries, explained = _reduce(method, dim, full_docs, full_queries, fit_size)
+            row, _ = _score_cell(
+                method,
+                dim,
+                docs,
+                queries,
+                doc_ids,
+                gold_ids_list,
+                metric_ks,
+                reference=reference,
+                explained_variance=explained,
+                hnsw=hnsw,
+            )
+            rows.append(row)
+
+    summary_obj = {
+        "collection": name,
+        "num_vectors": len(doc_ids),
+        "full_dimensions": full_dim,
+        "num_samples": len(samples),
+        "dimensions": cells,
+        "methods": list(dict.fromkeys(methods)),
+        "ks": metric_ks,
+        "rewrite": rewrite,
+        "pca_fit_size": fit_size,
+        "hnsw": hnsw,
+    }
+    _write_report_csv(rows, out / "dimension_report.csv")
+    _write_report_md(rows, summary_obj, out / "dimension_report.md")
+    (out / "summary.json").write_text(
+        json.dumps({**summary_obj, "rows": rows}, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    return DimensionReportSummary(
+        collection=name,
+        num_vectors=len(doc_ids),
+        full_dimensions=full_dim,
+        num_samples=len(samples),
+        rows=rows,
+        out_dir=str(out),
+    )
@@ -0,0 +1,110 @@
+"""
+Latency percentiles and throughput for evaluation summaries.
+
+문서: docs/evaluation/latency_stats.md
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any
+
+_SUMMARY_QUANTILES = (("p50_ms", 0.50), ("p90_ms", 0.90), ("p95_ms", 0.95), ("p99_ms", 0.99))
+
+# Values at or below this are counted in a dedicated zero bucket.
+_MIN_TRACKABLE_MS = 1e-6
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram: O(1) add, bounded memory, quantiles within relative_accuracy."""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0.0 < relative_accuracy < 1.0:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1.0 + relative_accuracy) / (1.0 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: dict[int, int] = {}
+        self._zero_count = 0
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = math.inf
+        self.max_ms = 0.0
+
+    def add(self, value_ms: float) -> None:
+        v = max(0.0, float(value_ms))
+        self.count += 1
+        self.total_ms += v
+        if v < self.min_ms:
+            self.min_ms = v
+        if v > self.max_ms:
+            self.max_ms = v
+        if v <= _MIN_TRACKABLE_MS:
+            self._zero_count += 1
+            return
+        idx = math.ceil(math.log(v) / self._log_gamma)
+        self._buckets[idx] = self._buckets.get(idx, 0) + 1
+
+    def merge(self, other: LatencyHistogram) -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge histograms with different relative_accuracy")
+        for idx, n in other._buckets.items():
+            self._buckets[idx] = self._buckets.get(idx, 0) + n
+        self._zero_count += other._zero_count
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.min_ms = min(self.min_ms, other.min_ms)
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def quantile(self, q: float) -> float:
+        if not 0.0 <= q <= 1.0:
+            raise ValueError("q must be in [0, 1]")
+        if self.count == 0:
+            return 0.0
+
+        rank = q * (self.count - 1)
+        seen = self._zero_count
+        if rank < seen:
+            return 0.0 if self.min_ms <= _MIN_TRACKABLE_MS else self.min_ms
+
+        value = self.max_ms
+        for idx in sorted(self._buckets):
+            seen += self._buckets[idx]
+            if rank < seen:
+                # Bucket idx covers (gamma^(idx-1), gamma^idx]; its midpoint estimate
+                # is within relative_accuracy of every value in the bucket.
+                value = 2.0 * math.exp(idx * self._log_gamma) / (self._gamma + 1.0)
+                break
+        return min(max(value, self.min_ms), self.max_ms)
+
+    def summary(self) -> dict[str, float]:
+        out: dict[str, float] = {
+            "count": float(self.count),
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+        }
+        for name, q in _SUMMARY_QUANTILES:
+            out[name] = self.quantile(q)
+        out["max_ms"] = self.max_ms
+        return out
+
+
+def throughput_summary(
+    num_samples: int, wall_clock_s: float, total_latency_ms: float
+) -> dict[str, float]:
+    return {
+        "wall_clock_s": wall_clock_s,
+        "qps": (num_samples / wall_clock_s) if wall_clock_s > 0 else 0.0,
+        "total_latency_s": total_latency_ms / 1000.0,
+    }
+
+
+def build_latency_section(
+    overall: LatencyHistogram,
+    by_tag: dict[str, LatencyHistogram],
+    wall_clock_s: float,
+) -> dict[str, Any]:
+    return {
+        "latency": overall.summary(),
+        "latency_by_tag": {tag: by_tag[tag].summary() for tag in sorted(by_tag)},
+        "throughput": throughput_summary(overall.count, wall_clock_s, overall.total_ms),
+    }
@@ -0,0 +1,368 @@
+"""
+Concurrency load test for retrieval and RAG generation.
+
+문서: docs/evaluation/load_test.md
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from config import Config
+from evaluation.latency_stats import LatencyHistogram
+from evaluation.retrieval_dataset import iter_retrieval_eval_jsonl
+from evaluation.sweep import default_collection_sets, resolve_collection_name
+from evaluation.utils import now_ts
+from observability import tracing
+
+LOAD_TEST_MODES = ("closed", "open")
+LOAD_TEST_TARGETS = ("search", "rag")
+ARRIVAL_PROCESSES = ("uniform", "poisson")
+
+# Open-loop worker threads; arrivals beyond this queue up (the wait counts as latency).
+_DEFAULT_MAX_IN_FLIGHT = 256
+
+
+@dataclass(frozen=True)
+class LoadTestSummary:
+    target: str
+    mode: str
+    steps: list[dict[str, Any]]
+    out_path: str
+
+
+class _StepRecorder:
+    """Thread-safe per-step aggregation: overall + per-stage histograms and errors."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latency = LatencyHistogram()
+        self.service = LatencyHistogram()
+        self.stages: dict[str, LatencyHistogram] = {}
+        self.stage_errors: dict[str, int] = {}
+        self.errors_by_type: dict[str, int] = {}
+        self.requests = 0
+        self.errors = 0
+
+    def record(
+        self,
+        start: float,
+        end: float,
+        intended_start: float,
+        trace: tracing.Trace | None,
+        error: str | None,
+    ) -> None:
+        with self._lock:
+            self.requests += 1
+            self.latency.add((end - intended_start) * 1000.0)
+            self.service.add((end - start) * 1000.0)
+            if error is not None:
+                self.errors += 1
+                self.errors_by_type[error] = self.errors_by_type.get(error, 0) + 1
+            if trace is None:
+                return
+            for name, ms in trace.timings_ms().items():
+                if name != "total":
+                    self.stages.setdefault(name, LatencyHistogram()).add(ms)
+            for s in trace.spans:
+                if "error" in s.attrs:
+                    self.stage_errors[s.name] = self.stage_errors.get(s.name, 0) + 1
+
+    def summary(self, wall_clock_s: float) -> dict[str, Any]:
+        def rate(n: int) -> float:
+            return n / wall_clock_s if wall_clock_s > 0 else 0.0
+
+        stages: dict[str, Any] = {}
+        for name in sorted(self.stages):
+            hist = self.stages[name]
+            errors = self.stage_errors.get(name, 0)
+            stages[name] = {
+                **hist.summary(),
+                "errors": errors,
+                "error_rate": errors / hist.count if hist.count else 0.0,
+                "throughput_per_s": rate(hist.count),
+            }
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": self.errors / self.requests if self.requests else 0.0,
+            "errors_by_type": dict(sorted(self.errors_by_type.items())),
+            "wall_clock_s": wall_clock_s,
+            "achieved_qps": rate(self.requests),
+            "latency": self.latency.summary(),
+            "service_latency": self.service.summary(),
+            "stages": stages,
+        }
+
+
+class _QueryCycle:
+    def __init__(self, queries: Sequence[str]):
+        self._queries = list(queries)
+        self._i = 0
+        self._lock = threading.Lock()
+
+    def next(self) -> str:
+        with self._lock:
+            q = self._queries[self._i % len(self._queries)]
+            self._i += 1
+            return q
+
+
+def _execute(
+    request_fn: Callable[[str], Any],
+    query: str,
+    intended_start: float,
+    recorder: _StepRecorder,
+) -> None:
+    error: str | None = None
+    start = time.perf_counter()
+    with tracing.record_trace("load_test.request", query=query) as trace:
+        try:
+            result = request_fn(query)
+        except Exception as e:
+            error = type(e).__name__
+        else:
+            # RAGPipeline reports LLM failures in metadata instead of raising.
+            if isinstance(result, dict) and result.get("metadata", {}).get("error"):
+                error = "GenerationError"
+    recorder.record(start, time.perf_counter(), intended_start, trace, error)
+
+
+def _run_closed_step(
+    request_fn: Callable[[str], Any],
+    queries: _QueryCycle,
+    concurrency: int,
+    duration_s: float | None,
+    num_requests: int | None,
+) -> dict[str, Any]:
+    recorder = _StepRecorder()
+    remaining: list[int | None] = [num_requests]
+    lock = threading.Lock()
+    t_start = time.perf_counter()
+    deadline = None if duration_s is None else t_start + duration_s
+
+    def client() -> None:
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if remaining[0] is not None:
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+            # Closed loop: the next request starts when the previous one finishes.
+            _execute(request_fn, queries.next(), time.perf_counter(), recorder)
+
+    threads = [
+        threading.Thread(target=client, name=f"load-client-{i}", daemon=True)
+        for i in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    out = recorder.summary(time.perf_counter() - t_start)
+    out["concurrency"] = concurrency
+    return out
+
+
+def _run_open_step(
+    request_fn: Callable[[str], Any],
+    queries: _QueryCycle,
+    qps: float,
+    duration_s: float | None,
+    num_requests: int | None,
+    arrival: str,
+    max_in_flight: int,
+    seed: int,
+) -> dict[str, Any]:
+    """
+    Dispatch requests on a fixed arrival schedule regardless of completions.
+
+    Latency is measured from each request's scheduled arrival time, so queueing
+    behind a saturated pool shows up in the percentiles (no coordinated omission);
+    service_latency excludes that wait.
+    """
+    recorder = _StepRecorder()
+    rng = random.Random(seed)
+    interval = 1.0 / qps
+    t_start = time.perf_counter()
+    next_at = t_start
+    sent = 0
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="load-open") as pool:
+        while True:
+            if num_requests is not None and sent >= num_requests:
+                break
+            if duration_s is not None and next_at - t_start >= duration_s:
+                break
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(_execute, request_fn, queries.next(), next_at, recorder)
+            sent += 1
+            next_at += rng.expovariate(qps) if arrival == "poisson" else interval
+
+    out = recorder.summary(time.perf_counter() - t_start)
+    out["offered_qps"] = qps
+    out["dispatched"] = sent
+    return out
+
+
+def run_load_steps(
+    request_fn: Callable[[str], Any],
+    queries: Sequence[str],
+    *,
+    mode: str = "closed",
+    concurrency: Sequence[int] = (1,),
+    qps: Sequence[float] = (1.0,),
+    duration_s: float | None = 10.0,
+    num_requests: int | None = None,
+    warmup_requests: int = 0,
+    arrival: str = "uniform",
+    max_in_flight: int = _DEFAULT_MAX_IN_FLIGHT,
+    seed: int = 0,
+) -> list[dict[str, Any]]:
+    """
+    Drive request_fn(query) under load, one step per concurrency (closed) or qps (open) level.
+
+    Each step runs for duration_s seconds or num_requests requests (whichever is
+    set; both may be). Ramping the level across steps exposes the saturation point:
+    achieved_qps stops growing while latency percentiles climb.
+    """
+    if mode not in LOAD_TEST_MODES:
+        raise ValueError(f"Unknown mode {mode!r}; expected one of {LOAD_TEST_MODES}")
+    if arrival not in ARRIVAL_PROCESSES:
+        raise ValueError(f"Unknown arrival {arrival!r}; expected one of {ARRIVAL_PROCESSES}")
+    if not queries:
+        raise ValueError("queries must not be empty")
+    if duration_s is None and num_requests is None:
+        raise ValueError("duration_s or num_requests is required")
+
+    cycle = _QueryCycle(queries)
+    for _ in range(max(0, warmup_requests)):
+        try:
+            request_fn(cycle.next())
+        except Exception:
+            pass
+
+    steps: list[dict[str, Any]] = []
+    if mode == "closed":
+        for n in concurrency:
+            if n <= 0:
+                raise ValueError("concurrency must be > 0")
+            steps.append(_run_closed_step(request_fn, cycle, n, duration_s, num_requests))
+    else:
+        for rate in qps:
+            if rate <= 0:
+                raise ValueError("qps must be > 0")
+            steps.append(
+                _run_open_step(
+                    request_fn, cycle, rate, duration_s, num_requests, arrival, max_in_flight, seed
+                )
+            )
+    return steps
+
+
+def _build_request_fn(
+    target: str, collections: Sequence[str], top_k: int, threshold: float, warm: bool = False
+) -> tuple[Callable[[str], Any], dict[str, Any] | None]:
+    """Request function for the target, plus the warm-up readiness when warm=True."""
+    from retrieval.rag import RAGPipeline
+    from retrieval.search import VectorSearch
+    from retrieval.warmup import warm_up
+
+    if target not in LOAD_TEST_TARGETS:
+        raise ValueError(f"Unknown target {target!r}; expected one of {LOAD_TEST_TARGETS}")
+    vs = VectorSearch(collection_name=list(collections))
+    rag = RAGPipeline(search=vs) if target == "rag" else None
+    readiness = warm_up(vs, rag).to_dict() if warm else None
+    if rag is not None:
+        return lambda q: rag.generate_answer(q, top_k=top_k, threshold=threshold), readiness
+    return lambda q: vs.search_merged(q, top_k=top_k, threshold=threshold), readiness
+
+
+def run_load_test(
+    *,
+    eval_path: str | Path,
+    target: str = "search",
+    mode: str = "closed",
+    concurrency: Sequence[int] = (1,),
+    qps: Sequence[float] = (1.0,),
+    duration_s: float | None = 10.0,
+    num_requests: int | None = None,
+    warmup_requests: int = 0,
+    warm_up: bool | None = None,
+    arrival: str = "uniform",
+    max_in_flight: int = _DEFAULT_MAX_IN_FLIGHT,
+    collections: Sequence[str] | None = None,
+    top_k: int = 5,
+    threshold: float = 0.0,
+    out_path: str | Path | None = None,
+    seed: int = 0,
+) -> LoadTestSummary:
+    """
+    Replay eval JSONL queries against search_merged (target="search") or
+    RAGPipeline.generate_answer (target="rag") and write a JSON result file.
+
+    warm_up (default Config.WARMUP_ENABLED) runs retrieval.warmup.warm_up()
+    before the first step; its readiness is stored in the result.
+    """
+    queries = [s.query for s in iter_retrieval_eval_jsonl(eval_path)]
+    names = (
+        [resolve_collection_name(n) for n in collections]
+        if collections
+        else default_collection_sets()[-1]
+    )
+    warm = Config.WARMUP_ENABLED if warm_up is None else warm_up
+    request_fn, readiness = _build_request_fn(target, names, top_k, threshold, warm=warm)
+    if readiness is not None and not readiness["ready"]:
+        failed = "; ".join(f"{st['name']}: {st['detail']}" for st in readiness["steps"] if not st["ok"])
+        raise RuntimeError(f"Warm-up {readiness['state']}: {failed}")
+
+    steps = run_load_steps(
+        request_fn,
+        queries,
+        mode=mode,
+        concurrency=concurrency,
+        qps=qps,
+        duration_s=duration_s,
+        num_requests=num_requests,
+        warmup_requests=warmup_requests,
+        arrival=arrival,
+        max_in_flight=max_in_flight,
+        seed=seed,
+    )
+
+    out = (
+        Path(out_path)
+        if out_path is not None
+        else Path("runs") / f"load_test_{now_ts()}" / "result.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    result_obj = {
+        "target": target,
+        "mode": mode,
+        "eval_path": str(eval_path),
+        "num_queries": len(queries),
+        "collections": names,
+        "top_k": top_k,
+        "threshold": threshold,
+        "duration_s": duration_s,
+        "num_requests": num_requests,
+        "warmup_requests": warmup_requests,
+        "readiness": readiness,
+        "arrival": arrival if mode == "open" else None,
+        "steps": steps,
+    }
+    out.write_text(json.dumps(result_obj, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    return LoadTestSummary(target=target, mode=mode, steps=steps, out_path=str(out))
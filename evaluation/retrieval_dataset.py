@@ -9,7 +9,7 @@ from __future__ import annotations
 import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Iterable, Iterator, Mapping, Optional
 
 
 @dataclass(frozen=True)
@@ -33,6 +33,26 @@ def _normalize_str_list(value: object, field_name: str) -> list[str]:
     raise ValueError(f"{field_name} must be a list, got {type(value).__name__}")
 
 
+def load_gold_aliases(path: str | Path) -> dict[str, str]:
+    """
+    Read a near-duplicate alias file (data/preprocess.py --dedup) as a doc id map,
+    e.g. {"faq_12": "faq_3"}, for resolving gold ids of collapsed entries.
+    """
+    from data.dedup import load_aliases
+
+    return {f"faq_{dup}": f"faq_{canonical}" for dup, canonical in load_aliases(path).items()}
+
+
+def resolve_gold_aliases(
+    sample: RetrievalEvalSample, aliases: Mapping[str, str]
+) -> RetrievalEvalSample:
+    """Map gold ids through `aliases`, dropping ids that collapse onto an earlier one."""
+    resolved = dict.fromkeys(aliases.get(g, g) for g in sample.gold_ids)
+    return RetrievalEvalSample(
+        qid=sample.qid, query=sample.query, gold_ids=tuple(resolved), tags=sample.tags
+    )
+
+
 def load_retrieval_eval_jsonl(path: str | Path) -> list[RetrievalEvalSample]:
     """
     Load retrieval eval samples from JSONL.
@@ -40,11 +60,27 @@ def load_retrieval_eval_jsonl(path: str | Path) -> list[RetrievalEvalSample]:
     Required keys per line: query, gold_ids
     Optional keys: qid, tags
     """
+    return list(iter_retrieval_eval_jsonl(path))
+
+
+def iter_retrieval_eval_jsonl(
+    path: str | Path, aliases: Mapping[str, str] | None = None
+) -> Iterator[RetrievalEvalSample]:
+    """
+    Stream retrieval eval samples from JSONL (same validation as load_retrieval_eval_jsonl).
+
+    The file's existence is checked immediately; lines are parsed lazily.
+    With `aliases` (load_gold_aliases()), gold ids are resolved to canonical ids.
+    """
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(str(p))
+    if aliases:
+        return (resolve_gold_aliases(s, aliases) for s in _iter_samples(p))
+    return _iter_samples(p)
+
 
-    samples: list[RetrievalEvalSample] = []
+def _iter_samples(p: Path) -> Iterator[RetrievalEvalSample]:
     with p.open("r", encoding="utf-8") as f:
         for idx, line in enumerate(f):
             raw = line.strip()
@@ -74,17 +110,13 @@ def load_retrieval_eval_jsonl(path: str | Path) -> list[RetrievalEvalSample]:
 
             tags_list = _normalize_str_list(obj.get("tags"), "tags")
 
-            samples.append(
-                RetrievalEvalSample(
-                    qid=qid,
-                    query=query.strip(),
-                    gold_ids=tuple(gold_ids_list),
-                    tags=tuple(tags_list),
-                )
+            yield RetrievalEvalSample(
+                qid=qid,
+                query=query.strip(),
+                gold_ids=tuple(gold_ids_list),
+                tags=tuple(tags_list),
             )
 
-    return samples
-
 
 def iter_jsonl_lines(path: str | Path) -> Iterable[dict]:
     """
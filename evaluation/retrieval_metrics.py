@@ -7,7 +7,12 @@ Retrieval metrics for label-based evaluation.
 from __future__ import annotations
 
 import math
-from typing import Iterable
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    # Imported by the vectorized functions only, keeping `import evaluation` light.
+    import numpy as np
 
 
 def _dcg_binary(rels: list[int]) -> float:
@@ -61,3 +66,87 @@ def compute_retrieval_metrics(
     }
 
 
+METRIC_NAMES = ("hit", "recall", "precision", "mrr", "ndcg")
+
+
+def metric_keys_for(ks: Sequence[int]) -> list[str]:
+    """Metric keys in report order: all metrics @k for each k in ks."""
+    return [f"{name}@{k}" for k in ks for name in METRIC_NAMES]
+
+
+def build_relevance_matrix(
+    retrieved_ids_list: Sequence[Sequence[str]],
+    gold_ids_list: Sequence[Iterable[str]],
+    max_k: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Binary relevance matrix for a batch of samples.
+
+    Returns (rel, num_gold) where rel[i, r] is 1.0 when the (r+1)-th retrieved id of
+    sample i is a gold id (0.0 for misses and for ranks past the retrieved list),
+    and num_gold[i] is the number of distinct gold ids of sample i.
+    """
+    if max_k <= 0:
+        raise ValueError("k must be > 0")
+    if len(retrieved_ids_list) != len(gold_ids_list):
+        raise ValueError("retrieved_ids_list and gold_ids_list must have the same length")
+
+    import numpy as np
+
+    n = len(retrieved_ids_list)
+    rel = np.zeros((n, max_k), dtype=np.float64)
+    num_gold = np.zeros(n, dtype=np.float64)
+    for i, (retrieved_ids, gold_ids) in enumerate(zip(retrieved_ids_list, gold_ids_list)):
+        gold_set = {str(x) for x in gold_ids}
+        if len(gold_set) == 0:
+            raise ValueError("gold_ids must be non-empty")
+        num_gold[i] = len(gold_set)
+        for r, doc_id in enumerate(retrieved_ids[:max_k]):
+            if str(doc_id) in gold_set:
+                rel[i, r] = 1.0
+    return rel, num_gold
+
+
+def compute_retrieval_metrics_multi_k(
+    retrieved_ids_list: Sequence[Sequence[str]],
+    gold_ids_list: Sequence[Iterable[str]],
+    ks: Sequence[int],
+) -> list[dict[str, float]]:
+    """
+    Compute metrics for many samples and several cutoffs in one vectorized pass.
+
+    Retrieve once at max(ks) and pass the ranked ids here; the result for each
+    sample equals merging compute_retrieval_metrics(retrieved_ids, gold_ids, k)
+    over every k in ks.
+    """
+    ks = sorted({int(k) for k in ks})
+    if not ks or ks[0] <= 0:
+        raise ValueError("k must be > 0")
+
+    import numpy as np
+
+    max_k = ks[-1]
+    rel, num_gold = build_relevance_matrix(retrieved_ids_list, gold_ids_list, max_k)
+    n = rel.shape[0]
+    if n == 0:
+        return []
+
+    discounts = 1.0 / np.log2(np.arange(2, max_k + 2, dtype=np.float64))
+    ideal_dcg = np.cumsum(discounts)
+    cum_hits = np.cumsum(rel, axis=1)
+    # Rank (1-based) of the first hit; max_k + 1 when there is none.
+    first_hit = np.where(rel.any(axis=1), rel.argmax(axis=1) + 1, max_k + 1)
+
+    columns: dict[str, np.ndarray] = {}
+    for k in ks:
+        intersection = cum_hits[:, k - 1]
+        dcg = rel[:, :k] @ discounts[:k]
+        idcg = ideal_dcg[np.minimum(num_gold, k).astype(np.int64) - 1]
+        columns[f"hit@{k}"] = (intersection > 0).astype(np.float64)
+        columns[f"recall@{k}"] = intersection / num_gold
+        columns[f"precision@{k}"] = intersection / float(k)
+        columns[f"mrr@{k}"] = np.where(first_hit <= k, 1.0 / first_hit, 0.0)
+        columns[f"ndcg@{k}"] = dcg / idcg
+
+    keys = metric_keys_for(ks)
+    return [{key: float(columns[key][i]) for key in keys} for i in range(n)]
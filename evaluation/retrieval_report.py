@@ -7,11 +7,17 @@ Report generation for retrieval evaluation.
 from __future__ import annotations
 
 import csv
+import heapq
 import json
+import math
 from dataclasses import dataclass
 from pathlib import Path
-from statistics import mean, pstdev
-from typing import Any, Iterable
+from typing import TYPE_CHECKING, Any, Iterable
+
+from evaluation.retrieval_dataset import iter_jsonl_lines
+
+if TYPE_CHECKING:
+    from data.corpus import ArrowCorpus
 
 
 @dataclass(frozen=True)
@@ -21,39 +27,172 @@ class AggregateMetric:
     std: float
 
 
-def _safe_mean(values: list[float]) -> float:
-    return 0.0 if len(values) == 0 else float(mean(values))
+class RunningStat:
+    """Welford online mean / population std in O(1) memory."""
+
+    __slots__ = ("count", "mean", "_m2")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        # population std; for 0/1 element streams return 0
+        return 0.0 if self.count <= 1 else math.sqrt(max(0.0, self._m2 / self.count))
 
 
-def _safe_std(values: list[float]) -> float:
-    # population std; for 0/1 element lists return 0
-    return 0.0 if len(values) <= 1 else float(pstdev(values))
+class MetricAccumulator:
+    """Streaming per-metric mean/std over per-sample rows."""
 
+    def __init__(self, metric_keys: list[str]):
+        self.metric_keys = list(metric_keys)
+        self._stats = {key: RunningStat() for key in self.metric_keys}
+        self.num_rows = 0
 
-def aggregate_metrics(per_sample: list[dict[str, Any]], metric_keys: list[str]) -> list[AggregateMetric]:
-    metrics: list[AggregateMetric] = []
-    for key in metric_keys:
-        vals: list[float] = []
-        for row in per_sample:
-            v = row.get("metrics", {}).get(key)
+    def add_row(self, row: dict[str, Any]) -> None:
+        self.num_rows += 1
+        metrics = row.get("metrics", {})
+        for key, stat in self._stats.items():
+            v = metrics.get(key)
             if isinstance(v, (int, float)):
-                vals.append(float(v))
-        metrics.append(AggregateMetric(name=key, avg=_safe_mean(vals), std=_safe_std(vals)))
-    return metrics
+                stat.add(float(v))
+
+    def aggregates(self) -> list[AggregateMetric]:
+        return [
+            AggregateMetric(name=key, avg=self._stats[key].mean, std=self._stats[key].std)
+            for key in self.metric_keys
+        ]
+
+
+class WorstSamples:
+    """Keep the n rows with the lowest `sort_by` metric (bounded heap, stable on ties)."""
+
+    def __init__(self, n: int, sort_by: str | None):
+        self.n = max(0, n)
+        self.sort_by = sort_by
+        self._heap: list[tuple[float, int, dict[str, Any]]] = []
+        self._seq = 0
+
+    def add(self, row: dict[str, Any]) -> None:
+        if self.n == 0:
+            return
+        score = (
+            float(row.get("metrics", {}).get(self.sort_by, 0.0)) if self.sort_by else 0.0
+        )
+        # Max-heap on (score, seq) via negation: the root is the entry to evict next.
+        item = (-score, -self._seq, row)
+        self._seq += 1
+        if len(self._heap) < self.n:
+            heapq.heappush(self._heap, item)
+        elif item[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, item)
+
+    def rows(self) -> list[dict[str, Any]]:
+        return [row for _, _, row in sorted(self._heap, key=lambda t: (-t[0], -t[1]))]
+
+
+def aggregate_metrics(per_sample: Iterable[dict[str, Any]], metric_keys: list[str]) -> list[AggregateMetric]:
+    acc = MetricAccumulator(metric_keys)
+    for row in per_sample:
+        acc.add_row(row)
+    return acc.aggregates()
+
+
+_LATENCY_COLUMNS = ("count", "mean_ms", "p50_ms", "p90_ms", "p95_ms", "p99_ms", "max_ms")
+
+
+def _latency_csv_rows(latency: dict[str, Any]) -> list[list[str]]:
+    # Same (metric, avg, std) layout as quality metrics; std is not applicable.
+    rows: list[list[str]] = []
+    scopes: list[tuple[str, dict[str, float]]] = [("", latency.get("latency", {}))]
+    for tag, stats in latency.get("latency_by_tag", {}).items():
+        scopes.append((f"[tag={tag}]", stats))
+    for suffix, stats in scopes:
+        for col in _LATENCY_COLUMNS:
+            if col in stats:
+                rows.append([f"latency_{col}{suffix}", f"{float(stats[col]):.6f}", ""])
+    for key, value in latency.get("throughput", {}).items():
+        rows.append([key, f"{float(value):.6f}", ""])
+    return rows
+
+
+def _write_latency_md(f: Any, latency: dict[str, Any]) -> None:
+    f.write("## Latency\n\n")
+    f.write("| scope | " + " | ".join(_LATENCY_COLUMNS) + " |\n")
+    f.write("|---|" + "---:|" * len(_LATENCY_COLUMNS) + "\n")
+    scopes: list[tuple[str, dict[str, float]]] = [("all", latency.get("latency", {}))]
+    for tag, stats in latency.get("latency_by_tag", {}).items():
+        scopes.append((f"tag: {tag}", stats))
+    for scope, stats in scopes:
+        cells = []
+        for col in _LATENCY_COLUMNS:
+            v = float(stats.get(col, 0.0))
+            cells.append(f"{int(v)}" if col == "count" else f"{v:.2f}")
+        f.write(f"| {scope} | " + " | ".join(cells) + " |\n")
+    f.write("\n")
+
+    throughput = latency.get("throughput", {})
+    if throughput:
+        f.write(f"- wall_clock_s: {float(throughput.get('wall_clock_s', 0.0)):.3f}\n")
+        f.write(f"- qps: {float(throughput.get('qps', 0.0)):.3f}\n")
+        f.write(f"- total_latency_s: {float(throughput.get('total_latency_s', 0.0)):.3f}\n\n")
+
+
+def _questions_for(corpus: ArrowCorpus, doc_ids: list[str]) -> list[str | None]:
+    # Chroma doc ids are "faq_<id>"; the corpus is keyed by the bare id.
+    out: list[str | None] = []
+    for doc_id in doc_ids:
+        entry = corpus.get(doc_id[len("faq_"):] if doc_id.startswith("faq_") else doc_id)
+        out.append(None if entry is None else entry["question"])
+    return out
 
 
 def write_retrieval_report(
     *,
-    per_sample: list[dict[str, Any]],
+    per_sample: Iterable[dict[str, Any]] | None = None,
+    per_sample_path: str | Path | None = None,
     out_dir: str | Path,
     metric_keys: list[str],
     top_n_failures: int = 20,
     sort_by: str | None = None,
+    latency: dict[str, Any] | None = None,
+    corpus: ArrowCorpus | None = None,
 ) -> dict[str, Any]:
+    """
+    Write report.csv / report.md in one streaming pass over the per-sample rows.
+
+    Rows come from `per_sample` (any iterable) or are read from `per_sample_path`
+    (per_sample.jsonl); memory stays bounded by top_n_failures either way.
+    With a processed `corpus` (data/corpus.py), worst samples also list the gold
+    and retrieved questions, looked up by id.
+    """
+    if per_sample is None:
+        if per_sample_path is None:
+            raise ValueError("per_sample or per_sample_path is required")
+        per_sample = iter_jsonl_lines(per_sample_path)
+
     out = Path(out_dir)
     out.mkdir(parents=True, exist_ok=True)
 
-    aggregates = aggregate_metrics(per_sample, metric_keys)
+    if sort_by is None:
+        sort_by = metric_keys[0] if metric_keys else None
+
+    acc = MetricAccumulator(metric_keys)
+    worst_samples = WorstSamples(top_n_failures, sort_by)
+    for row in per_sample:
+        acc.add_row(row)
+        worst_samples.add(row)
+
+    aggregates = acc.aggregates()
+    worst = worst_samples.rows()
 
     # CSV summary
     csv_path = out / "report.csv"
@@ -62,24 +201,13 @@ def write_retrieval_report(
         w.writerow(["metric", "avg", "std"])
         for m in aggregates:
             w.writerow([m.name, f"{m.avg:.6f}", f"{m.std:.6f}"])
-
-    # Failures
-    if sort_by is None:
-        sort_by = metric_keys[0] if metric_keys else None
-
-    failures = per_sample
-    if sort_by:
-        failures = sorted(
-            per_sample,
-            key=lambda r: float(r.get("metrics", {}).get(sort_by, 0.0)),
-        )
-
-    worst = failures[: max(0, top_n_failures)]
+        if latency:
+            w.writerows(_latency_csv_rows(latency))
 
     md_path = out / "report.md"
     with md_path.open("w", encoding="utf-8") as f:
         f.write("# Retrieval Eval Report\n\n")
-        f.write(f"- samples: {len(per_sample)}\n\n")
+        f.write(f"- samples: {acc.num_rows}\n\n")
         f.write("## Aggregate\n\n")
         f.write("| metric | avg | std |\n")
         f.write("|---|---:|---:|\n")
@@ -87,6 +215,9 @@ def write_retrieval_report(
             f.write(f"| {m.name} | {m.avg:.6f} | {m.std:.6f} |\n")
         f.write("\n")
 
+        if latency:
+            _write_latency_md(f, latency)
+
         if sort_by:
             f.write(f"## Worst samples (sorted by `{sort_by}`)\n\n")
         else:
@@ -102,6 +233,9 @@ def write_retrieval_report(
             f.write(f"- query: {query}\n")
             f.write(f"- gold_ids: {gold_ids}\n")
             f.write(f"- retrieved_ids: {retrieved_ids}\n")
+            if corpus is not None:
+                f.write(f"- gold_questions: {_questions_for(corpus, gold_ids)}\n")
+                f.write(f"- retrieved_questions: {_questions_for(corpus, retrieved_ids)}\n")
             f.write(f"- metrics: {metrics}\n\n")
 
     return {
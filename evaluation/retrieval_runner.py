@@ -6,15 +6,26 @@ Runner for label-based retrieval evaluation.
 
 from __future__ import annotations
 
+import contextlib
 import json
 import time
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Optional
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any
 
-from evaluation.retrieval_dataset import RetrievalEvalSample, load_retrieval_eval_jsonl
-from evaluation.retrieval_metrics import compute_retrieval_metrics
-from evaluation.retrieval_report import write_retrieval_report
+from data.corpus import ArrowCorpus
+from evaluation.latency_stats import LatencyHistogram, build_latency_section
+from evaluation.retrieval_dataset import (
+    RetrievalEvalSample,
+    iter_retrieval_eval_jsonl,
+    load_gold_aliases,
+)
+from evaluation.retrieval_metrics import compute_retrieval_metrics_multi_k, metric_keys_for
+from evaluation.retrieval_report import MetricAccumulator, write_retrieval_report
+from evaluation.utils import chunks, now_ts, timed
+from ingest.embed import get_embeddings_batch
 from retrieval.search import VectorSearch
 
 
@@ -25,10 +36,120 @@ class RetrievalEvalSummary:
     num_samples: int
     metric_avgs: dict[str, float]
     out_dir: str
+    latency: dict[str, float] = field(default_factory=dict)
+    throughput: dict[str, float] = field(default_factory=dict)
 
 
-def _now_ts() -> str:
-    return time.strftime("%Y%m%d_%H%M%S")
+# (sample, merged results, latency_ms) as produced by the retrieval stage.
+_Retrieved = tuple[RetrievalEvalSample, list[dict[str, Any]], float]
+
+_SCORE_CHUNK_SIZE = 1024
+
+
+def _build_row(
+    s: RetrievalEvalSample,
+    results: list[dict[str, Any]],
+    max_k: int,
+    metrics: dict[str, float],
+    dt_ms: float,
+) -> dict[str, Any]:
+    retrieved_ids: list[str] = [str(r.get("id")) for r in results if "id" in r]
+
+    retrieved_compact = [
+        {"id": str(r.get("id")), "similarity": float(r.get("similarity", 0.0))}
+        for r in results
+        if "id" in r
+    ]
+
+    return {
+        "qid": s.qid,
+        "query": s.query,
+        "gold_ids": list(s.gold_ids),
+        "tags": list(s.tags),
+        "retrieved_ids": retrieved_ids[:max_k],
+        "retrieved": retrieved_compact[:max_k],
+        "metrics": metrics,
+        "latency_ms": dt_ms,
+    }
+
+
+def _score_chunk(chunk: list[_Retrieved], ks: list[int]) -> list[dict[str, Any]]:
+    retrieved_ids_list = [
+        [str(r.get("id")) for r in results if "id" in r] for _, results, _ in chunk
+    ]
+    metrics_list = compute_retrieval_metrics_multi_k(
+        retrieved_ids_list, [s.gold_ids for s, _, _ in chunk], ks
+    )
+    return [
+        _build_row(s, results, ks[-1], metrics, dt_ms)
+        for (s, results, dt_ms), metrics in zip(chunk, metrics_list)
+    ]
+
+
+def _iter_scored_rows(
+    retrieved: Iterable[_Retrieved], ks: list[int]
+) -> Iterator[dict[str, Any]]:
+    """Score retrieved samples in vectorized chunks for every k, preserving order."""
+    chunk: list[_Retrieved] = []
+    for item in retrieved:
+        chunk.append(item)
+        if len(chunk) >= _SCORE_CHUNK_SIZE:
+            yield from _score_chunk(chunk, ks)
+            chunk = []
+    if chunk:
+        yield from _score_chunk(chunk, ks)
+
+
+def _iter_retrieved_serial(
+    vs: VectorSearch, samples: Iterable[RetrievalEvalSample], top_k: int, threshold: float
+) -> Iterator[_Retrieved]:
+    for s in samples:
+        t0 = time.perf_counter()
+        results = vs.search_merged(s.query, top_k=top_k, threshold=threshold)
+        dt_ms = (time.perf_counter() - t0) * 1000.0
+        yield s, results, dt_ms
+
+
+def _iter_retrieved_batched(
+    vs: VectorSearch,
+    samples: Iterable[RetrievalEvalSample],
+    top_k: int,
+    threshold: float,
+    workers: int,
+    batch_size: int,
+) -> Iterator[_Retrieved]:
+    """
+    Rewrite and retrieve concurrently, embed queries one API call per batch.
+
+    Results are yielded in the original sample order. Per-sample latency_ms is the
+    sample's own rewrite + retrieval time plus its equal share of the batch
+    embedding call, i.e. the cost attributable to that query.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for batch in chunks(samples, max(1, batch_size)):
+            rewrites = list(pool.map(lambda s: timed(vs.rewrite_query, s.query), batch))
+            rewritten = [q for q, _ in rewrites]
+
+            embeddings, embed_ms = timed(
+                get_embeddings_batch, rewritten, batch_size=len(rewritten)
+            )
+            embed_share_ms = embed_ms / float(len(batch))
+
+            searches = list(
+                pool.map(
+                    lambda pair: timed(
+                        vs.search_merged_by_embedding,
+                        pair[0],
+                        top_k=top_k,
+                        threshold=threshold,
+                        query_label=pair[1],
+                    ),
+                    zip(embeddings, rewritten),
+                )
+            )
+
+            for s, (_, rewrite_ms), (results, search_ms) in zip(batch, rewrites, searches):
+                yield s, results, rewrite_ms + embed_share_ms + search_ms
 
 
 def run_retrieval_eval(
@@ -39,89 +160,115 @@ def run_retrieval_eval(
     out_dir: str | Path | None = None,
     collection_name: str | None = None,
     top_n_failures: int = 20,
+    workers: int = 1,
+    batch_size: int = 1,
+    ks: Sequence[int] | None = None,
+    corpus_path: str | Path | None = None,
+    alias_path: str | Path | None = None,
 ) -> RetrievalEvalSummary:
-    samples = load_retrieval_eval_jsonl(eval_path)
+    """
+    Run label-based retrieval evaluation.
+
+    With workers > 1 or batch_size > 1, queries are embedded batch_size at a time
+    and rewrite/retrieval run on `workers` threads; per_sample.jsonl keeps the
+    original order and rankings match the serial run.
+
+    With ks (e.g. [1, 3, 5, 10]), retrieval runs once at max(ks) and metrics are
+    computed for every k, and top_k is not used (the CLI refuses --top-k with
+    --ks); otherwise metrics are computed at top_k only.
+
+    corpus_path (an Arrow processed corpus) adds gold/retrieved questions to the
+    report's worst samples. alias_path (faq_processed.aliases.jsonl) resolves
+    gold ids of collapsed near-duplicates to their canonical entries.
+    """
+    metric_ks = sorted({int(k) for k in ks}) if ks else [int(top_k)]
+    if metric_ks[0] <= 0:
+        raise ValueError("k must be > 0")
+    top_k = metric_ks[-1]
+
+    aliases = None if alias_path is None else load_gold_aliases(alias_path)
+    samples = iter_retrieval_eval_jsonl(eval_path, aliases=aliases)
 
     out = (
         Path(out_dir)
         if out_dir is not None
-        else Path("runs") / f"retrieval_eval_{_now_ts()}"
+        else Path("runs") / f"retrieval_eval_{now_ts()}"
     )
     out.mkdir(parents=True, exist_ok=True)
 
     vs = VectorSearch(collection_name=collection_name)
 
     per_sample_path = out / "per_sample.jsonl"
-    per_sample_rows: list[dict[str, Any]] = []
-
-    metric_keys = [
-        f"hit@{top_k}",
-        f"recall@{top_k}",
-        f"precision@{top_k}",
-        f"mrr@{top_k}",
-        f"ndcg@{top_k}",
-    ]
 
-    with per_sample_path.open("w", encoding="utf-8") as f:
-        for s in samples:
-            t0 = time.perf_counter()
-            results = vs.search_merged(s.query, top_k=top_k, threshold=threshold)
-            dt_ms = (time.perf_counter() - t0) * 1000.0
-
-            retrieved_ids: list[str] = [str(r.get("id")) for r in results if "id" in r]
-            metrics = compute_retrieval_metrics(
-                retrieved_ids=retrieved_ids, gold_ids=s.gold_ids, k=top_k
-            )
+    metric_keys = metric_keys_for(metric_ks)
+    metric_acc = MetricAccumulator(metric_keys)
+
+    retrieved: Iterator[_Retrieved]
+    if workers > 1 or batch_size > 1:
+        retrieved = _iter_retrieved_batched(
+            vs, samples, top_k, threshold, workers, batch_size
+        )
+    else:
+        retrieved = _iter_retrieved_serial(vs, samples, top_k, threshold)
+    rows = _iter_scored_rows(retrieved, metric_ks)
+
+    latency_overall = LatencyHistogram()
+    latency_by_tag: dict[str, LatencyHistogram] = {}
 
-            retrieved_compact = [
-                {"id": str(r.get("id")), "similarity": float(r.get("similarity", 0.0))}
-                for r in results
-                if "id" in r
-            ]
-
-            row = {
-                "qid": s.qid,
-                "query": s.query,
-                "gold_ids": list(s.gold_ids),
-                "tags": list(s.tags),
-                "retrieved_ids": retrieved_ids[:top_k],
-                "retrieved": retrieved_compact[:top_k],
-                "metrics": metrics,
-                "latency_ms": dt_ms,
-            }
-            per_sample_rows.append(row)
+    t_start = time.perf_counter()
+    with per_sample_path.open("w", encoding="utf-8") as f:
+        for row in rows:
+            metric_acc.add_row(row)
             f.write(json.dumps(row, ensure_ascii=False) + "\n")
 
+            latency_overall.add(row["latency_ms"])
+            for tag in row["tags"]:
+                latency_by_tag.setdefault(tag, LatencyHistogram()).add(row["latency_ms"])
+    wall_clock_s = time.perf_counter() - t_start
+
+    latency_section = build_latency_section(latency_overall, latency_by_tag, wall_clock_s)
+
     # summary.json
-    metric_avgs: dict[str, float] = {}
-    for key in metric_keys:
-        vals = [float(r["metrics"].get(key, 0.0)) for r in per_sample_rows]
-        metric_avgs[key] = sum(vals) / float(len(vals)) if vals else 0.0
+    metric_avgs = {m.name: m.avg for m in metric_acc.aggregates()}
 
     summary_obj = {
         "k": top_k,
+        "ks": metric_ks,
         "threshold": threshold,
-        "num_samples": len(per_sample_rows),
+        "num_samples": metric_acc.num_rows,
+        "workers": workers,
+        "batch_size": batch_size,
         "metric_avgs": metric_avgs,
+        **latency_section,
         "per_sample_path": str(per_sample_path),
     }
     (out / "summary.json").write_text(
         json.dumps(summary_obj, ensure_ascii=False, indent=2), encoding="utf-8"
     )
 
-    # report
-    write_retrieval_report(
-        per_sample=per_sample_rows,
-        out_dir=out,
-        metric_keys=metric_keys,
-        top_n_failures=top_n_failures,
-        sort_by=f"mrr@{top_k}",
-    )
+    # report (streams per_sample.jsonl back; constant memory)
+    with contextlib.ExitStack() as stack:
+        corpus = (
+            None
+            if corpus_path is None
+            else stack.enter_context(ArrowCorpus(corpus_path))
+        )
+        write_retrieval_report(
+            per_sample_path=per_sample_path,
+            out_dir=out,
+            metric_keys=metric_keys,
+            top_n_failures=top_n_failures,
+            sort_by=f"mrr@{top_k}",
+            latency=latency_section,
+            corpus=corpus,
+        )
 
     return RetrievalEvalSummary(
         k=top_k,
         threshold=threshold,
-        num_samples=len(per_sample_rows),
+        num_samples=metric_acc.num_rows,
         metric_avgs=metric_avgs,
         out_dir=str(out),
+        latency=latency_section["latency"],
+        throughput=latency_section["throughput"],
     )
@@ -0,0 +1,345 @@
+"""
+Experiment-matrix sweep over retrieval configurations.
+
+문서: docs/evaluation/sweep.md
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from collections.abc import Sequence
+from typing import Any
+
+from config import Config
+from evaluation.latency_stats import LatencyHistogram
+from evaluation.retrieval_dataset import (
+    RetrievalEvalSample,
+    iter_retrieval_eval_jsonl,
+    load_gold_aliases,
+)
+from evaluation.retrieval_metrics import METRIC_NAMES, compute_retrieval_metrics_multi_k
+from evaluation.utils import chunks, now_ts, timed
+from ingest.embed import get_embeddings_batch
+from retrieval.search import REWRITE_MODES, VectorSearch, merge_candidates
+
+STRATEGY_SUFFIXES = ("question", "answer", "question_answer")
+
+_LATENCY_KEYS = ("mean_ms", "p50_ms", "p95_ms", "p99_ms")
+
+
+@dataclass(frozen=True)
+class SweepConfig:
+    """One grid cell, minus top_k (every k is scored from the same ranking)."""
+
+    collections: tuple[str, ...]
+    rewrite: str
+    threshold: float
+
+    @property
+    def label(self) -> str:
+        return "+".join(name.split("__", 1)[-1] for name in self.collections)
+
+
+@dataclass(frozen=True)
+class RetrievalSweepSummary:
+    num_samples: int
+    num_configs: int
+    rows: list[dict[str, Any]]
+    out_dir: str
+    cost: dict[str, int] = field(default_factory=dict)
+
+
+def resolve_collection_name(name: str) -> str:
+    """Map a strategy suffix (e.g. "question") to its full collection name."""
+    name = name.strip()
+    if "__" in name or name == Config.CHROMA_COLLECTION_NAME:
+        return name
+    return f"{Config.CHROMA_COLLECTION_NAME}__{name}"
+
+
+def default_collection_sets() -> list[list[str]]:
+    """Each embedding-strategy collection alone, then all of them merged."""
+    names = [resolve_collection_name(s) for s in STRATEGY_SUFFIXES]
+    return [[name] for name in names] + [names]
+
+
+class _ConfigAccumulator:
+    def __init__(self, metric_keys: list[str]):
+        self.metric_sums = {key: 0.0 for key in metric_keys}
+        self.latency = LatencyHistogram()
+        self.count = 0
+
+
+def _score_configs_for_chunk(
+    chunk: list[RetrievalEvalSample],
+    configs: list[SweepConfig],
+    rewritten: dict[str, list[tuple[str, float]]],
+    candidates: dict[tuple[str, str], tuple[list[dict[str, Any]], float]],
+    embed_share_ms: float,
+    ks: list[int],
+    accumulators: dict[SweepConfig, _ConfigAccumulator],
+) -> None:
+    # NumPy is loaded on first use so importing the CLI stays cheap.
+    import numpy as np
+
+    from retrieval.utils import threshold_mask
+
+    gold_ids_list = [s.gold_ids for s in chunk]
+    # Configs differing only in threshold share one merge at the lowest
+    # threshold: the merged ranking is sorted by similarity, so a higher
+    # threshold keeps a prefix of it (found with a vectorized mask).
+    groups: dict[tuple[tuple[str, ...], str], list[SweepConfig]] = {}
+    for cfg in configs:
+        groups.setdefault((cfg.collections, cfg.rewrite), []).append(cfg)
+
+    for (collections, rewrite), group in groups.items():
+        thresholds = [cfg.threshold for cfg in group]
+        threshold_column = np.asarray(thresholds, dtype=np.float64)[:, None]
+        retrieved: list[list[list[str]]] = [[] for _ in group]
+        for text, rewrite_ms in rewritten[rewrite]:
+            per_collection = [candidates[(text, name)] for name in collections]
+            merged = merge_candidates(
+                [cands for cands, _ in per_collection],
+                top_k=sum(len(cands) for cands, _ in per_collection),
+                threshold=min(thresholds),
+            )
+            ids = [str(r["id"]) for r in merged]
+            if len(group) == 1:
+                kept = [len(ids)]
+            else:
+                similarities = np.fromiter(
+                    (r["similarity"] for r in merged), dtype=np.float64, count=len(merged)
+                )
+                # (thresholds, candidates) mask; row sums are the kept prefix lengths.
+                kept = threshold_mask(similarities[None, :], threshold_column).sum(axis=1)
+            # Modeled cost of serving this query with this configuration alone.
+            latency_ms = rewrite_ms + embed_share_ms + sum(ms for _, ms in per_collection)
+            for i, cfg in enumerate(group):
+                retrieved[i].append(ids[: min(int(kept[i]), ks[-1])])
+                accumulators[cfg].latency.add(latency_ms)
+
+        for cfg, retrieved_ids_list in zip(group, retrieved):
+            acc = accumulators[cfg]
+            for metrics in compute_retrieval_metrics_multi_k(retrieved_ids_list, gold_ids_list, ks):
+                for key, value in metrics.items():
+                    acc.metric_sums[key] += value
+            acc.count += len(chunk)
+
+
+def _build_rows(
+    configs: list[SweepConfig],
+    accumulators: dict[SweepConfig, _ConfigAccumulator],
+    ks: list[int],
+) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    for cfg in configs:
+        acc = accumulators[cfg]
+        latency = acc.latency.summary()
+        for k in ks:
+            row: dict[str, Any] = {
+                "collections": cfg.label,
+                "rewrite": cfg.rewrite,
+                "threshold": cfg.threshold,
+                "k": k,
+            }
+            for name in METRIC_NAMES:
+                total = acc.metric_sums.get(f"{name}@{k}", 0.0)
+                row[name] = total / float(acc.count) if acc.count else 0.0
+            for key in _LATENCY_KEYS:
+                row[f"latency_{key}"] = latency[key]
+            rows.append(row)
+    return rows
+
+
+def _row_columns() -> list[str]:
+    return (
+        ["collections", "rewrite", "threshold", "k"]
+        + list(METRIC_NAMES)
+        + [f"latency_{key}" for key in _LATENCY_KEYS]
+    )
+
+
+def _write_sweep_csv(rows: list[dict[str, Any]], path: Path) -> None:
+    columns = _row_columns()
+    with path.open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(columns)
+        for row in rows:
+            w.writerow(
+                [
+                    f"{row[c]:.6f}" if isinstance(row[c], float) else str(row[c])
+                    for c in columns
+                ]
+            )
+
+
+def _write_sweep_md(rows: list[dict[str, Any]], cost: dict[str, int], path: Path) -> None:
+    columns = _row_columns()
+    with path.open("w", encoding="utf-8") as f:
+        f.write("# Retrieval Sweep\n\n")
+        f.write("| " + " | ".join(columns) + " |\n")
+        f.write("|" + "---|" * 4 + "---:|" * (len(columns) - 4) + "\n")
+        for row in rows:
+            cells = []
+            for c in columns:
+                v = row[c]
+                if c.startswith("latency_"):
+                    cells.append(f"{float(v):.2f}")
+                elif isinstance(v, float) and c != "threshold":
+                    cells.append(f"{v:.4f}")
+                else:
+                    cells.append(str(v))
+            f.write("| " + " | ".join(cells) + " |\n")
+        f.write("\n")
+
+        f.write("## Shared work\n\n")
+        for key, value in cost.items():
+            f.write(f"- {key}: {value}\n")
+        f.write("\n")
+
+
+def run_retrieval_sweep(
+    *,
+    eval_path: str | Path,
+    collection_sets: Sequence[Sequence[str]] | None = None,
+    thresholds: Sequence[float] = (0.0,),
+    ks: Sequence[int] = (5,),
+    rewrite_modes: Sequence[str] = ("llm",),
+    out_dir: str | Path | None = None,
+    workers: int = 1,
+    batch_size: int = 64,
+    alias_path: str | Path | None = None,
+) -> RetrievalSweepSummary:
+    """
+    Evaluate every (collections, threshold, top_k, rewrite) combination in one pass.
+
+    Each distinct rewritten query is embedded once and each collection is queried
+    once per distinct embedding at max(ks); every grid cell is then derived from
+    those cached candidates with the same merging logic as search_merged().
+    alias_path (faq_processed.aliases.jsonl) resolves gold ids of collapsed
+    near-duplicates to their canonical entries.
+    """
+    metric_ks = sorted({int(k) for k in ks})
+    if not metric_ks or metric_ks[0] <= 0:
+        raise ValueError("k must be > 0")
+    for mode in rewrite_modes:
+        if mode not in REWRITE_MODES:
+            raise ValueError(f"Unknown rewrite mode {mode!r}; expected one of {REWRITE_MODES}")
+    if not thresholds:
+        raise ValueError("thresholds must not be empty")
+
+    sets = [
+        tuple(resolve_collection_name(name) for name in names)
+        for names in (collection_sets or default_collection_sets())
+    ]
+    if not sets or any(len(names) == 0 for names in sets):
+        raise ValueError("collection sets must not be empty")
+
+    configs = [
+        SweepConfig(collections=names, rewrite=mode, threshold=float(threshold))
+        for names in sets
+        for mode in dict.fromkeys(rewrite_modes)
+        for threshold in thresholds
+    ]
+    all_collections = list(dict.fromkeys(name for names in sets for name in names))
+    max_k = metric_ks[-1]
+
+    aliases = None if alias_path is None else load_gold_aliases(alias_path)
+    samples = iter_retrieval_eval_jsonl(eval_path, aliases=aliases)
+    num_samples = 0
+
+    out = (
+        Path(out_dir)
+        if out_dir is not None
+        else Path("runs") / f"retrieval_sweep_{now_ts()}"
+    )
+    out.mkdir(parents=True, exist_ok=True)
+
+    vs = VectorSearch(collection_name=all_collections)
+    metric_keys = [f"{name}@{k}" for k in metric_ks for name in METRIC_NAMES]
+    accumulators = {cfg: _ConfigAccumulator(metric_keys) for cfg in configs}
+    modes = list(dict.fromkeys(cfg.rewrite for cfg in configs))
+
+    cost = {
+        "rewrite_calls": 0,
+        "embedding_calls": 0,
+        "embedded_texts": 0,
+        "collection_queries": 0,
+    }
+
+    t_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for chunk in chunks(samples, max(1, batch_size)):
+            num_samples += len(chunk)
+            rewritten: dict[str, list[tuple[str, float]]] = {}
+            for mode in modes:
+                rewritten[mode] = list(
+                    pool.map(lambda s: timed(vs.rewrite_query, s.query, mode=mode), chunk)
+                )
+                if mode == "llm":
+                    # "heuristic" and "none" rewrite locally, without an API call.
+                    cost["rewrite_calls"] += len(chunk)
+
+            texts = list(dict.fromkeys(t for mode in modes for t, _ in rewritten[mode]))
+            embeddings, embed_ms = timed(get_embeddings_batch, texts, batch_size=len(texts))
+            embed_share_ms = embed_ms / float(len(texts))
+            cost["embedding_calls"] += 1
+            cost["embedded_texts"] += len(texts)
+
+            jobs = [(i, name) for i in range(len(texts)) for name in all_collections]
+            queried = pool.map(
+                lambda job: timed(
+                    vs.query_collection, job[1], embeddings[job[0]], n_results=max_k
+                ),
+                jobs,
+            )
+            candidates = {
+                (texts[i], name): result for (i, name), result in zip(jobs, queried)
+            }
+            cost["collection_queries"] += len(jobs)
+
+            _score_configs_for_chunk(
+                chunk, configs, rewritten, candidates, embed_share_ms, metric_ks, accumulators
+            )
+    wall_clock_s = time.perf_counter() - t_start
+
+    # What separate `retrieval-eval` runs (one per grid cell) would have issued.
+    runs = len(configs) * len(metric_ks)
+    cost["embedded_texts_without_sharing"] = runs * num_samples
+    cost["collection_queries_without_sharing"] = num_samples * len(metric_ks) * sum(
+        len(cfg.collections) for cfg in configs
+    )
+
+    rows = _build_rows(configs, accumulators, metric_ks)
+
+    _write_sweep_csv(rows, out / "sweep.csv")
+    _write_sweep_md(rows, cost, out / "sweep.md")
+    summary_obj = {
+        "num_samples": num_samples,
+        "num_configs": runs,
+        "ks": metric_ks,
+        "thresholds": [float(t) for t in thresholds],
+        "rewrite_modes": modes,
+        "collection_sets": [list(names) for names in sets],
+        "workers": workers,
+        "batch_size": batch_size,
+        "wall_clock_s": wall_clock_s,
+        "cost": cost,
+        "rows": rows,
+    }
+    (out / "sweep.json").write_text(
+        json.dumps(summary_obj, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+
+    return RetrievalSweepSummary(
+        num_samples=num_samples,
+        num_configs=runs,
+        rows=rows,
+        out_dir=str(out),
+        cost=cost,
+    )
@@ -0,0 +1,33 @@
+"""
+Small helpers shared by the evaluation runners.
+
+문서: docs/evaluation/utils.md
+"""
+
+from __future__ import annotations
+
+import itertools
+import time
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+def now_ts() -> str:
+    """Local timestamp used in default run directory names, e.g. 20250101_120000."""
+    return time.strftime("%Y%m%d_%H%M%S")
+
+
+def timed(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> tuple[Any, float]:
+    """Call fn(*args, **kwargs) and return (result, elapsed milliseconds)."""
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, (time.perf_counter() - t0) * 1000.0
+
+
+def chunks(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Yield consecutive lists of up to size items; the input is read lazily."""
+    it = iter(items)
+    while chunk := list(itertools.islice(it, size)):
+        yield chunk
@@ -2,31 +2,124 @@
 
 from __future__ import annotations
 
-import openai
 import logging
-from typing import TypeAlias
+import threading
+from typing import TYPE_CHECKING, Any, TypeAlias
 import time
 
 from config import Config
+from observability import metrics, tracing
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+if TYPE_CHECKING:
+    # Imported on first client creation: `openai` alone takes ~1 s to import.
+    import openai
+    from openai import Omit
 
-# Initialize OpenAI client
-openai.api_key = Config.OPENAI_API_KEY
+logger = logging.getLogger(__name__)
 
 
 EmbeddingVector: TypeAlias = list[float]
 EmbeddingMatrix: TypeAlias = list[EmbeddingVector]
 
 
-def get_embedding(text: str, model: str | None = None) -> EmbeddingVector:
+OPENAI_REQUESTS = metrics.REGISTRY.counter(
+    "rag_openai_requests_total", "OpenAI API calls", ("endpoint", "model", "status")
+)
+OPENAI_REQUEST_SECONDS = metrics.REGISTRY.histogram(
+    "rag_openai_request_duration_seconds", "OpenAI API call latency", ("endpoint",)
+)
+OPENAI_TOKENS = metrics.REGISTRY.counter(
+    "rag_openai_tokens_total", "Tokens reported by OpenAI usage", ("endpoint", "model", "kind")
+)
+EMBEDDED_TEXTS = metrics.REGISTRY.counter(
+    "rag_embedded_texts_total", "Texts sent to the embeddings endpoint", ("model",)
+)
+
+
+def record_openai_call(
+    endpoint: str, model: str, started: float, response: Any = None, error: bool = False
+) -> None:
+    """
+    Record one OpenAI call: count, latency since `started` (perf_counter), tokens.
+
+    Shared by every call site (embeddings, query rewrite, RAG generation) so the
+    series stay consistent.
+    """
+    OPENAI_REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - started)
+    OPENAI_REQUESTS.labels(endpoint, model, "error" if error else "ok").inc()
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        n = getattr(usage, kind, None)
+        if n:
+            OPENAI_TOKENS.labels(endpoint, model, kind.removesuffix("_tokens")).inc(n)
+
+
+def create_openai_client() -> openai.OpenAI:
+    """
+    Create an OpenAI client from Config.
+
+    All OpenAI clients in the project are created here so that
+    Config.OPENAI_BASE_URL (e.g. a local fake server) applies everywhere.
+    """
+    import openai
+
+    return openai.OpenAI(
+        api_key=Config.OPENAI_API_KEY, base_url=Config.OPENAI_BASE_URL
+    )
+
+
+_shared_clients: dict[tuple[str | None, str | None], openai.OpenAI] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_openai_client() -> openai.OpenAI:
+    """
+    Return the process-wide shared OpenAI client for the current Config.
+
+    The client (and its HTTP connection pool) is created once per
+    (api key, base URL) pair and is safe to share across threads.
+    """
+    key = (Config.OPENAI_API_KEY, Config.OPENAI_BASE_URL)
+    client = _shared_clients.get(key)
+    if client is None:
+        with _shared_clients_lock:
+            client = _shared_clients.get(key)
+            if client is None:
+                client = create_openai_client()
+                _shared_clients[key] = client
+    return client
+
+
+def embedding_dimensions_arg(dimensions: int | None = None) -> int | Omit:
+    """
+    The `dimensions` argument of embeddings.create(); openai.omit leaves it out.
+
+    None means Config: EMBEDDING_DIMENSIONS when EMBEDDING_REDUCTION is "api"
+    (with "pca" the API returns full vectors and the projection reduces them).
+    0 requests the model's full dimension.
+    """
+    if dimensions is None:
+        api_mode = Config.EMBEDDING_REDUCTION.strip().lower() == "api"
+        dimensions = Config.EMBEDDING_DIMENSIONS if api_mode else 0
+    if dimensions > 0:
+        return dimensions
+    import openai
+
+    return openai.omit
+
+
+def get_embedding(
+    text: str, model: str | None = None, dimensions: int | None = None
+) -> EmbeddingVector:
     """
     Generate embedding for a single text using OpenAI API.
 
     Args:
         text: Text to embed
         model: Embedding model name (defaults to Config.EMBEDDING_MODEL)
+        dimensions: Output dimension (see embedding_dimensions_arg(); defaults to Config)
 
     Returns:
         List of embedding values
@@ -36,8 +129,18 @@ def get_embedding(text: str, model: str | None = None) -> EmbeddingVector:
 
     try:
         # Use OpenAI client
-        client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
-        response = client.embeddings.create(model=model, input=text)
+        client = get_openai_client()
+        started = time.perf_counter()
+        with tracing.span("embed", model=model):
+            try:
+                response = client.embeddings.create(
+                    model=model, input=text, dimensions=embedding_dimensions_arg(dimensions)
+                )
+            except Exception:
+                record_openai_call("embeddings", model, started, error=True)
+                raise
+        record_openai_call("embeddings", model, started, response)
+        EMBEDDED_TEXTS.labels(model).inc()
         return response.data[0].embedding
     except Exception as e:
         logger.error(f"Error generating embedding: {e}")
@@ -45,7 +148,10 @@ def get_embedding(text: str, model: str | None = None) -> EmbeddingVector:
 
 
 def get_embeddings_batch(
-    texts: list[str], model: str | None = None, batch_size: int = 100
+    texts: list[str],
+    model: str | None = None,
+    batch_size: int = 100,
+    dimensions: int | None = None,
 ) -> EmbeddingMatrix:
     """
     Generate embeddings for multiple texts in batches.
@@ -54,6 +160,7 @@ def get_embeddings_batch(
         texts: List of texts to embed
         model: Embedding model name
         batch_size: Number of texts to process in each batch
+        dimensions: Output dimension (see embedding_dimensions_arg(); defaults to Config)
 
     Returns:
         List of embedding vectors
@@ -63,6 +170,7 @@ def get_embeddings_batch(
 
     all_embeddings = []
     total = len(texts)
+    dimensions_arg = embedding_dimensions_arg(dimensions)
 
     logger.info(f"Generating embeddings for {total} texts...")
 
@@ -73,8 +181,16 @@ def get_embeddings_batch(
         )
 
         try:
-            client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
-            response = client.embeddings.create(model=model, input=batch)
+            client = get_openai_client()
+            started = time.perf_counter()
+            with tracing.span("embed_batch", model=model, batch_size=len(batch)):
+                try:
+                    response = client.embeddings.create(model=model, input=batch, dimensions=dimensions_arg)
+                except Exception:
+                    record_openai_call("embeddings", model, started, error=True)
+                    raise
+            record_openai_call("embeddings", model, started, response)
+            EMBEDDED_TEXTS.labels(model).inc(len(batch))
 
             batch_embeddings = [item.embedding for item in response.data]
             all_embeddings.extend(batch_embeddings)
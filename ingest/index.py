@@ -2,21 +2,33 @@
 
 from __future__ import annotations
 
-import chromadb
-from chromadb.config import Settings
-from chromadb.api import ClientAPI
-from chromadb.api.models.Collection import Collection
-from chromadb.api.types import Metadata
-import json
+import argparse
 from pathlib import Path
+import itertools
 import logging
-from collections.abc import Sequence
-from typing import Literal, TypedDict, NotRequired, cast
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
+from typing import TYPE_CHECKING, Literal, TypedDict, NotRequired, cast
 
 from config import Config
-from ingest.embed import get_embeddings_batch
+from data.corpus import ARROW_SUFFIX, ArrowCorpus, arrow_available
+from data.records import find_record_file, iter_records
+from ingest.embed import EmbeddingMatrix, get_embeddings_batch
+from ingest.reduce import PCAProjection, projection_path_for, reduction_mode, remove_projection
+from retrieval.quantized import build_quantized_store, remove_quantized_store
+from retrieval.sharding import (
+    configured_num_shards,
+    parse_shard_hosts,
+    shard_of,
+    shard_persist_directory,
+)
+
+if TYPE_CHECKING:
+    # chromadb is imported when a client is created (~0.8 s import).
+    from chromadb.api import ClientAPI
+    from chromadb.api.models.Collection import Collection
+    from chromadb.api.types import Metadata
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -35,18 +47,56 @@ class FAQMetadata(TypedDict):
 
 FAQColumn = Literal["question", "answer"]
 
+# Batches embedded per streaming window in index_faq_data().
+_STREAM_WINDOW_BATCHES = 10
+
+
+def create_chroma_client(path: str | None = None) -> ClientAPI:
+    """Create and return a Chroma client (default: Config.CHROMA_PERSIST_DIRECTORY)."""
+    import chromadb
+    from chromadb.config import Settings
 
-def create_chroma_client() -> ClientAPI:
-    """Create and return a Chroma client."""
     client = chromadb.PersistentClient(
-        path=Config.CHROMA_PERSIST_DIRECTORY,
+        path=path or Config.CHROMA_PERSIST_DIRECTORY,
         settings=Settings(anonymized_telemetry=False),
     )
-    return cast(ClientAPI, client)
+    return cast("ClientAPI", client)
+
+
+def create_shard_clients(num_shards: int) -> list[ClientAPI]:
+    """
+    One client per shard: the CHROMA_SHARD_HOSTS servers when set, otherwise
+    local directories <CHROMA_PERSIST_DIRECTORY>/shard-NN.
+    """
+    hosts = parse_shard_hosts(Config.CHROMA_SHARD_HOSTS)
+    if not hosts:
+        return [create_chroma_client(shard_persist_directory(i)) for i in range(num_shards)]
+    if len(hosts) != num_shards:
+        raise ValueError(f"{num_shards} shards requested but {len(hosts)} CHROMA_SHARD_HOSTS configured")
+
+    import chromadb
+    from chromadb.config import Settings
+
+    return [
+        cast("ClientAPI", chromadb.HttpClient(host=host, port=port, settings=Settings(anonymized_telemetry=False)))
+        for host, port in hosts
+    ]
+
+
+def create_index_clients(num_shards: int) -> list[ClientAPI]:
+    """
+    Clients to write an index to: the top-level directory when unsharded (one
+    shard, no CHROMA_SHARD_HOSTS), otherwise create_shard_clients().
+    """
+    if num_shards == 1 and not Config.CHROMA_SHARD_HOSTS.strip():
+        return [create_chroma_client()]
+    return create_shard_clients(num_shards)
 
 
 def recreate_collection(
-    client: ClientAPI, collection_name: str | None = None
+    client: ClientAPI,
+    collection_name: str | None = None,
+    metadata: dict[str, str | int] | None = None,
 ) -> Collection:
     """Delete an existing collection (if present) and create a new one."""
     if collection_name is None:
@@ -59,13 +109,31 @@ def recreate_collection(
         # Collection might not exist; continue to create.
         logger.info(f"No existing collection to delete: {collection_name}")
 
-    collection = cast(Collection, client.create_collection(name=collection_name))
+    collection = cast(
+        "Collection", client.create_collection(name=collection_name, metadata=metadata)
+    )
     logger.info(f"Created new collection: {collection_name}")
     return collection
 
 
-def load_processed_data(data_path: str | Path) -> list[FAQEntry]:
-    """Load processed FAQ data from JSON file."""
+def default_processed_data_path() -> Path:
+    """
+    faq_processed.{arrow,jsonl.zst,jsonl,json} in PROCESSED_DATA_DIR (first that
+    exists; the Arrow corpus only when pyarrow is installed).
+    """
+    processed_dir = Path(Config.PROCESSED_DATA_DIR)
+    arrow_path = processed_dir / f"faq_processed{ARROW_SUFFIX}"
+    if arrow_path.is_file() and arrow_available():
+        return arrow_path
+    found = find_record_file(processed_dir, stem="faq_processed")
+    return found if found is not None else processed_dir / "faq_processed.jsonl"
+
+
+def iter_processed_data(data_path: str | Path, start: int = 0) -> Iterator[FAQEntry]:
+    """
+    Stream processed FAQ entries from a .jsonl, .jsonl.zst, .json or .arrow file,
+    skipping the first `start` entries (an Arrow corpus seeks there directly).
+    """
     data_path = Path(data_path)
 
     if not data_path.exists():
@@ -74,8 +142,32 @@ def load_processed_data(data_path: str | Path) -> list[FAQEntry]:
             "Please run data/preprocess.py first."
         )
 
-    with open(data_path, "r", encoding="utf-8") as f:
-        data = cast(list[FAQEntry], json.load(f))
+    if data_path.name.endswith(ARROW_SUFFIX):
+        return _iter_arrow_corpus(data_path, start)
+    records = iter_records(data_path)
+    if start > 0:
+        records = itertools.islice(records, start, None)
+    return cast(Iterator[FAQEntry], records)
+
+
+def _iter_arrow_corpus(data_path: Path, start: int) -> Iterator[FAQEntry]:
+    with ArrowCorpus(data_path) as corpus:
+        for entry in corpus.iter_entries(start):
+            yield cast(FAQEntry, entry)
+
+
+def _processed_data_tail(data_path: Path, max_entries: int) -> list[FAQEntry]:
+    """Last max_entries entries; an Arrow corpus reads only those rows."""
+    if data_path.name.endswith(ARROW_SUFFIX) and data_path.exists():
+        with ArrowCorpus(data_path) as corpus:
+            num_rows = len(corpus)
+        return list(iter_processed_data(data_path, start=max(0, num_rows - max_entries)))
+    return list(deque(iter_processed_data(data_path), maxlen=max_entries))
+
+
+def load_processed_data(data_path: str | Path) -> list[FAQEntry]:
+    """Load processed FAQ data from a .jsonl, .jsonl.zst, .json or .arrow file."""
+    data = list(iter_processed_data(data_path))
 
     logger.info(f"Loaded {len(data)} FAQ entries from {data_path}")
     return data
@@ -97,22 +189,75 @@ def collection_name_for(columns: Sequence[FAQColumn]) -> str:
     return f"{Config.CHROMA_COLLECTION_NAME}__{key}"
 
 
+def _add_window(
+    shards: Sequence[Collection],
+    window: list[FAQEntry],
+    texts: list[str],
+    embeddings: EmbeddingMatrix,
+    columns: Sequence[FAQColumn],
+    batch_size: int,
+) -> None:
+    """Add one embedded window, routing each entry to its shard, in batch_size slices."""
+    ids = [f"faq_{item['id']}" for item in window]
+    metadatas: list[Metadata] = [
+        cast(
+            "Metadata",
+            {
+                "question": item["question"],
+                "answer": item["answer"],
+                "id": item["id"],
+                "embedding_columns": "+".join(columns),
+            },
+        )
+        for item in window
+    ]
+
+    logger.info("Adding documents to Chroma collection...")
+    routed: list[list[int]] = [[] for _ in shards]
+    for i, item in enumerate(window):
+        routed[shard_of(item["id"], len(shards))].append(i)
+    for target, rows in zip(shards, routed):
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start : start + batch_size]
+            target.add(
+                ids=[ids[i] for i in batch],
+                embeddings=cast(list[Sequence[float]], [embeddings[i] for i in batch]),
+                documents=[texts[i] for i in batch],
+                metadatas=[metadatas[i] for i in batch],
+            )
+
+
 def index_faq_data(
-    collection: Collection,
-    faq_data: Sequence[FAQEntry],
+    collection: Collection | Sequence[Collection],
+    faq_data: Iterable[FAQEntry],
     columns: Sequence[FAQColumn],
     batch_size: int = 100,
-) -> None:
+    projection: PCAProjection | None = None,
+) -> int:
     """
     Index FAQ data into Chroma collection.
 
+    Entries are consumed in windows of a few batches (embed, then add), so
+    `faq_data` may be a stream such as iter_processed_data(); only one window is
+    held in memory.
+
     Args:
-        collection: Chroma collection object
-        faq_data: List of FAQ dictionaries with 'id', 'question', 'answer', 'text'
+        collection: Chroma collection object, or one collection per shard; each
+            entry then goes to collection[shard_of(entry["id"], len(collection))]
+        faq_data: Iterable of FAQ dictionaries with 'id', 'question', 'answer', 'text'
         batch_size: Number of items to process in each batch
+        projection: Store PCA-reduced vectors. Full-dimension embeddings are
+            requested; an unfitted projection is fitted on the first
+            projection.fit_size of them (buffered until then) and the caller
+            saves it for VectorSearch
+
+    Returns:
+        Number of entries indexed
     """
+    shards = list(collection) if isinstance(collection, (list, tuple)) else [cast("Collection", collection)]
+
     # Check if collection already has data
-    existing_count = collection.count()
+    existing_count = sum(c.count() for c in shards)
     if existing_count > 0:
         logger.warning(
             f"Collection already contains {existing_count} items. Clearing..."
@@ -120,60 +265,110 @@ def index_faq_data(
         # Note: Chroma doesn't have a direct clear method, so we'll delete and recreate
         # For now, we'll just add new items with unique IDs
 
-    # Build texts for embedding based on selected columns
-    texts = [build_embedding_text(item, columns) for item in faq_data]
-    ids = [f"faq_{item['id']}" for item in faq_data]
-    metadatas: list[Metadata] = [
-        cast(
-            Metadata,
-            {
-                "question": item["question"],
-                "answer": item["answer"],
-                "id": item["id"],
-                "embedding_columns": "+".join(columns),
-            },
+    num_indexed = 0
+    entries = iter(faq_data)
+    # Windows embedded before the projection has enough vectors to be fitted.
+    pending: list[tuple[list[FAQEntry], list[str], EmbeddingMatrix]] = []
+
+    def add(window: list[FAQEntry], texts: list[str], embeddings: EmbeddingMatrix) -> None:
+        nonlocal num_indexed
+        if projection is not None:
+            embeddings = projection.transform(embeddings).tolist()
+        _add_window(shards, window, texts, embeddings, columns, batch_size)
+        num_indexed += len(window)
+        logger.info(f"Indexed {num_indexed} entries so far")
+
+    def fit_and_flush() -> None:
+        assert projection is not None
+        projection.fit([vector for _, _, embeddings in pending for vector in embeddings])
+        for item in pending:
+            add(*item)
+        pending.clear()
+
+    # Embed a window of several API batches at a time (get_embeddings_batch paces
+    # its requests), then add to Chroma in batch_size slices.
+    window_size = batch_size * _STREAM_WINDOW_BATCHES
+    while window := list(itertools.islice(entries, window_size)):
+        # Build texts for embedding based on selected columns
+        texts = [build_embedding_text(item, columns) for item in window]
+
+        logger.info("Generating embeddings...")
+        embeddings = get_embeddings_batch(
+            texts, batch_size=batch_size, dimensions=0 if projection is not None else None
         )
-        for item in faq_data
-    ]
 
-    logger.info("Generating embeddings...")
-    embeddings = get_embeddings_batch(texts, batch_size=batch_size)
+        if projection is not None and not projection.fitted:
+            pending.append((window, texts, embeddings))
+            if sum(len(w) for w, _, _ in pending) >= projection.fit_size:
+                fit_and_flush()
+            continue
+        add(window, texts, embeddings)
 
-    logger.info("Adding documents to Chroma collection...")
+    if pending:
+        # Fewer entries than fit_size: fit on all of them.
+        fit_and_flush()
 
-    # Add in batches to avoid memory issues
-    for i in range(0, len(faq_data), batch_size):
-        batch_ids = ids[i : i + batch_size]
-        batch_embeddings = embeddings[i : i + batch_size]
-        batch_texts = texts[i : i + batch_size]
-        batch_metadatas = metadatas[i : i + batch_size]
-
-        collection.add(
-            ids=batch_ids,
-            embeddings=cast(list[Sequence[float]], batch_embeddings),
-            documents=batch_texts,
-            metadatas=batch_metadatas,
-        )
+    logger.info(f"Successfully indexed {num_indexed} FAQ entries")
+    return num_indexed
 
-        logger.info(
-            f"Indexed batch {i // batch_size + 1}/{(len(faq_data) + batch_size - 1) // batch_size}"
-        )
 
-    logger.info(f"Successfully indexed {len(faq_data)} FAQ entries")
+def _build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="ingest.index")
+    p.add_argument(
+        "--data",
+        default=None,
+        help="Processed .jsonl/.jsonl.zst/.json/.arrow file (default: <PROCESSED_DATA_DIR>/faq_processed.*)",
+    )
+    p.add_argument(
+        "--max-entries",
+        dest="max_entries",
+        type=int,
+        default=None,
+        help="Index only the last N entries; 0 = all (default: Config.INDEX_MAX_ENTRIES)",
+    )
+    p.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="Split each strategy collection into N shards by FAQ id (default: Config.CHROMA_NUM_SHARDS)",
+    )
+    return p
 
 
-def main() -> None:
+def main(argv: list[str] | None = None) -> None:
     """Main indexing pipeline."""
+    args = _build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
     Config.validate()
 
-    # Load processed data
-    processed_data_file = Path(Config.PROCESSED_DATA_DIR) / "faq_processed.json"
-    faq_data = load_processed_data(processed_data_file)
-
-    faq_data = faq_data[-1000:]  # TODO: Remove this
+    processed_data_file = (
+        Path(args.data) if args.data else default_processed_data_path()
+    )
+    max_entries = (
+        Config.INDEX_MAX_ENTRIES if args.max_entries is None else args.max_entries
+    )
 
-    # Create Chroma client
-    client = create_chroma_client()
+    # Without a cap, entries are re-streamed from disk for each strategy.
+    tail: list[FAQEntry] | None = None
+    if max_entries > 0:
+        tail = _processed_data_tail(processed_data_file, max_entries)
+        logger.info(f"Indexing the last {len(tail)} entries of {processed_data_file}")
+
+    num_shards = configured_num_shards() if args.shards is None else args.shards
+    if num_shards < 1:
+        raise ValueError("--shards must be >= 1")
+    clients = create_index_clients(num_shards)
+    if len(clients) > 1:
+        logger.info(f"Indexing into {num_shards} shards")
+    mode = reduction_mode()
+    # Recorded on each collection so a reader can tell how its vectors were made.
+    collection_metadata: dict[str, str | int] | None = None
+    if mode is not None:
+        collection_metadata = {
+            "embedding_reduction": mode,
+            "embedding_dimensions": Config.EMBEDDING_DIMENSIONS,
+        }
+        logger.info(f"Storing {Config.EMBEDDING_DIMENSIONS}-d vectors (reduction={mode})")
     strategies: list[list[FAQColumn]] = [
         ["question"],
         ["answer"],
@@ -182,10 +377,25 @@ def main() -> None:
 
     for columns in strategies:
         name = collection_name_for(columns)
-        collection = recreate_collection(client, collection_name=name)
-        index_faq_data(collection, faq_data, columns=columns)
+        collections = [
+            recreate_collection(client, collection_name=name, metadata=collection_metadata)
+            for client in clients
+        ]
+        # A projection or quantized store left by an earlier index would not match the new vectors.
+        remove_projection(name)
+        remove_quantized_store(name)
+        projection = PCAProjection(Config.EMBEDDING_DIMENSIONS) if mode == "pca" else None
+        entries = tail if tail is not None else iter_processed_data(processed_data_file)
+        index_faq_data(collections, entries, columns=columns, projection=projection)
+        if projection is not None:
+            path = projection.save(projection_path_for(name))
+            logger.info(f"Saved PCA projection for {name}: {path}")
+        if Config.SEARCH_ENGINE == "quantized":
+            build_quantized_store(name, collections)
+        counts = [c.count() for c in collections]
         logger.info(
-            f"Collection {name} now contains {collection.count()} items (columns={'+'.join(columns)})"
+            f"Collection {name} now contains {sum(counts)} items (columns={'+'.join(columns)}"
+            + (f", per shard={counts})" if len(counts) > 1 else ")")
         )
 
     logger.info("Indexing complete!")
@@ -0,0 +1,203 @@
+"""
+Reduced-dimension embeddings: Matryoshka truncation and a PCA projection.
+
+Two ways to store smaller vectors (Config.EMBEDDING_DIMENSIONS > 0):
+
+- "api": the embeddings endpoint returns `dimensions` values directly (models
+  trained for it, e.g. text-embedding-3-*). That output is the full vector
+  truncated and re-normalized, which truncate_embeddings() reproduces offline.
+- "pca": a PCAProjection is fitted on the first embeddings of each collection
+  at index time, saved next to the index, and applied to query embeddings by
+  VectorSearch. Works with any model, including text-embedding-ada-002.
+
+NumPy is imported on first use; ingest.index imports this module.
+
+문서: docs/ingest/reduce.md
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from collections.abc import Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from config import Config
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+
+logger = logging.getLogger(__name__)
+
+REDUCTION_MODES = ("api", "pca")
+
+# Embeddings fitted on per collection before the rest of the stream is projected.
+DEFAULT_PCA_FIT_SIZE = 10_000
+
+_PROJECTIONS_DIR = "projections"
+
+
+def _as_matrix(vectors: Sequence[Sequence[float]] | NDArray[np.floating]) -> NDArray[np.float32]:
+    import numpy as np
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim != 2:
+        raise ValueError(f"Expected a 2-D matrix of vectors, got shape {matrix.shape}")
+    return matrix
+
+
+def _normalize(matrix: NDArray[np.float32]) -> NDArray[np.float32]:
+    import numpy as np
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    normalized: NDArray[np.float32] = matrix / np.where(norms == 0.0, 1.0, norms)
+    return normalized
+
+
+def truncate_embeddings(
+    vectors: Sequence[Sequence[float]] | NDArray[np.floating], dimensions: int
+) -> NDArray[np.float32]:
+    """
+    First `dimensions` values of each vector, re-normalized to unit length.
+
+    For Matryoshka-trained models this equals asking the API for `dimensions`;
+    for other models (ada-002) it is only a baseline for the PCA projection.
+    """
+    matrix = _as_matrix(vectors)
+    if not 0 < dimensions <= matrix.shape[1]:
+        raise ValueError(f"dimensions must be in 1..{matrix.shape[1]}, got {dimensions}")
+    return _normalize(matrix[:, :dimensions])
+
+
+class PCAProjection:
+    """
+    Centered PCA to `dimensions` components; outputs are unit-length.
+
+    fit() takes the top right-singular vectors of the centered sample, so it
+    needs at least `dimensions` sample rows.
+    """
+
+    def __init__(self, dimensions: int, fit_size: int = DEFAULT_PCA_FIT_SIZE):
+        if dimensions <= 0:
+            raise ValueError("dimensions must be > 0")
+        self.dimensions = dimensions
+        self.fit_size = max(fit_size, dimensions)
+        self.mean: NDArray[np.float32] | None = None
+        self.components: NDArray[np.float32] | None = None
+        self.explained_variance_ratio = 0.0
+
+    @property
+    def fitted(self) -> bool:
+        return self.components is not None
+
+    @property
+    def input_dimensions(self) -> int:
+        if self.components is None:
+            raise RuntimeError("PCAProjection is not fitted")
+        return int(self.components.shape[1])
+
+    def fit(self, vectors: Sequence[Sequence[float]] | NDArray[np.floating]) -> PCAProjection:
+        import numpy as np
+
+        matrix = _as_matrix(vectors)
+        n, d = matrix.shape
+        if self.dimensions > min(n, d):
+            raise ValueError(
+                f"Cannot fit {self.dimensions} components on {n} vectors of dimension {d}"
+            )
+        mean = matrix.mean(axis=0)
+        _, singular, vt = np.linalg.svd(matrix - mean, full_matrices=False)
+        variance = singular**2
+        self.mean = mean.astype(np.float32)
+        self.components = np.ascontiguousarray(vt[: self.dimensions], dtype=np.float32)
+        total = float(variance.sum())
+        self.explained_variance_ratio = (
+            float(variance[: self.dimensions].sum()) / total if total > 0 else 1.0
+        )
+        logger.info(
+            "Fitted PCA %s -> %s on %s vectors (explained variance %.3f)",
+            d,
+            self.dimensions,
+            n,
+            self.explained_variance_ratio,
+        )
+        return self
+
+    def transform(self, vectors: Sequence[Sequence[float]] | NDArray[np.floating]) -> NDArray[np.float32]:
+        if self.mean is None or self.components is None:
+            raise RuntimeError("PCAProjection is not fitted")
+        matrix = _as_matrix(vectors)
+        if matrix.shape[1] != self.components.shape[1]:
+            raise ValueError(
+                f"Projection expects {self.components.shape[1]}-d vectors, got {matrix.shape[1]}-d"
+            )
+        return _normalize((matrix - self.mean) @ self.components.T)
+
+    def transform_one(self, vector: Sequence[float]) -> list[float]:
+        return [float(v) for v in self.transform([vector])[0]]
+
+    def save(self, path: str | Path) -> Path:
+        import numpy as np
+
+        if self.mean is None or self.components is None:
+            raise RuntimeError("PCAProjection is not fitted")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a reader never sees a half-written projection.
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as f:
+            np.savez(
+                f,
+                mean=self.mean,
+                components=self.components,
+                explained_variance_ratio=np.float64(self.explained_variance_ratio),
+            )
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> PCAProjection:
+        import numpy as np
+
+        with np.load(Path(path)) as data:
+            components = data["components"].astype(np.float32)
+            projection = cls(int(components.shape[0]))
+            projection.mean = data["mean"].astype(np.float32)
+            projection.components = components
+            projection.explained_variance_ratio = float(data["explained_variance_ratio"])
+        return projection
+
+
+def projection_path_for(collection_name: str, base: str | None = None) -> Path:
+    """<base>/projections/<collection>.npz (base defaults to CHROMA_PERSIST_DIRECTORY)."""
+    return Path(base or Config.CHROMA_PERSIST_DIRECTORY) / _PROJECTIONS_DIR / f"{collection_name}.npz"
+
+
+def load_projection(collection_name: str, base: str | None = None) -> PCAProjection | None:
+    """The collection's saved PCA projection, or None when it was indexed without one."""
+    path = projection_path_for(collection_name, base)
+    if not path.is_file():
+        return None
+    return PCAProjection.load(path)
+
+
+def remove_projection(collection_name: str, base: str | None = None) -> None:
+    """Delete a saved projection (re-indexing without PCA must not leave a stale one)."""
+    path = projection_path_for(collection_name, base)
+    if path.is_file():
+        path.unlink()
+        logger.info(f"Removed stale projection: {path}")
+
+
+def reduction_mode() -> str | None:
+    """Config's reduction mode when EMBEDDING_DIMENSIONS > 0, else None."""
+    if Config.EMBEDDING_DIMENSIONS <= 0:
+        return None
+    mode = Config.EMBEDDING_REDUCTION.strip().lower()
+    if mode not in REDUCTION_MODES:
+        raise ValueError(
+            f"Unknown EMBEDDING_REDUCTION {Config.EMBEDDING_REDUCTION!r}; expected one of {REDUCTION_MODES}"
+        )
+    return mode
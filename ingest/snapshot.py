@@ -0,0 +1,403 @@
+"""
+Portable embedding snapshots: export indexed collections, restore them without re-embedding.
+
+A snapshot is a directory that does not depend on the Chroma version or on
+the shard layout:
+
+    manifest.json                 format_version, embedding model, collections
+    <collection>/vectors.npy      float32 (count x dimensions), row order
+    <collection>/records.jsonl    {"id", "document", "metadata"} per row (.jsonl.zst with --zstd)
+    <collection>/projection.npz   the PCA projection, when indexed with EMBEDDING_REDUCTION=pca
+
+Export pages through each collection (every shard when sharded). Import
+recreates the collections, routes each row to its shard with shard_of() (so
+the target may have a different shard count), and adds rows in large batches
+straight from the memory-mapped vectors: no embedding API calls, so a restore
+is bound by disk and Chroma's insert speed.
+
+NumPy and Chroma are imported on first use.
+
+문서: docs/ingest/snapshot.md
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+from collections.abc import Iterator, Mapping, Sequence
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypedDict, cast
+
+from config import Config
+from data.records import iter_records, write_records
+from ingest.index import (
+    FAQColumn,
+    collection_name_for,
+    create_index_clients,
+    recreate_collection,
+)
+from ingest.reduce import projection_path_for, remove_projection
+from retrieval.quantized import build_quantized_store, remove_quantized_store
+from retrieval.sharding import configured_num_shards, shard_of
+
+if TYPE_CHECKING:
+    import numpy as np
+    from chromadb.api import ClientAPI
+    from chromadb.api.models.Collection import Collection
+    from numpy.typing import NDArray
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Rows per Chroma add() on import (capped by the client's max batch size).
+DEFAULT_IMPORT_BATCH_SIZE = 5000
+
+# Rows per Chroma get() on export.
+_EXPORT_PAGE = 5000
+
+_MANIFEST = "manifest.json"
+_VECTORS = "vectors.npy"
+_PROJECTION = "projection.npz"
+
+
+class SnapshotCollection(TypedDict):
+    name: str
+    count: int
+    dimensions: int
+    metadata: dict[str, Any] | None
+    records: str
+    projection: bool
+
+
+class SnapshotManifest(TypedDict):
+    format_version: int
+    created_at: float
+    embedding_model: str
+    chromadb_version: str
+    collections: list[SnapshotCollection]
+
+
+def default_collection_names() -> list[str]:
+    """The three strategy collections written by ingest/index.py."""
+    strategies: list[list[FAQColumn]] = [["question"], ["answer"], ["question", "answer"]]
+    return [collection_name_for(columns) for columns in strategies]
+
+
+def _chromadb_version() -> str:
+    try:
+        return version("chromadb")
+    except PackageNotFoundError:
+        return ""
+
+
+def _iter_pages(
+    shards: Sequence[Collection],
+) -> Iterator[tuple[list[str], NDArray[np.float32], list[Any], list[Any]]]:
+    """(ids, vectors, documents, metadatas) pages of every shard in turn."""
+    import numpy as np
+
+    for shard in shards:
+        total = shard.count()
+        for offset in range(0, total, _EXPORT_PAGE):
+            got = shard.get(
+                limit=_EXPORT_PAGE, offset=offset, include=["embeddings", "documents", "metadatas"]
+            )
+            ids = [str(i) for i in got["ids"]]
+            missing: list[Any] = [None] * len(ids)
+            documents: list[Any] = list(got["documents"] or missing)
+            metadatas: list[Any] = list(got["metadatas"] or missing)
+            yield ids, np.asarray(got["embeddings"], dtype=np.float32), documents, metadatas
+
+
+def export_collection(
+    name: str, shards: Sequence[Collection], out_dir: str | Path, compress: bool = False
+) -> SnapshotCollection:
+    """Write one collection (all of its shards) into out_dir/<name>."""
+    import numpy as np
+
+    target = Path(out_dir) / name
+    target.mkdir(parents=True, exist_ok=True)
+    count = sum(shard.count() for shard in shards)
+    records_name = "records.jsonl.zst" if compress else "records.jsonl"
+
+    written = 0
+    vectors: Any = None
+
+    def records() -> Iterator[dict[str, Any]]:
+        nonlocal written, vectors
+        for ids, page, documents, metadatas in _iter_pages(shards):
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(
+                    target / _VECTORS, mode="w+", dtype=np.float32, shape=(count, page.shape[1])
+                )
+            if written + len(ids) > count:
+                raise ValueError(f"{name} grew during export; expected {count} rows")
+            vectors[written : written + len(ids)] = page
+            written += len(ids)
+            for i, document, metadata in zip(ids, documents, metadatas):
+                yield {"id": i, "document": document, "metadata": metadata}
+
+    write_records(records(), target / records_name)
+    if written != count:
+        raise ValueError(f"{name}: exported {written} rows, expected {count}")
+    dimensions = 0
+    if vectors is not None:
+        dimensions = int(vectors.shape[1])
+        vectors.flush()
+        del vectors
+    else:
+        # An empty collection still gets a (0, 0) matrix so every snapshot has the same files.
+        np.save(target / _VECTORS, np.zeros((0, 0), dtype=np.float32))
+
+    projection = projection_path_for(name)
+    if projection.is_file():
+        shutil.copyfile(projection, target / _PROJECTION)
+    logger.info(f"Exported {count} x {dimensions} vectors of {name}")
+    return {
+        "name": name,
+        "count": count,
+        "dimensions": dimensions,
+        "metadata": dict(shards[0].metadata) if shards and shards[0].metadata else None,
+        "records": records_name,
+        "projection": projection.is_file(),
+    }
+
+
+def export_snapshot(
+    out: str | Path,
+    collection_names: Sequence[str] | None = None,
+    clients: Sequence[ClientAPI] | None = None,
+    compress: bool = False,
+) -> SnapshotManifest:
+    """
+    Export collections (default: the three strategy collections) to a snapshot
+    directory. The snapshot is written next to `out` and renamed into place when
+    complete; an existing snapshot at `out` is replaced, any other path refused.
+    """
+    out = Path(out)
+    if out.exists() and not (out / _MANIFEST).is_file():
+        raise FileExistsError(f"{out} exists and is not a snapshot")
+    names = list(collection_names) if collection_names else default_collection_names()
+    if clients is None:
+        clients = create_index_clients(configured_num_shards())
+
+    tmp = out.with_name(out.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    try:
+        entries = [
+            export_collection(name, [client.get_collection(name=name) for client in clients], tmp, compress)
+            for name in names
+        ]
+        manifest: SnapshotManifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "created_at": time.time(),
+            "embedding_model": Config.EMBEDDING_MODEL,
+            "chromadb_version": _chromadb_version(),
+            "collections": entries,
+        }
+        (tmp / _MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    shutil.rmtree(out, ignore_errors=True)
+    os.replace(tmp, out)
+    logger.info(f"Wrote snapshot of {len(entries)} collections to {out}")
+    return manifest
+
+
+def read_manifest(snapshot: str | Path) -> SnapshotManifest:
+    path = Path(snapshot) / _MANIFEST
+    if not path.is_file():
+        raise FileNotFoundError(f"No snapshot manifest at {path}")
+    manifest = cast(SnapshotManifest, json.loads(path.read_text(encoding="utf-8")))
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(
+            f"Snapshot {snapshot} has format {manifest.get('format_version')}, "
+            f"expected {SNAPSHOT_FORMAT_VERSION}"
+        )
+    return manifest
+
+
+def _shard_key(row_id: str, metadata: Mapping[str, Any] | None) -> Any:
+    # ingest/index.py routes by the FAQ id, which it also stores in the metadata.
+    if metadata is not None and "id" in metadata:
+        return metadata["id"]
+    return row_id
+
+
+def import_collection(
+    entry: SnapshotCollection,
+    snapshot: str | Path,
+    clients: Sequence[ClientAPI],
+    batch_size: int = DEFAULT_IMPORT_BATCH_SIZE,
+) -> int:
+    """
+    Recreate one collection on `clients` (one per shard) and bulk-load its rows.
+
+    Rows are buffered per shard and each buffer is added when it holds
+    batch_size rows; vectors are read from the memory-mapped .npy, so only one
+    batch per shard is in memory.
+    """
+    import numpy as np
+
+    name = entry["name"]
+    source = Path(snapshot) / name
+    vectors = np.load(source / _VECTORS, mmap_mode="r")
+    if vectors.shape[0] != entry["count"]:
+        raise ValueError(
+            f"{source / _VECTORS} holds {vectors.shape[0]} rows, manifest says {entry['count']}"
+        )
+    shards = [
+        recreate_collection(client, collection_name=name, metadata=entry["metadata"])
+        for client in clients
+    ]
+    # As in ingest/index.py: derived files left by the old index would not match the restored vectors.
+    remove_projection(name)
+    remove_quantized_store(name)
+    limit = min([batch_size] + [client.get_max_batch_size() for client in clients])
+
+    buffers: list[list[tuple[int, dict[str, Any]]]] = [[] for _ in shards]
+
+    def flush(shard: int) -> None:
+        rows = buffers[shard]
+        if not rows:
+            return
+        shards[shard].add(
+            ids=[record["id"] for _, record in rows],
+            embeddings=cast(Any, vectors[[row for row, _ in rows]]),
+            documents=[record["document"] for _, record in rows],
+            metadatas=[record["metadata"] for _, record in rows],
+        )
+        rows.clear()
+
+    loaded = 0
+    for row, record in enumerate(iter_records(source / entry["records"])):
+        if row >= len(vectors):
+            raise ValueError(f"{source / entry['records']} has more rows than {source / _VECTORS}")
+        shard = shard_of(_shard_key(record["id"], record["metadata"]), len(shards))
+        buffers[shard].append((row, record))
+        if len(buffers[shard]) >= limit:
+            flush(shard)
+        loaded += 1
+    for shard in range(len(shards)):
+        flush(shard)
+    if loaded != entry["count"]:
+        raise ValueError(f"{name}: loaded {loaded} rows, manifest says {entry['count']}")
+
+    if entry["projection"]:
+        target = projection_path_for(name)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source / _PROJECTION, target)
+    if Config.SEARCH_ENGINE == "quantized" and loaded:
+        build_quantized_store(name, shards)
+    logger.info(
+        f"Imported {loaded} rows into {name}" + (f" ({len(shards)} shards)" if len(shards) > 1 else "")
+    )
+    return loaded
+
+
+def import_snapshot(
+    snapshot: str | Path,
+    clients: Sequence[ClientAPI] | None = None,
+    collection_names: Sequence[str] | None = None,
+    batch_size: int = DEFAULT_IMPORT_BATCH_SIZE,
+    allow_model_mismatch: bool = False,
+) -> dict[str, int]:
+    """
+    Restore a snapshot (all collections, or `collection_names`); return rows per collection.
+
+    Queries are embedded with Config.EMBEDDING_MODEL, so a snapshot made with
+    another model is refused unless allow_model_mismatch is set.
+    """
+    manifest = read_manifest(snapshot)
+    if manifest["embedding_model"] != Config.EMBEDDING_MODEL and not allow_model_mismatch:
+        raise ValueError(
+            f"Snapshot vectors were made with {manifest['embedding_model']!r} but "
+            f"EMBEDDING_MODEL is {Config.EMBEDDING_MODEL!r}; queries would not match them"
+        )
+    entries = manifest["collections"]
+    if collection_names:
+        missing = set(collection_names) - {e["name"] for e in entries}
+        if missing:
+            raise ValueError(f"Collections not in snapshot: {sorted(missing)}")
+        entries = [e for e in entries if e["name"] in collection_names]
+    if clients is None:
+        clients = create_index_clients(configured_num_shards())
+    return {entry["name"]: import_collection(entry, snapshot, clients, batch_size) for entry in entries}
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="ingest.snapshot", description="Export or import embedding snapshots")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Write indexed collections to a snapshot directory")
+    export.add_argument("--out", required=True, help="Snapshot directory")
+    export.add_argument("--zstd", action="store_true", help="Compress records as .jsonl.zst (needs zstandard)")
+
+    restore = sub.add_parser("import", help="Recreate collections from a snapshot (no embedding calls)")
+    restore.add_argument("--snapshot", required=True, help="Snapshot directory")
+    restore.add_argument(
+        "--batch-size",
+        dest="batch_size",
+        type=int,
+        default=DEFAULT_IMPORT_BATCH_SIZE,
+        help="Rows per Chroma add()",
+    )
+    restore.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="Shards to import into (default: Config.CHROMA_NUM_SHARDS)",
+    )
+    restore.add_argument(
+        "--allow-model-mismatch",
+        dest="allow_model_mismatch",
+        action="store_true",
+        help="Import even if the snapshot's embedding model differs from EMBEDDING_MODEL",
+    )
+
+    for command in (export, restore):
+        command.add_argument(
+            "--collections",
+            default=None,
+            help="Comma-separated collection names (default: the three strategy collections / all)",
+        )
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    names = [n.strip() for n in args.collections.split(",") if n.strip()] if args.collections else None
+
+    start = time.perf_counter()
+    if args.command == "export":
+        manifest = export_snapshot(args.out, collection_names=names, compress=args.zstd)
+        for entry in manifest["collections"]:
+            print(f"{entry['name']}: {entry['count']} x {entry['dimensions']}")
+    else:
+        num_shards = configured_num_shards() if args.shards is None else args.shards
+        if num_shards < 1:
+            raise ValueError("--shards must be >= 1")
+        counts = import_snapshot(
+            args.snapshot,
+            clients=create_index_clients(num_shards),
+            collection_names=names,
+            batch_size=args.batch_size,
+            allow_model_mismatch=args.allow_model_mismatch,
+        )
+        for name, count in counts.items():
+            print(f"{name}: {count} rows")
+    print(f"done in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
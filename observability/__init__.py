@@ -0,0 +1 @@
+"""Observability helpers (tracing, metrics, profiling) for the retrieval and generation hot path."""
@@ -0,0 +1,455 @@
+"""
+In-process metrics registry (counters, gauges, fixed-bucket histograms) with
+Prometheus text exposition.
+
+Metric objects are created once at module import and updated on the hot path;
+an update is a dict lookup plus a locked add. The serving process exposes the
+registry over HTTP (`start_metrics_server`), and tools write `snapshot()` or
+`render_prometheus()` next to their results.
+
+문서: docs/observability/metrics.md
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import math
+import re
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from pathlib import Path
+from typing import Any, Generic, TypeVar, cast
+
+# Seconds; covers a cached rewrite (~µs) up to a slow LLM completion.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_NAME_RE = re.compile(r"^[a-zA-Z_:][a-zA-Z0-9_:]*$")
+_LABEL_RE = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+
+
+def _format_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    if math.isnan(v):
+        return "NaN"
+    if v == int(v) and abs(v) < 1e15:
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape_label(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _CounterChild:
+    __slots__ = ("_value", "_lock", "_function")
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+        self._function: Callable[[], float] | None = None
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self._value += amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from `function` at collection time (e.g. lru_cache hits)."""
+        self._function = function
+
+    def get(self) -> float:
+        function = self._function
+        return float(function()) if function is not None else self._value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._value = 0.0
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("_upper_bounds", "_counts", "_sum", "_lock")
+
+    def __init__(self, upper_bounds: tuple[float, ...]):
+        self._upper_bounds = upper_bounds
+        # One count per bucket plus the implicit +Inf bucket (non-cumulative).
+        self._counts = [0] * (len(upper_bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def time(self) -> _Timer:
+        """Context manager observing the elapsed seconds of its block."""
+        return _Timer(self)
+
+    def get(self) -> tuple[list[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * len(self._counts)
+            self._sum = 0.0
+
+
+class _Timer:
+    __slots__ = ("_child", "_t0")
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+        self._t0 = 0.0
+
+    def __enter__(self) -> None:
+        self._t0 = time.perf_counter()
+
+    def __exit__(self, *exc: object) -> None:
+        self._child.observe(time.perf_counter() - self._t0)
+
+
+_ChildT = TypeVar("_ChildT", bound="_CounterChild | _HistogramChild")
+_ValueChildT = TypeVar("_ValueChildT", bound=_CounterChild)
+
+
+class _Metric(Generic[_ChildT]):
+    """A metric family: one child per label-value combination."""
+
+    type_name = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        if not _NAME_RE.match(name):
+            raise ValueError(f"Invalid metric name {name!r}")
+        for label in labelnames:
+            if not _LABEL_RE.match(label) or label.startswith("__"):
+                raise ValueError(f"Invalid label name {label!r}")
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], _ChildT] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> _ChildT:
+        raise NotImplementedError
+
+    def labels(self, *values: Any) -> _ChildT:
+        """Child for one label-value combination (created on first use)."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _unlabelled(self) -> _ChildT:
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use .labels(...)")
+        return self.labels()
+
+    def _items(self) -> list[tuple[tuple[str, ...], _ChildT]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        """(sample name, label string, value) in exposition order."""
+        raise NotImplementedError
+
+    def snapshot(self) -> dict[str, Any]:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Zero every child; children stay valid for callers holding them."""
+        for _, child in self._items():
+            child.reset()
+
+
+class _ValueMetric(_Metric[_ValueChildT]):
+    """Counter/gauge family: one float per child."""
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        for key, child in self._items():
+            yield self.name, _label_str(self.labelnames, key), child.get()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "type": self.type_name,
+            "help": self.help,
+            "samples": [{"labels": dict(zip(self.labelnames, key)), "value": c.get()} for key, c in self._items()],
+        }
+
+
+class Counter(_ValueMetric[_CounterChild]):
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._unlabelled().set_function(function)
+
+
+class Gauge(_ValueMetric[_GaugeChild]):
+    type_name = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._unlabelled().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._unlabelled().dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._unlabelled().set_function(function)
+
+
+class Histogram(_Metric[_HistogramChild]):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        if "le" in labelnames:
+            raise ValueError("'le' is reserved for histogram buckets")
+        upper = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+        if not upper:
+            raise ValueError("Histogram needs at least one finite bucket")
+        super().__init__(name, help, labelnames)
+        self.buckets = upper
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._unlabelled().observe(value)
+
+    def time(self) -> _Timer:
+        return self._unlabelled().time()
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        bounds = [*self.buckets, math.inf]
+        for key, child in self._items():
+            counts, total = child.get()
+            cumulative = 0
+            for bound, n in zip(bounds, counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket", _label_str(self.labelnames, key, le), cumulative
+            yield f"{self.name}_sum", _label_str(self.labelnames, key), total
+            yield f"{self.name}_count", _label_str(self.labelnames, key), cumulative
+
+    def snapshot(self) -> dict[str, Any]:
+        samples = []
+        for key, child in self._items():
+            counts, total = child.get()
+            samples.append(
+                {
+                    "labels": dict(zip(self.labelnames, key)),
+                    "buckets": dict(zip([_format_value(b) for b in [*self.buckets, math.inf]], counts)),
+                    "sum": total,
+                    "count": sum(counts),
+                }
+            )
+        return {"type": self.type_name, "help": self.help, "samples": samples}
+
+
+_MetricT = TypeVar("_MetricT", bound=_Metric[Any])
+
+
+class MetricsRegistry:
+    """Named metric families. Registering an existing name returns the same family."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric[Any]] = {}
+        self._lock = threading.Lock()
+
+    def _register(
+        self, cls: type[_MetricT], name: str, help: str, labelnames: Sequence[str], **kwargs: Any
+    ) -> _MetricT:
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if type(existing) is not cls or existing.labelnames != tuple(labelnames):
+                    raise ValueError(f"Metric {name!r} is already registered with a different type or labels")
+                return cast(_MetricT, existing)
+            metric = cls(name, help, labelnames, **kwargs)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, help, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> _Metric[Any] | None:
+        return self._metrics.get(name)
+
+    def metrics(self) -> list[_Metric[Any]]:
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+
+    def clear(self) -> None:
+        """Zero all recorded samples (families and children stay registered)."""
+        for metric in self.metrics():
+            metric.clear()
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format 0.0.4."""
+        lines: list[str] = []
+        for metric in self.metrics():
+            help_text = metric.help.replace("\\", "\\\\").replace("\n", "\\n")
+            lines.append(f"# HELP {metric.name} {help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for sample_name, labels, value in metric.samples():
+                lines.append(f"{sample_name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-serializable view of every family that has samples."""
+        out: dict[str, Any] = {}
+        for metric in self.metrics():
+            snap = metric.snapshot()
+            if snap["samples"]:
+                out[metric.name] = snap
+        return out
+
+
+REGISTRY = MetricsRegistry()
+
+
+def write_metrics(path: str | Path, registry: MetricsRegistry = REGISTRY) -> Path:
+    """Write the registry to `path`: JSON snapshot for .json, Prometheus text otherwise."""
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    if p.suffix.lower() == ".json":
+        p.write_text(json.dumps(registry.snapshot(), ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    else:
+        p.write_text(registry.render_prometheus(), encoding="utf-8")
+    return p
+
+
+_readiness_check: Callable[[], dict[str, Any]] | None = None
+
+
+def set_readiness_check(check: Callable[[], dict[str, Any]] | None) -> None:
+    """
+    Serve GET /ready from `check()`, a JSON-able dict with a boolean "ready"
+    (200 when true, 503 otherwise). None removes the route (404).
+    """
+    global _readiness_check
+    _readiness_check = check
+
+
+def _make_server(address: tuple[str, int], registry: MetricsRegistry) -> Any:
+    # http.server pulls in email/html parsing (~30 ms), so it is imported only
+    # by processes that actually serve metrics.
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802 (http.server API)
+            path = self.path.split("?", 1)[0]
+            if path == "/ready" and _readiness_check is not None:
+                status = _readiness_check()
+                self._send(
+                    200 if status.get("ready") else 503,
+                    "application/json",
+                    json.dumps(status, ensure_ascii=False).encode("utf-8"),
+                )
+                return
+            if path not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            self._send(200, PROMETHEUS_CONTENT_TYPE, registry.render_prometheus().encode("utf-8"))
+
+        def _send(self, code: int, content_type: str, body: bytes) -> None:
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return None
+
+    server = ThreadingHTTPServer(address, MetricsHandler)
+    server.daemon_threads = True
+    return server
+
+
+_servers: dict[tuple[str, int], Any] = {}
+_servers_lock = threading.Lock()
+
+
+def start_metrics_server(port: int, addr: str = "0.0.0.0", registry: MetricsRegistry = REGISTRY) -> Any:
+    """
+    Serve GET /metrics from a daemon thread; returns the running ThreadingHTTPServer.
+
+    Idempotent per (addr, port), so Streamlit reruns do not try to bind twice.
+    Port 0 binds an ephemeral port (see `server.server_address`); call
+    `server.shutdown()` to stop it.
+    """
+    key = (addr, int(port))
+    with _servers_lock:
+        server = _servers.get(key) if port else None
+        if server is None:
+            server = _make_server(key, registry)
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+            if port:
+                _servers[key] = server
+    return server
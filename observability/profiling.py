@@ -0,0 +1,323 @@
+"""
+Opt-in per-request profiling with collapsed-stack / speedscope dumps.
+
+A request is profiled when profiling is enabled for every request, when it is
+the 1-in-N sampled request, or when the caller passes force=True (the
+`profile=` flag of search_merged / generate_answer). Otherwise
+`profile_request()` returns a shared no-op context manager: one global read,
+no allocation.
+
+문서: docs/observability/profiling.md
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import logging
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+from types import FrameType, TracebackType
+from typing import Any
+
+from config import Config
+from observability import tracing
+
+logger = logging.getLogger(__name__)
+
+PROFILERS = ("sampling", "cprofile")
+PROFILE_FORMATS = ("collapsed", "speedscope")
+
+_DEFAULT_INTERVAL_S = 0.005
+# Deep recursion is cut off instead of growing every stack key.
+_MAX_STACK_DEPTH = 256
+
+_enabled: bool = Config.PROFILE_ENABLED
+_sample_every: int = Config.PROFILE_SAMPLE_EVERY
+_out_dir = Path(Config.PROFILE_DIR)
+_profiler: str = Config.PROFILE_PROFILER
+_format: str = Config.PROFILE_FORMAT
+_interval_s: float = _DEFAULT_INTERVAL_S
+
+_request_counter = itertools.count(1)
+_file_counter = itertools.count(1)
+_active: ContextVar[bool] = ContextVar("rag_profile_active", default=False)
+
+
+def configure_profiling(
+    enabled: bool = False,
+    sample_every: int = 0,
+    out_dir: str | Path | None = None,
+    profiler: str | None = None,
+    fmt: str | None = None,
+    interval_s: float | None = None,
+) -> None:
+    """Override the profiling configuration read from Config at import time."""
+    global _enabled, _sample_every, _out_dir, _profiler, _format, _interval_s
+    if profiler is not None and profiler not in PROFILERS:
+        raise ValueError(f"Unknown profiler {profiler!r}; expected one of {PROFILERS}")
+    if fmt is not None and fmt not in PROFILE_FORMATS:
+        raise ValueError(f"Unknown profile format {fmt!r}; expected one of {PROFILE_FORMATS}")
+    if sample_every < 0:
+        raise ValueError("sample_every must be >= 0")
+    _enabled = bool(enabled)
+    _sample_every = int(sample_every)
+    if out_dir is not None:
+        _out_dir = Path(out_dir)
+    if profiler is not None:
+        _profiler = profiler
+    if fmt is not None:
+        _format = fmt
+    if interval_s is not None:
+        _interval_s = float(interval_s)
+
+
+def profiling_active() -> bool:
+    """Whether any request can be profiled without force=True."""
+    return _enabled or _sample_every > 0
+
+
+def query_id_for(query: str) -> str:
+    """Stable id for a query text, so repeated slow queries share a tag."""
+    return hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def _stack_of(frame: FrameType | None) -> tuple[str, ...]:
+    """Root-to-leaf frame labels."""
+    labels: list[str] = []
+    while frame is not None and len(labels) < _MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+
+class StackSampler:
+    """
+    Sample one thread's Python stack every `interval_s` from a helper thread.
+
+    Each sample is weighted by the time since the previous one, so the totals
+    add up to wall-clock time even when the GIL delays the sampler.
+    """
+
+    def __init__(self, thread_id: int, interval_s: float = _DEFAULT_INTERVAL_S):
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.samples: list[tuple[str, ...]] = []
+        self.weights_ms: list[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is not None:
+                self.samples.append(_stack_of(frame))
+                self.weights_ms.append((now - last) * 1000.0)
+            last = now
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> dict[tuple[str, ...], float]:
+        """Stack -> total weight in milliseconds."""
+        totals: defaultdict[tuple[str, ...], float] = defaultdict(float)
+        for stack, weight in zip(self.samples, self.weights_ms):
+            totals[stack] += weight
+        return dict(totals)
+
+
+def to_collapsed(stacks: dict[tuple[str, ...], float]) -> str:
+    """Brendan Gregg collapsed format: "root;child;leaf <weight>", weights in µs."""
+    lines = [
+        ";".join(s.replace(";", ":") for s in stack) + f" {max(1, round(weight_ms * 1000.0))}"
+        for stack, weight_ms in sorted(stacks.items())
+    ]
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def to_speedscope(
+    samples: list[tuple[str, ...]], weights_ms: list[float], name: str, metadata: dict[str, Any]
+) -> dict[str, Any]:
+    """Sampled speedscope profile (https://www.speedscope.app/file-format-schema.json)."""
+    frame_index: dict[str, int] = {}
+    frames: list[dict[str, Any]] = []
+    indexed: list[list[int]] = []
+    for stack in samples:
+        row = []
+        for label in stack:
+            i = frame_index.get(label)
+            if i is None:
+                i = frame_index[label] = len(frames)
+                func, _, location = label.partition(" (")
+                file, _, line = location.rstrip(")").rpartition(":")
+                frames.append({"name": func, "file": file, "line": int(line) if line.isdigit() else None})
+            row.append(i)
+        indexed.append(row)
+    total = sum(weights_ms)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "rag-lab observability.profiling",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": total,
+                "samples": indexed,
+                "weights": weights_ms,
+            }
+        ],
+        "metadata": metadata,
+    }
+
+
+class _NoopProfile:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        return None
+
+
+_NOOP = _NoopProfile()
+
+
+class ProfileResult:
+    """Where a profiled request was written; yielded by profile_request()."""
+
+    __slots__ = ("name", "query_id", "path", "duration_ms")
+
+    def __init__(self, name: str, query_id: str):
+        self.name = name
+        self.query_id = query_id
+        self.path: Path | None = None
+        self.duration_ms = 0.0
+
+
+class _ProfileContext:
+    __slots__ = ("_result", "_query", "_profiler", "_sampler", "_cprofile", "_token", "_t0")
+
+    def __init__(self, name: str, query: str, query_id: str | None):
+        self._result = ProfileResult(name, query_id or query_id_for(query))
+        self._query = query
+        self._profiler = _profiler
+        self._sampler: StackSampler | None = None
+        self._cprofile: Any = None
+        self._token: Any = None
+        self._t0 = 0.0
+
+    def __enter__(self) -> ProfileResult:
+        self._token = _active.set(True)
+        if self._profiler == "cprofile":
+            import cProfile
+
+            self._cprofile = cProfile.Profile()
+            try:
+                self._cprofile.enable()
+            except ValueError as e:
+                # Python 3.12+ allows one cProfile at a time per process.
+                logger.debug("cProfile unavailable for %s: %s", self._result.name, e)
+                self._cprofile = None
+        else:
+            self._sampler = StackSampler(threading.get_ident(), _interval_s)
+            self._sampler.start()
+        self._t0 = time.perf_counter()
+        return self._result
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self._result.duration_ms = (time.perf_counter() - self._t0) * 1000.0
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        _active.reset(self._token)
+        try:
+            self._write(error=None if exc is None else repr(exc))
+        except OSError as e:
+            logger.warning("Failed to write profile for %s: %s", self._result.name, e)
+
+    def _write(self, error: str | None) -> None:
+        r = self._result
+        stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{r.name}-{r.query_id}-{next(_file_counter)}"
+        _out_dir.mkdir(parents=True, exist_ok=True)
+        metadata = {
+            "name": r.name,
+            "query_id": r.query_id,
+            "query": self._query,
+            "duration_ms": r.duration_ms,
+            "error": error,
+        }
+        trace = tracing.current_trace()
+        if trace is not None:
+            metadata["trace_id"] = trace.trace_id
+
+        if self._cprofile is not None:
+            path = _out_dir / f"{stem}.prof"
+            self._cprofile.dump_stats(str(path))
+            path.with_suffix(".json").write_text(json.dumps(metadata, ensure_ascii=False), encoding="utf-8")
+        elif self._sampler is not None:
+            if _format == "speedscope":
+                path = _out_dir / f"{stem}.speedscope.json"
+                obj = to_speedscope(self._sampler.samples, self._sampler.weights_ms, stem, metadata)
+                path.write_text(json.dumps(obj, ensure_ascii=False), encoding="utf-8")
+            else:
+                path = _out_dir / f"{stem}.collapsed.txt"
+                path.write_text(to_collapsed(self._sampler.collapsed()), encoding="utf-8")
+                path.with_name(f"{stem}.json").write_text(json.dumps(metadata, ensure_ascii=False), encoding="utf-8")
+        else:
+            return
+
+        r.path = path
+        if trace is not None:
+            trace.attrs["profile_path"] = str(path)
+        logger.info("Profiled %s query_id=%s (%.1f ms) -> %s", r.name, r.query_id, r.duration_ms, path)
+
+
+def profile_request(
+    name: str, query: str, force: bool = False, query_id: str | None = None
+) -> _ProfileContext | _NoopProfile:
+    """
+    Profile one request if it is selected; yields a ProfileResult or None.
+
+    Nested entry points (generate_answer -> search_merged) are profiled once,
+    by the outermost one.
+    """
+    if not (force or _enabled or _sample_every):
+        return _NOOP
+    if _active.get():
+        return _NOOP
+    if not (force or _enabled) and next(_request_counter) % _sample_every:
+        return _NOOP
+    return _ProfileContext(name, query, query_id)
@@ -0,0 +1,246 @@
+"""
+Lightweight per-request span tracing (near-zero overhead when disabled).
+
+문서: docs/observability/tracing.md
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import uuid
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    name: str
+    start_ms: float
+    duration_ms: float = 0.0
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+
+class Trace:
+    """Spans recorded for one request."""
+
+    def __init__(self, name: str, attrs: dict[str, Any]):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        self.spans: list[Span] = []
+        self.started_at = time.time()
+        self.duration_ms = 0.0
+        self._t0 = time.perf_counter()
+
+    def timings_ms(self) -> dict[str, float]:
+        """Total duration per span name (same-name spans are summed) plus "total"."""
+        out: dict[str, float] = {}
+        for s in self.spans:
+            out[s.name] = out.get(s.name, 0.0) + s.duration_ms
+        # Traces still in progress (e.g. joined by a nested entry point) report elapsed time.
+        out["total"] = self.duration_ms or (time.perf_counter() - self._t0) * 1000.0
+        return out
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "attrs": self.attrs,
+            "timings_ms": self.timings_ms(),
+            "spans": [
+                {
+                    "name": s.name,
+                    "start_ms": s.start_ms,
+                    "duration_ms": s.duration_ms,
+                    "attrs": s.attrs,
+                }
+                for s in self.spans
+            ],
+        }
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("rag_trace", default=None)
+
+_enabled: bool = Config.TRACE_ENABLED
+_export_path: Path | None = (
+    Path(Config.TRACE_EXPORT_PATH) if Config.TRACE_EXPORT_PATH else None
+)
+_export_lock = threading.Lock()
+
+
+def configure_tracing(enabled: bool, export_path: str | Path | None = None) -> None:
+    """Override the tracing configuration read from Config at import time."""
+    global _enabled, _export_path
+    _enabled = bool(enabled)
+    _export_path = None if export_path is None else Path(export_path)
+
+
+def tracing_enabled() -> bool:
+    return _enabled
+
+
+def _export(trace: Trace) -> None:
+    path = _export_path
+    if path is None:
+        return
+    line = json.dumps(trace.to_dict(), ensure_ascii=False)
+    try:
+        with _export_lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    except OSError as e:
+        logger.warning("Failed to export trace to %s: %s", path, e)
+
+
+class _NoopContext:
+    """Shared context manager used when there is nothing to record."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        return None
+
+
+_NOOP = _NoopContext()
+
+
+class _JoinedTraceContext:
+    """Yields an already-active trace without finishing it."""
+
+    __slots__ = ("_trace",)
+
+    def __init__(self, trace: Trace):
+        self._trace = trace
+
+    def __enter__(self) -> Trace:
+        return self._trace
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        return None
+
+
+class _TraceContext:
+    __slots__ = ("_trace", "_token", "_export")
+
+    def __init__(self, name: str, attrs: dict[str, Any], export: bool = True):
+        self._trace = Trace(name, attrs)
+        self._token: Token[Trace | None] | None = None
+        self._export = export
+
+    def __enter__(self) -> Trace:
+        self._token = _current_trace.set(self._trace)
+        return self._trace
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        tr = self._trace
+        tr.duration_ms = (time.perf_counter() - tr._t0) * 1000.0
+        if exc is not None:
+            tr.attrs["error"] = repr(exc)
+        if self._token is not None:
+            _current_trace.reset(self._token)
+        if self._export:
+            _export(tr)
+
+
+class _SpanContext:
+    __slots__ = ("_trace", "_name", "_attrs", "_t0")
+
+    def __init__(self, trace: Trace, name: str, attrs: dict[str, Any]):
+        self._trace = trace
+        self._name = name
+        self._attrs = attrs
+        self._t0 = 0.0
+
+    def __enter__(self) -> None:
+        self._t0 = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        t1 = time.perf_counter()
+        if exc is not None:
+            self._attrs["error"] = repr(exc)
+        self._trace.spans.append(
+            Span(
+                name=self._name,
+                start_ms=(self._t0 - self._trace._t0) * 1000.0,
+                duration_ms=(t1 - self._t0) * 1000.0,
+                attrs=self._attrs,
+            )
+        )
+
+
+def start_trace(
+    name: str, **attrs: Any
+) -> _TraceContext | _JoinedTraceContext | _NoopContext:
+    """
+    Start a trace for the current request.
+
+    Yields the Trace, or None when tracing is disabled. If a trace is already
+    active in this context, it is yielded and left open for the outer owner.
+    """
+    current = _current_trace.get()
+    if current is not None:
+        return _JoinedTraceContext(current)
+    if not _enabled:
+        return _NOOP
+    return _TraceContext(name, attrs)
+
+
+def record_trace(name: str, **attrs: Any) -> _TraceContext | _JoinedTraceContext:
+    """
+    Like start_trace(), but always yields a Trace, even when tracing is disabled.
+
+    For tools that need per-stage timings regardless of configuration (e.g. the
+    load tester). The trace is exported only when tracing is enabled.
+    """
+    current = _current_trace.get()
+    if current is not None:
+        return _JoinedTraceContext(current)
+    return _TraceContext(name, attrs, export=_enabled)
+
+
+def span(name: str, **attrs: Any) -> _SpanContext | _NoopContext:
+    """Time one stage on the active trace (no-op when no trace is active)."""
+    current = _current_trace.get()
+    if current is None:
+        return _NOOP
+    return _SpanContext(current, name, attrs)
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
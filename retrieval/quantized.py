@@ -0,0 +1,455 @@
+"""
+Two-stage retrieval: a quantized scan for candidates, exact rescoring from disk.
+
+A quantized store holds one collection's vectors twice: compact codes kept in
+RAM (int8 scalar quantization, 1 byte per dimension, or binary sign bits, 1 bit
+per dimension) and the full float32 vectors in a .npy file that is memory-mapped
+rather than loaded. A query scans every code for roughly n_results * overfetch
+candidates, then rescores only those candidates exactly against their
+full-precision rows, so RAM holds 4x (int8) or 32x (binary) less vector data
+than an in-memory float32 index.
+
+QuantizedCollection gives the store the Chroma query result shape, with
+distances in the source collection's space (l2, cosine or ip, recorded when
+the store is built), so VectorSearch (SEARCH_ENGINE=quantized) swaps it in for
+the Chroma collection and merging, thresholds, RAG and evaluation see the same
+similarities as with the Chroma engine.
+
+문서: docs/retrieval/quantized.md
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections.abc import Iterator, Mapping, Sequence
+from pathlib import Path
+from typing import Any, cast
+
+from config import Config
+from observability import metrics
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATIONS = ("int8", "binary")
+SEARCH_ENGINES = ("chroma", "quantized")
+DISTANCE_SPACES = ("l2", "cosine", "ip")
+
+FORMAT_VERSION = 1
+
+QUANTIZED_STAGE_SECONDS = metrics.REGISTRY.histogram(
+    "rag_quantized_stage_duration_seconds",
+    "Quantized engine latency per stage (scan = quantized candidates, rescore = exact)",
+    ("stage",),
+)
+
+_STORE_DIR = "quantized"
+# Rows encoded per block at build time, and rows per binary scan block.
+_SCAN_BLOCK = 8192
+# int8 scan blocks are converted to float32 before the matmul; keeping each
+# converted block cache-sized (~256 KiB) made the scan 2-4x faster than
+# 8192-row blocks (benchmarks/quantized.py, 1536-d).
+_INT8_BLOCK_BYTES = 256 * 1024
+_INT8_MIN_ROWS = 128
+# Chroma get() page size when reading a collection into a store.
+_READ_PAGE = 5000
+
+
+def quantized_store_path(collection_name: str, base: str | None = None) -> Path:
+    """<base>/quantized/<collection> (base defaults to CHROMA_PERSIST_DIRECTORY)."""
+    return Path(base or Config.CHROMA_PERSIST_DIRECTORY) / _STORE_DIR / collection_name
+
+
+def _popcount64(x: Any) -> Any:
+    """Set bits of each uint64 (SWAR; NumPy < 2 has no bitwise_count)."""
+    import numpy as np
+
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+def _pack_signs(vectors: Any) -> Any:
+    """Sign bits of each row, zero-padded to whole uint64 words."""
+    import numpy as np
+
+    words = (vectors.shape[-1] + 63) // 64
+    bits = np.packbits(vectors > 0, axis=-1)
+    pad = words * 8 - bits.shape[-1]
+    if pad:
+        bits = np.concatenate([bits, np.zeros(bits.shape[:-1] + (pad,), dtype=np.uint8)], axis=-1)
+    return bits
+
+
+def collection_space(collection: Any) -> str:
+    """
+    Distance space of a Chroma collection: its "hnsw:space" metadata, else its
+    HNSW configuration, else Chroma's default "l2".
+    """
+    metadata = getattr(collection, "metadata", None) or {}
+    space = metadata.get("hnsw:space")
+    if space is None:
+        configuration = getattr(collection, "configuration_json", None) or {}
+        space = (configuration.get("hnsw") or {}).get("space")
+    return str(space or "l2")
+
+
+def cosine_to_distance(similarity: float, space: str) -> float:
+    """
+    Chroma's distance for unit vectors with cosine `similarity`: squared L2
+    (2 - 2cos) in "l2" space, 1 - cos in "cosine" and "ip" space.
+    """
+    return 2.0 - 2.0 * similarity if space == "l2" else 1.0 - similarity
+
+
+def iter_collection_pages(
+    collections: Sequence[Any], page_size: int = _READ_PAGE
+) -> Iterator[tuple[list[str], Any]]:
+    """(ids, float32 embeddings) pages of each collection in turn (e.g. every shard)."""
+    import numpy as np
+
+    for collection in collections:
+        total = collection.count()
+        for offset in range(0, total, page_size):
+            got = collection.get(limit=page_size, offset=offset, include=["embeddings"])
+            yield [str(i) for i in got["ids"]], np.asarray(got["embeddings"], dtype=np.float32)
+
+
+def write_quantized_store(
+    path: str | Path,
+    pages: Iterator[tuple[list[str], Any]],
+    count: int,
+    quantization: str = "int8",
+    source: str = "",
+    space: str = "l2",
+) -> Path:
+    """
+    Write a store from (ids, vectors) pages holding `count` vectors in total.
+
+    Vectors are L2-normalized and streamed into vectors.npy page by page; the
+    codes are then computed from that file in blocks, so the corpus is never
+    held in memory as float32. The directory is replaced only when complete.
+    `space` is the source collection's distance space, used for the distances
+    QuantizedCollection reports.
+    """
+    import numpy as np
+
+    from retrieval.utils import normalize_rows
+
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization {quantization!r}; expected one of {QUANTIZATIONS}")
+    if space not in DISTANCE_SPACES:
+        raise ValueError(f"Unknown distance space {space!r}; expected one of {DISTANCE_SPACES}")
+    if count <= 0:
+        raise ValueError("A quantized store needs at least one vector")
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    ids: list[str] = []
+    vectors: Any = None
+    max_abs: Any = None
+    for page_ids, page in pages:
+        if vectors is None:
+            vectors = np.lib.format.open_memmap(
+                tmp / "vectors.npy", mode="w+", dtype=np.float32, shape=(count, page.shape[1])
+            )
+            max_abs = np.zeros(page.shape[1], dtype=np.float32)
+        if len(ids) + len(page_ids) > count:
+            raise ValueError(f"Pages hold more than the expected {count} vectors")
+        rows = normalize_rows(page)
+        vectors[len(ids) : len(ids) + len(page_ids)] = rows
+        np.maximum(max_abs, np.abs(rows).max(axis=0), out=max_abs)
+        ids.extend(page_ids)
+    if len(ids) != count:
+        raise ValueError(f"Expected {count} vectors, got {len(ids)}")
+    dim = int(vectors.shape[1])
+
+    if quantization == "int8":
+        # Symmetric per-dimension scale: code = round(x / scale), |code| <= 127.
+        scale = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+        codes = np.lib.format.open_memmap(tmp / "codes.npy", mode="w+", dtype=np.int8, shape=(count, dim))
+        for start in range(0, count, _SCAN_BLOCK):
+            block = vectors[start : start + _SCAN_BLOCK] / scale
+            codes[start : start + _SCAN_BLOCK] = np.clip(np.rint(block), -127, 127)
+        np.save(tmp / "scale.npy", scale)
+    else:
+        codes = np.lib.format.open_memmap(
+            tmp / "codes.npy", mode="w+", dtype=np.uint8, shape=(count, (dim + 63) // 64 * 8)
+        )
+        for start in range(0, count, _SCAN_BLOCK):
+            codes[start : start + _SCAN_BLOCK] = _pack_signs(vectors[start : start + _SCAN_BLOCK])
+    codes.flush()
+    vectors.flush()
+    del codes, vectors
+
+    (tmp / "ids.json").write_text(json.dumps(ids, ensure_ascii=False), encoding="utf-8")
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "quantization": quantization,
+        "count": count,
+        "dimensions": dim,
+        "space": space,
+        "source": source,
+        "created_at": time.time(),
+    }
+    (tmp / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+    logger.info(f"Wrote {quantization} quantized store of {count} x {dim} vectors: {path}")
+    return path
+
+
+def build_quantized_store(
+    collection_name: str,
+    collections: Sequence[Any],
+    quantization: str | None = None,
+    base: str | None = None,
+) -> Path:
+    """Store for an indexed collection (pass every shard's collection); no embedding calls."""
+    count = sum(c.count() for c in collections)
+    return write_quantized_store(
+        quantized_store_path(collection_name, base),
+        iter_collection_pages(collections),
+        count,
+        quantization=quantization or Config.QUANTIZATION,
+        source=collection_name,
+        space=collection_space(collections[0]),
+    )
+
+
+def remove_quantized_store(collection_name: str, base: str | None = None) -> None:
+    """Delete a store (re-indexing without rebuilding it must not leave a stale one)."""
+    path = quantized_store_path(collection_name, base)
+    if path.exists():
+        shutil.rmtree(path)
+        logger.info(f"Removed stale quantized store: {path}")
+
+
+class QuantizedStore:
+    """An opened store: codes and ids in RAM, full vectors memory-mapped."""
+
+    def __init__(self, path: str | Path):
+        import numpy as np
+
+        self.path = Path(path)
+        manifest_path = self.path / "manifest.json"
+        if not manifest_path.is_file():
+            raise FileNotFoundError(
+                f"No quantized store at {self.path}; build it with `python -m retrieval.quantized`"
+            )
+        self.manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Quantized store {self.path} has format {self.manifest.get('format_version')}, "
+                f"expected {FORMAT_VERSION}; rebuild it"
+            )
+        self.quantization: str = self.manifest["quantization"]
+        self.dimensions: int = int(self.manifest["dimensions"])
+        self.space: str = self.manifest["space"]
+        self.ids: list[str] = json.loads((self.path / "ids.json").read_text(encoding="utf-8"))
+        self.codes = np.load(self.path / "codes.npy")
+        if self.quantization == "binary":
+            # Whole 64-bit words, so Hamming distance is XOR + popcount per word.
+            self.codes = self.codes.view(np.uint64)
+        self.scale = np.load(self.path / "scale.npy") if self.quantization == "int8" else None
+        self.vectors = np.load(self.path / "vectors.npy", mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def ram_bytes(self) -> int:
+        """Vector data resident in RAM (the codes); the full vectors stay on disk."""
+        return int(self.codes.nbytes) + (0 if self.scale is None else int(self.scale.nbytes))
+
+    def _scan(self, query: Any) -> Any:
+        """Approximate score of every vector (higher is closer), block by block."""
+        import numpy as np
+
+        if self.quantization == "int8":
+            # codes * scale approximates the vectors; fold the scale into the query.
+            scaled = query * self.scale
+            rows = max(_INT8_MIN_ROWS, _INT8_BLOCK_BYTES // (4 * self.dimensions))
+
+            def score(block: Any) -> Any:
+                return block.astype(np.float32) @ scaled
+
+        else:
+            rows = _SCAN_BLOCK
+            bits = _pack_signs(query).view(np.uint64)
+
+            def score(block: Any) -> Any:
+                # Negative Hamming distance between sign bits.
+                return -_popcount64(block ^ bits).sum(axis=1, dtype=np.int64)
+
+        return np.concatenate(
+            [score(self.codes[start : start + rows]) for start in range(0, len(self.codes), rows)]
+        )
+
+    def search(
+        self, query_embedding: Sequence[float], n_results: int, overfetch: float | None = None
+    ) -> list[tuple[int, float]]:
+        """
+        Top n_results (row, cosine similarity), best first.
+
+        The scan keeps max(n_results, ceil(n_results * overfetch)) candidates
+        (Config.QUANTIZED_OVERFETCH by default); only those rows are read from
+        the memory-mapped vectors and scored exactly.
+        """
+        import math
+
+        import numpy as np
+
+        from retrieval.utils import top_k_indices
+
+        if overfetch is None:
+            overfetch = Config.QUANTIZED_OVERFETCH
+        n = len(self.ids)
+        k = min(int(n_results), n)
+        if k <= 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if query.shape != (self.dimensions,):
+            raise ValueError(f"Store holds {self.dimensions}-d vectors, got a {query.shape[-1]}-d query")
+        norm = float(np.linalg.norm(query))
+        query = query / (norm if norm > 0 else 1.0)
+
+        with QUANTIZED_STAGE_SECONDS.labels("scan").time():
+            num_candidates = min(n, max(k, math.ceil(k * overfetch)))
+            candidates = np.sort(top_k_indices(self._scan(query), num_candidates))
+        with QUANTIZED_STAGE_SECONDS.labels("rescore").time():
+            # Sorted rows read the memory-mapped file front to back.
+            exact = self.vectors[candidates] @ query
+            best = top_k_indices(exact, k)
+        return [(int(candidates[i]), float(exact[i])) for i in best]
+
+
+class QuantizedCollection:
+    """
+    A quantized store behind the subset of the Chroma Collection API that
+    VectorSearch uses. Documents and metadata of the results come from
+    `payloads` (the Chroma collection the store was built from).
+    """
+
+    def __init__(self, name: str, store: QuantizedStore, payloads: Any, overfetch: float | None = None):
+        self.name = name
+        self.store = store
+        self.payloads = payloads
+        self.overfetch = overfetch
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        overfetch: float | None = None,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        result: dict[str, Any] = {"ids": [], "distances": [], "documents": [], "metadatas": []}
+        for embedding in query_embeddings:
+            hits = self.store.search(
+                embedding, n_results, overfetch=self.overfetch if overfetch is None else overfetch
+            )
+            ids = [self.store.ids[row] for row, _ in hits]
+            payload = self._payloads(ids)
+            result["ids"].append(ids)
+            # The distance Chroma reports in the source collection's space, so
+            # VectorSearch derives the same similarity from it as with the Chroma engine.
+            result["distances"].append(
+                [cosine_to_distance(similarity, self.store.space) for _, similarity in hits]
+            )
+            result["documents"].append([payload.get(i, (None, None))[0] for i in ids])
+            result["metadatas"].append([payload.get(i, (None, None))[1] for i in ids])
+        return result
+
+    def _payloads(self, ids: list[str]) -> dict[str, tuple[Any, Any]]:
+        if not ids:
+            return {}
+        got = self.payloads.get(ids=ids, include=["documents", "metadatas"])
+        documents = got.get("documents") or [None] * len(got["ids"])
+        metadatas = got.get("metadatas") or [None] * len(got["ids"])
+        return {str(i): (d, m) for i, d, m in zip(got["ids"], documents, metadatas)}
+
+    def get(self, **kwargs: Any) -> Mapping[str, Any]:
+        return cast("Mapping[str, Any]", self.payloads.get(**kwargs))
+
+    def count(self) -> int:
+        return len(self.store)
+
+
+_shared_stores: dict[Path, tuple[int, QuantizedStore]] = {}
+_shared_stores_lock = threading.Lock()
+
+
+def open_quantized_collection(
+    name: str, payloads: Any, overfetch: float | None = None, base: str | None = None
+) -> QuantizedCollection:
+    """
+    QuantizedCollection for `name`. Each store is opened once per process and
+    reopened when it has been rebuilt (its manifest changed).
+    """
+    path = quantized_store_path(name, base)
+    manifest = path / "manifest.json"
+    version = manifest.stat().st_mtime_ns if manifest.is_file() else 0
+    with _shared_stores_lock:
+        cached = _shared_stores.get(path)
+        if cached is None or cached[0] != version:
+            cached = (version, QuantizedStore(path))
+            _shared_stores[path] = cached
+    return QuantizedCollection(name, cached[1], payloads, overfetch=overfetch)
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="retrieval.quantized", description="Build quantized stores from indexed collections"
+    )
+    p.add_argument(
+        "--collections",
+        default=None,
+        help="Comma-separated collection names (default: the three strategy collections)",
+    )
+    p.add_argument(
+        "--quantization",
+        choices=QUANTIZATIONS,
+        default=None,
+        help="Code type (default: Config.QUANTIZATION)",
+    )
+    return p
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    from retrieval.search import get_chroma_client
+    from retrieval.sharding import configured_num_shards, sharding_enabled
+
+    if args.collections:
+        names = [n.strip() for n in args.collections.split(",") if n.strip()]
+    else:
+        names = [f"{Config.CHROMA_COLLECTION_NAME}__{s}" for s in ("question", "answer", "question_answer")]
+
+    if sharding_enabled():
+        from ingest.index import create_shard_clients
+
+        # Every shard is read in turn (get() offsets are per shard).
+        clients = create_shard_clients(configured_num_shards())
+    else:
+        clients = [get_chroma_client()]
+    for name in names:
+        sources = [client.get_collection(name=name) for client in clients]
+        path = build_quantized_store(name, sources, quantization=args.quantization)
+        print(f"{name}: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,32 +1,46 @@
 """RAG pipeline: Retrieve and generate answers."""
 
-import openai
 import logging
+import time
 from collections.abc import Sequence
 from typing import Any
 
 from config import Config
+from observability import metrics, profiling, tracing
+from ingest.embed import get_openai_client, record_openai_call
 from retrieval.search import VectorSearch
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-openai.api_key = Config.OPENAI_API_KEY
+RAG_ANSWERS = metrics.REGISTRY.counter(
+    "rag_answers_total", "RAG answers by outcome (ok, no_context, empty, error)", ("outcome",)
+)
+RAG_ANSWER_SECONDS = metrics.REGISTRY.histogram(
+    "rag_answer_duration_seconds", "RAGPipeline answer latency (retrieval included when not cached)"
+)
 
 
 class RAGPipeline:
     """RAG pipeline combining retrieval and generation."""
 
-    def __init__(self, collection_name: str | Sequence[str] | None = None):
+    def __init__(
+        self,
+        collection_name: str | Sequence[str] | None = None,
+        search: VectorSearch | None = None,
+    ):
         """
         Initialize RAG pipeline.
 
         Args:
             collection_name: Name(s) of Chroma collection(s)
+            search: Existing VectorSearch to reuse (collection_name is ignored when given)
         """
-        self.search = VectorSearch(collection_name=collection_name)
-        self.client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+        self.search = (
+            search
+            if search is not None
+            else VectorSearch(collection_name=collection_name)
+        )
+        self.client = get_openai_client()
 
     def format_context(self, search_results: list[dict[str, Any]]) -> str:
         """
@@ -88,6 +102,7 @@ Answer:"""
         top_k: int | None = None,
         threshold: float | None = None,
         model: str | None = None,
+        profile: bool = False,
     ) -> dict[str, Any]:
         """
         Generate answer using RAG pipeline.
@@ -97,20 +112,91 @@ Answer:"""
             top_k: Number of documents to retrieve
             threshold: Similarity threshold for retrieval
             model: LLM model name (defaults to Config.LLM_MODEL)
+            profile: Dump a stack profile of this request regardless of configuration
 
         Returns:
-            Dictionary with answer, retrieved context, and metadata
+            Dictionary with answer, retrieved context, and metadata.
+            When tracing is enabled, metadata also carries per-stage "timings_ms" and "trace_id";
+            profiled requests carry "profile_path".
         """
-        if model is None:
-            model = Config.LLM_MODEL
+        with RAG_ANSWER_SECONDS.time(), tracing.start_trace(
+            "rag.generate_answer", query=query
+        ) as trace, profiling.profile_request(
+            "rag.generate_answer", query, force=profile
+        ) as prof:
+            result = self._generate_answer(
+                query, top_k=top_k, threshold=threshold, model=model
+            )
+        return self._annotate(result, trace, prof)
 
+    def generate_answer_from_results(
+        self,
+        query: str,
+        search_results: list[dict[str, Any]],
+        model: str | None = None,
+        profile: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Generate an answer from already-retrieved results (skips retrieval).
+
+        Useful when the caller caches or post-filters retrieval candidates
+        (e.g. the Streamlit app narrowing cached results by Top-K/threshold).
+
+        Args:
+            query: User query
+            search_results: Merged, ranked search results (shape of VectorSearch.search_merged)
+            model: LLM model name (defaults to Config.LLM_MODEL)
+            profile: Dump a stack profile of this request regardless of configuration
+
+        Returns:
+            Same shape as generate_answer()
+        """
+        with RAG_ANSWER_SECONDS.time(), tracing.start_trace(
+            "rag.generate_answer", query=query
+        ) as trace, profiling.profile_request(
+            "rag.generate_answer", query, force=profile
+        ) as prof:
+            result = self._generate_from_results(query, search_results, model=model)
+        return self._annotate(result, trace, prof)
+
+    @staticmethod
+    def _annotate(
+        result: dict[str, Any],
+        trace: tracing.Trace | None,
+        prof: profiling.ProfileResult | None,
+    ) -> dict[str, Any]:
+        if trace is not None:
+            result["metadata"]["timings_ms"] = trace.timings_ms()
+            result["metadata"]["trace_id"] = trace.trace_id
+        if prof is not None and prof.path is not None:
+            result["metadata"]["profile_path"] = str(prof.path)
+        return result
+
+    def _generate_answer(
+        self,
+        query: str,
+        top_k: int | None = None,
+        threshold: float | None = None,
+        model: str | None = None,
+    ) -> dict[str, Any]:
         # Step 1: Retrieve relevant documents
         logger.info(f"Retrieving documents for query: {query}")
         search_results = self.search.search_merged(
             query, top_k=top_k, threshold=threshold
         )
+        return self._generate_from_results(query, search_results, model=model)
+
+    def _generate_from_results(
+        self,
+        query: str,
+        search_results: list[dict[str, Any]],
+        model: str | None = None,
+    ) -> dict[str, Any]:
+        if model is None:
+            model = Config.LLM_MODEL
 
         if not search_results:
+            RAG_ANSWERS.labels("no_context").inc()
             return {
                 "answer": "I couldn't find relevant information in the FAQ database to answer your question.",
                 "retrieved_context": [],
@@ -126,18 +212,25 @@ Answer:"""
         # Step 4: Call LLM
         logger.info(f"Generating answer using {model}...")
         try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a helpful assistant that answers questions based on provided context.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                # temperature=0.7,
-                max_completion_tokens=1000,
-            )
+            started = time.perf_counter()
+            with tracing.span("llm.generate", model=model):
+                try:
+                    response = self.client.chat.completions.create(
+                        model=model,
+                        messages=[
+                            {
+                                "role": "system",
+                                "content": "You are a helpful assistant that answers questions based on provided context.",
+                            },
+                            {"role": "user", "content": prompt},
+                        ],
+                        # temperature=0.7,
+                        max_completion_tokens=1000,
+                    )
+                except Exception:
+                    record_openai_call("chat.completions", model, started, error=True)
+                    raise
+            record_openai_call("chat.completions", model, started, response)
 
             # NOTE:
             # - message.content can be None or empty (e.g., tool_calls/refusal/content_filter).
@@ -152,6 +245,7 @@ Answer:"""
             tool_calls = getattr(message0, "tool_calls", None)
             refusal = getattr(message0, "refusal", None)
 
+            RAG_ANSWERS.labels("ok" if answer else "empty").inc()
             if not answer:
                 logger.warning(
                     "Empty LLM content. model=%s finish_reason=%s has_tool_calls=%s has_refusal=%s content_len=%s",
@@ -184,6 +278,7 @@ Answer:"""
             }
 
         except Exception as e:
+            RAG_ANSWERS.labels("error").inc()
             logger.error(f"Error generating answer: {e}")
             return {
                 "answer": f"Error generating answer: {str(e)}",
@@ -1,20 +1,37 @@
 """Vector search functionality."""
 
-import chromadb
-from chromadb.config import Settings
 import logging
-from collections.abc import Sequence
+import threading
+import time
+from collections.abc import Iterable, Sequence
 from functools import lru_cache
 from typing import Any
 
-import openai
-
 from config import Config
-from ingest.embed import get_embedding
+from ingest.embed import get_embedding, get_openai_client, record_openai_call
+from ingest.reduce import PCAProjection, load_projection
+from observability import metrics, profiling, tracing
+from retrieval.quantized import SEARCH_ENGINES, open_quantized_collection
+from retrieval.sharding import ShardSet, get_shard_set, sharding_enabled
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SEARCH_REQUESTS = metrics.REGISTRY.counter(
+    "rag_search_requests_total", "VectorSearch calls", ("method",)
+)
+SEARCH_SECONDS = metrics.REGISTRY.histogram(
+    "rag_search_duration_seconds", "VectorSearch call latency (rewrite + embed + query)", ("method",)
+)
+SEARCH_EMPTY = metrics.REGISTRY.counter(
+    "rag_search_empty_results_total", "Merged searches that returned no result above threshold"
+)
+COLLECTION_QUERY_SECONDS = metrics.REGISTRY.histogram(
+    "rag_collection_query_duration_seconds", "Chroma query latency per collection", ("collection",)
+)
+QUERY_REWRITES = metrics.REGISTRY.counter(
+    "rag_query_rewrites_total", "Query rewrites by the path that produced them", ("source",)
+)
+
 
 def _rewrite_query_as_question_heuristic(query: str) -> str:
     """
@@ -61,29 +78,35 @@ def _rewrite_query_as_question_openai_cached(query: str) -> str:
     if not Config.OPENAI_API_KEY:
         raise ValueError("OPENAI_API_KEY is not set")
 
-    client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+    client = get_openai_client()
     model = Config.LLM_MODEL
 
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You rewrite user inputs into a single natural Korean question.\n"
-                    "Rules:\n"
-                    "- Preserve the original meaning.\n"
-                    "- Output ONLY the rewritten question, nothing else.\n"
-                    "- Do NOT answer.\n"
-                    "- Keep it to one sentence.\n"
-                    "- Ensure it ends with a question mark '?'."
-                ),
-            },
-            {"role": "user", "content": q},
-        ],
-        temperature=0.0,
-        max_completion_tokens=80,
-    )
+    started = time.perf_counter()
+    try:
+        resp = client.chat.completions.create(
+            model=model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "You rewrite user inputs into a single natural Korean question.\n"
+                        "Rules:\n"
+                        "- Preserve the original meaning.\n"
+                        "- Output ONLY the rewritten question, nothing else.\n"
+                        "- Do NOT answer.\n"
+                        "- Keep it to one sentence.\n"
+                        "- Ensure it ends with a question mark '?'."
+                    ),
+                },
+                {"role": "user", "content": q},
+            ],
+            temperature=0.0,
+            max_completion_tokens=80,
+        )
+    except Exception:
+        record_openai_call("chat.completions", model, started, error=True)
+        raise
+    record_openai_call("chat.completions", model, started, resp)
 
     text = (resp.choices[0].message.content or "").strip()
     # Defensive normalization: take first non-empty line only.
@@ -105,23 +128,139 @@ def _rewrite_query_as_question(query: str) -> str:
     if not q:
         return q
 
-    try:
-        return _rewrite_query_as_question_openai_cached(q)
-    except Exception as e:
-        logger.debug("Query rewrite via OpenAI failed; falling back. err=%s", e)
-        return _rewrite_query_as_question_heuristic(q)
+    with tracing.span("rewrite"):
+        try:
+            rewritten = _rewrite_query_as_question_openai_cached(q)
+        except Exception as e:
+            logger.debug("Query rewrite via OpenAI failed; falling back. err=%s", e)
+            QUERY_REWRITES.labels("heuristic_fallback").inc()
+            return _rewrite_query_as_question_heuristic(q)
+    QUERY_REWRITES.labels("llm").inc()
+    return rewritten
+
+
+# Read from the lru_cache at scrape time; hits / (hits + misses) is the hit ratio.
+metrics.REGISTRY.counter(
+    "rag_rewrite_cache_hits_total", "Query rewrite cache hits"
+).set_function(lambda: _rewrite_query_as_question_openai_cached.cache_info().hits)
+metrics.REGISTRY.counter(
+    "rag_rewrite_cache_misses_total", "Query rewrite cache misses"
+).set_function(lambda: _rewrite_query_as_question_openai_cached.cache_info().misses)
+metrics.REGISTRY.gauge(
+    "rag_rewrite_cache_entries", "Entries in the query rewrite cache"
+).set_function(lambda: _rewrite_query_as_question_openai_cached.cache_info().currsize)
+
+
+REWRITE_MODES = ("llm", "heuristic", "none")
+
+
+_shared_chroma_clients: dict[str, Any] = {}
+_shared_chroma_lock = threading.Lock()
+
+
+def get_chroma_client(path: str | None = None) -> Any:
+    """
+    Return the process-wide shared Chroma PersistentClient for a persist directory.
+
+    Defaults to Config.CHROMA_PERSIST_DIRECTORY. Creation is guarded by a lock so
+    concurrent sessions/threads never open duplicate clients.
+    """
+    if path is None:
+        path = Config.CHROMA_PERSIST_DIRECTORY
+    client = _shared_chroma_clients.get(path)
+    if client is None:
+        with _shared_chroma_lock:
+            client = _shared_chroma_clients.get(path)
+            if client is None:
+                # chromadb is imported here, not at module level (~0.8 s import).
+                import chromadb
+                from chromadb.config import Settings
+
+                client = chromadb.PersistentClient(
+                    path=path,
+                    settings=Settings(anonymized_telemetry=False),
+                )
+                _shared_chroma_clients[path] = client
+    return client
+
+
+def merge_candidates(
+    candidate_lists: Iterable[list[dict[str, Any]]], top_k: int, threshold: float
+) -> list[dict[str, Any]]:
+    """
+    Merge per-collection candidates into one ranked list.
+
+    Drops candidates below threshold, de-duplicates by FAQ identity (metadata["id"]
+    when present, keeping the most similar hit), sorts by similarity, and clips to top_k.
+    """
+    merged: dict[str, dict[str, Any]] = {}
+    for candidates in candidate_lists:
+        for candidate in candidates:
+            if candidate["similarity"] < threshold:
+                continue
+
+            metadata = candidate.get("metadata")
+            doc_id = candidate["id"]
+
+            # Prefer de-duplication by FAQ identity (metadata["id"]) when present.
+            dedupe_key = (
+                str(metadata.get("id", doc_id))
+                if isinstance(metadata, dict)
+                else str(doc_id)
+            )
+
+            prev = merged.get(dedupe_key)
+            if prev is None or float(candidate["similarity"]) > float(
+                prev["similarity"]
+            ):
+                merged[dedupe_key] = candidate
+
+    return sorted(
+        merged.values(), key=lambda r: float(r.get("similarity", 0.0)), reverse=True
+    )[:top_k]
+
+
+def narrow_merged(
+    candidates: list[dict[str, Any]], top_k: int, threshold: float
+) -> list[dict[str, Any]]:
+    """
+    Apply a smaller top_k / higher threshold to an already merged ranking.
+
+    merge_candidates() output is sorted by similarity, so for candidates from
+    search_merged(query, K, T) with K >= top_k and T <= threshold, this is the
+    list search_merged(query, top_k, threshold) would return.
+    """
+    return [c for c in candidates if c["similarity"] >= threshold][:top_k]
 
 
 class VectorSearch:
     """Vector search using Chroma."""
 
-    def __init__(self, collection_name: str | Sequence[str] | None = None):
+    def __init__(
+        self,
+        collection_name: str | Sequence[str] | None = None,
+        client: Any = None,
+        shards: ShardSet | None = None,
+        projections: dict[str, PCAProjection] | None = None,
+        engine: str | None = None,
+        overfetch: float | None = None,
+    ):
         """
         Initialize vector search.
 
         Args:
             collection_name: Name(s) of Chroma collection(s) (defaults to Config value).
                 If multiple names are provided, search can be executed across all collections.
+            client: Chroma client to use (defaults to the process-wide shared client).
+            shards: Search each collection across these shards (scatter-gather). Defaults to
+                the process-wide ShardSet when sharding is configured and no client is given.
+            projections: PCA projection per collection name, applied to query embeddings.
+                Defaults to the projections saved by ingest/index.py (EMBEDDING_REDUCTION=pca)
+                under CHROMA_PERSIST_DIRECTORY.
+            engine: "chroma" (HNSW query) or "quantized" (quantized candidate scan + exact
+                rescoring; Chroma then only serves documents and metadata). Defaults to
+                Config.SEARCH_ENGINE.
+            overfetch: Quantized engine candidates per result (defaults to Config.QUANTIZED_OVERFETCH).
         """
         if collection_name is None:
             collection_names = [Config.CHROMA_COLLECTION_NAME]
@@ -134,14 +273,34 @@ class VectorSearch:
             raise ValueError("collection_name must not be an empty list")
 
         self.collection_names: list[str] = collection_names
-        self.client = chromadb.PersistentClient(
-            path=Config.CHROMA_PERSIST_DIRECTORY,
-            settings=Settings(anonymized_telemetry=False),
-        )
-        self.collections = {
-            name: self.client.get_or_create_collection(name=name)
-            for name in self.collection_names
-        }
+        if shards is None and client is None and sharding_enabled():
+            shards = get_shard_set()
+        self.shards = shards
+        # Chroma Collection, ShardedCollection or QuantizedCollection: all serve query/get/count.
+        self.collections: dict[str, Any]
+        if shards is not None:
+            self.client = client
+            self.collections = {name: shards.collection(name) for name in self.collection_names}
+        else:
+            self.client = client if client is not None else get_chroma_client()
+            self.collections = {
+                name: self.client.get_or_create_collection(name=name)
+                for name in self.collection_names
+            }
+
+        self.engine = engine or Config.SEARCH_ENGINE
+        if self.engine not in SEARCH_ENGINES:
+            raise ValueError(f"Unknown search engine {self.engine!r}; expected one of {SEARCH_ENGINES}")
+        if self.engine == "quantized":
+            self.collections = {
+                name: open_quantized_collection(name, payloads=collection, overfetch=overfetch)
+                for name, collection in self.collections.items()
+            }
+
+        if projections is None:
+            loaded = {name: load_projection(name) for name in self.collection_names}
+            projections = {name: p for name, p in loaded.items() if p is not None}
+        self.projections = projections
 
         # Backward-compatible single-collection attribute
         self.collection_name = self.collection_names[0]
@@ -161,6 +320,13 @@ class VectorSearch:
         Returns:
             Mapping from collection name to a list of search results with metadata
         """
+        SEARCH_REQUESTS.labels("search").inc()
+        with SEARCH_SECONDS.labels("search").time(), tracing.start_trace("search.search", query=query):
+            return self._search(query, top_k=top_k, threshold=threshold)
+
+    def _search(
+        self, query: str, top_k: int | None = None, threshold: float | None = None
+    ) -> dict[str, list[dict[str, Any]]]:
         if top_k is None:
             top_k = Config.TOP_K
         if threshold is None:
@@ -174,37 +340,9 @@ class VectorSearch:
 
         # Search in Chroma per collection (embedding strategy).
         per_collection: dict[str, list[dict[str, Any]]] = {
-            name: [] for name in self.collections.keys()
+            name: self.query_collection(name, query_embedding, n_results=top_k)
+            for name in self.collections.keys()
         }
-        for collection_name, collection in self.collections.items():
-            results = collection.query(
-                query_embeddings=[query_embedding], n_results=top_k
-            )
-
-            if not results.get("ids") or not results["ids"][0]:
-                continue
-
-            for i in range(len(results["ids"][0])):
-                # Convert distance to similarity score
-                distance = results["distances"][0][i]
-                similarity = 1 - distance  # Assuming cosine distance
-
-                # if similarity < threshold:
-                #     continue
-
-                metadata = results["metadatas"][0][i]
-                doc_id = results["ids"][0][i]
-
-                candidate: dict[str, Any] = {
-                    "id": doc_id,
-                    "text": results["documents"][0][i],
-                    "metadata": metadata,
-                    "distance": distance,
-                    "similarity": similarity,
-                    "collection_name": collection_name,
-                }
-
-                per_collection[collection_name].append(candidate)
 
         # Sort and clip per collection.
         for name, items in per_collection.items():
@@ -219,14 +357,28 @@ class VectorSearch:
         return per_collection
 
     def search_merged(
-        self, query: str, top_k: int | None = None, threshold: float | None = None
+        self,
+        query: str,
+        top_k: int | None = None,
+        threshold: float | None = None,
+        profile: bool = False,
     ) -> list[dict[str, Any]]:
         """
         Search across one or more collections and return a single merged ranked list.
 
         This is useful for pipelines (e.g. RAG) that want a unified context rather than
-        comparing embedding strategies side-by-side.
+        comparing embedding strategies side-by-side. profile=True dumps a stack profile
+        of this call (see observability.profiling) regardless of configuration.
         """
+        SEARCH_REQUESTS.labels("search_merged").inc()
+        with SEARCH_SECONDS.labels("search_merged").time(), tracing.start_trace(
+            "search.search_merged", query=query
+        ), profiling.profile_request("search.search_merged", query, force=profile):
+            return self._search_merged(query, top_k=top_k, threshold=threshold)
+
+    def _search_merged(
+        self, query: str, top_k: int | None = None, threshold: float | None = None
+    ) -> list[dict[str, Any]]:
         if top_k is None:
             top_k = Config.TOP_K
         if threshold is None:
@@ -235,55 +387,120 @@ class VectorSearch:
         rewritten_query = _rewrite_query_as_question(query)
         query_embedding = get_embedding(rewritten_query)
 
-        merged: dict[str, dict[str, Any]] = {}
-        for collection_name, collection in self.collections.items():
-            results = collection.query(
-                query_embeddings=[query_embedding], n_results=top_k
-            )
-
-            if not results.get("ids") or not results["ids"][0]:
-                continue
+        return self._search_merged_by_embedding(
+            query_embedding,
+            top_k=top_k,
+            threshold=threshold,
+            query_label=rewritten_query,
+        )
 
-            for i in range(len(results["ids"][0])):
-                distance = results["distances"][0][i]
-                similarity = 1 - distance  # Assuming cosine distance
+    def query_collection(
+        self,
+        collection_name: str,
+        query_embedding: Sequence[float],
+        n_results: int,
+        projected: bool = False,
+    ) -> list[dict[str, Any]]:
+        """
+        Query one configured collection and return its ranked candidates (no threshold).
 
-                if similarity < threshold:
-                    continue
+        Each candidate has id, text, metadata, distance, similarity, and collection_name.
+        Pass projected=True when query_embedding is already in the collection's stored
+        space (e.g. one of its own vectors), so the PCA projection is not applied again.
+        """
+        collection = self.collections[collection_name]
+        projection = None if projected else self.projections.get(collection_name)
+        if projection is not None:
+            # The collection stores PCA-reduced vectors; reduce the query the same way.
+            query_embedding = projection.transform_one(query_embedding)
+        with COLLECTION_QUERY_SECONDS.labels(collection_name).time(), tracing.span(
+            f"chroma.query:{collection_name}", n_results=n_results
+        ):
+            results = collection.query(
+                query_embeddings=[list(query_embedding)], n_results=n_results
+            )
 
-                metadata = results["metadatas"][0][i]
-                doc_id = results["ids"][0][i]
+        candidates: list[dict[str, Any]] = []
+        if not results.get("ids") or not results["ids"][0]:
+            return candidates
 
-                # Prefer de-duplication by FAQ identity (metadata["id"]) when present.
-                dedupe_key = (
-                    str(metadata.get("id", doc_id))
-                    if isinstance(metadata, dict)
-                    else str(doc_id)
-                )
+        for i in range(len(results["ids"][0])):
+            # Convert distance to similarity score
+            distance = results["distances"][0][i]
+            similarity = 1 - distance  # Assuming cosine distance
 
-                candidate: dict[str, Any] = {
-                    "id": doc_id,
+            candidates.append(
+                {
+                    "id": results["ids"][0][i],
                     "text": results["documents"][0][i],
-                    "metadata": metadata,
+                    "metadata": results["metadatas"][0][i],
                     "distance": distance,
                     "similarity": similarity,
                     "collection_name": collection_name,
                 }
+            )
+        return candidates
 
-                prev = merged.get(dedupe_key)
-                if prev is None or float(candidate["similarity"]) > float(
-                    prev["similarity"]
-                ):
-                    merged[dedupe_key] = candidate
+    def rewrite_query(self, query: str, mode: str = "llm") -> str:
+        """
+        Rewrite a user query into the question-shaped string that gets embedded.
 
-        formatted_results = sorted(
-            merged.values(), key=lambda r: float(r.get("similarity", 0.0)), reverse=True
-        )[:top_k]
+        mode is one of REWRITE_MODES: "llm" (OpenAI with heuristic fallback, the
+        search_merged() behavior), "heuristic" (no network call), or "none" (strip only).
+        """
+        if mode == "llm":
+            return _rewrite_query_as_question(query)
+        if mode == "heuristic":
+            return _rewrite_query_as_question_heuristic(query)
+        if mode == "none":
+            return (query or "").strip()
+        raise ValueError(f"Unknown rewrite mode {mode!r}; expected one of {REWRITE_MODES}")
+
+    def search_merged_by_embedding(
+        self,
+        query_embedding: Sequence[float],
+        top_k: int | None = None,
+        threshold: float | None = None,
+        query_label: str = "",
+    ) -> list[dict[str, Any]]:
+        """
+        Merged search for a precomputed query embedding (no rewrite, no embedding call).
+
+        search_merged() is rewrite_query() + get_embedding() + this method, so callers that
+        embed queries in batches (e.g. the evaluation runner) get identical ranking logic.
+        """
+        SEARCH_REQUESTS.labels("search_merged_by_embedding").inc()
+        with SEARCH_SECONDS.labels("search_merged_by_embedding").time():
+            return self._search_merged_by_embedding(
+                query_embedding, top_k=top_k, threshold=threshold, query_label=query_label
+            )
+
+    def _search_merged_by_embedding(
+        self,
+        query_embedding: Sequence[float],
+        top_k: int | None = None,
+        threshold: float | None = None,
+        query_label: str = "",
+    ) -> list[dict[str, Any]]:
+        if top_k is None:
+            top_k = Config.TOP_K
+        if threshold is None:
+            threshold = Config.SIMILARITY_THRESHOLD
+
+        candidate_lists = [
+            self.query_collection(name, query_embedding, n_results=top_k)
+            for name in self.collections.keys()
+        ]
+        formatted_results = merge_candidates(
+            candidate_lists, top_k=top_k, threshold=threshold
+        )
+        if not formatted_results:
+            SEARCH_EMPTY.inc()
 
         logger.info(
             "Merged-search found %s results for query: %s... (collections=%s)",
             len(formatted_results),
-            rewritten_query[:50],
+            query_label[:50],
             self.collection_names,
         )
         return formatted_results
@@ -0,0 +1,321 @@
+"""
+Sharded collections: hash FAQ ids to N shards, scatter queries, heap-merge results.
+
+Shard i of every strategy collection lives either in its own persist directory
+(<CHROMA_PERSIST_DIRECTORY>/shard-NN, queried from a thread or from one worker
+process per shard) or on the i-th server of CHROMA_SHARD_HOSTS. A
+ShardedCollection looks like a Chroma collection to VectorSearch: query()
+fans out to every shard and merges the per-shard rankings into the global top n.
+
+문서: docs/retrieval/sharding.md
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any
+
+from config import Config
+from observability import metrics
+
+logger = logging.getLogger(__name__)
+
+SHARD_QUERY_SECONDS = metrics.REGISTRY.histogram(
+    "rag_shard_query_duration_seconds",
+    "Per-shard collection call latency, including the hop to a worker or server",
+    ("shard",),
+)
+
+# Per-query result fields merged across shards (ids and distances are required).
+_RESULT_FIELDS = ("ids", "distances", "documents", "metadatas", "embeddings")
+
+
+def shard_of(faq_id: Any, num_shards: int) -> int:
+    """
+    Shard of an FAQ id: a stable hash of str(faq_id), so indexing and any later
+    re-index agree across processes (unlike the salted built-in hash()).
+    """
+    if num_shards <= 1:
+        return 0
+    digest = hashlib.blake2b(str(faq_id).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % num_shards
+
+
+def shard_persist_directory(shard: int, base: str | None = None) -> str:
+    """Persist directory of a local shard: <base>/shard-NN."""
+    return os.path.join(base or Config.CHROMA_PERSIST_DIRECTORY, f"shard-{shard:02d}")
+
+
+def parse_shard_hosts(value: str) -> list[tuple[str, int]]:
+    """'host:port,host:port' -> [(host, port), ...]; an empty string gives []."""
+    hosts: list[tuple[str, int]] = []
+    for item in (v.strip() for v in value.split(",")):
+        if not item:
+            continue
+        host, sep, port = item.rpartition(":")
+        if not sep or not host or not port.isdigit():
+            raise ValueError(f"Invalid shard host {item!r}; expected host:port")
+        hosts.append((host, int(port)))
+    return hosts
+
+
+def configured_num_shards() -> int:
+    """Shard count from Config; with CHROMA_SHARD_HOSTS it is the number of hosts."""
+    hosts = parse_shard_hosts(Config.CHROMA_SHARD_HOSTS)
+    if hosts:
+        if Config.CHROMA_NUM_SHARDS not in (1, len(hosts)):
+            raise ValueError(
+                f"CHROMA_NUM_SHARDS={Config.CHROMA_NUM_SHARDS} does not match "
+                f"{len(hosts)} CHROMA_SHARD_HOSTS"
+            )
+        return len(hosts)
+    if Config.CHROMA_NUM_SHARDS < 1:
+        raise ValueError("CHROMA_NUM_SHARDS must be >= 1")
+    return Config.CHROMA_NUM_SHARDS
+
+
+def sharding_enabled() -> bool:
+    """Whether VectorSearch should search shards instead of one local collection."""
+    return bool(Config.CHROMA_SHARD_HOSTS.strip()) or Config.CHROMA_NUM_SHARDS > 1
+
+
+def _ranked(result: Mapping[str, Any], q: int, shard: int) -> Iterator[tuple[float, int, int]]:
+    distances = result["distances"][q]
+    return ((float(distances[i]), shard, i) for i in range(len(distances)))
+
+
+def merge_shard_results(results: Sequence[Mapping[str, Any]], n_results: int) -> dict[str, Any]:
+    """
+    Merge per-shard query results into Chroma's result shape, keeping the n best.
+
+    Each shard's list is already sorted by distance, so a k-way heap merge stops
+    after n_results items instead of sorting every candidate. Ties go to the
+    lower shard, then the shard's own order.
+    """
+    if not results:
+        return {"ids": [], "distances": []}
+    fields = [f for f in _RESULT_FIELDS if all(r.get(f) is not None for r in results)]
+    merged: dict[str, Any] = {f: [] for f in fields}
+    for q in range(len(results[0]["ids"])):
+        streams = [_ranked(r, q, shard) for shard, r in enumerate(results)]
+        top = list(itertools.islice(heapq.merge(*streams), n_results))
+        for f in fields:
+            merged[f].append([results[shard][f][q][i] for _, shard, i in top])
+    return merged
+
+
+def _collection_call(collection: Any, method: str, kwargs: dict[str, Any]) -> Any:
+    result = getattr(collection, method)(**kwargs)
+    # Chroma result objects are dicts; plain dicts pickle across processes.
+    return dict(result) if isinstance(result, Mapping) else result
+
+
+_worker_collections: dict[tuple[str, str], Any] = {}
+
+
+def _worker_call(path: str, collection_name: str, method: str, kwargs: dict[str, Any]) -> Any:
+    """Runs in a shard worker process, which opens its shard directory once."""
+    collection = _worker_collections.get((path, collection_name))
+    if collection is None:
+        from retrieval.search import get_chroma_client
+
+        collection = get_chroma_client(path).get_or_create_collection(name=collection_name)
+        _worker_collections[(path, collection_name)] = collection
+    return _collection_call(collection, method, kwargs)
+
+
+class _ClientShard:
+    """A shard reached through a Chroma client in this process (local or HTTP)."""
+
+    def __init__(self, label: str, client: Any, pool: Executor):
+        self.label = label
+        self.client = client
+        self._pool = pool
+        self._collections: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _collection(self, name: str) -> Any:
+        collection = self._collections.get(name)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.get(name)
+                if collection is None:
+                    collection = self.client.get_or_create_collection(name=name)
+                    self._collections[name] = collection
+        return collection
+
+    def submit(self, collection_name: str, method: str, kwargs: dict[str, Any]) -> Future[Any]:
+        return self._pool.submit(
+            lambda: _collection_call(self._collection(collection_name), method, kwargs)
+        )
+
+    def close(self) -> None:
+        pass
+
+
+class _ProcessShard:
+    """A local shard directory owned by one worker process (its own memory and CPU)."""
+
+    def __init__(self, label: str, path: str):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.label = label
+        self.path = path
+        # spawn: forking a process that already runs Chroma/gRPC threads is unsafe.
+        self._executor = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def submit(self, collection_name: str, method: str, kwargs: dict[str, Any]) -> Future[Any]:
+        return self._executor.submit(_worker_call, self.path, collection_name, method, kwargs)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _observe_elapsed(histogram: Any, started: float) -> Callable[[Future[Any]], None]:
+    """Done-callback observing the seconds since `started` in `histogram`."""
+
+    def done(_future: Future[Any]) -> None:
+        histogram.observe(time.perf_counter() - started)
+
+    return done
+
+
+class ShardedCollection:
+    """One logical collection split across shards; the subset of the Chroma
+    Collection API that VectorSearch and the app use (query, get, count)."""
+
+    def __init__(self, name: str, shards: ShardSet):
+        self.name = name
+        self._shards = shards
+
+    def query(
+        self, query_embeddings: Sequence[Sequence[float]], n_results: int = 10, **kwargs: Any
+    ) -> dict[str, Any]:
+        # Every shard returns its own top n_results; the merge keeps the global top n.
+        results = self._shards.scatter(
+            self.name, "query", {"query_embeddings": query_embeddings, "n_results": n_results, **kwargs}
+        )
+        return merge_shard_results(results, n_results)
+
+    def get(self, **kwargs: Any) -> dict[str, Any]:
+        """
+        Rows of every shard, concatenated in shard order (by ids or where filter).
+
+        limit/offset are refused: they would apply to each shard separately, so
+        a page would hold up to N x limit rows. Page through each shard's own
+        collection instead (see retrieval.quantized.iter_collection_pages).
+        """
+        paging = sorted(k for k in ("limit", "offset") if kwargs.get(k) is not None)
+        if paging:
+            raise ValueError(
+                f"ShardedCollection.get() does not support {'/'.join(paging)}; "
+                "page through each shard's collection instead"
+            )
+        results = self._shards.scatter(self.name, "get", kwargs)
+        fields = [
+            f for f in ("ids", "documents", "metadatas", "embeddings")
+            if all(r.get(f) is not None for r in results)
+        ]
+        return {f: [item for r in results for item in r[f]] for f in fields}
+
+    def count(self) -> int:
+        return sum(self._shards.scatter(self.name, "count", {}))
+
+
+class ShardSet:
+    """The shards of a deployment; open once per process (see get_shard_set())."""
+
+    def __init__(self, shards: Sequence[_ClientShard | _ProcessShard], pool: ThreadPoolExecutor | None = None):
+        if not shards:
+            raise ValueError("A ShardSet needs at least one shard")
+        self.shards = list(shards)
+        self._pool = pool
+
+    @classmethod
+    def local(cls, num_shards: int, base: str | None = None, processes: bool = False) -> ShardSet:
+        """Shards in <base>/shard-NN, queried from threads or from one process each."""
+        paths = [shard_persist_directory(i, base) for i in range(num_shards)]
+        if processes:
+            return cls([_ProcessShard(f"{i:02d}", path) for i, path in enumerate(paths)])
+        from retrieval.search import get_chroma_client
+
+        pool = ThreadPoolExecutor(max_workers=num_shards, thread_name_prefix="shard")
+        return cls(
+            [_ClientShard(f"{i:02d}", get_chroma_client(path), pool) for i, path in enumerate(paths)],
+            pool,
+        )
+
+    @classmethod
+    def remote(cls, hosts: Sequence[tuple[str, int]]) -> ShardSet:
+        """One shard per Chroma server, queried over HTTP from threads."""
+        import chromadb
+        from chromadb.config import Settings
+
+        pool = ThreadPoolExecutor(max_workers=len(hosts), thread_name_prefix="shard")
+        return cls(
+            [
+                _ClientShard(
+                    f"{i:02d}",
+                    chromadb.HttpClient(host=host, port=port, settings=Settings(anonymized_telemetry=False)),
+                    pool,
+                )
+                for i, (host, port) in enumerate(hosts)
+            ],
+            pool,
+        )
+
+    @classmethod
+    def from_config(cls) -> ShardSet:
+        hosts = parse_shard_hosts(Config.CHROMA_SHARD_HOSTS)
+        if hosts:
+            return cls.remote(hosts)
+        return cls.local(configured_num_shards(), processes=Config.CHROMA_SHARD_PROCESSES)
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    def collection(self, name: str) -> ShardedCollection:
+        return ShardedCollection(name, self)
+
+    def scatter(self, collection_name: str, method: str, kwargs: dict[str, Any]) -> list[Any]:
+        """Call `method` on every shard's collection concurrently; results in shard order."""
+        started = time.perf_counter()
+        futures = []
+        for shard in self.shards:
+            future = shard.submit(collection_name, method, kwargs)
+            future.add_done_callback(_observe_elapsed(SHARD_QUERY_SECONDS.labels(shard.label), started))
+            futures.append(future)
+        # A failing shard fails the call: a silently partial ranking would look valid.
+        return [f.result() for f in futures]
+
+    def close(self) -> None:
+        for shard in self.shards:
+            shard.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+
+_shared_shard_set: ShardSet | None = None
+_shared_shard_lock = threading.Lock()
+
+
+def get_shard_set() -> ShardSet:
+    """Process-wide ShardSet built from Config (worker processes start once)."""
+    global _shared_shard_set
+    if _shared_shard_set is None:
+        with _shared_shard_lock:
+            if _shared_shard_set is None:
+                _shared_shard_set = ShardSet.from_config()
+                logger.info("Opened %s shards", len(_shared_shard_set))
+    return _shared_shard_set
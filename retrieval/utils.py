@@ -1,55 +1,175 @@
-"""Utility functions for retrieval."""
+"""
+Utility functions for retrieval: scalar helpers and batch NumPy kernels.
+
+The batch kernels work on float32 matrices whose rows are L2-normalized once
+(`normalize_rows`), so cosine similarity is a single matrix product and top-k
+is a partial sort instead of a full one.
+
+문서: docs/retrieval/utils.md
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
 import numpy as np
-from typing import List, Tuple
 
+FUSION_METHODS = ("max", "sum", "rrf")
+
+# k in 1 / (k + rank) for reciprocal rank fusion (Cormack et al., 2009).
+RRF_K = 60
 
-def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
+
+def cosine_similarity(vec1: Sequence[float], vec2: Sequence[float]) -> float:
     """
     Calculate cosine similarity between two vectors.
-    
+
     Args:
         vec1: First vector
         vec2: Second vector
-    
+
     Returns:
-        Cosine similarity score between -1 and 1
-    """
-    vec1 = np.array(vec1)
-    vec2 = np.array(vec2)
-    
-    dot_product = np.dot(vec1, vec2)
-    norm1 = np.linalg.norm(vec1)
-    norm2 = np.linalg.norm(vec2)
-    
-    if norm1 == 0 or norm2 == 0:
+        Cosine similarity score between -1 and 1 (0.0 if either vector is zero)
+    """
+    a = np.asarray(vec1, dtype=np.float64)
+    b = np.asarray(vec2, dtype=np.float64)
+    norm = float(np.sqrt(np.dot(a, a) * np.dot(b, b)))
+    if norm == 0.0:
         return 0.0
-    
-    return dot_product / (norm1 * norm2)
+    return float(np.dot(a, b)) / norm
 
 
-def filter_by_threshold(results: List[dict], threshold: float) -> List[dict]:
+def filter_by_threshold(results: list[dict[str, Any]], threshold: float) -> list[dict[str, Any]]:
     """
     Filter search results by similarity threshold.
-    
+
+    Stays a plain loop: for result dicts the cost is the key lookups, and
+    building an array first is slower (see benchmarks/kernels.py). Use
+    threshold_mask() when the scores are already an array.
+
     Args:
         results: List of search result dictionaries with 'distance' or 'score'
         threshold: Minimum similarity threshold
-    
+
     Returns:
         Filtered list of results
     """
     filtered = []
     for result in results:
         # Chroma returns 'distance' (lower is better), convert to similarity
-        if 'distance' in result:
+        if "distance" in result:
             # Convert distance to similarity (assuming cosine distance)
-            similarity = 1 - result['distance']
-        elif 'score' in result:
-            similarity = result['score']
+            similarity = 1 - result["distance"]
+        elif "score" in result:
+            similarity = result["score"]
         else:
             continue
-        
+
         if similarity >= threshold:
             filtered.append(result)
-    
+
     return filtered
+
+
+def normalize_rows(matrix: Any) -> np.ndarray:
+    """
+    Return a float32 copy of `matrix` (n, d) with L2-normalized rows.
+
+    Zero rows stay zero, so their cosine with anything is 0. A 1-D vector is
+    treated as one row and returned 1-D.
+    """
+    m = np.array(matrix, dtype=np.float32, copy=True)
+    rows = m.reshape(1, -1) if m.ndim == 1 else m
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    np.divide(rows, norms, out=rows, where=norms > 0)
+    return m
+
+
+def cosine_similarity_matrix(queries: Any, docs: Any, normalized: bool = False) -> np.ndarray:
+    """
+    Many-to-many cosine similarity: (q, d) @ (n, d).T -> (q, n) float32.
+
+    Pass normalized=True when both inputs come from normalize_rows() (the usual
+    case for a stored embedding matrix) to skip renormalizing the documents on
+    every call.
+    """
+    q = np.asarray(queries, dtype=np.float32) if normalized else normalize_rows(queries)
+    d = np.asarray(docs, dtype=np.float32) if normalized else normalize_rows(docs)
+    squeeze = q.ndim == 1
+    scores: np.ndarray = np.atleast_2d(q) @ d.T
+    return scores[0] if squeeze else scores
+
+
+def top_k_indices(scores: Any, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores along the last axis, best first.
+
+    Finds the k-th best score with a partial sort (O(n)) and sorts only the k
+    survivors. Ties keep the lower index first, also at the k-th place. Works on
+    1-D (n,) or 2-D (q, n) scores; k is clipped to n.
+    """
+    s = np.asarray(scores)
+    n = s.shape[-1]
+    k = min(int(k), n)
+    if k <= 0:
+        return np.zeros(s.shape[:-1] + (0,), dtype=np.intp)
+    if k == n:
+        return np.argsort(-s, axis=-1, kind="stable")
+
+    rows = s.reshape(-1, n)
+    kth = -np.partition(-rows, k - 1, axis=1)[:, k - 1 : k]
+    above = rows > kth
+    # Of the scores equal to the k-th one, keep the lowest indices that fit.
+    at = rows == kth
+    room = k - above.sum(axis=1, keepdims=True)
+    keep = above | (at & (np.cumsum(at, axis=1) <= room))
+    part = np.nonzero(keep)[1].reshape(len(rows), k)
+    order = np.argsort(-np.take_along_axis(rows, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1).reshape(s.shape[:-1] + (k,))
+
+
+def threshold_mask(scores: Any, threshold: Any) -> np.ndarray:
+    """
+    Boolean mask of scores >= threshold (NaN scores are never kept).
+
+    threshold may be an array broadcastable against scores, e.g. a (t, 1)
+    column of thresholds against (1, n) scores gives one mask row per threshold.
+    """
+    mask: np.ndarray = np.asarray(scores) >= threshold
+    return mask
+
+
+def fuse_scores(
+    scores: Any, method: str = "max", weights: Sequence[float] | None = None
+) -> np.ndarray:
+    """
+    Fuse per-source scores (s, n) for the same n documents into (n,).
+
+    - "max": best score over sources (the merge_candidates() rule); use -inf
+      (or NaN) for documents a source did not return.
+    - "sum": weighted sum of scores (weights default to 1; missing = NaN counts 0).
+    - "rrf": reciprocal rank fusion, sum of w / (RRF_K + rank) over sources that
+      returned the document (rank 1 = best); missing = NaN or -inf.
+    """
+    s = np.asarray(scores, dtype=np.float64)
+    if s.ndim != 2:
+        raise ValueError("scores must be 2-D (sources, documents)")
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method {method!r}; expected one of {FUSION_METHODS}")
+    w = np.ones(s.shape[0]) if weights is None else np.asarray(weights, dtype=np.float64)
+    if w.shape != (s.shape[0],):
+        raise ValueError("weights must have one entry per source")
+
+    present = np.isfinite(s)
+    fused: np.ndarray
+    if method == "max":
+        fused = np.max(np.where(present, s, -np.inf), axis=0)
+    elif method == "sum":
+        fused = np.where(present, s, 0.0).T @ w
+    else:
+        # Rank within each source among documents it returned (1 = best).
+        order = np.argsort(np.where(present, -s, np.inf), axis=1, kind="stable")
+        ranks = np.argsort(order, axis=1) + 1
+        fused = (np.where(present, 1.0 / (RRF_K + ranks), 0.0) * w[:, None]).sum(axis=0)
+    return fused
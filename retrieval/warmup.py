@@ -0,0 +1,236 @@
+"""
+Warm-up at process start and the readiness state serving code checks.
+
+warm_up() does the work the first queries would otherwise pay for: it loads
+every collection's HNSW index with a probe query (this also starts shard
+workers), creates the shared OpenAI client and its connection pool, and runs a
+few synthetic queries through embedding and merged search. The outcome is kept
+in a process-wide Readiness that the Streamlit app, the load test and the
+metrics server's /ready route read.
+
+문서: docs/retrieval/warmup.md
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any
+
+from config import Config
+from observability import metrics
+
+if TYPE_CHECKING:
+    from retrieval.rag import RAGPipeline
+    from retrieval.search import VectorSearch
+
+logger = logging.getLogger(__name__)
+
+READINESS_STATES = ("starting", "warming", "ready", "degraded", "failed")
+
+# Short, typical user questions; they only need to exercise the query path.
+DEFAULT_WARM_QUERIES = (
+    "불안 증상은 무엇인가요?",
+    "잠을 잘 못 자요",
+    "상담은 어떻게 받을 수 있나요?",
+    "우울할 때 도움이 되는 방법이 있나요?",
+)
+
+
+@dataclass(frozen=True)
+class WarmupStep:
+    name: str
+    ok: bool
+    duration_ms: float
+    detail: str = ""
+
+
+class Readiness:
+    """
+    starting -> warming -> ready | degraded | failed.
+
+    "degraded" still accepts traffic: the indexes are loaded, but an optional
+    step (e.g. the OpenAI client) failed, so early requests may be slow or fail.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.state = "starting"
+        self.steps: list[WarmupStep] = []
+        self.started_at: float | None = None
+        self.duration_s = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.state in ("ready", "degraded")
+
+    def _begin(self) -> None:
+        with self._lock:
+            self.state = "warming"
+            self.steps = []
+            self.started_at = time.time()
+            self.duration_s = 0.0
+
+    def _record(self, step: WarmupStep) -> None:
+        with self._lock:
+            self.steps.append(step)
+
+    def _finish(self, state: str, duration_s: float) -> None:
+        with self._lock:
+            self.state = state
+            self.duration_s = duration_s
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "ready": self.ready,
+                "started_at": self.started_at,
+                "duration_s": self.duration_s,
+                "steps": [asdict(s) for s in self.steps],
+            }
+
+
+READINESS = Readiness()
+
+metrics.REGISTRY.gauge(
+    "rag_ready", "1 when warm-up finished and the process accepts traffic (ready or degraded)"
+).set_function(lambda: 1.0 if READINESS.ready else 0.0)
+metrics.REGISTRY.gauge(
+    "rag_warmup_duration_seconds", "Duration of the last warm-up"
+).set_function(lambda: READINESS.duration_s)
+
+
+def get_readiness() -> Readiness:
+    return READINESS
+
+
+def _run_step(
+    readiness: Readiness, name: str, fn: Callable[[], tuple[bool, str, Any]]
+) -> tuple[bool, Any, bool]:
+    """Run fn() -> (ok, detail, value); returns (ok, value, raised)."""
+    t0 = time.perf_counter()
+    raised = False
+    try:
+        ok, detail, value = fn()
+    except Exception as e:
+        ok, detail, value, raised = False, f"{type(e).__name__}: {e}", None, True
+    step = WarmupStep(name, ok, (time.perf_counter() - t0) * 1000.0, detail)
+    readiness._record(step)
+    log = logger.info if ok else logger.warning
+    log(
+        "Warm-up %s: %s in %.0f ms%s",
+        name,
+        "ok" if ok else "FAILED",
+        step.duration_ms,
+        f" ({detail})" if detail else "",
+    )
+    return ok, value, raised
+
+
+def _load_indexes(search: VectorSearch) -> tuple[bool, str, Any]:
+    """
+    Query every collection with one of its own vectors so Chroma loads the
+    index; returns those probe vectors by collection name.
+    """
+    probes: dict[str, list[float]] = {}
+    total = 0
+    empty: list[str] = []
+    for name, collection in search.collections.items():
+        count = collection.count()
+        total += count
+        if count == 0:
+            empty.append(name)
+            continue
+        got = collection.get(limit=1, include=["embeddings"])
+        vector = [float(v) for v in got["embeddings"][0]]
+        collection.query(query_embeddings=[vector], n_results=1)
+        probes[name] = vector
+    detail = f"{len(search.collections)} collections, {total} vectors"
+    if empty:
+        detail += f"; empty: {', '.join(empty)}"
+    return not empty, detail, probes
+
+
+def _open_openai_client() -> tuple[bool, str, Any]:
+    if not Config.OPENAI_API_KEY:
+        return False, "OPENAI_API_KEY is not set", None
+    from ingest.embed import get_openai_client
+
+    get_openai_client()
+    return True, "", None
+
+
+def _warm_queries(
+    search: VectorSearch,
+    rag: RAGPipeline | None,
+    queries: Sequence[str],
+    probes: dict[str, list[float]] | None,
+    use_api: bool,
+) -> tuple[bool, str, Any]:
+    from ingest.embed import get_embedding
+    from retrieval.search import merge_candidates
+
+    probes = probes or {}
+    if not use_api and not probes:
+        return False, "no query embedding available", None
+    for query in queries:
+        if use_api:
+            results = search.search_merged_by_embedding(
+                get_embedding(query), top_k=Config.TOP_K, threshold=-1.0, query_label=query
+            )
+        else:
+            # Without the API each collection's probe still exercises query + merge. The
+            # probes are stored vectors, already PCA-reduced when a projection is used.
+            results = merge_candidates(
+                (
+                    search.query_collection(name, vector, n_results=Config.TOP_K, projected=True)
+                    for name, vector in probes.items()
+                ),
+                top_k=Config.TOP_K,
+                threshold=-1.0,
+            )
+        if rag is not None:
+            rag.generate_prompt(query, rag.format_context(results))
+    detail = f"{len(queries)} queries" + ("" if use_api else " (probe vector, no embedding API)")
+    return use_api, detail, None
+
+
+def warm_up(
+    search: VectorSearch,
+    rag: RAGPipeline | None = None,
+    queries: Sequence[str] | None = None,
+    num_queries: int | None = None,
+    readiness: Readiness = READINESS,
+) -> Readiness:
+    """
+    Warm the indexes, the OpenAI client and the query path; returns `readiness`.
+
+    Pass the RAGPipeline to also exercise prompt building (no LLM call is
+    made). num_queries defaults to Config.WARMUP_QUERIES synthetic queries.
+    """
+    if queries is None:
+        n = Config.WARMUP_QUERIES if num_queries is None else num_queries
+        queries = [DEFAULT_WARM_QUERIES[i % len(DEFAULT_WARM_QUERIES)] for i in range(max(0, n))]
+    readiness._begin()
+    t0 = time.perf_counter()
+
+    indexes_ok, probes, raised = _run_step(readiness, "indexes", lambda: _load_indexes(search))
+    if raised:
+        # The indexes cannot be read: serving would fail every request.
+        readiness._finish("failed", time.perf_counter() - t0)
+        return readiness
+
+    client_ok, _, _ = _run_step(readiness, "openai_client", _open_openai_client)
+    queries_ok = True
+    if queries:
+        queries_ok, _, _ = _run_step(
+            readiness, "warm_queries", lambda: _warm_queries(search, rag, queries, probes, client_ok)
+        )
+    state = "ready" if indexes_ok and client_ok and queries_ok else "degraded"
+    readiness._finish(state, time.perf_counter() - t0)
+    logger.info("Warm-up finished: %s in %.2f s", state, readiness.duration_s)
+    return readiness
@@ -0,0 +1,96 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+pytest.importorskip("pyarrow")
+
+from data.corpus import ArrowCorpus, index_path_for, write_arrow_corpus
+
+
+def _entries(n, id_fn=lambda i: i):
+    return [
+        {"id": id_fn(i), "question": f"질문 {i}?", "answer": f"답변 {i}.", "text": f"Q: 질문 {i}?\nA: 답변 {i}."}
+        for i in range(n)
+    ]
+
+
+def test_arrow_corpus_round_trip_and_lookup(tmp_path):
+    # Shuffled ids and a small batch size so rows span several record batches.
+    entries = _entries(25, id_fn=lambda i: (i * 7) % 25 + 100)
+    path = tmp_path / "faq_processed.arrow"
+
+    assert write_arrow_corpus(iter(entries), path, batch_size=4) == 25
+    assert index_path_for(path).name == "faq_processed.ids.arrow"
+
+    with ArrowCorpus(path) as corpus:
+        assert len(corpus) == 25
+        assert list(corpus.iter_entries()) == entries
+        assert list(corpus.iter_entries(start=10)) == entries[10:]
+        assert corpus.row(13) == entries[13]
+        for i, entry in enumerate(entries):
+            assert corpus.row_of(entry["id"]) == i
+            assert corpus.get(str(entry["id"])) == entry
+        assert corpus.get(99) is None
+        assert corpus.get_many([100, 5]) == [entries[0], None]
+        assert corpus.column("question").to_pylist() == [e["question"] for e in entries]
+        with pytest.raises(IndexError):
+            corpus.row(25)
+
+
+def test_arrow_corpus_string_ids_and_empty(tmp_path):
+    entries = _entries(3, id_fn=lambda i: f"doc-{i}")
+    write_arrow_corpus(entries, tmp_path / "str.arrow")
+    with ArrowCorpus(tmp_path / "str.arrow") as corpus:
+        assert corpus.get("doc-2") == entries[2]
+        assert corpus.get("2") is None
+
+    assert write_arrow_corpus([], tmp_path / "empty.arrow") == 0
+    with ArrowCorpus(tmp_path / "empty.arrow") as corpus:
+        assert len(corpus) == 0
+        assert corpus.get(0) is None
+        assert list(corpus.iter_entries()) == []
+
+    with pytest.raises(ValueError):
+        write_arrow_corpus([{"id": 1, "question": "", "answer": ""}, {"id": "x", "question": "", "answer": ""}], tmp_path / "mixed.arrow")
+
+
+def test_preprocess_arrow_output_feeds_indexing(tmp_path, monkeypatch):
+    pytest.importorskip("pandas")
+    pytest.importorskip("chromadb")
+    from config import Config
+    from data import preprocess
+    from data.records import iter_records, write_records
+    from ingest import index
+
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    write_records(({"Questions": f"질문 {i}", "Answers": f"답변 {i}"} for i in range(7)), raw / "faq.jsonl")
+    processed = tmp_path / "processed"
+    monkeypatch.setattr(Config, "PROCESSED_DATA_DIR", str(processed))
+
+    n = preprocess.main(["--input", str(raw), "--output", str(processed / "faq_processed.jsonl"), "--arrow"])
+
+    assert n == 7
+    assert index.default_processed_data_path() == processed / "faq_processed.arrow"
+    expected = list(iter_records(processed / "faq_processed.jsonl"))
+    assert list(index.iter_processed_data(processed / "faq_processed.arrow")) == expected
+    assert list(index.iter_processed_data(processed / "faq_processed.arrow", start=5)) == expected[5:]
+    assert index._processed_data_tail(processed / "faq_processed.arrow", 3) == expected[-3:]
+
+
+def test_retrieval_report_lists_questions_from_corpus(tmp_path):
+    from evaluation.retrieval_report import write_retrieval_report
+
+    write_arrow_corpus(_entries(3), tmp_path / "faq_processed.arrow")
+    row = {"qid": "q1", "query": "질문", "gold_ids": ["faq_1"], "retrieved_ids": ["faq_2", "faq_9"], "metrics": {"mrr@5": 0.0}}
+    with ArrowCorpus(tmp_path / "faq_processed.arrow") as corpus:
+        paths = write_retrieval_report(per_sample=[row], out_dir=tmp_path, metric_keys=["mrr@5"], corpus=corpus)
+
+    md = Path(paths["report_md"]).read_text(encoding="utf-8")
+    assert "- gold_questions: ['질문 1?']" in md
+    assert "- retrieved_questions: ['질문 2?', None]" in md
@@ -0,0 +1,96 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from data.dedup import DedupConfig, NearDuplicateCollapser, alias_path_for, load_aliases, normalize_for_dedup
+from data.synthetic import SyntheticCorpusConfig, SyntheticFAQGenerator
+
+
+def _shingles(entry, k=3):
+    t = normalize_for_dedup(f"{entry['question']}\n{entry['answer']}")
+    return {t[i : i + k] for i in range(len(t) - k + 1)}
+
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+def test_collapse_keeps_first_entry_and_aliases_near_duplicates():
+    answer = "수면 위생을 지키고 규칙적으로 운동하세요. 증상이 계속되면 전문가와 상담하는 것이 좋습니다."
+    entries = [
+        {"id": 1, "question": "불면증이 있으면 어떻게 하나요?", "answer": answer},
+        {"id": 2, "question": "우울감이 오래 가면 어떻게 하나요?", "answer": "가까운 상담 센터에 연락해 보세요."},
+        {"id": 3, "question": "불면증이  있으면   어떻게 하나요?", "answer": answer.upper()},
+        {"id": 4, "question": "불면증이 있으면 어떻게 해야 하나요?", "answer": answer},
+    ]
+    collapser = NearDuplicateCollapser()
+
+    kept = list(collapser.collapse(entries))
+
+    assert [e["id"] for e in kept] == [1, 2]
+    assert collapser.aliases == {3: 1, 4: 1}
+    assert collapser.stats.to_dict() == {
+        "num_input": 4,
+        "num_kept": 2,
+        "num_aliases": 2,
+        "num_clusters": 1,
+        "shrink_ratio": 0.5,
+    }
+
+
+def test_collapse_synthetic_corpus_finds_only_near_duplicates():
+    gen = SyntheticFAQGenerator(SyntheticCorpusConfig(num_entries=3000, eval_queries=0, seed=3))
+    entries = list(gen.entries())
+    by_id = {e["id"]: e for e in entries}
+    collapser = NearDuplicateCollapser(DedupConfig(threshold=0.5))
+
+    kept = list(collapser.collapse(entries))
+
+    assert len(kept) + len(collapser.aliases) == len(entries)
+    # Most generated near-duplicates are found, and every alias points back to
+    # a kept, genuinely similar entry (unrelated entries have Jaccard < 0.2).
+    assert len(collapser.aliases) >= 0.85 * gen.num_near_duplicates
+    kept_ids = {e["id"] for e in kept}
+    for dup, canonical in collapser.aliases.items():
+        assert canonical < dup and canonical in kept_ids
+        assert _jaccard(_shingles(by_id[dup]), _shingles(by_id[canonical])) > 0.35
+
+
+def test_preprocess_dedup_writes_aliases_that_resolve_gold_ids(tmp_path, monkeypatch):
+    pytest.importorskip("pandas")
+    from config import Config
+    from data import preprocess
+    from data.records import iter_records, write_records
+    from evaluation.retrieval_dataset import iter_retrieval_eval_jsonl, load_gold_aliases
+
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    rows = [
+        {"Questions": "불면증이 있으면 어떻게 하나요?", "Answers": "수면 위생을 지키고 규칙적으로 운동하세요."},
+        {"Questions": "우울감이 오래 가면?", "Answers": "가까운 상담 센터에 연락해 보세요."},
+        {"Questions": "불면증이 있으면 어떻게 하나요? ", "Answers": "수면 위생을 지키고 규칙적으로 운동하세요!"},
+    ]
+    write_records(rows, raw / "faq.jsonl")
+    monkeypatch.setattr(Config, "PROCESSED_DATA_DIR", str(tmp_path / "processed"))
+    output = tmp_path / "processed" / "faq_processed.jsonl"
+
+    assert preprocess.main(["--input", str(raw), "--output", str(output), "--dedup"]) == 2
+
+    assert [e["id"] for e in iter_records(output)] == ["0", "1"]
+    alias_file = alias_path_for(output)
+    assert alias_file.name == "faq_processed.aliases.jsonl"
+    assert load_aliases(alias_file) == {"2": "0"}
+
+    eval_path = tmp_path / "eval.jsonl"
+    eval_path.write_text(
+        json.dumps({"qid": "q1", "query": "불면증", "gold_ids": ["faq_2", "faq_0", "faq_1"]}) + "\n",
+        encoding="utf-8",
+    )
+    [sample] = iter_retrieval_eval_jsonl(eval_path, aliases=load_gold_aliases(alias_file))
+    assert sample.gold_ids == ("faq_0", "faq_1")
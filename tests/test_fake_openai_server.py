@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_openai import (
+    FakeOpenAIConfig,
+    deterministic_embedding,
+    start_fake_openai_server,
+)
+
+
+def test_deterministic_embedding_is_stable_and_normalized():
+    a = deterministic_embedding("불안 증상은 무엇인가요?", 64)
+    b = deterministic_embedding("불안 증상은 무엇인가요?", 64)
+    assert a == b
+    assert sum(v * v for v in a) == pytest.approx(1.0)
+
+
+def test_openai_client_round_trip_through_fake_server(monkeypatch):
+    openai = pytest.importorskip("openai")
+    server = start_fake_openai_server(
+        FakeOpenAIConfig(embedding_dim=32, chat_response="fake answer")
+    )
+    try:
+        from config import Config
+        from ingest.embed import get_embedding, get_embeddings_batch
+
+        monkeypatch.setattr(Config, "OPENAI_API_KEY", "fake")
+        monkeypatch.setattr(Config, "OPENAI_BASE_URL", server.base_url)
+
+        vec = get_embedding("hello")
+        assert vec == pytest.approx(deterministic_embedding("hello", 32), abs=1e-6)
+        batch = get_embeddings_batch(["a", "b", "c"], batch_size=2)
+        assert len(batch) == 3
+
+        client = openai.OpenAI(api_key="fake", base_url=server.base_url)
+        resp = client.chat.completions.create(
+            model="m", messages=[{"role": "user", "content": "hi"}]
+        )
+        assert resp.choices[0].message.content == "fake answer"
+
+        stream = client.chat.completions.create(
+            model="m", messages=[{"role": "user", "content": "hi"}], stream=True
+        )
+        text = "".join((c.choices[0].delta.content or "") for c in stream if c.choices)
+        assert text == "fake answer"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_fake_server_injects_rate_limit_errors():
+    openai = pytest.importorskip("openai")
+    server = start_fake_openai_server(FakeOpenAIConfig(error_rate=1.0))
+    try:
+        client = openai.OpenAI(api_key="fake", base_url=server.base_url, max_retries=0)
+        with pytest.raises(openai.RateLimitError):
+            client.embeddings.create(model="m", input="x")
+    finally:
+        server.shutdown()
+        server.server_close()
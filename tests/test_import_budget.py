@@ -0,0 +1,73 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.import_budget import (
+    DEFAULT_BUDGET_PATH,
+    ENTRY_POINTS,
+    ImportMeasurement,
+    find_budget_violations,
+    load_budgets,
+    measure_import,
+    script_project_imports,
+)
+
+
+def test_find_budget_violations_reports_slow_and_eager_imports():
+    budgets = {"evaluation.cli": {"measured_ms": 40.0, "budget_ms": 140}}
+
+    ok = {"evaluation.cli": ImportMeasurement("evaluation.cli", 120.0, [])}
+    assert find_budget_violations(ok, budgets) == []
+
+    bad = {"evaluation.cli": ImportMeasurement("evaluation.cli", 150.0, ["chromadb"])}
+    problems = find_budget_violations(bad, budgets)
+    assert problems[0] == "evaluation.cli: imports chromadb eagerly"
+    assert problems[1].startswith("evaluation.cli: import 150.0ms > budget 140ms")
+
+    # Entry points without a budget entry are only checked for eager imports.
+    assert find_budget_violations(ok, {}) == []
+
+
+def test_app_entry_point_follows_app_imports(tmp_path):
+    script = tmp_path / "page.py"
+    script.write_text(
+        "import sys\nimport streamlit as st\nimport config\n"
+        "from observability import metrics\nfrom retrieval.search import VectorSearch\n"
+        "from retrieval.search import merge_candidates\n\n"
+        "def page():\n    from retrieval import warmup\n",
+        encoding="utf-8",
+    )
+    # Project modules only, deduplicated; function-level imports are not eager.
+    assert script_project_imports(script) == ("config", "observability.metrics", "retrieval.search")
+
+    modules = ENTRY_POINTS["app.main"].modules
+    assert {"observability.metrics", "retrieval.rag", "retrieval.warmup"} <= set(modules)
+
+
+@pytest.mark.parametrize("name", sorted(ENTRY_POINTS))
+def test_entry_point_imports_lazily(name):
+    """각 엔트리포인트를 새 인터프리터에서 import 해 무거운 의존성을 eager import 하지 않는지 확인합니다."""
+    measurement = measure_import(ENTRY_POINTS[name])
+
+    # Without budgets only eager imports are reported, which does not depend on machine load.
+    problems = find_budget_violations({name: measurement}, {})
+    assert not problems, "\n".join(problems)
+
+
+@pytest.mark.parametrize("name", sorted(ENTRY_POINTS))
+def test_entry_point_import_within_budget(name):
+    """각 엔트리포인트의 import 시간을 저장된 예산과 비교합니다 (wall-clock, opt-in)."""
+    if os.getenv("RAG_PLAYGROUND_RUN_PERF") != "1":
+        pytest.skip("Set RAG_PLAYGROUND_RUN_PERF=1 to enable import-time budget tests.")
+
+    budgets = load_budgets(DEFAULT_BUDGET_PATH)
+    measurement = measure_import(ENTRY_POINTS[name])
+
+    problems = find_budget_violations({name: measurement}, budgets)
+    assert not problems, "\n".join(problems)
@@ -0,0 +1,49 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from evaluation.latency_stats import LatencyHistogram, build_latency_section
+
+
+def _exact_quantile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_latency_histogram_quantiles_within_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(3.0, 0.8) for _ in range(5000)]
+    h = LatencyHistogram(relative_accuracy=0.01)
+    for v in values:
+        h.add(v)
+
+    for q in (0.5, 0.9, 0.95, 0.99):
+        exact = _exact_quantile(values, q)
+        assert h.quantile(q) == pytest.approx(exact, rel=0.011)
+    assert h.summary()["max_ms"] == max(values)
+    assert h.summary()["count"] == 5000
+
+
+def test_latency_histogram_merge_matches_single_histogram():
+    a, b, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    for i in range(1, 200):
+        (a if i % 2 else b).add(float(i))
+        both.add(float(i))
+    a.merge(b)
+    assert a.summary() == both.summary()
+
+
+def test_build_latency_section_throughput():
+    h = LatencyHistogram()
+    for v in (10.0, 20.0, 30.0, 40.0):
+        h.add(v)
+    section = build_latency_section(h, {"x": h}, wall_clock_s=2.0)
+    assert section["throughput"]["qps"] == 2.0
+    assert section["throughput"]["total_latency_s"] == pytest.approx(0.1)
+    assert set(section["latency_by_tag"]) == {"x"}
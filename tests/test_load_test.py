@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from evaluation.load_test import run_load_steps
+from observability import tracing
+
+
+def _fake_request(query: str) -> dict:
+    with tracing.span("embed"):
+        time.sleep(0.002)
+    if query == "boom":
+        raise RuntimeError("boom")
+    return {"metadata": {}}
+
+
+def test_closed_loop_counts_requests_errors_and_stages():
+    steps = run_load_steps(
+        _fake_request, ["a", "b", "c", "boom"], mode="closed", concurrency=[1, 4], duration_s=None, num_requests=40
+    )
+    assert [s["concurrency"] for s in steps] == [1, 4]
+    for step in steps:
+        assert step["requests"] == 40
+        assert step["errors"] == 10
+        assert step["errors_by_type"] == {"RuntimeError": 10}
+        assert step["stages"]["embed"]["count"] == 40
+        assert step["latency"]["p50_ms"] >= 2.0
+
+
+def test_open_loop_dispatches_every_arrival():
+    steps = run_load_steps(_fake_request, ["a"], mode="open", qps=[100.0, 200.0], duration_s=None, num_requests=30)
+    assert [s["offered_qps"] for s in steps] == [100.0, 200.0]
+    for step in steps:
+        assert step["dispatched"] == 30
+        assert step["requests"] == 30
+        assert step["error_rate"] == 0.0
+
+
+def test_achieved_rates():
+    """Throughput checks depend on the scheduler; opt-in like the other perf tests."""
+    if os.getenv("RAG_PLAYGROUND_RUN_PERF") != "1":
+        pytest.skip("Set RAG_PLAYGROUND_RUN_PERF=1 to enable load-test rate checks.")
+
+    closed = run_load_steps(_fake_request, ["a"], mode="closed", concurrency=[1, 4], duration_s=None, num_requests=40)
+    # Four clients should finish the same work noticeably faster than one.
+    assert closed[1]["achieved_qps"] > 1.5 * closed[0]["achieved_qps"]
+
+    open_loop = run_load_steps(_fake_request, ["a"], mode="open", qps=[100.0], duration_s=None, num_requests=30)
+    # 30 arrivals at 100/s span ~0.29 s, so achieved QPS cannot exceed the offered rate by much.
+    assert open_loop[0]["achieved_qps"] == pytest.approx(100.0, rel=0.35)
@@ -0,0 +1,100 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+chromadb = pytest.importorskip("chromadb")
+
+from retrieval.search import merge_candidates
+
+
+def _cand(doc_id: str, faq_id: str, similarity: float, collection: str) -> dict:
+    return {
+        "id": doc_id,
+        "text": "",
+        "metadata": {"id": faq_id},
+        "distance": 1.0 - similarity,
+        "similarity": similarity,
+        "collection_name": collection,
+    }
+
+
+def test_merge_candidates_dedupes_thresholds_and_clips():
+    question = [_cand("q_1", "1", 0.9, "q"), _cand("q_2", "2", 0.5, "q"), _cand("q_3", "3", 0.1, "q")]
+    answer = [_cand("a_2", "2", 0.8, "a"), _cand("a_1", "1", 0.7, "a"), _cand("a_4", "4", 0.6, "a")]
+
+    merged = merge_candidates([question, answer], top_k=3, threshold=0.2)
+
+    assert [(r["id"], r["similarity"]) for r in merged] == [("q_1", 0.9), ("a_2", 0.8), ("a_4", 0.6)]
+
+
+def test_merge_candidates_prefix_equals_smaller_top_k():
+    question = [_cand(f"q_{i}", str(i), 1.0 - i / 10, "q") for i in range(8)]
+    answer = [_cand(f"a_{i}", str(i), 0.95 - i / 7, "a") for i in range(8)]
+
+    full = merge_candidates([question, answer], top_k=8, threshold=0.0)
+    for k in (1, 3, 5):
+        assert merge_candidates([question[:k], answer[:k]], top_k=k, threshold=0.0) == full[:k]
+
+
+class _FakeCollection:
+    """Chroma-shaped query() over fixed unit vectors, ranked by cosine distance."""
+
+    def __init__(self, name, vectors):
+        self.name = name
+        self.vectors = vectors
+
+    def query(self, query_embeddings, n_results):
+        q = query_embeddings[0]
+        distances = sorted(
+            (1.0 - sum(a * b for a, b in zip(q, v)), faq) for faq, v in enumerate(self.vectors)
+        )[:n_results]
+        return {
+            "ids": [[f"{self.name}_{faq}" for _, faq in distances]],
+            "distances": [[d for d, _ in distances]],
+            "documents": [[f"doc {faq}" for _, faq in distances]],
+            "metadatas": [[{"id": faq} for _, faq in distances]],
+        }
+
+
+class _FakeClient:
+    def __init__(self, collections):
+        self.collections = {c.name: c for c in collections}
+
+    def get_or_create_collection(self, name):
+        return self.collections[name]
+
+
+def test_narrow_merged_equals_search_merged(monkeypatch):
+    import random
+
+    from config import Config
+    from retrieval import search as search_module
+    from retrieval.search import VectorSearch, narrow_merged
+
+    rng = random.Random(0)
+
+    def unit(dim=8):
+        v = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+        norm = sum(x * x for x in v) ** 0.5
+        return [x / norm for x in v]
+
+    names = ["faq__question", "faq__answer", "faq__question_answer"]
+    client = _FakeClient([_FakeCollection(name, [unit() for _ in range(30)]) for name in names])
+    vs = VectorSearch(collection_name=names, client=client, projections={}, engine="chroma")
+    queries = [f"query {i}" for i in range(5)]
+    # No rewrite or embedding API: queries fall back to the heuristic rewrite.
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", None)
+    embeddings = {vs.rewrite_query(q, mode="heuristic"): unit() for q in queries}
+    monkeypatch.setattr(search_module, "get_embedding", lambda text: embeddings[text])
+
+    for query in queries:
+        # What the app caches: one fetch at the loosest slider settings.
+        cached = vs.search_merged(query, top_k=10, threshold=0.0)
+        for k in (1, 3, 5, 10):
+            for t in (0.0, 0.1, 0.2, 0.35, 0.5, 0.9):
+                assert narrow_merged(cached, k, t) == vs.search_merged(query, top_k=k, threshold=t), (query, k, t)
@@ -0,0 +1,147 @@
+import sys
+import threading
+import urllib.request
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from observability.metrics import REGISTRY, MetricsRegistry, start_metrics_server
+
+
+def test_prometheus_exposition_of_counters_gauges_and_histograms():
+    reg = MetricsRegistry()
+    requests = reg.counter("app_requests_total", "Requests", ("method",))
+    requests.labels("search").inc()
+    requests.labels("search").inc(2)
+    requests.labels('we"ird\n').inc()
+    reg.gauge("app_cache_entries", "Cache size").set_function(lambda: 7)
+    latency = reg.histogram("app_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(v)
+
+    assert reg.render_prometheus() == (
+        "# HELP app_cache_entries Cache size\n"
+        "# TYPE app_cache_entries gauge\n"
+        "app_cache_entries 7\n"
+        "# HELP app_latency_seconds Latency\n"
+        "# TYPE app_latency_seconds histogram\n"
+        'app_latency_seconds_bucket{le="0.1"} 2\n'
+        'app_latency_seconds_bucket{le="1"} 3\n'
+        'app_latency_seconds_bucket{le="+Inf"} 4\n'
+        "app_latency_seconds_sum 3.65\n"
+        "app_latency_seconds_count 4\n"
+        "# HELP app_requests_total Requests\n"
+        "# TYPE app_requests_total counter\n"
+        'app_requests_total{method="search"} 3\n'
+        'app_requests_total{method="we\\"ird\\n"} 1\n'
+    )
+    snap = reg.snapshot()
+    assert snap["app_latency_seconds"]["samples"][0]["buckets"] == {"0.1": 2, "1": 1, "+Inf": 1}
+    assert snap["app_requests_total"]["samples"][0] == {"labels": {"method": "search"}, "value": 3.0}
+
+    reg.clear()
+    assert 'app_requests_total{method="search"} 0' in reg.render_prometheus()
+
+
+def test_registry_rejects_conflicts_and_counts_exactly_across_threads():
+    reg = MetricsRegistry()
+    c = reg.counter("hits_total", "Hits")
+    assert reg.counter("hits_total", "Hits") is c
+    with pytest.raises(ValueError):
+        reg.gauge("hits_total", "Hits")
+    with pytest.raises(ValueError):
+        c.inc(-1)
+    with pytest.raises(ValueError):
+        reg.counter("by_kind_total", "x", ("kind",)).inc()
+
+    def work():
+        for _ in range(20_000):
+            c.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert reg.snapshot()["hits_total"]["samples"][0]["value"] == 80_000
+
+
+def test_metrics_server_serves_registry():
+    reg = MetricsRegistry()
+    reg.counter("served_total", "Served").inc()
+    server = start_metrics_server(0, addr="127.0.0.1", registry=reg)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5) as resp:
+            assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "served_total 1" in resp.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class _FakeCollection:
+    def query(self, query_embeddings, n_results):
+        return {"ids": [["faq_1"]], "documents": [["질문?"]], "metadatas": [[{"id": 1, "answer": "답"}]], "distances": [[0.2]]}
+
+
+class _FakeChromaClient:
+    def get_or_create_collection(self, name):
+        return _FakeCollection()
+
+
+def _fake_openai_client():
+    usage = SimpleNamespace(prompt_tokens=12, completion_tokens=3)
+    completion = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="답변입니다", tool_calls=None, refusal=None), finish_reason="stop")],
+        usage=usage,
+    )
+    embedding = SimpleNamespace(data=[SimpleNamespace(embedding=[0.1, 0.2])], usage=SimpleNamespace(prompt_tokens=4))
+    return SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kw: completion)),
+        embeddings=SimpleNamespace(create=lambda **kw: embedding),
+    )
+
+
+def _value(name, **labels):
+    for sample in REGISTRY.snapshot().get(name, {}).get("samples", []):
+        if sample["labels"] == labels:
+            return sample.get("value", sample.get("count"))
+    return 0
+
+
+def test_search_and_rag_are_instrumented(monkeypatch):
+    from config import Config
+    from ingest import embed
+    from retrieval import search
+    from retrieval.rag import RAGPipeline
+
+    client = _fake_openai_client()
+    monkeypatch.setattr(embed, "get_openai_client", lambda: client)
+    monkeypatch.setattr(search, "get_openai_client", lambda: client)
+    monkeypatch.setattr("retrieval.rag.get_openai_client", lambda: client)
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "test")
+    search._rewrite_query_as_question_openai_cached.cache_clear()
+    REGISTRY.clear()
+
+    vs = search.VectorSearch(collection_name=["c1", "c2"], client=_FakeChromaClient())
+    rag = RAGPipeline(search=vs)
+    vs.search_merged("불면증", top_k=3, threshold=0.0)
+    result = rag.generate_answer("불면증", top_k=3, threshold=0.0, model="m")
+
+    assert result["answer"] == "답변입니다"
+    assert _value("rag_search_requests_total", method="search_merged") == 2
+    assert _value("rag_search_requests_total", method="search_merged_by_embedding") == 0
+    assert _value("rag_collection_query_duration_seconds", collection="c1") == 2
+    assert _value("rag_query_rewrites_total", source="llm") == 2
+    assert _value("rag_rewrite_cache_hits_total") == 1
+    assert _value("rag_rewrite_cache_misses_total") == 1
+    assert _value("rag_openai_requests_total", endpoint="embeddings", model=Config.EMBEDDING_MODEL, status="ok") == 2
+    assert _value("rag_openai_requests_total", endpoint="chat.completions", model="m", status="ok") == 1
+    assert _value("rag_openai_tokens_total", endpoint="chat.completions", model="m", kind="completion") == 3
+    assert _value("rag_answers_total", outcome="ok") == 1
+    assert _value("rag_answer_duration_seconds") == 1
@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.perf_suite import BenchmarkResult, find_regressions
+
+
+def test_find_regressions_applies_tolerance_to_p95_and_throughput():
+    results = {"search_merged": BenchmarkResult("search_merged", 10.0, 100.0, "queries", 200)}
+
+    within = {"search_merged": {"p95_ms": 8.0, "throughput_per_s": 120.0}}
+    assert find_regressions(results, within, tolerance=0.5) == []
+
+    slower = {"search_merged": {"p95_ms": 5.0, "throughput_per_s": 200.0}}
+    problems = find_regressions(results, slower, tolerance=0.5)
+    assert len(problems) == 2
+    assert problems[0].startswith("search_merged: p95")
+    assert problems[1].startswith("search_merged: throughput")
+
+    # Benchmarks without a baseline entry are not gated.
+    assert find_regressions(results, {}, tolerance=0.0) == []
+
+
+def test_perf_regression_against_baseline():
+    """
+    오프라인(fake OpenAI 서버 + 임시 Chroma)으로 핫패스 벤치마크를 실행하고,
+    저장된 baseline 대비 p95 latency / throughput 회귀 여부를 판단합니다.
+    """
+    if os.getenv("RAG_PLAYGROUND_RUN_PERF") != "1":
+        pytest.skip("Set RAG_PLAYGROUND_RUN_PERF=1 to enable performance regression tests.")
+
+    pytest.importorskip("chromadb")
+    pytest.importorskip("openai")
+    pytest.importorskip("pandas")
+
+    from benchmarks.perf_suite import (
+        DEFAULT_BASELINE_PATH,
+        DEFAULT_TOLERANCE,
+        load_baseline,
+        run_perf_suite,
+    )
+
+    baseline_path = Path(os.getenv("RAG_PLAYGROUND_PERF_BASELINE", str(DEFAULT_BASELINE_PATH)))
+    if not baseline_path.exists():
+        pytest.skip(f"No baseline at {baseline_path}; run `python -m benchmarks.perf_suite --update-baseline`.")
+
+    # 머신마다 편차가 크므로 기본 허용치는 넉넉하게(원하면 env로 조여서 게이트로 사용)
+    tolerance = float(os.getenv("RAG_PLAYGROUND_PERF_TOLERANCE", str(DEFAULT_TOLERANCE)))
+    only = os.getenv("RAG_PLAYGROUND_PERF_ONLY")
+    names = [n.strip() for n in only.split(",") if n.strip()] if only else None
+
+    scale = float(json.loads(baseline_path.read_text(encoding="utf-8")).get("scale", 1.0))
+    results = run_perf_suite(names, scale=scale)
+
+    problems = find_regressions(results, load_baseline(baseline_path), tolerance)
+    assert not problems, "\n".join(problems)
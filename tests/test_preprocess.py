@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+pd = pytest.importorskip("pandas")
+
+from data.preprocess import preprocess_csv, preprocess_faq_data
+
+
+def test_preprocess_dataframe_strips_filters_and_numbers_rows():
+    df = pd.DataFrame(
+        {
+            "Questions": [" 불안이 뭔가요? ", "", float("nan"), "nan", "수면", 3],
+            "Answers": ["설명 ", "x", "y", "z", " nan ", 4.5],
+            "Other": [1, 2, 3, 4, 5, 6],
+        }
+    )
+
+    assert preprocess_faq_data(df) == [
+        {"id": 0, "question": "불안이 뭔가요?", "answer": "설명", "text": "Q: 불안이 뭔가요?\nA: 설명"},
+        {"id": 1, "question": "3", "answer": "4.5", "text": "Q: 3\nA: 4.5"},
+    ]
+
+
+def test_preprocess_dataframe_keeps_iterrows_semantics():
+    # All-numeric frames are upcast row-wise by iterrows(): int cells print as floats.
+    numeric = pd.DataFrame({"q": [1, 2], "a": [1.5, 2.0]})
+    assert [(e["question"], e["answer"]) for e in preprocess_faq_data(numeric)] == [
+        ("1.0", "1.5"),
+        ("2.0", "2.0"),
+    ]
+
+    # Without Q/A columns: first two columns, index labels as ids, unstripped text, no filtering.
+    fallback = pd.DataFrame({"foo": [" x ", None], "bar": ["y", "z"]}, index=[10, 20])
+    assert preprocess_faq_data(fallback) == [
+        {"id": 10, "question": "x", "answer": "y", "text": "Q:  x \nA: y"},
+        {"id": 20, "question": "None", "answer": "z", "text": "Q: None\nA: z"},
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_preprocess_csv_chunks_match_whole_frame(tmp_path, workers):
+    df = pd.DataFrame(
+        {
+            "Questions": [f"질문 {i} " if i % 7 else "" for i in range(50)],
+            "Answers": [f" 답변 {i}" if i % 5 else None for i in range(50)],
+        }
+    )
+    path = tmp_path / "faq.csv"
+    df.to_csv(path, index=False)
+
+    expected = preprocess_faq_data(pd.read_csv(path))
+    assert len(expected) == 34
+    assert preprocess_csv(path, chunksize=8, workers=workers) == expected
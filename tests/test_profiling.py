@@ -0,0 +1,98 @@
+import json
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config import Config
+from observability import profiling
+
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    out = tmp_path / "profiles"
+    profiling.configure_profiling(out_dir=out, profiler="sampling", fmt="collapsed", interval_s=0.001)
+    yield out
+    profiling.configure_profiling(
+        Config.PROFILE_ENABLED,
+        Config.PROFILE_SAMPLE_EVERY,
+        Config.PROFILE_DIR,
+        Config.PROFILE_PROFILER,
+        Config.PROFILE_FORMAT,
+        0.005,
+    )
+
+
+def _busy_leaf(seconds=0.05):
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        pass
+
+
+def test_disabled_profiling_is_a_shared_noop(profile_dir):
+    assert profiling.profile_request("search.search_merged", "q") is profiling.profile_request("x", "y")
+    with profiling.profile_request("search.search_merged", "q") as prof:
+        assert prof is None
+    assert not profile_dir.exists()
+
+
+def test_collapsed_and_speedscope_dumps_are_tagged_with_query_id(profile_dir):
+    with profiling.profile_request("search.search_merged", "불면증", force=True) as prof:
+        _busy_leaf()
+
+    assert prof.query_id == profiling.query_id_for("불면증")
+    assert f"-search.search_merged-{prof.query_id}-" in prof.path.name
+    collapsed = prof.path.read_text(encoding="utf-8").splitlines()
+    assert any("_busy_leaf (" in line.rsplit(" ", 1)[0].split(";")[-1] for line in collapsed)
+    # Weights are µs of wall-clock time and add up to roughly the request duration.
+    total_ms = sum(int(line.rsplit(" ", 1)[1]) for line in collapsed) / 1000.0
+    assert total_ms == pytest.approx(prof.duration_ms, rel=0.5)
+    meta = json.loads(prof.path.with_name(prof.path.name.replace(".collapsed.txt", ".json")).read_text(encoding="utf-8"))
+    assert meta["query"] == "불면증" and meta["query_id"] == prof.query_id
+
+    profiling.configure_profiling(out_dir=profile_dir, fmt="speedscope")
+    with profiling.profile_request("rag.generate_answer", "q", force=True, query_id="qid-7") as prof:
+        _busy_leaf()
+    doc = json.loads(prof.path.read_text(encoding="utf-8"))
+    assert prof.path.name.endswith(".speedscope.json") and "-qid-7-" in prof.path.name
+    p = doc["profiles"][0]
+    assert p["type"] == "sampled" and len(p["samples"]) == len(p["weights"]) > 0
+    assert all(0 <= i < len(doc["shared"]["frames"]) for s in p["samples"] for i in s)
+    assert doc["metadata"]["query_id"] == "qid-7"
+
+
+def test_sampling_profiles_one_in_n_and_nested_calls_once(profile_dir):
+    profiling.configure_profiling(sample_every=3, out_dir=profile_dir)
+    profiled = []
+    for i in range(6):
+        with profiling.profile_request("rag.generate_answer", f"q{i}") as prof:
+            with profiling.profile_request("search.search_merged", f"q{i}", force=True) as inner:
+                # A forced inner call is profiled only when the outer request is not.
+                assert (inner is None) == (prof is not None)
+        profiled.append(prof is not None)
+    assert profiled.count(True) == 2
+    assert len(list(profile_dir.glob("*-rag.generate_answer-*.collapsed.txt"))) == 2
+
+
+def test_rag_profile_flag_reports_profile_path(profile_dir, monkeypatch):
+    from retrieval.rag import RAGPipeline
+
+    completion = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="답", tool_calls=None, refusal=None), finish_reason="stop")],
+        usage=None,
+    )
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kw: completion)))
+    monkeypatch.setattr("retrieval.rag.get_openai_client", lambda: client)
+    rag = RAGPipeline(search=SimpleNamespace())
+
+    plain = rag.generate_answer_from_results("q", [{"text": "t", "similarity": 0.9}], model="m")
+    profiled = rag.generate_answer_from_results("q", [{"text": "t", "similarity": 0.9}], model="m", profile=True)
+
+    assert "profile_path" not in plain["metadata"]
+    assert Path(profiled["metadata"]["profile_path"]).parent == profile_dir
@@ -0,0 +1,144 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config import Config
+
+
+def _write(tmp_path, docs, quantization, page=700):
+    from retrieval.quantized import QuantizedStore, write_quantized_store
+
+    ids = [f"faq_{i}" for i in range(len(docs))]
+    pages = ((ids[s : s + page], docs[s : s + page]) for s in range(0, len(docs), page))
+    return QuantizedStore(write_quantized_store(tmp_path / quantization, pages, len(docs), quantization))
+
+
+@pytest.mark.parametrize("quantization", ["int8", "binary"])
+def test_store_layout_and_exact_rescoring(tmp_path, quantization):
+    np = pytest.importorskip("numpy")
+    from benchmarks.quantized import clustered_corpus
+    from retrieval.utils import cosine_similarity_matrix, top_k_indices
+
+    docs, queries = clustered_corpus(2000, 96, 10)
+    store = _write(tmp_path, docs, quantization)
+
+    manifest = json.loads((store.path / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["count"] == 2000 and manifest["dimensions"] == 96
+    assert isinstance(store.vectors, np.memmap)
+    # int8: 1 byte per dimension; binary: 96 sign bits padded to two 64-bit words.
+    assert store.ram_bytes == (2000 * 96 + 96 * 4 if quantization == "int8" else 2000 * 16)
+
+    for query in queries:
+        scores = cosine_similarity_matrix(query, docs, normalized=True)
+        # Rescoring every row is exact search, whatever the codes.
+        hits = store.search(query, 10, overfetch=len(docs))
+        assert [row for row, _ in hits] == top_k_indices(scores, 10).tolist()
+        assert [s for _, s in hits] == pytest.approx(np.sort(scores)[::-1][:10].tolist(), abs=1e-5)
+
+
+def test_int8_overfetch_recall(tmp_path):
+    pytest.importorskip("numpy")
+    from benchmarks.quantized import clustered_corpus
+    from retrieval.utils import cosine_similarity_matrix, top_k_indices
+
+    docs, queries = clustered_corpus(3000, 64, 20, seed=1)
+    store = _write(tmp_path, docs, "int8")
+    expected = top_k_indices(cosine_similarity_matrix(queries, docs, normalized=True), 10)
+
+    recall = sum(
+        len({row for row, _ in store.search(q, 10, overfetch=4)} & set(e.tolist())) / 10
+        for q, e in zip(queries, expected)
+    ) / len(queries)
+    assert recall >= 0.95
+
+
+def test_store_rejects_count_mismatch(tmp_path):
+    np = pytest.importorskip("numpy")
+    from retrieval.quantized import write_quantized_store
+
+    pages = iter([(["a", "b"], np.ones((2, 4), dtype=np.float32))])
+    with pytest.raises(ValueError):
+        write_quantized_store(tmp_path / "s", pages, 3)
+    assert not (tmp_path / "s").exists()
+
+
+def test_vector_search_quantized_engine_matches_exact(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("chromadb")
+    from benchmarks.quantized import clustered_corpus
+    from ingest.index import create_chroma_client
+    from retrieval.quantized import build_quantized_store
+    from retrieval.search import VectorSearch
+    from retrieval.utils import cosine_similarity_matrix, top_k_indices
+
+    monkeypatch.setattr(Config, "CHROMA_PERSIST_DIRECTORY", str(tmp_path))
+    docs, queries = clustered_corpus(500, 32, 5)
+    client = create_chroma_client(str(tmp_path))
+    collection = client.create_collection("faq", metadata={"hnsw:space": "cosine"})
+    collection.add(
+        ids=[f"faq_{i}" for i in range(500)],
+        embeddings=docs,
+        documents=[f"doc {i}" for i in range(500)],
+        metadatas=[{"id": i} for i in range(500)],
+    )
+    build_quantized_store("faq", [collection], quantization="int8")
+
+    search = VectorSearch(collection_name="faq", client=client, engine="quantized", overfetch=500)
+    assert search.collection.count() == 500
+    for query in queries:
+        scores = cosine_similarity_matrix(query, docs, normalized=True)
+        results = search.search_merged_by_embedding(query.tolist(), top_k=5, threshold=-1.0)
+        assert [r["id"] for r in results] == [f"faq_{i}" for i in top_k_indices(scores, 5)]
+        assert all(r["text"] == f"doc {r['metadata']['id']}" for r in results)
+
+        # The threshold applies to the exact similarities.
+        cut = float(np.sort(scores)[-3])
+        assert len(search.search_merged_by_embedding(query.tolist(), top_k=5, threshold=cut)) == 3
+
+    with pytest.raises(ValueError):
+        VectorSearch(collection_name="faq", client=client, engine="faiss")
+
+
+@pytest.mark.parametrize("space", ["l2", "cosine"])
+def test_quantized_engine_reports_chroma_distances(tmp_path, monkeypatch, space):
+    pytest.importorskip("chromadb")
+    from benchmarks.quantized import clustered_corpus
+    from ingest.index import create_chroma_client
+    from retrieval.quantized import build_quantized_store
+    from retrieval.search import VectorSearch
+
+    monkeypatch.setattr(Config, "CHROMA_PERSIST_DIRECTORY", str(tmp_path))
+    docs, queries = clustered_corpus(300, 16, 5, seed=2)
+    client = create_chroma_client(str(tmp_path))
+    # ingest/index.py creates its collections without hnsw:space, i.e. in Chroma's default l2.
+    collection = client.create_collection("faq", metadata={"hnsw:space": "cosine"} if space == "cosine" else None)
+    collection.add(ids=[f"faq_{i}" for i in range(300)], embeddings=docs)
+    build_quantized_store("faq", [collection])
+
+    chroma = VectorSearch(collection_name="faq", client=client, engine="chroma")
+    quantized = VectorSearch(collection_name="faq", client=client, engine="quantized", overfetch=300)
+    for query in queries:
+        expected = chroma.query_collection("faq", query.tolist(), n_results=5)
+        got = quantized.query_collection("faq", query.tolist(), n_results=5)
+        assert [r["id"] for r in got] == [r["id"] for r in expected]
+        assert [r["distance"] for r in got] == pytest.approx([r["distance"] for r in expected], abs=1e-4)
+        assert [r["similarity"] for r in got] == pytest.approx([r["similarity"] for r in expected], abs=1e-4)
+
+
+def test_quantized_benchmark_smoke():
+    pytest.importorskip("numpy")
+    from benchmarks.quantized import bench_quantized
+
+    results = bench_quantized(1500, 32, ["int8", "binary"], [1, 1500], queries=5, top_k=5)
+
+    assert [(r.engine, r.overfetch) for r in results] == [
+        ("flat", 0.0), ("int8", 1), ("int8", 1500), ("binary", 1), ("binary", 1500)
+    ]
+    assert results[2].recall == 1.0 and results[4].recall == 1.0
+    assert results[3].ram_mb < results[1].ram_mb < results[0].ram_mb
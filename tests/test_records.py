@@ -0,0 +1,68 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from data.records import find_record_file, iter_records, record_format, write_records
+
+_RECORDS = [
+    {"id": i, "question": f"질문 {i}\n둘째 줄", "answer": "답변", "meta": {"tags": [1, {"x": None}], "empty": {}}}
+    for i in range(5)
+]
+
+
+@pytest.mark.parametrize("name", ["faq.jsonl", "faq.jsonl.zst", "faq.json"])
+def test_write_and_iter_records_round_trip(tmp_path, name):
+    if name.endswith(".zst"):
+        pytest.importorskip("zstandard")
+    path = tmp_path / name
+
+    assert write_records(iter(_RECORDS), path) == len(_RECORDS)
+    assert list(iter_records(path)) == _RECORDS
+    assert record_format(path) == name.split(".", 1)[1]
+
+
+@pytest.mark.parametrize("records", [_RECORDS, _RECORDS[:1], []])
+def test_json_output_matches_json_dump(tmp_path, records):
+    write_records(iter(records), tmp_path / "streamed.json")
+    with (tmp_path / "dumped.json").open("w", encoding="utf-8") as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+
+    assert (tmp_path / "streamed.json").read_bytes() == (tmp_path / "dumped.json").read_bytes()
+
+
+def test_iter_records_validates_lines_and_find_prefers_jsonl(tmp_path):
+    bad = tmp_path / "bad.jsonl"
+    bad.write_text('{"id": 1}\n\n[1, 2]\n', encoding="utf-8")
+    with pytest.raises(ValueError, match="line 3"):
+        list(iter_records(bad))
+    with pytest.raises(FileNotFoundError):
+        iter_records(tmp_path / "missing.jsonl")
+    with pytest.raises(ValueError):
+        record_format(tmp_path / "faq.csv")
+
+    (tmp_path / "faq_processed.json").write_text("[]", encoding="utf-8")
+    (tmp_path / "faq_processed.jsonl").write_text("", encoding="utf-8")
+    assert find_record_file(tmp_path, stem="faq_processed").name == "faq_processed.jsonl"
+    assert find_record_file(tmp_path, stem="other") is None
+
+
+def test_preprocess_streams_jsonl_to_jsonl(tmp_path):
+    pytest.importorskip("pandas")
+    from data import preprocess
+
+    raw = [
+        {"id": "a1", "question": " 잠이 안 와요 ", "answer": "수면 위생", "_split": "default"},
+        {"id": "a2", "question": "", "answer": "빈 질문"},
+        {"Questions": "불안", "Answers": "호흡"},
+    ]
+    write_records(iter(raw), tmp_path / "raw" / "webfaq_kor.jsonl")
+    out = tmp_path / "faq_processed.jsonl"
+
+    assert preprocess.main(["--input", str(tmp_path / "raw"), "--output", str(out)]) == 2
+    assert list(iter_records(out)) == preprocess.preprocess_faq_data(raw)
@@ -0,0 +1,153 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config import Config
+
+
+def _fake_server(monkeypatch, dim):
+    pytest.importorskip("openai")
+    from benchmarks.fake_openai import FakeOpenAIConfig, start_fake_openai_server
+
+    server = start_fake_openai_server(FakeOpenAIConfig(embedding_dim=dim))
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "fake")
+    monkeypatch.setattr(Config, "OPENAI_BASE_URL", server.base_url)
+    return server
+
+
+def test_truncate_and_pca_output_unit_vectors(tmp_path):
+    np = pytest.importorskip("numpy")
+    from ingest.reduce import PCAProjection, load_projection, projection_path_for, truncate_embeddings
+
+    rng = np.random.default_rng(0)
+    # Low-rank data plus noise: 4 components carry almost all of the variance.
+    vectors = rng.normal(size=(200, 4)) @ rng.normal(size=(4, 32)) + 0.01 * rng.normal(size=(200, 32))
+
+    truncated = truncate_embeddings(vectors, 8)
+    assert truncated.shape == (200, 8)
+    assert np.allclose(np.linalg.norm(truncated, axis=1), 1.0, atol=1e-5)
+    with pytest.raises(ValueError):
+        truncate_embeddings(vectors, 64)
+
+    projection = PCAProjection(4).fit(vectors)
+    assert projection.explained_variance_ratio > 0.99
+    reduced = projection.transform(vectors)
+    assert reduced.shape == (200, 4)
+    assert np.allclose(np.linalg.norm(reduced, axis=1), 1.0, atol=1e-5)
+
+    path = projection.save(projection_path_for("faq", base=str(tmp_path)))
+    loaded = load_projection("faq", base=str(tmp_path))
+    assert path.is_file() and loaded is not None
+    assert np.allclose(loaded.transform(vectors), reduced, atol=1e-6)
+    assert load_projection("missing", base=str(tmp_path)) is None
+
+    with pytest.raises(ValueError):
+        PCAProjection(8).fit(vectors[:5])
+
+
+def test_api_dimensions_follow_config(monkeypatch):
+    from ingest.embed import get_embedding, get_embeddings_batch
+
+    server = _fake_server(monkeypatch, dim=32)
+    try:
+        monkeypatch.setattr(Config, "EMBEDDING_DIMENSIONS", 8)
+        monkeypatch.setattr(Config, "EMBEDDING_REDUCTION", "api")
+        assert len(get_embedding("q")) == 8
+        assert [len(v) for v in get_embeddings_batch(["a", "b"])] == [8, 8]
+        assert len(get_embedding("q", dimensions=0)) == 32
+
+        # In pca mode the API returns full vectors; the projection reduces them.
+        monkeypatch.setattr(Config, "EMBEDDING_REDUCTION", "pca")
+        assert len(get_embedding("q")) == 32
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_pca_index_and_projected_queries(tmp_path, monkeypatch):
+    pytest.importorskip("chromadb")
+    from ingest.embed import get_embedding
+    from ingest.index import create_chroma_client, index_faq_data
+    from ingest.reduce import PCAProjection
+    from retrieval.search import VectorSearch
+
+    server = _fake_server(monkeypatch, dim=32)
+    try:
+        client = create_chroma_client(str(tmp_path))
+        collection = client.create_collection("faq", metadata={"hnsw:space": "cosine"})
+        faq = [{"id": i, "question": f"question {i}", "answer": f"a{i}"} for i in range(60)]
+        projection = PCAProjection(8, fit_size=25)
+
+        assert index_faq_data(collection, faq, columns=["question"], batch_size=5, projection=projection) == 60
+        assert projection.fitted and projection.input_dimensions == 32
+        stored = collection.get(limit=1, include=["embeddings"])["embeddings"][0]
+        assert len(stored) == 8
+
+        search = VectorSearch(collection_name="faq", client=client, projections={"faq": projection})
+        for i in (0, 30, 59):
+            query = get_embedding(f"question {i}")
+            # The projected query equals the stored vector, buffered (0, 30) or not (59).
+            own = collection.get(ids=[f"faq_{i}"], include=["embeddings"])["embeddings"][0]
+            assert projection.transform_one(query) == pytest.approx(list(own), abs=1e-5)
+            hits = search.query_collection("faq", query, n_results=5)
+            assert f"faq_{i}" in [h["id"] for h in hits]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("num_shards", [1, 2])
+def test_dimension_report_rows(tmp_path, monkeypatch, num_shards):
+    pytest.importorskip("chromadb")
+    from evaluation.dimension_report import run_dimension_report
+    from ingest.index import create_index_clients, index_faq_data
+    from retrieval import sharding
+
+    server = _fake_server(monkeypatch, dim=32)
+    # A fresh process-wide ShardSet for this test's shard directories.
+    monkeypatch.setattr(sharding, "_shared_shard_set", None)
+    try:
+        monkeypatch.setattr(Config, "CHROMA_PERSIST_DIRECTORY", str(tmp_path / "chroma"))
+        monkeypatch.setattr(Config, "CHROMA_COLLECTION_NAME", "faq")
+        monkeypatch.setattr(Config, "CHROMA_NUM_SHARDS", num_shards)
+        collections = [c.create_collection("faq__question") for c in create_index_clients(num_shards)]
+        faq = [{"id": i, "question": f"question {i}", "answer": f"a{i}"} for i in range(40)]
+        index_faq_data(collections, faq, columns=["question"], batch_size=10)
+
+        eval_path = tmp_path / "eval.jsonl"
+        eval_path.write_text(
+            "".join(
+                json.dumps({"query": f"question {i}", "gold_ids": [f"faq_{i}"]}) + "\n"
+                for i in range(0, 40, 4)
+            ),
+            encoding="utf-8",
+        )
+        report = run_dimension_report(
+            eval_path=eval_path,
+            collection_name="question",
+            dimensions=[8, 16, 64],
+            ks=[1, 5],
+            out_dir=tmp_path / "out",
+        )
+    finally:
+        if sharding._shared_shard_set is not None:
+            sharding._shared_shard_set.close()
+        server.shutdown()
+        server.server_close()
+
+    assert report.num_vectors == 40
+    # 64 is not below the stored 32 dimensions and is skipped.
+    assert [(r["method"], r["dimensions"]) for r in report.rows] == [
+        ("full", 32), ("truncate", 8), ("truncate", 16), ("pca", 8), ("pca", 16)
+    ]
+    full = report.rows[0]
+    assert full["recall@1"] == 1.0 and full["full_overlap@5"] == 1.0
+    assert report.rows[1]["vectors_mb"] == pytest.approx(full["vectors_mb"] / 4)
+    assert (tmp_path / "out" / "dimension_report.csv").is_file()
+    assert "| pca | 16 |" in (tmp_path / "out" / "dimension_report.md").read_text(encoding="utf-8")
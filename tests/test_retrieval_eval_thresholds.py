@@ -8,7 +8,10 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from evaluation.retrieval_metrics import compute_retrieval_metrics
+from evaluation.retrieval_metrics import (
+    compute_retrieval_metrics,
+    compute_retrieval_metrics_multi_k,
+)
 
 
 def test_compute_retrieval_metrics_thresholds_unit():
@@ -24,6 +27,26 @@ def test_compute_retrieval_metrics_thresholds_unit():
     assert 0.0 <= m[f"ndcg@{k}"] <= 1.0
 
 
+def test_compute_retrieval_metrics_multi_k_matches_scalar():
+    retrieved_list = [
+        ["a", "b", "c", "d", "e"],
+        ["x", "c", "c"],
+        [],
+        ["g1", "g2", "n", "g3"],
+    ]
+    gold_list = [["c", "x"], ["c"], ["a"], ["g1", "g2", "g3", "g4"]]
+    ks = [1, 3, 5, 10]
+
+    batch = compute_retrieval_metrics_multi_k(retrieved_list, gold_list, ks)
+
+    assert len(batch) == len(retrieved_list)
+    for retrieved, gold, row in zip(retrieved_list, gold_list, batch):
+        for k in ks:
+            scalar = compute_retrieval_metrics(retrieved_ids=retrieved, gold_ids=gold, k=k)
+            for key, value in scalar.items():
+                assert row[key] == pytest.approx(value, abs=1e-12)
+
+
 def test_retrieval_eval_integration_thresholds(tmp_path: Path):
     """
     실제 Chroma DB/컬렉션이 준비되어 있을 때만 retrieval 평가를 수행하고,
@@ -0,0 +1,58 @@
+import json
+import random
+import sys
+from pathlib import Path
+from statistics import mean, pstdev
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from evaluation.retrieval_report import RunningStat, WorstSamples, write_retrieval_report
+
+
+def _rows(n: int, seed: int = 3) -> list[dict]:
+    rng = random.Random(seed)
+    # Few distinct values so ties are common.
+    return [
+        {"qid": f"q{i}", "query": "", "metrics": {"mrr@5": rng.choice([0.0, 0.25, 0.5, 1.0])}}
+        for i in range(n)
+    ]
+
+
+def test_running_stat_matches_statistics():
+    values = [random.Random(1).uniform(-5, 5) for _ in range(1000)]
+    stat = RunningStat()
+    for v in values:
+        stat.add(v)
+    assert stat.count == len(values)
+    assert stat.mean == pytest.approx(mean(values), abs=1e-12)
+    assert stat.std == pytest.approx(pstdev(values), abs=1e-12)
+
+
+def test_worst_samples_matches_stable_sort():
+    rows = _rows(500)
+    worst = WorstSamples(20, "mrr@5")
+    for row in rows:
+        worst.add(row)
+    expected = sorted(rows, key=lambda r: r["metrics"]["mrr@5"])[:20]
+    assert [r["qid"] for r in worst.rows()] == [r["qid"] for r in expected]
+
+
+def test_write_retrieval_report_streams_from_jsonl(tmp_path: Path):
+    rows = _rows(200)
+    per_sample_path = tmp_path / "per_sample.jsonl"
+    per_sample_path.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+
+    from_list = write_retrieval_report(
+        per_sample=rows, out_dir=tmp_path / "a", metric_keys=["mrr@5"], top_n_failures=5
+    )
+    from_path = write_retrieval_report(
+        per_sample_path=per_sample_path, out_dir=tmp_path / "b", metric_keys=["mrr@5"], top_n_failures=5
+    )
+
+    for key in ("report_csv", "report_md"):
+        assert Path(from_list[key]).read_text(encoding="utf-8") == Path(from_path[key]).read_text(encoding="utf-8")
+    assert "- samples: 200" in Path(from_path["report_md"]).read_text(encoding="utf-8")
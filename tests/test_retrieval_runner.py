@@ -0,0 +1,72 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config import Config
+
+
+def _per_sample(out_dir):
+    with (out_dir / "per_sample.jsonl").open(encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_batched_run_matches_serial_run(tmp_path, monkeypatch):
+    """병렬/배치 실행도 직렬 실행과 같은 순서, 같은 검색 결과와 지표를 내야 합니다."""
+    pytest.importorskip("chromadb")
+    pytest.importorskip("openai")
+    from benchmarks.fake_openai import FakeOpenAIConfig, start_fake_openai_server
+    from evaluation.retrieval_runner import run_retrieval_eval
+    from ingest.index import create_chroma_client, index_faq_data
+
+    monkeypatch.setattr(Config, "CHROMA_PERSIST_DIRECTORY", str(tmp_path / "chroma"))
+    faq = [{"id": i, "question": f"how do I fix error {i}", "answer": f"restart service {i}"} for i in range(30)]
+    eval_path = tmp_path / "eval.jsonl"
+    eval_path.write_text(
+        "".join(
+            json.dumps({"qid": f"q{i}", "query": f"fix error {i}", "gold_ids": [f"faq_{i}"], "tags": [f"t{i % 2}"]})
+            + "\n"
+            for i in range(0, 30, 3)
+        ),
+        encoding="utf-8",
+    )
+
+    server = start_fake_openai_server(FakeOpenAIConfig(embedding_dim=32))
+    try:
+        monkeypatch.setattr(Config, "OPENAI_API_KEY", "fake")
+        monkeypatch.setattr(Config, "OPENAI_BASE_URL", server.base_url)
+        collection = create_chroma_client().create_collection("faq__question", metadata={"hnsw:space": "cosine"})
+        index_faq_data(collection, faq, columns=["question"], batch_size=8)
+
+        kwargs = dict(eval_path=eval_path, top_k=5, threshold=0.0, collection_name="faq__question")
+        serial = run_retrieval_eval(out_dir=tmp_path / "serial", **kwargs)
+        batched = run_retrieval_eval(out_dir=tmp_path / "batched", workers=4, batch_size=3, **kwargs)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    expected = _per_sample(tmp_path / "serial")
+    got = _per_sample(tmp_path / "batched")
+    assert [r["qid"] for r in expected] == [f"q{i}" for i in range(0, 30, 3)]
+    assert [r["qid"] for r in got] == [r["qid"] for r in expected]
+    assert [r["retrieved_ids"] for r in got] == [r["retrieved_ids"] for r in expected]
+    assert [r["metrics"] for r in got] == [r["metrics"] for r in expected]
+    assert batched.metric_avgs == serial.metric_avgs
+    assert serial.metric_avgs["hit@5"] > 0.0
+
+
+def test_cli_refuses_top_k_with_ks(capsys):
+    from evaluation.cli import _build_parser
+
+    parser = _build_parser()
+    assert parser.parse_args(["retrieval-eval", "--eval", "e.jsonl", "--ks", "1,5"]).ks == "1,5"
+    assert parser.parse_args(["retrieval-eval", "--eval", "e.jsonl", "--top-k", "20"]).top_k == 20
+    # --ks sets the retrieval depth, so --top-k 20 would silently retrieve only 5.
+    with pytest.raises(SystemExit):
+        parser.parse_args(["retrieval-eval", "--eval", "e.jsonl", "--top-k", "20", "--ks", "1,5"])
+    assert "not allowed with argument" in capsys.readouterr().err
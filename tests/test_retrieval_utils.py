@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+np = pytest.importorskip("numpy")
+
+from retrieval.utils import (
+    cosine_similarity,
+    cosine_similarity_matrix,
+    fuse_scores,
+    normalize_rows,
+    threshold_mask,
+    top_k_indices,
+)
+
+
+def test_cosine_matrix_matches_scalar_and_handles_zero_rows():
+    rng = np.random.default_rng(0)
+    queries = rng.normal(size=(3, 16))
+    docs = rng.normal(size=(5, 16))
+    docs[2] = 0.0
+
+    scores = cosine_similarity_matrix(queries, docs)
+    assert scores.shape == (3, 5) and scores.dtype == np.float32
+    for i in range(3):
+        for j in range(5):
+            assert scores[i, j] == pytest.approx(cosine_similarity(queries[i], docs[j]), abs=1e-5)
+    assert np.all(scores[:, 2] == 0.0)
+
+    normalized = normalize_rows(docs)
+    assert np.allclose(np.linalg.norm(normalized[[0, 1, 3, 4]], axis=1), 1.0, atol=1e-6)
+    single = cosine_similarity_matrix(normalize_rows(queries[0]), normalized, normalized=True)
+    assert single.shape == (5,)
+    assert np.allclose(single, scores[0], atol=1e-6)
+
+
+def test_top_k_indices_matches_full_sort_with_stable_ties():
+    rng = np.random.default_rng(1)
+    scores = rng.integers(0, 5, size=(4, 50)).astype(np.float32)
+    for k in (1, 7, 50, 80):
+        got = top_k_indices(scores, k)
+        for row, idx in zip(scores, got):
+            expected = sorted(range(len(row)), key=lambda j: (-row[j], j))[: min(k, len(row))]
+            assert idx.tolist() == expected
+    assert top_k_indices(scores[0], 0).shape == (0,)
+
+
+def test_threshold_mask_broadcasts_one_row_per_threshold():
+    similarities = np.array([0.9, 0.7, 0.5, np.nan])
+    mask = threshold_mask(similarities[None, :], np.array([[0.0], [0.6], [0.95]]))
+    assert mask.tolist() == [
+        [True, True, True, False],
+        [True, True, False, False],
+        [False, False, False, False],
+    ]
+
+
+def test_fuse_scores_max_sum_and_rrf():
+    scores = np.array([[0.9, np.nan, 0.2], [0.1, 0.8, 0.3]])
+    assert fuse_scores(scores, "max").tolist() == pytest.approx([0.9, 0.8, 0.3])
+    assert fuse_scores(scores, "sum", weights=[2.0, 1.0]).tolist() == pytest.approx([1.9, 0.8, 0.7])
+    # Source 0 ranks doc0, doc2; source 1 ranks doc1, doc2, doc0.
+    expected = [1 / 61 + 1 / 63, 1 / 61, 1 / 62 + 1 / 62]
+    assert fuse_scores(scores, "rrf").tolist() == pytest.approx(expected)
+    with pytest.raises(ValueError):
+        fuse_scores(scores, "mean")
+
+
+def test_kernel_benchmarks_smoke():
+    from benchmarks.kernels import run_kernel_benchmarks
+
+    results = run_kernel_benchmarks(scale=0.01, repeat=1)
+    assert [r.name for r in results] == ["cosine", "top_k", "threshold", "fusion_max"]
+    assert all(r.baseline_ms > 0 and r.kernel_ms > 0 for r in results)
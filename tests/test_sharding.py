@@ -0,0 +1,139 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from retrieval.sharding import merge_shard_results, parse_shard_hosts, shard_of
+
+
+def test_shard_of_is_stable_and_balanced():
+    counts = [0, 0, 0, 0]
+    for faq_id in range(4000):
+        counts[shard_of(faq_id, 4)] += 1
+    assert all(900 < c < 1100 for c in counts)
+    # str(id) is hashed, so int and str ids of the same FAQ agree.
+    assert [shard_of(i, 4) for i in range(50)] == [shard_of(str(i), 4) for i in range(50)]
+    assert shard_of(123, 1) == 0
+
+
+def test_parse_shard_hosts():
+    assert parse_shard_hosts(" a:8001, 10.0.0.2:8002 ,") == [("a", 8001), ("10.0.0.2", 8002)]
+    assert parse_shard_hosts("") == []
+    with pytest.raises(ValueError):
+        parse_shard_hosts("localhost")
+
+
+def test_merge_shard_results_keeps_global_top_n():
+    shard_a = {"ids": [["a1", "a2", "a3"]], "distances": [[0.1, 0.4, 0.9]], "metadatas": [[{}, {}, {}]]}
+    shard_b = {"ids": [["b1", "b2"]], "distances": [[0.2, 0.4]], "metadatas": [[{}, {}]], "documents": None}
+
+    merged = merge_shard_results([shard_a, shard_b], n_results=4)
+
+    assert merged["ids"] == [["a1", "b1", "a2", "b2"]]
+    assert merged["distances"] == [[0.1, 0.2, 0.4, 0.4]]
+    # A field missing from any shard is dropped rather than misaligned.
+    assert set(merged) == {"ids", "distances", "metadatas"}
+
+
+def _index_random(tmp_path, num_shards, n=300, dim=16):
+    np = pytest.importorskip("numpy")
+    from ingest.index import create_chroma_client
+    from retrieval.sharding import shard_persist_directory
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(n, dim)).tolist()
+    single = create_chroma_client(str(tmp_path / "single")).create_collection(
+        "faq", metadata={"hnsw:space": "cosine"}
+    )
+    shards = [
+        create_chroma_client(shard_persist_directory(i, str(tmp_path / "sharded"))).create_collection(
+            "faq", metadata={"hnsw:space": "cosine"}
+        )
+        for i in range(num_shards)
+    ]
+
+    def add(collection, faq_ids):
+        collection.add(
+            ids=[f"faq_{i}" for i in faq_ids],
+            embeddings=[vectors[i] for i in faq_ids],
+            metadatas=[{"id": i} for i in faq_ids],
+        )
+
+    add(single, list(range(n)))
+    for shard, collection in enumerate(shards):
+        add(collection, [i for i in range(n) if shard_of(i, num_shards) == shard])
+    return single, rng.normal(size=(5, dim)).tolist()
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_sharded_search_matches_single_collection(tmp_path, processes):
+    pytest.importorskip("chromadb")
+    from retrieval.search import VectorSearch
+    from retrieval.sharding import ShardSet
+
+    single, queries = _index_random(tmp_path, num_shards=3)
+    shard_set = ShardSet.local(3, base=str(tmp_path / "sharded"), processes=processes)
+    try:
+        sharded = VectorSearch(collection_name="faq", shards=shard_set)
+        assert sharded.collection.count() == single.count()
+        for query in queries:
+            expected = single.query(query_embeddings=[query], n_results=10)
+            got = sharded.query_collection("faq", query, n_results=10)
+            assert [c["id"] for c in got] == expected["ids"][0]
+            assert [c["distance"] for c in got] == pytest.approx(expected["distances"][0], abs=1e-5)
+    finally:
+        shard_set.close()
+
+
+def test_index_faq_data_routes_entries_to_their_shard(tmp_path, monkeypatch):
+    pytest.importorskip("chromadb")
+    pytest.importorskip("openai")
+    from benchmarks.fake_openai import FakeOpenAIConfig, start_fake_openai_server
+    from config import Config
+    from ingest.index import create_chroma_client, index_faq_data
+
+    server = start_fake_openai_server(FakeOpenAIConfig(embedding_dim=16))
+    try:
+        monkeypatch.setattr(Config, "OPENAI_API_KEY", "fake")
+        monkeypatch.setattr(Config, "OPENAI_BASE_URL", server.base_url)
+        client = create_chroma_client(str(tmp_path))
+        shards = [client.create_collection(f"faq_{i}") for i in range(3)]
+        faq = [{"id": i, "question": f"q{i}", "answer": f"a{i}"} for i in range(40)]
+
+        assert index_faq_data(shards, faq, columns=["question"], batch_size=7) == 40
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    for shard, collection in enumerate(shards):
+        ids = [m["id"] for m in collection.get()["metadatas"]]
+        assert ids and all(shard_of(i, 3) == shard for i in ids)
+    assert sum(c.count() for c in shards) == 40
+
+
+def test_sharded_get_concatenates_shards_and_refuses_paging(tmp_path):
+    pytest.importorskip("chromadb")
+    from retrieval.sharding import ShardSet
+
+    single, _ = _index_random(tmp_path, num_shards=2, n=40)
+    shard_set = ShardSet.local(2, base=str(tmp_path / "sharded"))
+    try:
+        sharded = shard_set.collection("faq")
+        got = sharded.get(include=["metadatas"])
+        assert sorted(got["ids"]) == sorted(single.get()["ids"])
+        # Rows come back shard by shard.
+        shards = [shard_of(m["id"], 2) for m in got["metadatas"]]
+        assert shards == sorted(shards)
+        assert set(sharded.get(ids=["faq_3", "faq_7"])["ids"]) == {"faq_3", "faq_7"}
+
+        # Per-shard limit/offset would not page the logical collection.
+        with pytest.raises(ValueError, match="limit/offset"):
+            sharded.get(limit=10, offset=10)
+        with pytest.raises(ValueError, match="limit"):
+            sharded.get(limit=10)
+    finally:
+        shard_set.close()
@@ -0,0 +1,65 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config import Config
+
+
+def test_openai_client_is_shared_per_key_and_base_url(monkeypatch):
+    pytest.importorskip("openai")
+    from ingest import embed
+    from ingest.embed import get_openai_client
+
+    # Start from an empty cache; monkeypatch restores the process-wide one.
+    monkeypatch.setattr(embed, "_shared_clients", {})
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "key-a")
+    monkeypatch.setattr(Config, "OPENAI_BASE_URL", "http://127.0.0.1:9/v1")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        clients = list(pool.map(lambda _: get_openai_client(), range(32)))
+    first = clients[0]
+    assert all(c is first for c in clients)
+
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "key-b")
+    other_key = get_openai_client()
+    assert other_key is not first and other_key.api_key == "key-b"
+
+    monkeypatch.setattr(Config, "OPENAI_BASE_URL", "http://127.0.0.1:10/v1")
+    other_url = get_openai_client()
+    assert other_url is not other_key and str(other_url.base_url).startswith("http://127.0.0.1:10/")
+
+    # Switching back reuses the clients created before.
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "key-a")
+    monkeypatch.setattr(Config, "OPENAI_BASE_URL", "http://127.0.0.1:9/v1")
+    assert get_openai_client() is first
+
+
+def test_chroma_client_is_shared_per_path(tmp_path, monkeypatch):
+    pytest.importorskip("chromadb")
+    pytest.importorskip("openai")
+    from retrieval.rag import RAGPipeline
+    from retrieval.search import VectorSearch, get_chroma_client
+
+    monkeypatch.setattr(Config, "CHROMA_PERSIST_DIRECTORY", str(tmp_path / "a"))
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "fake")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        clients = list(pool.map(lambda _: get_chroma_client(), range(16)))
+    default = clients[0]
+    assert all(c is default for c in clients)
+    assert get_chroma_client(str(tmp_path / "a")) is default
+    assert get_chroma_client(str(tmp_path / "b")) is not default
+    assert get_chroma_client(str(tmp_path / "b")) is get_chroma_client(str(tmp_path / "b"))
+
+    # Engines built without explicit clients reuse the shared ones.
+    first = RAGPipeline(collection_name="faq")
+    second = RAGPipeline(collection_name="faq")
+    assert first.search.client is second.search.client is default
+    assert first.client is second.client
+    assert VectorSearch(collection_name="faq").client is default
@@ -0,0 +1,126 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config import Config
+
+
+def _indexed_client(path, size=120, dim=16):
+    np = pytest.importorskip("numpy")
+    from ingest.index import create_chroma_client
+
+    client = create_chroma_client(str(path))
+    collection = client.create_collection(
+        "faq__question", metadata={"hnsw:space": "cosine", "embedding_dimensions": dim}
+    )
+    vectors = np.random.default_rng(0).normal(size=(size, dim)).astype(np.float32)
+    collection.add(
+        ids=[f"faq_{i}" for i in range(size)],
+        embeddings=vectors,
+        documents=[f"question {i}" for i in range(size)],
+        metadatas=[{"id": i, "question": f"question {i}", "answer": f"a{i}"} for i in range(size)],
+    )
+    return client, vectors
+
+
+def _rows(collections):
+    rows = {}
+    for collection in collections:
+        got = collection.get(include=["embeddings", "documents", "metadatas"])
+        for i, e, d, m in zip(got["ids"], got["embeddings"], got["documents"], got["metadatas"]):
+            rows[i] = (list(e), d, m)
+    return rows
+
+
+def test_export_import_roundtrip_into_shards(tmp_path, monkeypatch):
+    pytest.importorskip("chromadb")
+    from ingest.index import create_chroma_client
+    from ingest.snapshot import export_snapshot, import_snapshot, read_manifest
+    from retrieval.sharding import shard_of
+
+    monkeypatch.setattr(Config, "CHROMA_PERSIST_DIRECTORY", str(tmp_path / "source"))
+    source, _ = _indexed_client(tmp_path / "source")
+    manifest = export_snapshot(tmp_path / "snap", ["faq__question"], clients=[source])
+
+    entry = manifest["collections"][0]
+    assert (entry["count"], entry["dimensions"], entry["projection"]) == (120, 16, False)
+    assert read_manifest(tmp_path / "snap")["embedding_model"] == Config.EMBEDDING_MODEL
+    assert not (tmp_path / "snap.tmp").exists()
+
+    # Restore into three shards; no embedding endpoint is reachable.
+    monkeypatch.setattr(Config, "OPENAI_BASE_URL", "http://127.0.0.1:9")
+    monkeypatch.setattr(Config, "CHROMA_PERSIST_DIRECTORY", str(tmp_path / "target"))
+    clients = [create_chroma_client(str(tmp_path / "target" / f"shard-{i}")) for i in range(3)]
+    assert import_snapshot(tmp_path / "snap", clients=clients, batch_size=7) == {"faq__question": 120}
+
+    restored = [c.get_collection("faq__question") for c in clients]
+    assert restored[0].metadata == {"hnsw:space": "cosine", "embedding_dimensions": 16}
+    for shard, collection in enumerate(restored):
+        assert all(shard_of(m["id"], 3) == shard for m in collection.get(include=["metadatas"])["metadatas"])
+    expected = _rows([source.get_collection("faq__question")])
+    got = _rows(restored)
+    assert got.keys() == expected.keys()
+    for i, (vector, document, metadata) in expected.items():
+        assert got[i][0] == pytest.approx(vector) and got[i][1:] == (document, metadata)
+
+    # Re-exporting replaces the snapshot; any other existing path is refused.
+    export_snapshot(tmp_path / "snap", ["faq__question"], clients=clients)
+    assert read_manifest(tmp_path / "snap")["collections"][0]["count"] == 120
+    (tmp_path / "other").mkdir()
+    with pytest.raises(FileExistsError):
+        export_snapshot(tmp_path / "other", ["faq__question"], clients=clients)
+
+
+def test_import_restores_projection_and_quantized_store(tmp_path, monkeypatch):
+    pytest.importorskip("chromadb")
+    from ingest.index import create_chroma_client
+    from ingest.reduce import PCAProjection, projection_path_for
+    from ingest.snapshot import export_snapshot, import_snapshot
+    from retrieval.quantized import quantized_store_path
+
+    monkeypatch.setattr(Config, "CHROMA_PERSIST_DIRECTORY", str(tmp_path / "source"))
+    source, vectors = _indexed_client(tmp_path / "source")
+    PCAProjection(4).fit(vectors).save(projection_path_for("faq__question"))
+    assert export_snapshot(tmp_path / "snap", ["faq__question"], clients=[source])["collections"][0]["projection"]
+
+    monkeypatch.setattr(Config, "CHROMA_PERSIST_DIRECTORY", str(tmp_path / "target"))
+    monkeypatch.setattr(Config, "SEARCH_ENGINE", "quantized")
+    stale = quantized_store_path("faq__question")
+    stale.mkdir(parents=True)
+    (stale / "manifest.json").write_text("{}", encoding="utf-8")
+
+    import_snapshot(tmp_path / "snap", clients=[create_chroma_client(str(tmp_path / "target"))])
+    assert projection_path_for("faq__question").read_bytes() == (
+        tmp_path / "source" / "projections" / "faq__question.npz"
+    ).read_bytes()
+    assert json.loads((stale / "manifest.json").read_text(encoding="utf-8"))["count"] == 120
+
+
+def test_import_refuses_mismatched_snapshots(tmp_path, monkeypatch):
+    pytest.importorskip("chromadb")
+    from ingest.index import create_chroma_client
+    from ingest.snapshot import export_snapshot, import_snapshot
+
+    monkeypatch.setattr(Config, "CHROMA_PERSIST_DIRECTORY", str(tmp_path / "source"))
+    source, _ = _indexed_client(tmp_path / "source", size=10)
+    export_snapshot(tmp_path / "snap", ["faq__question"], clients=[source])
+    target = [create_chroma_client(str(tmp_path / "target"))]
+
+    monkeypatch.setattr(Config, "EMBEDDING_MODEL", "text-embedding-3-large")
+    with pytest.raises(ValueError, match="text-embedding-3-large"):
+        import_snapshot(tmp_path / "snap", clients=target)
+    assert import_snapshot(tmp_path / "snap", clients=target, allow_model_mismatch=True) == {"faq__question": 10}
+    with pytest.raises(ValueError):
+        import_snapshot(tmp_path / "snap", clients=target, collection_names=["faq__answer"])
+
+    manifest_path = tmp_path / "snap" / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest_path.write_text(json.dumps({**manifest, "format_version": 99}), encoding="utf-8")
+    with pytest.raises(ValueError, match="format"):
+        import_snapshot(tmp_path / "snap", clients=target, allow_model_mismatch=True)
@@ -0,0 +1,134 @@
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config import Config
+
+
+def test_sweep_shared_merge_matches_per_threshold_merge():
+    pytest.importorskip("chromadb")
+    from evaluation.retrieval_dataset import RetrievalEvalSample
+    from evaluation.retrieval_metrics import compute_retrieval_metrics_multi_k, metric_keys_for
+    from evaluation.sweep import SweepConfig, _ConfigAccumulator, _score_configs_for_chunk
+    from retrieval.search import merge_candidates
+
+    rng = random.Random(0)
+    collections = ("c__question", "c__answer")
+    chunk = [RetrievalEvalSample(qid=str(i), query=f"q{i}", gold_ids=(str(i % 7),)) for i in range(12)]
+    candidates = {}
+    for s in chunk:
+        for name in collections:
+            cands = []
+            for faq in rng.sample(range(20), 8):
+                sim = round(rng.random(), 6)
+                cands.append(
+                    {"id": f"{name}_{faq}", "metadata": {"id": str(faq)}, "similarity": sim, "distance": 1 - sim}
+                )
+            candidates[(s.query, name)] = (sorted(cands, key=lambda c: -c["similarity"]), 1.0)
+    rewritten = {"none": [(s.query, 0.0) for s in chunk]}
+    ks = [1, 3, 5]
+    configs = [SweepConfig(collections, "none", t) for t in (0.0, 0.4, 0.7)]
+    keys = metric_keys_for(ks)
+    accumulators = {cfg: _ConfigAccumulator(keys) for cfg in configs}
+
+    _score_configs_for_chunk(chunk, configs, rewritten, candidates, 0.0, ks, accumulators)
+
+    for cfg in configs:
+        retrieved = [
+            [
+                str(r["id"])
+                for r in merge_candidates(
+                    [candidates[(s.query, n)][0] for n in collections], top_k=ks[-1], threshold=cfg.threshold
+                )
+            ]
+            for s in chunk
+        ]
+        expected = {key: 0.0 for key in keys}
+        for metrics in compute_retrieval_metrics_multi_k(retrieved, [s.gold_ids for s in chunk], ks):
+            for key in keys:
+                expected[key] += metrics[key]
+        for key in keys:
+            assert accumulators[cfg].metric_sums[key] == pytest.approx(expected[key])
+        assert accumulators[cfg].count == len(chunk)
+
+
+def test_run_retrieval_sweep_matches_direct_search(tmp_path, monkeypatch):
+    pytest.importorskip("chromadb")
+    pytest.importorskip("openai")
+    from benchmarks.fake_openai import FakeOpenAIConfig, start_fake_openai_server
+    from evaluation.retrieval_metrics import compute_retrieval_metrics_multi_k
+    from evaluation.sweep import run_retrieval_sweep
+    from ingest.embed import get_embedding
+    from ingest.index import create_chroma_client, index_faq_data
+    from retrieval.search import VectorSearch
+
+    monkeypatch.setattr(Config, "CHROMA_PERSIST_DIRECTORY", str(tmp_path / "chroma"))
+    monkeypatch.setattr(Config, "CHROMA_COLLECTION_NAME", "faq")
+    faq = [{"id": i, "question": f"how do I fix error {i}", "answer": f"restart service {i}"} for i in range(20)]
+    samples = [(f"fix error {i}", [str(i)]) for i in range(0, 20, 2)]
+    eval_path = tmp_path / "eval.jsonl"
+    eval_path.write_text(
+        "".join(json.dumps({"query": q, "gold_ids": gold}) + "\n" for q, gold in samples), encoding="utf-8"
+    )
+
+    server = start_fake_openai_server(FakeOpenAIConfig(embedding_dim=32))
+    try:
+        monkeypatch.setattr(Config, "OPENAI_API_KEY", "fake")
+        monkeypatch.setattr(Config, "OPENAI_BASE_URL", server.base_url)
+        client = create_chroma_client()
+        for column in ("question", "answer"):
+            collection = client.create_collection(f"faq__{column}", metadata={"hnsw:space": "cosine"})
+            index_faq_data(collection, faq, columns=[column], batch_size=10)
+
+        summary = run_retrieval_sweep(
+            eval_path=eval_path,
+            collection_sets=[["question"], ["question", "answer"]],
+            thresholds=(0.0, 0.3),
+            ks=(1, 3),
+            rewrite_modes=("none", "heuristic"),
+            out_dir=tmp_path / "sweep",
+            batch_size=4,
+        )
+
+        # Each grid cell equals a separate search_merged-style run of that configuration.
+        for row in summary.rows:
+            names = [f"faq__{s}" for s in row["collections"].split("+")]
+            vs = VectorSearch(collection_name=names, client=client)
+            retrieved = [
+                [
+                    str(r["id"])
+                    for r in vs.search_merged_by_embedding(
+                        get_embedding(vs.rewrite_query(q, mode=row["rewrite"])),
+                        top_k=row["k"],
+                        threshold=row["threshold"],
+                    )
+                ]
+                for q, _ in samples
+            ]
+            metrics = compute_retrieval_metrics_multi_k(retrieved, [g for _, g in samples], [row["k"]])
+            for name in ("hit", "recall", "mrr", "ndcg"):
+                expected = sum(m[f"{name}@{row['k']}"] for m in metrics) / len(samples)
+                assert row[name] == pytest.approx(expected), row
+
+        llm = run_retrieval_sweep(
+            eval_path=eval_path, collection_sets=[["question"]], rewrite_modes=("llm",), out_dir=tmp_path / "llm"
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert summary.num_samples == 10 and summary.num_configs == 2 * 2 * 2 * 2
+    assert len(summary.rows) == 16
+    # Neither "none" nor "heuristic" calls the API; "llm" rewrites every sample.
+    assert summary.cost["rewrite_calls"] == 0
+    assert llm.cost["rewrite_calls"] == 10
+    assert summary.cost["embedding_calls"] == 3
+    assert summary.cost["collection_queries"] < summary.cost["collection_queries_without_sharing"]
+    assert {p.name for p in (tmp_path / "sweep").iterdir()} == {"sweep.csv", "sweep.md", "sweep.json"}
@@ -0,0 +1,49 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+pytest.importorskip("numpy")
+
+from data.synthetic import SyntheticCorpusConfig, generate_synthetic_dataset
+from evaluation.retrieval_dataset import load_retrieval_eval_jsonl
+
+
+def _generate(tmp_path: Path, name: str, **overrides) -> tuple[list[dict], Path]:
+    config = SyntheticCorpusConfig(num_entries=2000, eval_queries=100, seed=7, **overrides)
+    corpus_path = tmp_path / name / "faq.json"
+    eval_path = tmp_path / name / "eval.jsonl"
+    generate_synthetic_dataset(config, corpus_path, eval_path)
+    return json.loads(corpus_path.read_text(encoding="utf-8")), eval_path
+
+
+def test_synthetic_corpus_schema_and_determinism(tmp_path):
+    corpus, eval_path = _generate(tmp_path, "a")
+    again, eval_again = _generate(tmp_path, "b")
+
+    assert corpus == again
+    assert eval_path.read_bytes() == eval_again.read_bytes()
+    assert [e["id"] for e in corpus] == list(range(2000))
+    for e in corpus[:50]:
+        assert set(e) == {"id", "question", "answer", "text"}
+        assert e["text"] == f"Q: {e['question']}\nA: {e['answer']}"
+        assert len(e["answer"]) > len(e["question"]) > 0
+
+
+def test_synthetic_eval_gold_ids_cover_near_duplicate_clusters(tmp_path):
+    corpus, eval_path = _generate(tmp_path, "c", near_duplicate_rate=0.3)
+    samples = load_retrieval_eval_jsonl(eval_path)
+
+    assert len(samples) == 100
+    assert len({s.qid for s in samples}) == 100
+    ids = {f"faq_{e['id']}" for e in corpus}
+    for s in samples:
+        assert s.query
+        assert set(s.gold_ids) <= ids
+        assert ("near_duplicate" in s.tags) == (len(s.gold_ids) > 1)
+    assert any("near_duplicate" in s.tags for s in samples)
@@ -0,0 +1,103 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config import Config
+from observability import tracing
+
+
+@pytest.fixture(autouse=True)
+def _restore_tracing(monkeypatch):
+    # configure_tracing() sets module globals; monkeypatch puts them back afterwards.
+    monkeypatch.setattr(tracing, "_enabled", tracing._enabled)
+    monkeypatch.setattr(tracing, "_export_path", tracing._export_path)
+
+
+@pytest.fixture
+def rag(tmp_path, monkeypatch):
+    """RAGPipeline over a small Chroma collection, backed by the fake OpenAI server."""
+    pytest.importorskip("chromadb")
+    pytest.importorskip("openai")
+    from benchmarks.fake_openai import FakeOpenAIConfig, start_fake_openai_server
+    from ingest.index import create_chroma_client, index_faq_data
+    from retrieval.rag import RAGPipeline
+    from retrieval.search import VectorSearch
+
+    server = start_fake_openai_server(FakeOpenAIConfig(embedding_dim=16, chat_response="ok"))
+    try:
+        monkeypatch.setattr(Config, "OPENAI_API_KEY", "fake")
+        monkeypatch.setattr(Config, "OPENAI_BASE_URL", server.base_url)
+        client = create_chroma_client(str(tmp_path / "chroma"))
+        collection = client.create_collection("faq__question", metadata={"hnsw:space": "cosine"})
+        faq = [{"id": i, "question": f"how to reset device {i}", "answer": f"hold button {i}"} for i in range(10)]
+        index_faq_data(collection, faq, columns=["question"], batch_size=10)
+        yield RAGPipeline(search=VectorSearch(collection_name="faq__question", client=client))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_disabled_tracing_records_nothing(rag, tmp_path):
+    tracing.configure_tracing(False, tmp_path / "traces.jsonl")
+
+    with tracing.start_trace("request") as trace:
+        assert trace is None
+        assert tracing.span("stage") is tracing.span("other")
+    result = rag.generate_answer("reset device 1", threshold=-1.0)
+
+    assert result["metadata"]["num_retrieved"] > 0
+    assert "timings_ms" not in result["metadata"] and "trace_id" not in result["metadata"]
+    assert not (tmp_path / "traces.jsonl").exists()
+
+
+def test_enabled_tracing_times_each_stage(rag, tmp_path):
+    export = tmp_path / "traces.jsonl"
+    tracing.configure_tracing(True, export)
+
+    result = rag.generate_answer("reset device 2", threshold=-1.0)
+
+    timings = result["metadata"]["timings_ms"]
+    assert {"rewrite", "embed", "chroma.query:faq__question", "llm.generate", "total"} <= set(timings)
+    assert all(v >= 0.0 for v in timings.values())
+    assert timings["total"] >= timings["llm.generate"]
+
+    # search_merged() joined the answer's trace: one line, not two.
+    lines = export.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    exported = json.loads(lines[0])
+    assert exported["trace_id"] == result["metadata"]["trace_id"]
+    assert exported["name"] == "rag.generate_answer"
+    assert [s["name"] for s in exported["spans"]][-1] == "llm.generate"
+
+
+def test_record_trace_exports_once_and_only_when_enabled(tmp_path):
+    export = tmp_path / "traces.jsonl"
+
+    tracing.configure_tracing(False, export)
+    with tracing.record_trace("tool") as trace:
+        with tracing.span("stage", n=1):
+            pass
+    assert [s.name for s in trace.spans] == ["stage"] and trace.spans[0].attrs == {"n": 1}
+    assert not export.exists()
+
+    tracing.configure_tracing(True, export)
+    with tracing.record_trace("outer") as outer:
+        # A nested entry point joins the open trace instead of exporting its own.
+        with tracing.record_trace("inner") as inner, tracing.span("stage"):
+            assert inner is outer
+        with pytest.raises(RuntimeError), tracing.span("failing"):
+            raise RuntimeError("boom")
+    assert tracing.current_trace() is None
+
+    lines = [json.loads(line) for line in export.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["name"] == "outer"
+    assert [s["name"] for s in lines[0]["spans"]] == ["stage", "failing"]
+    assert lines[0]["spans"][1]["attrs"]["error"] == "RuntimeError('boom')"
+    assert set(lines[0]["timings_ms"]) == {"stage", "failing", "total"}
@@ -0,0 +1,116 @@
+import json
+import sys
+import urllib.error
+import urllib.request
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from config import Config
+from observability import metrics
+from retrieval.warmup import Readiness, warm_up
+
+
+def _search_over_random_collection(tmp_path, dim=16):
+    pytest.importorskip("chromadb")
+    np = pytest.importorskip("numpy")
+    from ingest.index import create_chroma_client
+    from retrieval.search import VectorSearch
+
+    client = create_chroma_client(str(tmp_path))
+    collection = client.create_collection("faq")
+    vectors = np.random.default_rng(0).normal(size=(20, dim)).tolist()
+    collection.add(
+        ids=[f"faq_{i}" for i in range(20)],
+        embeddings=vectors,
+        documents=[f"q{i}" for i in range(20)],
+        metadatas=[{"id": i, "answer": f"a{i}"} for i in range(20)],
+    )
+    return VectorSearch(collection_name="faq", client=client)
+
+
+def test_warm_up_without_api_key_is_degraded_but_ready(tmp_path, monkeypatch):
+    search = _search_over_random_collection(tmp_path)
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", None)
+    readiness = Readiness()
+    assert readiness.state == "starting" and not readiness.ready
+
+    warm_up(search, num_queries=2, readiness=readiness)
+
+    assert readiness.state == "degraded" and readiness.ready
+    steps = {s.name: s for s in readiness.steps}
+    assert steps["indexes"].ok and "20 vectors" in steps["indexes"].detail
+    assert not steps["openai_client"].ok
+    # The probe vector still ran the query + merge path.
+    assert "probe vector" in steps["warm_queries"].detail
+
+
+def test_warm_up_probe_fallback_with_pca_projection(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    from ingest.reduce import PCAProjection
+
+    search = _search_over_random_collection(tmp_path, dim=8)
+    # The collection stores 8-d vectors reduced from 16-d model embeddings.
+    search.projections = {"faq": PCAProjection(8).fit(np.random.default_rng(1).normal(size=(40, 16)))}
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", None)
+
+    readiness = warm_up(search, num_queries=2, readiness=Readiness())
+
+    assert readiness.state == "degraded"
+    # The stored probe is queried as is, not projected a second time.
+    assert {s.name: s for s in readiness.steps}["warm_queries"].detail == "2 queries (probe vector, no embedding API)"
+
+
+def test_warm_up_with_api_is_ready(tmp_path, monkeypatch):
+    pytest.importorskip("openai")
+    from benchmarks.fake_openai import FakeOpenAIConfig, start_fake_openai_server
+    from retrieval.rag import RAGPipeline
+
+    search = _search_over_random_collection(tmp_path)
+    server = start_fake_openai_server(FakeOpenAIConfig(embedding_dim=16))
+    try:
+        monkeypatch.setattr(Config, "OPENAI_API_KEY", "fake")
+        monkeypatch.setattr(Config, "OPENAI_BASE_URL", server.base_url)
+        readiness = warm_up(search, RAGPipeline(search=search), num_queries=3, readiness=Readiness())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert readiness.state == "ready", readiness.to_dict()
+    assert [s.name for s in readiness.steps] == ["indexes", "openai_client", "warm_queries"]
+
+
+def test_unreadable_index_fails_readiness():
+    class Broken:
+        def count(self):
+            raise RuntimeError("no such collection")
+
+    readiness = warm_up(SimpleNamespace(collections={"faq": Broken()}), readiness=Readiness())
+
+    assert readiness.state == "failed" and not readiness.ready
+    assert readiness.steps[0].detail == "RuntimeError: no such collection"
+
+
+def test_metrics_server_ready_route(tmp_path):
+    readiness = Readiness()
+    metrics.set_readiness_check(readiness.to_dict)
+    server = metrics.start_metrics_server(0, addr="127.0.0.1")
+    url = f"http://127.0.0.1:{server.server_address[1]}/ready"
+    try:
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(url, timeout=5)
+        assert e.value.code == 503
+
+        readiness._finish("ready", 0.1)
+        with urllib.request.urlopen(url, timeout=5) as resp:
+            assert resp.status == 200
+            assert json.loads(resp.read())["state"] == "ready"
+    finally:
+        metrics.set_readiness_check(None)
+        server.shutdown()
+        server.server_close()